@@ -3,6 +3,10 @@
 eng-buddy Calendar Poller
 Fetches weekly events directly from the Google Calendar API and writes them
 to inbox.db without using Claude in the background.
+
+The first run of a window lists it with one ranged ``events.list``; later runs
+pass the returned ``syncToken`` and get only the events that changed. Cards
+are keyed on the event id and updated in place, so card ids stay stable.
 """
 
 from __future__ import annotations
@@ -10,12 +14,12 @@ from __future__ import annotations
 import json
 import sqlite3
 import time
-import urllib.parse
-import urllib.request
+import urllib.error
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
-from poller_runtime import single_instance
+from poller_http import shared_client
+from poller_runtime import current_run, ensure_inbox_schema, single_instance, track_run
 
 BASE_DIR = Path.home() / ".claude" / "eng-buddy"
 DB_PATH = BASE_DIR / "inbox.db"
@@ -24,6 +28,13 @@ TOKENS_FILE = Path.home() / ".config" / "google-calendar-mcp" / "tokens.json"
 GOOGLE_OAUTH_FILE = Path.home() / ".claude" / "google-oauth-credentials.json"
 TOKEN_URL = "https://oauth2.googleapis.com/token"
 CALENDAR_API = "https://www.googleapis.com/calendar/v3"
+EVENTS_PAGE_SIZE = 250
+
+_http = shared_client()
+
+
+class SyncTokenExpired(Exception):
+    """Google answered 410 Gone: the stored syncToken must be replaced by a full sync."""
 
 
 def load_state():
@@ -56,17 +67,20 @@ def _load_calendar_account() -> tuple[dict, dict]:
 
 
 def _refresh_access_token(account: dict, client: dict) -> dict:
-    payload = urllib.parse.urlencode(
-        {
+    run = current_run("calendar")
+    refreshed = _http.request(
+        "POST",
+        TOKEN_URL,
+        data={
             "client_id": client["client_id"],
             "client_secret": client["client_secret"],
             "refresh_token": account["refresh_token"],
             "grant_type": "refresh_token",
-        }
-    ).encode("utf-8")
-    request = urllib.request.Request(TOKEN_URL, data=payload, method="POST")
-    with urllib.request.urlopen(request, timeout=15) as response:
-        refreshed = json.loads(response.read())
+        },
+        timeout=15,
+        before_send=lambda: run.api_call("oauth.token"),
+        on_backoff=run.rate_limited,
+    ).json()
 
     account["access_token"] = refreshed["access_token"]
     account["expiry_date"] = int(time.time() * 1000) + refreshed.get("expires_in", 3600) * 1000
@@ -76,23 +90,28 @@ def _refresh_access_token(account: dict, client: dict) -> dict:
     return account
 
 
-def _get_access_token() -> str:
+def _get_access_token(force_refresh: bool = False) -> str:
     account, client = _load_calendar_account()
     expiry = int(account.get("expiry_date") or 0)
-    if int(time.time() * 1000) >= expiry - 60_000:
+    if force_refresh or int(time.time() * 1000) >= expiry - 60_000:
         account = _refresh_access_token(account, client)
     return account["access_token"]
 
 
 def _calendar_get(path: str, params: dict[str, str]) -> dict:
-    token = _get_access_token()
-    query = urllib.parse.urlencode(params)
-    request = urllib.request.Request(
-        f"{CALENDAR_API}{path}?{query}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    with urllib.request.urlopen(request, timeout=20) as response:
-        return json.loads(response.read())
+    # events.list honours If-None-Match, so an unchanged window or sync
+    # token comes back as a bodiless 304 answered from the client's cache.
+    run = current_run("calendar")
+    return _http.request(
+        "GET",
+        f"{CALENDAR_API}{path}",
+        params=params,
+        headers={"Authorization": f"Bearer {_get_access_token()}"},
+        reauth=lambda: {"Authorization": f"Bearer {_get_access_token(force_refresh=True)}"},
+        timeout=20,
+        before_send=lambda: run.api_call(path),
+        on_backoff=run.rate_limited,
+    ).json()
 
 
 def _extract_join_link(event: dict) -> str:
@@ -141,46 +160,82 @@ def _build_single_day_prompt(_target_date):
     return ""
 
 
-def _fetch_events_for_date(target_date):
-    start_dt = datetime(target_date.year, target_date.month, target_date.day, tzinfo=timezone.utc)
-    end_dt = start_dt + timedelta(days=1)
-    payload = _calendar_get(
-        "/calendars/primary/events",
-        {
-            "timeMin": start_dt.isoformat().replace("+00:00", "Z"),
-            "timeMax": end_dt.isoformat().replace("+00:00", "Z"),
-            "singleEvents": "true",
-            "orderBy": "startTime",
-            "maxResults": "250",
-        },
-    )
+def _window_bounds(start_date, end_date):
+    start_dt = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
+    end_dt = datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return start_dt, end_dt
+
+
+def _isoformat_z(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _normalize_event(item):
+    start = (item.get("start") or {}).get("dateTime") or (item.get("start") or {}).get("date") or ""
+    end = (item.get("end") or {}).get("dateTime") or (item.get("end") or {}).get("date") or ""
+    description = str(item.get("description") or "").strip()
+    attendees = []
+    for attendee in item.get("attendees") or []:
+        email = str(attendee.get("email") or "").strip()
+        if email:
+            attendees.append(email)
+
+    event = {
+        "id": item.get("id", ""),
+        "summary": item.get("summary", ""),
+        "start": start,
+        "end": end,
+        "location": item.get("location", ""),
+        "hangout_link": _extract_join_link(item),
+        "attendees": attendees,
+        "description": description[:200],
+    }
+    event["prep_needed"] = _event_prep_needed(event)
+    event["priority"] = _event_priority(event)
+    event["context_notes"] = _event_context_notes(event)
+    return event
+
+
+def _parse_event_time(raw: str) -> datetime | None:
+    raw = str(raw or "").strip()
+    if not raw:
+        return None
+    try:
+        if "T" in raw:
+            parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        return datetime.strptime(raw, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _event_in_window(event, start_dt, end_dt) -> bool:
+    """Whether the event overlaps ``[start_dt, end_dt)``, as timeMin/timeMax would."""
+    starts = _parse_event_time(event.get("start"))
+    ends = _parse_event_time(event.get("end")) or starts
+    if starts is None:
+        return False
+    return starts < end_dt and ends > start_dt
 
-    events = []
-    for item in payload.get("items", []):
-        start = (item.get("start") or {}).get("dateTime") or (item.get("start") or {}).get("date") or ""
-        end = (item.get("end") or {}).get("dateTime") or (item.get("end") or {}).get("date") or ""
-        description = str(item.get("description") or "").strip()
-        attendees = []
-        for attendee in item.get("attendees") or []:
-            email = str(attendee.get("email") or "").strip()
-            if email:
-                attendees.append(email)
-
-        event = {
-            "id": item.get("id", ""),
-            "summary": item.get("summary", ""),
-            "start": start,
-            "end": end,
-            "location": item.get("location", ""),
-            "hangout_link": _extract_join_link(item),
-            "attendees": attendees,
-            "description": description[:200],
-        }
-        event["prep_needed"] = _event_prep_needed(event)
-        event["priority"] = _event_priority(event)
-        event["context_notes"] = _event_context_notes(event)
-        events.append(event)
-    return events
+
+def _list_events(params):
+    """Every page of ``events.list`` for ``params``; returns ``(items, next_sync_token)``."""
+    items = []
+    page_token = ""
+    while True:
+        page_params = dict(params)
+        if page_token:
+            page_params["pageToken"] = page_token
+        try:
+            payload = _calendar_get("/calendars/primary/events", page_params)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 410 and "syncToken" in params:
+                raise SyncTokenExpired(params["syncToken"]) from exc
+            raise
+        items.extend(payload.get("items", []))
+        page_token = payload.get("nextPageToken", "")
+        if not page_token:
+            return items, payload.get("nextSyncToken", "")
 
 
 def _dedupe_events(events):
@@ -214,66 +269,184 @@ def format_event_summary(event):
     return title
 
 
-def fetch_events():
-    start_date, end_date = compute_fetch_window()
-    current_date = start_date
-    events = []
-    while current_date <= end_date:
+def fetch_events(state=None, today=None):
+    """Events in the current window: ``(events, removed_ids, mode)``.
+
+    ``mode`` is ``"full"`` when the window was listed with one ranged call
+    (first run, new window, or an expired syncToken) and ``events`` is then
+    the complete set. In ``"incremental"`` mode only events changed since
+    the stored syncToken come back: updated events in the window, and the
+    ids of events that were cancelled or moved out of it. ``state`` gets the
+    new ``sync_token`` and ``window``.
+    """
+    state = state if state is not None else {}
+    start_date, end_date = compute_fetch_window(today)
+    start_dt, end_dt = _window_bounds(start_date, end_date)
+    window = [start_date.isoformat(), end_date.isoformat()]
+    sync_token = state.get("sync_token") if state.get("window") == window else ""
+
+    items = None
+    mode = "incremental"
+    if sync_token:
         try:
-            events.extend(_fetch_events_for_date(current_date))
-        except Exception as exc:
-            print(
-                f"[{datetime.now().strftime('%H:%M')}] Calendar fetch failed for "
-                f"{current_date.isoformat()}: {exc}"
+            items, next_token = _list_events(
+                {"syncToken": sync_token, "singleEvents": "true", "maxResults": str(EVENTS_PAGE_SIZE)}
             )
-        current_date += timedelta(days=1)
+        except SyncTokenExpired:
+            print(f"[{datetime.now().strftime('%H:%M')}] Calendar sync token expired — full sync")
+    if items is None:
+        mode = "full"
+        items, next_token = _list_events(
+            {
+                "timeMin": _isoformat_z(start_dt),
+                "timeMax": _isoformat_z(end_dt),
+                "singleEvents": "true",
+                "maxResults": str(EVENTS_PAGE_SIZE),
+            }
+        )
+
+    events = []
+    removed_ids = []
+    for item in items:
+        event = _normalize_event(item)
+        if item.get("status") == "cancelled" or not _event_in_window(event, start_dt, end_dt):
+            if event["id"]:
+                removed_ids.append(event["id"])
+            continue
+        events.append(event)
+    events.sort(key=lambda event: _parse_event_time(event["start"]) or start_dt)
 
-    return _dedupe_events(events)
+    state["sync_token"] = next_token
+    state["window"] = window
+    return _dedupe_events(events), removed_ids, mode
 
 
 def enrich_events(events):
     return events
 
 
-def write_to_db(events):
+CARD_COLUMNS = ("timestamp", "summary", "classification", "proposed_actions", "section", "context_notes")
+
+
+def _card_row(event):
+    """The card columns a calendar event maps to, in CARD_COLUMNS order."""
+    section = "needs-action" if event.get("prep_needed") else "no-action"
+    proposed = json.dumps(
+        [
+            {
+                "type": "calendar_event",
+                "id": event.get("id", ""),
+                "summary": event.get("summary", ""),
+                "start": event.get("start", ""),
+                "end": event.get("end", ""),
+                "hangout_link": event.get("hangout_link", ""),
+                "attendees": event.get("attendees", []),
+            }
+        ]
+    )
+    return (
+        event.get("start") or datetime.now(timezone.utc).isoformat(),
+        format_event_summary(event),
+        event.get("priority", "normal"),
+        proposed,
+        section,
+        event.get("context_notes", ""),
+    )
+
+
+def _unique_summary(conn, summary, event_id, card_id=None, current=None):
+    """``summary``, or a variant no other calendar card holds.
+
+    Cards are unique on ``(source, summary)``, so two events with the same
+    start and title would otherwise collide. The loser gets the tail of its
+    event id appended, the way gmail cards get theirs. A card keeps the
+    variant it already has (``current``) so later syncs leave it alone.
+    """
+
+    def taken(candidate):
+        return conn.execute(
+            "SELECT 1 FROM cards WHERE source = 'calendar' AND summary = ? AND id IS NOT ?",
+            (candidate, card_id),
+        ).fetchone()
+
+    if current and current.startswith(f"{summary} [") and not taken(current):
+        return current
+    if not taken(summary):
+        return summary
+    base = f"{summary} [{event_id[-6:]}]" if event_id else f"{summary} [duplicate]"
+    candidate, counter = base, 2
+    while taken(candidate):
+        candidate = f"{base} #{counter}"
+        counter += 1
+    return candidate
+
+
+def write_to_db(events, removed_ids=(), full=True):
+    """Diff ``events`` against the calendar cards and touch only what changed.
+
+    Cards are matched on the event id (``message_id``). New events are
+    inserted, changed ones updated in place (status and other user state
+    survive), and cards for ``removed_ids`` deleted. With ``full`` the events
+    are the whole window, so cards for any event not among them go too.
+    Returns counts of ``inserted``, ``updated``, ``deleted`` and ``unchanged``,
+    each the number of rows actually written.
+    """
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
     if not DB_PATH.exists():
-        return
+        return counts
 
+    summary_index = CARD_COLUMNS.index("summary")
     conn = sqlite3.connect(DB_PATH)
     try:
-        conn.execute("DELETE FROM cards WHERE source = 'calendar'")
-        for event in events:
-            event_start = event.get("start") or datetime.now(timezone.utc).isoformat()
-            summary = format_event_summary(event)
-            section = "needs-action" if event.get("prep_needed") else "no-action"
-            proposed = json.dumps(
-                [
-                    {
-                        "type": "calendar_event",
-                        "id": event.get("id", ""),
-                        "summary": event.get("summary", ""),
-                        "start": event.get("start", ""),
-                        "end": event.get("end", ""),
-                        "hangout_link": event.get("hangout_link", ""),
-                        "attendees": event.get("attendees", []),
-                    }
-                ]
+        existing = {
+            row[0]: (row[1], tuple(row[2:]))
+            for row in conn.execute(
+                f"""SELECT message_id, id, {', '.join(CARD_COLUMNS)} FROM cards
+                    WHERE source = 'calendar' AND message_id IS NOT NULL"""
             )
-            conn.execute(
-                """INSERT OR IGNORE INTO cards
-                   (source, timestamp, summary, classification, status,
-                    proposed_actions, execution_status, section, context_notes)
-                   VALUES ('calendar', ?, ?, ?, 'pending', ?, 'not_run', ?, ?)""",
-                (
-                    event_start,
-                    summary,
-                    event.get("priority", "normal"),
-                    proposed,
-                    section,
-                    event.get("context_notes", ""),
-                ),
-            )
-        conn.commit()
+        }
+        stale = set(removed_ids)
+        if full:
+            stale |= set(existing) - {event.get("id", "") for event in events}
+        deletes = [(existing[event_id][0],) for event_id in stale if event_id in existing]
+
+        with conn:
+            if full:
+                # Cards from before event ids were recorded cannot be matched.
+                conn.execute("DELETE FROM cards WHERE source = 'calendar' AND message_id IS NULL")
+            counts["deleted"] = sum(conn.execute("DELETE FROM cards WHERE id = ?", row).rowcount for row in deletes)
+            # Rows go one at a time so each summary is checked against what is
+            # already written, including earlier events from this batch.
+            for event in events:
+                event_id = event.get("id", "")
+                current = existing.get(event_id)
+                if current is not None and event_id in stale:
+                    continue
+                row = list(_card_row(event))
+                if current is None:
+                    row[summary_index] = _unique_summary(conn, row[summary_index], event_id)
+                else:
+                    row[summary_index] = _unique_summary(
+                        conn, row[summary_index], event_id, current[0], current[1][summary_index]
+                    )
+                row = tuple(row)
+                if current is None:
+                    cursor = conn.execute(
+                        f"""INSERT OR IGNORE INTO cards
+                           (source, {', '.join(CARD_COLUMNS)}, message_id, status, execution_status)
+                           VALUES ('calendar', {', '.join('?' for _ in CARD_COLUMNS)}, ?, 'pending', 'not_run')""",
+                        row + (event_id or None,),
+                    )
+                    counts["inserted"] += cursor.rowcount
+                elif current[1] != row:
+                    cursor = conn.execute(
+                        f"UPDATE OR IGNORE cards SET {', '.join(f'{col} = ?' for col in CARD_COLUMNS)} WHERE id = ?",
+                        row + (current[0],),
+                    )
+                    counts["updated"] += cursor.rowcount
+                else:
+                    counts["unchanged"] += 1
+        return counts
     finally:
         conn.close()
 
@@ -289,17 +462,31 @@ def main():
                 print(f"[{now.strftime('%H:%M')}] Already fetched this slot, skipping")
                 return
 
-            print(f"[{now.strftime('%H:%M')}] Fetching calendar events...")
-            events = fetch_events()
-
-            if events:
-                write_to_db(events)
-                print(f"[{now.strftime('%H:%M')}] Wrote {len(events)} calendar cards to inbox.db")
-            else:
-                print(f"[{now.strftime('%H:%M')}] No events found in the current weekly horizon")
-
-            state["last_fetch"] = current_slot
-            save_state(state)
+            with track_run("calendar", DB_PATH) as run:
+                print(f"[{now.strftime('%H:%M')}] Fetching calendar events...")
+                try:
+                    with run.phase("fetch"):
+                        events, removed_ids, mode = fetch_events(state)
+                except (urllib.error.URLError, OSError, ValueError) as exc:
+                    # Nothing is written on a failed fetch; a full sync must not
+                    # delete cards because the listing came back empty.
+                    print(f"[{now.strftime('%H:%M')}] Calendar fetch failed: {exc}")
+                    run.fail(exc)
+                    return
+
+                ensure_inbox_schema(DB_PATH)
+                with run.phase("db_write"):
+                    counts = write_to_db(events, removed_ids, full=mode == "full")
+                written = counts["inserted"] + counts["updated"] + counts["deleted"]
+                run.count(fetched=len(events), written=written, skipped=counts["unchanged"])
+                print(
+                    f"[{now.strftime('%H:%M')}] Calendar {mode} sync: {len(events)} event(s) — "
+                    f"{counts['inserted']} new, {counts['updated']} updated, "
+                    f"{counts['deleted']} removed, {counts['unchanged']} unchanged"
+                )
+
+                state["last_fetch"] = current_slot
+                save_state(state)
     except RuntimeError as exc:
         print(f"[{datetime.now().strftime('%H:%M')}] {exc}")
 
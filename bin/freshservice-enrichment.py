@@ -86,12 +86,20 @@ def write_health(status: str, synced_count: int, errors: int = 0):
     )
 
 
+_poller_module = None
+
+
 def _load_freshservice_poller():
-    spec = importlib.util.spec_from_file_location("freshservice_poller", POLLER_PATH)
-    module = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(module)
-    return module
+    # Loaded once per process so a resident supervisor keeps the poller's
+    # rate limiter and connection state between runs.
+    global _poller_module
+    if _poller_module is None:
+        spec = importlib.util.spec_from_file_location("freshservice_poller", POLLER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        assert spec and spec.loader
+        spec.loader.exec_module(module)
+        _poller_module = module
+    return _poller_module
 
 
 def main():
@@ -5,17 +5,32 @@ Fetches tickets from two Freshservice views via the REST API:
   1. "Assigned To Kioja Unresolved" — agent_id + status Open/Pending
   2. "[IT-Systems] Open System Tickets" — workspace 2, group Global IT/Systems, status Open
 Writes/updates cards in inbox.db; removes stale cards no longer in either view.
+
+Between full reconciles only tickets updated since the stored watermark are
+fetched (``updated_since``); pages are fetched concurrently under one shared
+rate limit, and a card is only written when its content hash changed.
 """
+import hashlib
 import json
 import os
 import sqlite3
+import threading
+import time
 import urllib.error
-import urllib.parse
-import urllib.request
 from base64 import b64encode
 from datetime import datetime, timezone
 from pathlib import Path
-from poller_runtime import credential, single_instance
+from poller_http import shared_client
+from poller_runtime import (
+    ContextThreadPoolExecutor,
+    TokenBucket,
+    credential,
+    current_run,
+    ensure_inbox_schema,
+    notify_dashboard,
+    single_instance,
+    track_run,
+)
 
 BASE_DIR = Path.home() / ".claude" / "eng-buddy"
 STATE_FILE = BASE_DIR / "freshservice-ingestor-state.json"
@@ -29,57 +44,126 @@ API_KEY = os.environ.get("FRESHSERVICE_API_KEY") or credential("FRESHSERVICE_API
 AGENT_ID = int(os.environ.get("ENG_BUDDY_FRESHSERVICE_AGENT_ID", "15004391041"))
 GROUP_ID = int(os.environ.get("ENG_BUDDY_FRESHSERVICE_GROUP_ID", "15000745688"))
 WORKSPACE_ID = int(os.environ.get("ENG_BUDDY_FRESHSERVICE_WORKSPACE_ID", "2"))
-
-DASHBOARD_INVALIDATE_URL = os.environ.get(
-    "ENG_BUDDY_DASHBOARD_INVALIDATE_URL",
-    "http://127.0.0.1:7777/api/cache-invalidate",
-)
+FRESHSERVICE_BASE = f"https://{FRESHSERVICE_DOMAIN}"
+
+# Pages are fetched by a small pool under one account-wide budget; a 429
+# parks every worker for the server's Retry-After.
+PAGE_WORKERS = 4
+FRESHSERVICE_REQUESTS_PER_MINUTE = 100
+FRESHSERVICE_BURST = 10
+FILTER_PAGE_SIZE = 30
+LIST_PAGE_SIZE = 100
+# Deltas cannot see deleted tickets, so the views are re-listed this often.
+FULL_SYNC_INTERVAL_SECONDS = 6 * 3600
 
 # Status mapping
 STATUS_MAP = {2: "Open", 3: "Pending", 4: "Resolved", 5: "Closed"}
 PRIORITY_MAP = {1: "Low", 2: "Medium", 3: "High", 4: "Urgent"}
 
 
+class FreshserviceRateLimiter:
+    """Shared token bucket plus a Retry-After pause for every worker."""
+
+    def __init__(self, rate_per_minute=FRESHSERVICE_REQUESTS_PER_MINUTE, burst=FRESHSERVICE_BURST):
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait out any pause, then take a token; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                wait = self.blocked_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        return waited + self.bucket.acquire()
+
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_rate_limiter = FreshserviceRateLimiter()
+_http = shared_client()
+
+
 def _api_get(path, params=None):
     """Make a GET request to the Freshservice API. Returns parsed JSON."""
     if not API_KEY or not FRESHSERVICE_DOMAIN:
         raise RuntimeError("Missing Freshservice credentials")
-    url = f"https://{FRESHSERVICE_DOMAIN}{path}"
-    if params:
-        url += ("&" if "?" in url else "?") + urllib.parse.urlencode(params)
+    url = f"{FRESHSERVICE_BASE}{path}"
     auth = b64encode(f"{API_KEY}:X".encode()).decode()
-    req = urllib.request.Request(
-        url,
-        headers={
-            "Authorization": f"Basic {auth}",
-            "Content-Type": "application/json",
-        },
-    )
+    run = current_run("freshservice")
+
+    def before_send():
+        run.rate_limited(_rate_limiter.acquire())
+        run.api_call(path)
+
+    def on_backoff(seconds):
+        print(f"  Backing off {seconds:.1f}s before retrying {path}")
+        _rate_limiter.pause(seconds)
+        run.rate_limited(seconds)
+
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            return json.loads(resp.read())
+        return _http.request(
+            "GET",
+            url,
+            params=params,
+            headers={
+                "Authorization": f"Basic {auth}",
+                "Content-Type": "application/json",
+            },
+            before_send=before_send,
+            on_backoff=on_backoff,
+        ).json()
     except urllib.error.HTTPError as e:
         body = e.read().decode("utf-8", errors="replace")[:500]
         print(f"  HTTP {e.code} for {url}: {body}")
         raise
 
 
-def _fetch_filter(query, workspace_id=None, per_page=30):
+def _fetch_pages(path, params, per_page, workers=PAGE_WORKERS):
+    """All tickets from a paginated endpoint, in page order.
+
+    When page 1 reports ``total`` (the filter endpoint) the remaining pages
+    are fetched in one concurrent round; otherwise (the list endpoint) pages
+    are fetched ``workers`` at a time until one comes back short.
+    """
+    def get_page(page):
+        return _api_get(path, {**params, "per_page": per_page, "page": page})
+
+    first = get_page(1)
+    tickets = list(first.get("tickets", []))
+    if len(tickets) < per_page:
+        return tickets
+
+    with ContextThreadPoolExecutor(max_workers=workers) as pool:
+        if "total" in first:
+            pages = -(-int(first.get("total") or 0) // per_page)
+            for data in pool.map(get_page, range(2, pages + 1)):
+                tickets.extend(data.get("tickets", []))
+            return tickets
+
+        next_page = 2
+        while True:
+            wave = list(pool.map(get_page, range(next_page, next_page + workers)))
+            for data in wave:
+                batch = data.get("tickets", [])
+                tickets.extend(batch)
+                if len(batch) < per_page:
+                    return tickets
+            next_page += workers
+
+
+def _fetch_filter(query, workspace_id=None, per_page=FILTER_PAGE_SIZE):
     """Fetch all pages from the filter endpoint. Returns list of tickets."""
-    tickets = []
-    page = 1
-    while True:
-        params = {"query": f'"{query}"', "per_page": per_page, "page": page}
-        if workspace_id is not None:
-            params["workspace_id"] = workspace_id
-        data = _api_get("/api/v2/tickets/filter", params)
-        batch = data.get("tickets", [])
-        tickets.extend(batch)
-        total = data.get("total", 0)
-        if len(tickets) >= total or not batch:
-            break
-        page += 1
-    return tickets
+    params = {"query": f'"{query}"'}
+    if workspace_id is not None:
+        params["workspace_id"] = workspace_id
+    return _fetch_pages("/api/v2/tickets/filter", params, per_page)
 
 
 def fetch_view1_assigned_unresolved():
@@ -94,6 +178,26 @@ def fetch_view2_it_systems_open():
     return _fetch_filter(query, workspace_id=WORKSPACE_ID)
 
 
+def in_view1(ticket):
+    return ticket.get("responder_id", ticket.get("agent_id")) == AGENT_ID and ticket.get("status") in (2, 3)
+
+
+def in_view2(ticket):
+    return ticket.get("group_id") == GROUP_ID and ticket.get("status") == 2
+
+
+def fetch_updated_tickets(updated_since):
+    """Tickets updated at or after ``updated_since`` in both views' workspaces."""
+    tickets = {}
+    for workspace_id in (None, WORKSPACE_ID):
+        params = {"updated_since": updated_since}
+        if workspace_id is not None:
+            params["workspace_id"] = workspace_id
+        for ticket in _fetch_pages("/api/v2/tickets", params, LIST_PAGE_SIZE):
+            tickets[ticket["id"]] = ticket
+    return list(tickets.values())
+
+
 def ticket_url(ticket_id):
     return f"https://{FRESHSERVICE_DOMAIN}/a/tickets/{ticket_id}"
 
@@ -124,124 +228,205 @@ def write_health(status, ticket_count):
 
 
 def invalidate_dashboard_cache():
-    payload = json.dumps({"source": "freshservice"}).encode("utf-8")
-    req = urllib.request.Request(
-        DASHBOARD_INVALIDATE_URL,
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
+    notify_dashboard("invalidate", {"source": "freshservice"})
+
+
+def build_card(ticket):
+    """Card columns for ``ticket``; ``analysis_metadata`` carries their content hash."""
+    url = ticket_url(ticket["id"])
+    proposed = json.dumps([{
+        "type": "review_freshservice_ticket",
+        "draft": f"Review Freshservice ticket #{ticket['id']}: {ticket.get('subject', '')}",
+        "source": "freshservice",
+        "url": url,
+    }])
+    metadata = {
+        "ticket_id": ticket["id"],
+        "status": STATUS_MAP.get(ticket.get("status"), "Open"),
+        "priority": PRIORITY_MAP.get(ticket.get("priority"), "Medium"),
+        "type": ticket.get("type", ""),
+        "requester_id": ticket.get("requester_id"),
+        "group_id": ticket.get("group_id"),
+        "agent_id": ticket.get("agent_id"),
+        "created_at": ticket.get("created_at"),
+        "updated_at": ticket.get("updated_at"),
+        "url": url,
+    }
+    card = {
+        "summary": card_summary(ticket),
+        "classification": card_classification(ticket),
+        "proposed_actions": proposed,
+    }
+    content = json.dumps([card, metadata], sort_keys=True)
+    metadata["content_hash"] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    card["analysis_metadata"] = json.dumps(metadata)
+    card["content_hash"] = metadata["content_hash"]
+    return card
+
+
+def write_tickets(conn, tickets, removed_ids=(), full=False, now=None):
+    """Write the cards whose content hash changed; delete cards that left the views.
+
+    Cards are matched to tickets by ``analysis_metadata.ticket_id``. With
+    ``full`` the tickets are both views in their entirety, so any other
+    Freshservice card is stale. Returns counts of ``inserted``, ``updated``,
+    ``deleted`` and ``unchanged``.
+    """
+    now = now or datetime.now(timezone.utc).isoformat()
+    existing = {}
+    unkeyed = []
+    for card_id, ticket_id, content_hash in conn.execute(
+        """SELECT id, json_extract(analysis_metadata, '$.ticket_id'),
+                  json_extract(analysis_metadata, '$.content_hash')
+           FROM cards
+           WHERE source = 'freshservice'
+             AND (analysis_metadata IS NULL OR json_valid(analysis_metadata))"""
+    ):
+        if ticket_id is None:
+            unkeyed.append(card_id)
+        else:
+            existing[int(ticket_id)] = (card_id, content_hash)
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    inserts, updates = [], []
+    for ticket in tickets:
+        card = build_card(ticket)
+        current = existing.get(ticket["id"])
+        values = (now, card["summary"], card["classification"], card["proposed_actions"], card["analysis_metadata"])
+        if current is None:
+            inserts.append(values)
+        elif current[1] != card["content_hash"]:
+            updates.append(values + (current[0],))
+        else:
+            counts["unchanged"] += 1
+
+    stale = {int(ticket_id) for ticket_id in removed_ids}
+    if full:
+        stale |= set(existing) - {ticket["id"] for ticket in tickets}
+    deletes = [(existing[ticket_id][0],) for ticket_id in stale if ticket_id in existing]
+    if full:
+        deletes.extend((card_id,) for card_id in unkeyed)
+
+    conn.executemany("DELETE FROM cards WHERE id = ?", deletes)
+    conn.executemany(
+        """UPDATE OR IGNORE cards
+           SET timestamp = ?, summary = ?, classification = ?, proposed_actions = ?, analysis_metadata = ?
+           WHERE id = ?""",
+        updates,
     )
-    try:
-        with urllib.request.urlopen(req, timeout=2):
-            return
-    except (urllib.error.URLError, TimeoutError, OSError):
-        return
+    conn.executemany(
+        """INSERT INTO cards
+           (source, timestamp, summary, classification, status, section,
+            proposed_actions, analysis_metadata, execution_status)
+           VALUES ('freshservice', ?, ?, ?, 'pending', 'needs-action', ?, ?, 'not_run')
+           ON CONFLICT(source, summary) DO UPDATE SET
+               timestamp=excluded.timestamp,
+               classification=excluded.classification,
+               proposed_actions=excluded.proposed_actions,
+               analysis_metadata=excluded.analysis_metadata""",
+        inserts,
+    )
+    counts.update(inserted=len(inserts), updated=len(updates), deleted=len(deletes))
+    return counts
+
+
+def _latest_updated_at(tickets, default):
+    stamps = [str(ticket.get("updated_at") or "") for ticket in tickets]
+    return max([stamp for stamp in stamps if stamp] + [default])
+
+
+def load_state():
+    if STATE_FILE.exists():
+        try:
+            return json.loads(STATE_FILE.read_text())
+        except json.JSONDecodeError:
+            pass
+    return {}
 
 
 def main():
     try:
-        with single_instance("freshservice-poller"):
-            now = datetime.now(timezone.utc).isoformat()
+        with single_instance("freshservice-poller"), track_run("freshservice", DB_PATH) as run:
+            started = datetime.now(timezone.utc)
+            now = started.isoformat()
             print(f"[{datetime.now()}] Freshservice poller starting...")
-
-            try:
-                v1 = fetch_view1_assigned_unresolved()
-                print(f"  View 1 (Assigned/Unresolved): {len(v1)} tickets")
-            except Exception as e:
-                print(f"  View 1 failed: {e}")
-                v1 = []
-
-            try:
-                v2 = fetch_view2_it_systems_open()
-                print(f"  View 2 (IT-Systems Open): {len(v2)} tickets")
-            except Exception as e:
-                print(f"  View 2 failed: {e}")
-                v2 = []
-
-            all_tickets = {}
-            for ticket in v1:
-                all_tickets[ticket["id"]] = ticket
-            for ticket in v2:
-                all_tickets[ticket["id"]] = ticket
+            state = load_state()
+            watermark = state.get("updated_since", "")
+            full = not watermark or time.time() - float(state.get("full_sync_at") or 0) >= FULL_SYNC_INTERVAL_SECONDS
+
+            removed_ids = []
+            if full:
+                try:
+                    with run.phase("fetch"):
+                        v1 = fetch_view1_assigned_unresolved()
+                        print(f"  View 1 (Assigned/Unresolved): {len(v1)} tickets")
+                        v2 = fetch_view2_it_systems_open()
+                        print(f"  View 2 (IT-Systems Open): {len(v2)} tickets")
+                except Exception as e:
+                    # A partial listing must not delete the other view's cards.
+                    print(f"  Full listing failed: {e}")
+                    run.fail(e)
+                    write_health("error", 0)
+                    return
+                fetched = v1 + v2
+                all_tickets = {ticket["id"]: ticket for ticket in fetched}
+                if not all_tickets:
+                    print("  No tickets fetched — skipping DB update to avoid wiping on API error.")
+                    write_health("error", 0)
+                    return
+            else:
+                try:
+                    with run.phase("fetch"):
+                        fetched = fetch_updated_tickets(watermark)
+                except Exception as e:
+                    print(f"  Delta since {watermark} failed: {e}")
+                    run.fail(e)
+                    write_health("error", 0)
+                    return
+                print(f"  Updated since {watermark}: {len(fetched)} tickets")
+                all_tickets = {}
+                for ticket in fetched:
+                    if in_view1(ticket) or in_view2(ticket):
+                        all_tickets[ticket["id"]] = ticket
+                    else:
+                        removed_ids.append(ticket["id"])
 
             total = len(all_tickets)
-            print(f"  Combined unique tickets: {total}")
-
-            if not all_tickets and not v1 and not v2:
-                print("  No tickets fetched — skipping DB update to avoid wiping on API error.")
-                write_health("error", 0)
-                return
-
-            conn = sqlite3.connect(DB_PATH)
-            valid_summaries = set()
-            changed = False
-
-            for ticket in all_tickets.values():
-                summary = card_summary(ticket)
-                valid_summaries.add(summary)
-                classification = card_classification(ticket)
-                status_label = STATUS_MAP.get(ticket.get("status"), "Open")
-                priority_label = PRIORITY_MAP.get(ticket.get("priority"), "Medium")
-                url = ticket_url(ticket["id"])
-
-                proposed = json.dumps([{
-                    "type": "review_freshservice_ticket",
-                    "draft": f"Review Freshservice ticket #{ticket['id']}: {ticket.get('subject', '')}",
-                    "source": "freshservice",
-                    "url": url,
-                }])
-
-                metadata = json.dumps({
-                    "ticket_id": ticket["id"],
-                    "status": status_label,
-                    "priority": priority_label,
-                    "type": ticket.get("type", ""),
-                    "requester_id": ticket.get("requester_id"),
-                    "group_id": ticket.get("group_id"),
-                    "agent_id": ticket.get("agent_id"),
-                    "created_at": ticket.get("created_at"),
-                    "updated_at": ticket.get("updated_at"),
-                    "url": url,
-                })
-
-                before = conn.total_changes
-                conn.execute(
-                    """INSERT INTO cards
-                       (source, timestamp, summary, classification, status, section,
-                        proposed_actions, analysis_metadata, execution_status)
-                       VALUES (?, ?, ?, ?, 'pending', 'needs-action', ?, ?, 'not_run')
-                       ON CONFLICT(source, summary) DO UPDATE SET
-                           timestamp=excluded.timestamp,
-                           classification=excluded.classification,
-                           proposed_actions=excluded.proposed_actions,
-                           analysis_metadata=excluded.analysis_metadata""",
-                    ("freshservice", now, summary, classification, proposed, metadata),
-                )
-                if conn.total_changes > before:
-                    changed = True
-
-            existing = conn.execute(
-                "SELECT id, summary FROM cards WHERE source='freshservice'"
-            ).fetchall()
-            stale_ids = [row[0] for row in existing if row[1] not in valid_summaries]
-            if stale_ids:
-                placeholders = ",".join("?" * len(stale_ids))
-                conn.execute(
-                    f"DELETE FROM cards WHERE id IN ({placeholders})", stale_ids
-                )
-                changed = True
-                print(f"  Removed {len(stale_ids)} stale cards")
-
-            conn.commit()
-            conn.close()
-
-            STATE_FILE.write_text(json.dumps({"last_checked": now}))
+            print(f"  {'Combined unique' if full else 'Changed in view'} tickets: {total}")
+
+            ensure_inbox_schema(DB_PATH)
+            with run.phase("db_write"):
+                conn = sqlite3.connect(DB_PATH)
+                try:
+                    with conn:
+                        counts = write_tickets(conn, all_tickets.values(), removed_ids, full=full, now=now)
+                finally:
+                    conn.close()
+            written = counts["inserted"] + counts["updated"] + counts["deleted"]
+            run.count(fetched=len(fetched), written=written, skipped=counts["unchanged"])
+            if counts["deleted"]:
+                print(f"  Removed {counts['deleted']} stale cards")
+
+            state["last_checked"] = now
+            # Full runs start the watermark at the run's start; deltas advance
+            # it to the newest updated_at the server reported.
+            if full:
+                state["updated_since"] = started.strftime("%Y-%m-%dT%H:%M:%SZ")
+            else:
+                state["updated_since"] = _latest_updated_at(fetched, watermark)
+            if full:
+                state["full_sync_at"] = time.time()
+            STATE_FILE.write_text(json.dumps(state))
             write_health("ok", total)
 
-            if changed:
+            if counts["inserted"] or counts["updated"] or counts["deleted"]:
                 invalidate_dashboard_cache()
 
-            print(f"[{datetime.now()}] Done — {total} tickets synced.")
+            print(
+                f"[{datetime.now()}] Done — {'full' if full else 'delta'} sync: "
+                f"{counts['inserted']} new, {counts['updated']} updated, "
+                f"{counts['deleted']} removed, {counts['unchanged']} unchanged."
+            )
     except RuntimeError as exc:
         print(f"[{datetime.now()}] {exc}")
 
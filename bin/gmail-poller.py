@@ -11,15 +11,25 @@ import json
 import os
 import re
 import sqlite3
+import sys
 import time
 import subprocess
 from datetime import datetime, date, timezone
 from pathlib import Path
 from email.utils import parseaddr
-import urllib.request
 import urllib.parse
 import urllib.error
-from poller_runtime import single_instance
+from poller_http import shared_client
+from poller_runtime import (
+    ContextThreadPoolExecutor,
+    TokenBucket,
+    current_run,
+    ensure_inbox_schema,
+    load_migrations,
+    notify_dashboard,
+    single_instance,
+    track_run,
+)
 
 # --- Config ---
 CREDS_FILE = Path.home() / ".gmail-mcp" / "credentials.json"
@@ -30,12 +40,37 @@ DB_PATH    = BASE_DIR / "inbox.db"
 SETTINGS_FILE = BASE_DIR / "dashboard-settings.json"
 TOKEN_URL  = "https://oauth2.googleapis.com/token"
 GMAIL_BASE = "https://gmail.googleapis.com/gmail/v1/users/me"
-DASHBOARD_INVALIDATE_URL = "http://127.0.0.1:7777/api/cache-invalidate"
 USER_EMAIL = os.environ.get("ENG_BUDDY_USER_EMAIL", "kioja.kudumu@klaviyo.com")
 
 # How many noise hits before we surface a filter suggestion
 FILTER_SUGGEST_THRESHOLD = 10
 
+# Full listings cover the inbox for this window; incremental runs read history.
+INBOX_QUERY = "in:inbox newer_than:3d"
+LIST_PAGE_SIZE = 500
+# Processed message ids are kept well past the 3-day window, newest first.
+SEEN_TTL_SECONDS = 7 * 24 * 3600
+SEEN_MAX_ROWS = 5000
+
+# Response sweep: concurrent threads.get calls under one shared budget. Gmail
+# allows 250 quota units/user/second and threads.get costs 10.
+SWEEP_WORKERS = 8
+GMAIL_THREAD_GETS_PER_SECOND = 20
+RESPONSE_SECTIONS = ("action-needed", "needs-action", "needs-response")
+# History deltas only name threads I replied in; every open card is swept at
+# least this often, like the Slack and Freshservice full reconciles.
+SWEEP_FULL_INTERVAL_SECONDS = 6 * 3600
+
+# messages.get calls are grouped into multipart batch requests; Gmail accepts
+# up to 100 sub-requests per batch.
+GMAIL_BATCH_SIZE = 100
+# A message deleted between the listing and the fetch answers with one of
+# these; it is recorded as seen instead of holding the historyId back.
+GONE_STATUSES = frozenset({404, 410})
+METADATA_HEADERS = ["From", "To", "Subject", "Date"]
+
+_http = shared_client()
+
 
 # ---------------------------------------------------------------------------
 # OAuth helpers (unchanged)
@@ -49,15 +84,13 @@ def load_credentials():
 
 
 def refresh_access_token(creds, client):
-    data = urllib.parse.urlencode({
+    run = current_run("gmail")
+    new_token = _http.request("POST", TOKEN_URL, data={
         "client_id":     client["client_id"],
         "client_secret": client["client_secret"],
         "refresh_token": creds["refresh_token"],
         "grant_type":    "refresh_token",
-    }).encode()
-    req = urllib.request.Request(TOKEN_URL, data=data, method="POST")
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        new_token = json.loads(resp.read())
+    }, timeout=10, before_send=lambda: run.api_call("oauth.token"), on_backoff=run.rate_limited).json()
     creds["access_token"] = new_token["access_token"]
     creds["expiry_date"]  = int(time.time() * 1000) + new_token.get("expires_in", 3600) * 1000
     CREDS_FILE.write_text(json.dumps(creds, indent=2))
@@ -76,21 +109,31 @@ def get_token():
 # Gmail API helpers (unchanged)
 # ---------------------------------------------------------------------------
 
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _gmail_method(path):
+    """API method name for a ``users/me`` path, for run telemetry: ``messages/ID`` -> ``messages.get``."""
+    resource, _, rest = path.partition("/")
+    if resource == "profile":
+        return "getProfile"
+    return f"{resource}.{'get' if rest else 'list'}"
+
+
 def gmail_get(path, params=None, token=None):
-    url = f"{GMAIL_BASE}/{path}"
-    if params:
-        url += "?" + urllib.parse.urlencode(params, doseq=True)
-    req = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            return json.loads(resp.read())
-    except urllib.error.HTTPError as e:
-        if e.code == 401:
-            token = get_token()
-            req = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                return json.loads(resp.read())
-        raise
+    """GET a Gmail API path; a 401 refreshes the token once."""
+    run = current_run("gmail")
+    return _http.request(
+        "GET",
+        f"{GMAIL_BASE}/{path}",
+        params=params,
+        headers=_bearer(token),
+        reauth=lambda: _bearer(get_token()),
+        timeout=15,
+        before_send=lambda: run.api_call(_gmail_method(path)),
+        on_backoff=run.rate_limited,
+    ).json()
 
 
 def get_message(msg_id, token):
@@ -98,12 +141,144 @@ def get_message(msg_id, token):
         f"messages/{msg_id}",
         {
             "format": "metadata",
-            "metadataHeaders": ["From", "To", "Subject", "Date"],
+            "metadataHeaders": METADATA_HEADERS,
         },
         token=token,
     )
 
 
+def gmail_batch_url():
+    """The batch endpoint on the same host as GMAIL_BASE."""
+    root, _, _ = GMAIL_BASE.partition("/gmail/v1")
+    return f"{root}/batch/gmail/v1"
+
+
+def build_batch_body(msg_ids, boundary):
+    """multipart/mixed body with one ``messages.get`` per part, tagged by index."""
+    path = urllib.parse.urlsplit(GMAIL_BASE).path
+    query = urllib.parse.urlencode({"format": "metadata", "metadataHeaders": METADATA_HEADERS}, doseq=True)
+    parts = []
+    for index, msg_id in enumerate(msg_ids):
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item-{index}>\r\n"
+            "\r\n"
+            f"GET {path}/messages/{urllib.parse.quote(msg_id)}?{query}\r\n"
+            "\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode()
+
+
+def _split_head(text):
+    """``(head, body)`` around the first blank line of an HTTP-style message."""
+    parts = re.split(r"\r?\n\r?\n", text, maxsplit=1)
+    return parts[0], parts[1] if len(parts) > 1 else ""
+
+
+def parse_batch_response(body, content_type):
+    """Split a multipart/mixed batch response into ``{index: (status, payload)}``.
+
+    Parts are matched back to their sub-request through ``Content-ID:
+    <response-item-N>``; a part without one takes its position instead.
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not match:
+        raise ValueError(f"batch response without a boundary: {content_type!r}")
+    delimiter = f"--{match.group(1)}"
+    results = {}
+    for position, chunk in enumerate(body.split(delimiter)[1:]):
+        if chunk.startswith("--"):
+            break
+        part_headers, http_response = _split_head(chunk.strip("\r\n"))
+        content_id = re.search(r"Content-ID:\s*<response-item-(\d+)>", part_headers, re.IGNORECASE)
+        index = int(content_id.group(1)) if content_id else position
+        head, payload = _split_head(http_response)
+        status_line = (head.splitlines() or [""])[0].split()
+        status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else 0
+        try:
+            results[index] = (status, json.loads(payload) if payload.strip() else {})
+        except json.JSONDecodeError:
+            results[index] = (status, {"raw": payload})
+    return results
+
+
+def post_message_batch(msg_ids, token):
+    """One batch round trip for ``msg_ids``; refreshes the token once on 401.
+
+    Returns ``(parts, token)`` so later batches reuse a refreshed token.
+    """
+    boundary = f"batch_{os.getpid()}_{int(time.time() * 1000)}"
+    run = current_run("gmail")
+
+    def reauth():
+        nonlocal token
+        token = get_token()
+        return _bearer(token)
+
+    resp = _http.request(
+        "POST",
+        gmail_batch_url(),
+        data=build_batch_body(msg_ids, boundary),
+        headers={**_bearer(token), "Content-Type": f"multipart/mixed; boundary={boundary}"},
+        reauth=reauth,
+        timeout=30,
+        before_send=lambda: run.api_call("batch"),
+        on_backoff=run.rate_limited,
+    )
+    return parse_batch_response(resp.text(), resp.headers.get("Content-Type")), token
+
+
+def get_messages(msg_ids, token, batch_size=None):
+    """Metadata for ``msg_ids`` in batches of up to GMAIL_BATCH_SIZE.
+
+    Returns ``(messages, failures, gone)``: messages and failures keyed by
+    message id, and the ids Gmail answered 404/410 for (deleted or purged
+    since they were listed), which no retry will bring back. A part that comes
+    back 401 refreshes the token; any other failed part, and every id of a
+    batch that could not be sent at all, is retried once with an individual
+    ``messages.get`` before it counts as a failure.
+    """
+    batch_size = batch_size or GMAIL_BATCH_SIZE
+    messages = {}
+    gone = set()
+    retry = []
+    refresh = False
+    for start in range(0, len(msg_ids), batch_size):
+        chunk = msg_ids[start:start + batch_size]
+        try:
+            parts, token = post_message_batch(chunk, token)
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            print(f"[{datetime.now().strftime('%H:%M')}] Gmail batch of {len(chunk)} failed: {exc}")
+            retry.extend(chunk)
+            continue
+        for index, msg_id in enumerate(chunk):
+            status, payload = parts.get(index, (0, {}))
+            if status == 200 and payload.get("id"):
+                messages[msg_id] = payload
+            elif status in GONE_STATUSES:
+                gone.add(msg_id)
+            else:
+                refresh = refresh or status == 401
+                retry.append(msg_id)
+
+    if refresh:
+        token = get_token()
+    failures = {}
+    for msg_id in retry:
+        try:
+            messages[msg_id] = get_message(msg_id, token)
+        except urllib.error.HTTPError as exc:
+            if exc.code in GONE_STATUSES:
+                gone.add(msg_id)
+            else:
+                failures[msg_id] = exc
+        except Exception as exc:
+            failures[msg_id] = exc
+    return messages, failures, gone
+
+
 def extract_header(msg, name):
     headers = msg.get("payload", {}).get("headers", [])
     for h in headers:
@@ -126,6 +301,118 @@ def extract_received_at(msg):
     return datetime.now(timezone.utc).isoformat()
 
 
+# ---------------------------------------------------------------------------
+# Incremental sync — history API with a full-listing fallback
+# ---------------------------------------------------------------------------
+
+class HistoryExpired(Exception):
+    """The stored historyId is too old for users.history.list (HTTP 404)."""
+
+
+def current_history_id(token):
+    return str(gmail_get("profile", token=token).get("historyId", ""))
+
+
+def list_inbox_message_ids(token, query=INBOX_QUERY):
+    """Every message id matching ``query``, following nextPageToken."""
+    msg_ids = []
+    page_token = ""
+    while True:
+        params = {"q": query, "maxResults": LIST_PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        result = gmail_get("messages", params, token=token)
+        msg_ids.extend(ref["id"] for ref in result.get("messages", []))
+        page_token = result.get("nextPageToken", "")
+        if not page_token:
+            return msg_ids
+
+
+def list_history_message_ids(token, start_history_id):
+    """Messages added since ``start_history_id``.
+
+    Returns ``(msg_ids, replied_threads, history_id)``: new inbox message ids
+    (oldest first), the thread ids I sent a message in, and the mailbox's
+    current historyId to resume from next time.
+    """
+    msg_ids = []
+    replied_threads = set()
+    history_id = str(start_history_id)
+    page_token = ""
+    while True:
+        params = {"startHistoryId": start_history_id, "historyTypes": "messageAdded"}
+        if page_token:
+            params["pageToken"] = page_token
+        try:
+            result = gmail_get("history", params, token=token)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                raise HistoryExpired(start_history_id) from exc
+            raise
+        for record in result.get("history", []):
+            for added in record.get("messagesAdded", []):
+                message = added.get("message", {})
+                labels = message.get("labelIds", ["INBOX"])
+                if "INBOX" in labels and message.get("id"):
+                    msg_ids.append(message["id"])
+                if "SENT" in labels and message.get("threadId"):
+                    replied_threads.add(message["threadId"])
+        history_id = str(result.get("historyId") or history_id)
+        page_token = result.get("nextPageToken", "")
+        if not page_token:
+            return list(dict.fromkeys(msg_ids)), replied_threads, history_id
+
+
+def fetch_new_message_ids(token, state, full=False):
+    """Message ids to look at this run: the history delta, or a full listing.
+
+    Returns ``(msg_ids, history_id, mode, replied_threads)``. The full listing
+    records the historyId before listing so nothing delivered in between is
+    skipped; it has no thread delta, so ``replied_threads`` is None there and
+    the response sweep checks every open card.
+    """
+    start_history_id = state.get("history_id")
+    if start_history_id and not full:
+        try:
+            msg_ids, replied_threads, history_id = list_history_message_ids(token, start_history_id)
+            return msg_ids, history_id, "history", replied_threads
+        except HistoryExpired:
+            print(f"[{datetime.now().strftime('%H:%M')}] Gmail history {start_history_id} expired — full listing")
+    history_id = current_history_id(token)
+    return list_inbox_message_ids(token), history_id, "full", None
+
+
+def load_seen_ids(conn, now=None):
+    """Evict expired/overflow rows and return the remaining seen message ids."""
+    now = time.time() if now is None else now
+    conn.execute("DELETE FROM gmail_seen_messages WHERE seen_at < ?", (now - SEEN_TTL_SECONDS,))
+    conn.execute(
+        """DELETE FROM gmail_seen_messages WHERE message_id IN (
+               SELECT message_id FROM gmail_seen_messages
+               ORDER BY seen_at DESC, message_id DESC LIMIT -1 OFFSET ?
+           )""",
+        (SEEN_MAX_ROWS,),
+    )
+    conn.commit()
+    return {row[0] for row in conn.execute("SELECT message_id FROM gmail_seen_messages")}
+
+
+def remember_seen_ids(conn, msg_ids, now=None):
+    now = time.time() if now is None else now
+    conn.executemany(
+        "INSERT OR IGNORE INTO gmail_seen_messages (message_id, seen_at) VALUES (?, ?)",
+        [(msg_id, now) for msg_id in msg_ids],
+    )
+
+
+def import_legacy_seen_ids(conn, state):
+    """Move the old unordered ``seen_msg_ids`` list out of the state file."""
+    legacy = state.pop("seen_msg_ids", None)
+    if legacy:
+        remember_seen_ids(conn, legacy)
+        conn.commit()
+
+
 # ---------------------------------------------------------------------------
 # State
 # ---------------------------------------------------------------------------
@@ -141,18 +428,7 @@ def save_state(state):
 
 
 def invalidate_dashboard_cache(source="gmail"):
-    payload = json.dumps({"source": source}).encode("utf-8")
-    request = urllib.request.Request(
-        DASHBOARD_INVALIDATE_URL,
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=2):
-            return
-    except (urllib.error.URLError, TimeoutError, OSError):
-        return
+    notify_dashboard("invalidate", {"source": source})
 
 
 # ---------------------------------------------------------------------------
@@ -195,6 +471,7 @@ def notify(title, message):
 def db_connect():
     if not DB_PATH.exists():
         return None
+    ensure_inbox_schema(DB_PATH)
     return sqlite3.connect(DB_PATH)
 
 
@@ -258,12 +535,19 @@ def write_card_to_db(conn, item, classification_result):
         "subject":   item.get("subject", ""),
     }])
 
+    # Threading keys are stored as indexed columns so the dashboard can collapse
+    # duplicates in SQL. Without the shared migrate module they stay NULL and
+    # the card is shown uncollapsed.
+    migrations = load_migrations()
+    keys = migrations.gmail_card_keys(summary, proposed_actions) if migrations else {}
+
     before = conn.total_changes
-    conn.execute(
+    cursor = conn.execute(
         """INSERT OR IGNORE INTO cards
            (source, timestamp, summary, classification, section, draft_response,
-            context_notes, status, proposed_actions, execution_status)
-           VALUES ('gmail', ?, ?, ?, ?, ?, ?, 'pending', ?, 'not_run')""",
+            context_notes, status, proposed_actions, execution_status,
+            thread_id, message_id, sender_email, dup_key)
+           VALUES ('gmail', ?, ?, ?, ?, ?, ?, 'pending', ?, 'not_run', ?, ?, ?, ?)""",
         (
             item.get("received_at") or datetime.now(timezone.utc).isoformat(),
             summary,
@@ -272,9 +556,19 @@ def write_card_to_db(conn, item, classification_result):
             draft_response,
             context_notes,
             proposed_actions,
+            keys.get("thread_id"),
+            keys.get("message_id"),
+            keys.get("sender_email"),
+            keys.get("dup_key"),
         ),
     )
-    return conn.total_changes > before
+    inserted = conn.total_changes > before
+    if inserted and migrations and not keys.get("dup_key"):
+        conn.execute(
+            "UPDATE cards SET dup_key = ? WHERE id = ?",
+            (f"card:{cursor.lastrowid}", cursor.lastrowid),
+        )
+    return inserted
 
 
 def update_filter_suggestions(conn, noise_items):
@@ -327,55 +621,74 @@ def update_filter_suggestions(conn, noise_items):
 # Response sweep — detect user replies in threads
 # ---------------------------------------------------------------------------
 
-def sweep_responded_cards(token):
+def _card_epoch(timestamp):
+    try:
+        return datetime.fromisoformat((timestamp or "").replace("Z", "+00:00")).timestamp()
+    except (ValueError, TypeError):
+        return 0
+
+
+def latest_self_reply_ts(thread_data):
+    """Epoch seconds of my newest message in a ``threads.get`` payload, or 0."""
+    latest = 0
+    for msg in thread_data.get("messages", []):
+        _, from_email = parseaddr(extract_header(msg, "From"))
+        if from_email.lower() != USER_EMAIL.lower():
+            continue
+        msg_internal = msg.get("internalDate", "0")
+        latest = max(latest, int(msg_internal) / 1000 if msg_internal else 0)
+    return latest
+
+
+def sweep_responded_cards(token, changed_threads=None, workers=SWEEP_WORKERS):
     """
     Check unresolved Gmail cards for user replies in the thread.
     If the user has replied, mark the card as responded.
+
+    ``changed_threads`` limits the sweep to threads I sent something in since
+    the last run (from the history delta); None checks every open card. Each
+    thread is fetched once, concurrently, under a shared requests-per-second
+    budget. Returns ``(count, resolved_ids, failed_threads)``, the last being
+    the threads whose fetch failed and should be checked again.
     """
     conn = db_connect()
     if conn is None:
-        return 0, []
-
+        return 0, [], set()
+    if changed_threads is not None and not changed_threads:
+        conn.close()
+        return 0, [], set()
+
+    section_marks = ",".join("?" for _ in RESPONSE_SECTIONS)
+    sql = f"""SELECT id, thread_id, timestamp
+              FROM cards
+              WHERE source = 'gmail'
+                AND thread_id IS NOT NULL AND thread_id != ''
+                AND responded = 0
+                AND section IN ({section_marks})
+                AND status = 'pending'"""
+    params = list(RESPONSE_SECTIONS)
+    if changed_threads is not None:
+        sql += " AND thread_id IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(sorted(changed_threads)))
     try:
-        rows = conn.execute(
-            """SELECT id, summary, proposed_actions, timestamp
-               FROM cards
-               WHERE source = 'gmail'
-                 AND responded = 0
-                 AND section IN ('action-needed', 'needs-action', 'needs-response')
-                 AND status = 'pending'""",
-        ).fetchall()
+        rows = conn.execute(sql, params).fetchall()
     except sqlite3.OperationalError:
         conn.close()
-        return 0, []
+        return 0, [], set()
 
     if not rows:
         conn.close()
-        return 0, []
-
-    resolved_count = 0
-    resolved_ids = []
-
-    for row in rows:
-        card_id = row[0]
-        proposed_actions_raw = row[2] or "[]"
-        card_timestamp = row[3] or ""
-
-        try:
-            actions = json.loads(proposed_actions_raw)
-        except (json.JSONDecodeError, TypeError):
-            actions = []
+        return 0, [], set()
 
-        thread_id = ""
-        for action in actions:
-            thread_id = action.get("thread_id", "")
-            if thread_id:
-                break
+    cards_by_thread = {}
+    for card_id, thread_id, timestamp in rows:
+        cards_by_thread.setdefault(thread_id, []).append((card_id, _card_epoch(timestamp)))
 
-        if not thread_id:
-            continue
+    bucket = TokenBucket(GMAIL_THREAD_GETS_PER_SECOND * 60, burst=GMAIL_THREAD_GETS_PER_SECOND)
+    run = current_run("gmail")
 
-        # Fetch thread messages from Gmail API
+    def fetch_reply_ts(thread_id):
+        run.rate_limited(bucket.acquire())
         try:
             thread_data = gmail_get(
                 f"threads/{thread_id}",
@@ -384,56 +697,80 @@ def sweep_responded_cards(token):
             )
         except Exception as exc:
             print(f"[{datetime.now().strftime('%H:%M')}] Thread fetch failed for {thread_id}: {exc}")
-            continue
+            return None
+        return latest_self_reply_ts(thread_data)
+
+    thread_ids = list(cards_by_thread)
+    with ContextThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="gmail-sweep") as pool:
+        reply_ts_by_thread = dict(zip(thread_ids, pool.map(fetch_reply_ts, thread_ids)))
+
+    failed_threads = {thread_id for thread_id, reply_ts in reply_ts_by_thread.items() if reply_ts is None}
+    resolved_ids = [
+        card_id
+        for thread_id, cards in cards_by_thread.items()
+        for card_id, card_ts in cards
+        if (reply_ts_by_thread[thread_id] or 0) > card_ts
+    ]
+    if resolved_ids:
+        conn.executemany(
+            """UPDATE cards
+               SET responded = 1, section = 'no-action', classification = 'responded'
+               WHERE id = ?""",
+            [(card_id,) for card_id in resolved_ids],
+        )
+        conn.commit()
+    conn.close()
 
-        thread_messages = thread_data.get("messages", [])
-
-        # Check if any message in the thread is from the user (sent after card timestamp)
-        user_replied = False
-        for msg in thread_messages:
-            msg_from = ""
-            for h in msg.get("payload", {}).get("headers", []):
-                if h["name"].lower() == "from":
-                    msg_from = h["value"]
-                    break
-
-            _, from_email = parseaddr(msg_from)
-            if not from_email:
-                continue
-
-            # Check if this is from the user's own email
-            if from_email.lower() == USER_EMAIL.lower():
-                # Verify it was sent after the card was created
-                msg_internal = msg.get("internalDate", "0")
-                msg_ts = int(msg_internal) / 1000 if msg_internal else 0
-
-                try:
-                    card_dt = datetime.fromisoformat(card_timestamp.replace("Z", "+00:00"))
-                    card_ts = card_dt.timestamp()
-                except (ValueError, TypeError):
-                    card_ts = 0
-
-                if msg_ts > card_ts:
-                    user_replied = True
-                    break
-
-        if user_replied:
-            conn.execute(
-                """UPDATE cards
-                   SET responded = 1, section = 'no-action', classification = 'responded'
-                   WHERE id = ?""",
-                (card_id,),
-            )
-            resolved_count += 1
-            resolved_ids.append(card_id)
+    return len(resolved_ids), resolved_ids, failed_threads
 
-        time.sleep(0.15)  # rate limiting
 
-    if resolved_count:
-        conn.commit()
-    conn.close()
+def run_response_sweep(changed_threads=None):
+    """Sweep for replies, then ask the dashboard to resolve related cards in one message.
 
-    return resolved_count, resolved_ids
+    Returns the threads the sweep could not fetch.
+    """
+    sweep_count, sweep_ids, failed_threads = sweep_responded_cards(get_token(), changed_threads)
+    if failed_threads:
+        print(f"[{datetime.now().strftime('%H:%M')}] Response sweep: {len(failed_threads)} thread(s) left for the next run")
+    if not sweep_count:
+        return failed_threads
+    print(f"[{datetime.now().strftime('%H:%M')}] Response sweep: resolved {sweep_count} card(s)")
+    invalidate_dashboard_cache("gmail")
+    if not notify_dashboard("resolve_related", {"card_ids": sweep_ids}):
+        print(f"[{datetime.now().strftime('%H:%M')}] Cross-channel resolve for {len(sweep_ids)} card(s) spooled until the dashboard is up")
+    return failed_threads
+
+
+def sweep_with_carryover(state, replied_threads, now=None):
+    """Run the response sweep, keeping whatever it did not check for the next run.
+
+    Sweeps every open card when there is no thread delta (a full listing) or
+    the last full sweep is older than SWEEP_FULL_INTERVAL_SECONDS; otherwise
+    the threads I replied in plus those an earlier run could not fetch. The
+    targets are saved before the sweep starts, so a sweep that raises leaves
+    them, and a pending full sweep, in the state file for the next run.
+    """
+    now = time.time() if now is None else now
+    pending = set(state.get("sweep_pending_threads") or [])
+    full = (
+        replied_threads is None
+        or not state.get("sweep_full_at")
+        or now - float(state["sweep_full_at"]) >= SWEEP_FULL_INTERVAL_SECONDS
+    )
+    if full:
+        state["sweep_full_at"] = None
+        changed_threads = None
+    else:
+        changed_threads = pending | set(replied_threads)
+        pending = changed_threads
+    state["sweep_pending_threads"] = sorted(pending)
+    save_state(state)
+
+    failed_threads = run_response_sweep(changed_threads)
+    state["sweep_pending_threads"] = sorted(failed_threads)
+    if full:
+        state["sweep_full_at"] = now
+    save_state(state)
 
 
 # ---------------------------------------------------------------------------
@@ -569,172 +906,189 @@ def build_classification_map(results, _batch_items):
 # Main
 # ---------------------------------------------------------------------------
 
-def main():
-    try:
-        with single_instance("gmail-poller"):
-            state = load_state()
-            token = get_token()
-            refresh_now = "--refresh-now" in sys.argv[1:]
-            already_seen = set() if refresh_now else set(state.get("seen_msg_ids", []))
-            processed_seen = set()
-
-            query = "in:inbox newer_than:3d"
-            result = gmail_get("messages", {"q": query, "maxResults": 50}, token=token)
-            messages = result.get("messages", [])
-
-            if not messages:
-                print(f"[{datetime.now().strftime('%H:%M')}] No emails in last 3 days")
-                state["last_check_ts"] = int(datetime.now().timestamp())
-                save_state(state)
-                return
-
-            batch_items = []
-            for msg_ref in messages:
-                msg_id = msg_ref["id"]
-                if msg_id in already_seen:
-                    continue
-
-                try:
-                    msg = get_message(msg_id, token)
-                except Exception as exc:
-                    print(f"[{datetime.now().strftime('%H:%M')}] Failed to fetch {msg_id}: {exc}")
-                    continue
-
-                msg_from = extract_header(msg, "From")
-                msg_to = extract_header(msg, "To")
-                msg_subject = extract_header(msg, "Subject")
-                msg_thread = msg.get("threadId", "")
-                snippet = msg.get("snippet", "")
-                labels = msg.get("labelIds", [])
-                _, sender_email = parseaddr(msg_from)
-
-                batch_items.append(
-                    {
-                        "id": msg_id,
-                        "from": msg_from,
-                        "sender_email": sender_email,
-                        "to": msg_to,
-                        "subject": msg_subject,
-                        "snippet": snippet[:500],
-                        "labels": labels,
-                        "thread_id": msg_thread,
-                        "received_at": extract_received_at(msg),
-                    }
-                )
+def ingest_messages(token, state, conn, msg_ids, history_id, sync_mode):
+    """Fetch, classify and write the new messages; updates ``state`` in place."""
+    processed_seen = set()
+    run = current_run("gmail")
+    if not msg_ids:
+        print(f"[{datetime.now().strftime('%H:%M')}] No new emails ({sync_mode} sync)")
+        state["last_check_ts"] = int(datetime.now().timestamp())
+        state["history_id"] = history_id
+        save_state(state)
+        if conn:
+            conn.close()
+        return
 
-                time.sleep(0.15)
+    batch_items = []
+    with run.phase("fetch"):
+        messages, failures, gone = get_messages(msg_ids, token)
+    run.count(fetched=len(messages))
+    fetch_failed = bool(failures)
+    for msg_id, exc in failures.items():
+        print(f"[{datetime.now().strftime('%H:%M')}] Failed to fetch {msg_id}: {exc}")
+    if gone:
+        print(f"[{datetime.now().strftime('%H:%M')}] {len(gone)} message(s) deleted before they could be fetched")
+        if conn:
+            remember_seen_ids(conn, gone)
+            conn.commit()
+    for msg_id in msg_ids:
+        msg = messages.get(msg_id)
+        if msg is None:
+            continue
 
-            if not batch_items:
-                print(f"[{datetime.now().strftime('%H:%M')}] No new emails (all already seen)")
-                state["last_check_ts"] = int(datetime.now().timestamp())
-                state["seen_msg_ids"] = list(already_seen)[-500:]
-                save_state(state)
-                return
+        msg_from = extract_header(msg, "From")
+        msg_to = extract_header(msg, "To")
+        msg_subject = extract_header(msg, "Subject")
+        msg_thread = msg.get("threadId", "")
+        snippet = msg.get("snippet", "")
+        labels = msg.get("labelIds", [])
+        _, sender_email = parseaddr(msg_from)
+
+        batch_items.append(
+            {
+                "id": msg_id,
+                "from": msg_from,
+                "sender_email": sender_email,
+                "to": msg_to,
+                "subject": msg_subject,
+                "snippet": snippet[:500],
+                "labels": labels,
+                "thread_id": msg_thread,
+                "received_at": extract_received_at(msg),
+            }
+        )
+
+    # A failed fetch keeps the old historyId so the message is retried;
+    # everything fetched this run is in the seen table by then. Deleted
+    # messages are not failures: retrying them would pin the historyId until
+    # the history expires.
+    if not fetch_failed:
+        state["history_id"] = history_id
+
+    if not batch_items:
+        print(f"[{datetime.now().strftime('%H:%M')}] No new emails fetched")
+        state["last_check_ts"] = int(datetime.now().timestamp())
+        save_state(state)
+        if conn:
+            conn.close()
+        return
 
-            print(f"[{datetime.now().strftime('%H:%M')}] Heuristically classifying {len(batch_items)} new email(s)...")
+    print(f"[{datetime.now().strftime('%H:%M')}] Heuristically classifying {len(batch_items)} new email(s)...")
 
-            classification_results = classify_batch(batch_items)
-            classification_map = build_classification_map(classification_results, batch_items)
+    with run.phase("classify"):
+        classification_results = classify_batch(batch_items)
+        classification_map = build_classification_map(classification_results, batch_items)
 
-            conn = db_connect()
-            action_needed = []
-            alerts = []
-            noise_items = []
-            db_changed = False
+    action_needed = []
+    alerts = []
+    noise_items = []
+    db_changed = False
+    written = 0
 
-            if conn:
-                for item in batch_items:
-                    msg_id = item["id"]
-                    cl_result = classification_map.get(
-                        msg_id,
-                        {
-                            "section": "noise",
-                            "classification": "unclassified",
-                            "draft_response": None,
-                            "context_notes": None,
-                        },
-                    )
-
-                    if write_card_to_db(conn, item, cl_result):
-                        processed_seen.add(msg_id)
-                        db_changed = True
-
-                    section = cl_result.get("section", "noise")
-                    if section == "action-needed":
-                        action_needed.append((item, cl_result))
-                    elif section == "alert":
-                        alerts.append((item, cl_result))
-                    else:
-                        noise_items.append(item)
-
-                update_filter_suggestions(conn, noise_items)
-                conn.commit()
-                conn.close()
-            else:
-                print(f"[{datetime.now().strftime('%H:%M')}] inbox.db not found — skipping DB writes")
-                for item in batch_items:
-                    msg_id = item["id"]
-                    cl_result = classification_map.get(msg_id, {"section": "noise"})
-                    section = cl_result.get("section", "noise")
-                    if section == "action-needed":
-                        action_needed.append((item, cl_result))
-                    elif section == "alert":
-                        alerts.append((item, cl_result))
-                    else:
-                        noise_items.append(item)
-                    processed_seen.add(msg_id)
-
-            for item, _cl_result in action_needed:
-                _, display_name = parseaddr(item["from"])
-                notify(
-                    title="eng-buddy: Action needed",
-                    message=f"From: {display_name or item['from']}\n{item['subject'][:80]}",
+    if conn:
+        with run.phase("db_write"):
+            for item in batch_items:
+                msg_id = item["id"]
+                cl_result = classification_map.get(
+                    msg_id,
+                    {
+                        "section": "noise",
+                        "classification": "unclassified",
+                        "draft_response": None,
+                        "context_notes": None,
+                    },
                 )
 
-            if alerts:
-                if len(alerts) == 1:
-                    item, _cl_result = alerts[0]
-                    _, display_name = parseaddr(item["from"])
-                    notify(
-                        title="eng-buddy: Alert",
-                        message=f"From: {display_name or item['from']}\n{item['subject'][:80]}",
-                    )
+                if write_card_to_db(conn, item, cl_result):
+                    db_changed = True
+                    written += 1
+                processed_seen.add(msg_id)
+
+                section = cl_result.get("section", "noise")
+                if section == "action-needed":
+                    action_needed.append((item, cl_result))
+                elif section == "alert":
+                    alerts.append((item, cl_result))
                 else:
-                    notify(
-                        title="eng-buddy: Alerts",
-                        message=f"{len(alerts)} alert email(s) in your inbox",
-                    )
+                    noise_items.append(item)
+
+            update_filter_suggestions(conn, noise_items)
+            remember_seen_ids(conn, processed_seen)
+            # Key rows other writers left without threading columns (manual
+            # inserts, older pollers); the dashboard only reads them.
+            migrations = load_migrations()
+            if migrations:
+                migrations.backfill_gmail_keys(conn)
+            conn.commit()
+            conn.close()
+        run.count(written=written, skipped=len(batch_items) - written)
+    else:
+        print(f"[{datetime.now().strftime('%H:%M')}] inbox.db not found — skipping DB writes")
+        for item in batch_items:
+            msg_id = item["id"]
+            cl_result = classification_map.get(msg_id, {"section": "noise"})
+            section = cl_result.get("section", "noise")
+            if section == "action-needed":
+                action_needed.append((item, cl_result))
+            elif section == "alert":
+                alerts.append((item, cl_result))
+            else:
+                noise_items.append(item)
+
+    for item, _cl_result in action_needed:
+        _, display_name = parseaddr(item["from"])
+        notify(
+            title="eng-buddy: Action needed",
+            message=f"From: {display_name or item['from']}\n{item['subject'][:80]}",
+        )
+
+    if alerts:
+        if len(alerts) == 1:
+            item, _cl_result = alerts[0]
+            _, display_name = parseaddr(item["from"])
+            notify(
+                title="eng-buddy: Alert",
+                message=f"From: {display_name or item['from']}\n{item['subject'][:80]}",
+            )
+        else:
+            notify(
+                title="eng-buddy: Alerts",
+                message=f"{len(alerts)} alert email(s) in your inbox",
+            )
 
-            total = len(batch_items)
+    total = len(batch_items)
 
-            print(
-                f"[{datetime.now().strftime('%H:%M')}] {total} email(s): "
-                f"{len(action_needed)} action-needed, {len(alerts)} alert, {len(noise_items)} noise"
-            )
+    print(
+        f"[{datetime.now().strftime('%H:%M')}] {total} email(s): "
+        f"{len(action_needed)} action-needed, {len(alerts)} alert, {len(noise_items)} noise"
+    )
+
+    state["last_check_ts"] = int(datetime.now().timestamp())
+    save_state(state)
+
+    if db_changed:
+        invalidate_dashboard_cache("gmail")
+
+
+def main():
+    try:
+        with single_instance("gmail-poller"), track_run("gmail", DB_PATH) as run:
+            state = load_state()
+            token = get_token()
+            refresh_now = "--refresh-now" in sys.argv[1:]
+            conn = db_connect()
+            if conn:
+                import_legacy_seen_ids(conn, state)
+            already_seen = set() if refresh_now or conn is None else load_seen_ids(conn)
+
+            with run.phase("list"):
+                msg_ids, history_id, sync_mode, replied_threads = fetch_new_message_ids(token, state, full=refresh_now)
+            msg_ids = [msg_id for msg_id in msg_ids if msg_id not in already_seen]
+            state["sync_mode"] = sync_mode
 
-            state["last_check_ts"] = int(datetime.now().timestamp())
-            state["seen_msg_ids"] = list((already_seen | processed_seen))[-500:]
-            save_state(state)
-
-            if db_changed:
-                invalidate_dashboard_cache("gmail")
-
-            token_for_sweep = get_token()
-            sweep_count, sweep_ids = sweep_responded_cards(token_for_sweep)
-            if sweep_count:
-                print(f"[{datetime.now().strftime('%H:%M')}] Response sweep: resolved {sweep_count} card(s)")
-                invalidate_dashboard_cache("gmail")
-                for cid in sweep_ids:
-                    try:
-                        req = urllib.request.Request(
-                            f"http://127.0.0.1:7777/api/cards/{cid}/resolve-related",
-                            data=b"{}",
-                            headers={"Content-Type": "application/json"},
-                            method="POST",
-                        )
-                        urllib.request.urlopen(req, timeout=10)
-                    except Exception as exc:
-                        print(f"[{datetime.now().strftime('%H:%M')}] Cross-channel resolve failed for card {cid}: {exc}")
+            ingest_messages(token, state, conn, msg_ids, history_id, sync_mode)
+            with run.phase("sweep"):
+                sweep_with_carryover(state, replied_threads)
     except RuntimeError as exc:
         print(f"[{datetime.now().strftime('%H:%M')}] {exc}")
 
@@ -2,22 +2,25 @@
 """
 eng-buddy Jira Poller
 Fetches Jira issues assigned to the configured user via the Jira REST API.
-Writes cards to inbox.db without routing through Claude.
+Hands cards to the dashboard's ingest channel without routing through Claude.
+
+After the first run only issues updated since the last check are fetched;
+the board and active sprint ids are cached in the state file.
 """
 
 from __future__ import annotations
 
 import json
 import os
-import sqlite3
+import re
+import time
 import urllib.error
-import urllib.parse
-import urllib.request
 from base64 import b64encode
 from datetime import datetime, timezone
 from pathlib import Path
 
-from poller_runtime import credential, single_instance
+from poller_http import shared_client
+from poller_runtime import credential, current_run, ensure_inbox_schema, push_cards, single_instance, track_run
 
 try:
     import tasks_db
@@ -35,29 +38,54 @@ JIRA_PROJECT_KEY = os.environ.get("ENG_BUDDY_JIRA_PROJECT_KEY", "ITWORK2")
 JIRA_BASE_URL = credential("JIRA_BASE_URL").rstrip("/")
 JIRA_API_TOKEN = credential("JIRA_API_TOKEN")
 
+SEARCH_PAGE_SIZE = 100
+ISSUE_FIELDS = "summary,status,priority,issuetype,labels,updated"
+# The active sprint is looked up again after this long, or once it has ended.
+SPRINT_CACHE_SECONDS = 6 * 3600
+# Overlap between incremental windows; Jira's relative dates have minute precision.
+UPDATED_OVERLAP_MINUTES = 5
+
+_http = shared_client()
+
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        try:
+            return json.loads(STATE_FILE.read_text())
+        except json.JSONDecodeError:
+            pass
+    return {}
+
 
-def set_last_checked(ts: str):
-    STATE_FILE.write_text(json.dumps({"last_checked": ts}))
+def save_state(state: dict):
+    STATE_FILE.write_text(json.dumps(state))
+
+
+def set_last_checked(ts: str, state: dict | None = None):
+    state = dict(state or load_state())
+    state["last_checked"] = ts
+    save_state(state)
 
 
 def _jira_get(path: str, params: dict[str, str] | None = None) -> dict:
     if not JIRA_BASE_URL or not JIRA_USER or not JIRA_API_TOKEN:
         raise RuntimeError("Missing Jira credentials")
 
-    query = ""
-    if params:
-        query = "?" + urllib.parse.urlencode(params)
-
     token = b64encode(f"{JIRA_USER}:{JIRA_API_TOKEN}".encode("utf-8")).decode("ascii")
-    request = urllib.request.Request(
-        f"{JIRA_BASE_URL}{path}{query}",
+    run = current_run("jira")
+    # Telemetry counts calls per endpoint, not per board/sprint id.
+    endpoint = re.sub(r"/\d+(?=/|$)", "/{id}", path)
+    return _http.request(
+        "GET",
+        f"{JIRA_BASE_URL}{path}",
+        params=params,
         headers={
             "Authorization": f"Basic {token}",
             "Accept": "application/json",
         },
-    )
-    with urllib.request.urlopen(request, timeout=30) as response:
-        return json.loads(response.read())
+        before_send=lambda: run.api_call(endpoint),
+        on_backoff=run.rate_limited,
+    ).json()
 
 
 def _pick_board(boards: list[dict]) -> dict | None:
@@ -102,47 +130,101 @@ def _issue_url(issue_key: str) -> str:
     return f"{JIRA_BASE_URL}/browse/{issue_key}" if issue_key else ""
 
 
-def fetch_jira_issues() -> list[dict]:
-    if not JIRA_BASE_URL or not JIRA_USER or not JIRA_API_TOKEN:
-        print(f"[{datetime.now()}] Jira credentials missing, skipping sync.")
-        return []
+def _parse_iso(raw: str) -> datetime | None:
+    try:
+        parsed = datetime.fromisoformat(str(raw or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-    board_payload = _jira_get(
-        "/rest/agile/1.0/board",
-        {"projectKeyOrId": JIRA_PROJECT_KEY, "maxResults": "50"},
-    )
-    board = _pick_board(board_payload.get("values", []))
 
-    sprint = None
-    if board and board.get("id"):
+def resolve_board_and_sprint(state: dict, now: float | None = None) -> tuple[int | None, int | None]:
+    """Board and active sprint ids, from ``state`` while the cache is valid.
+
+    The board is cached for good once found; the sprint until it ends or
+    SPRINT_CACHE_SECONDS pass. ``state`` is updated in place.
+    """
+    now = time.time() if now is None else now
+    board_id = state.get("board_id")
+    if not board_id:
+        board_payload = _jira_get(
+            "/rest/agile/1.0/board",
+            {"projectKeyOrId": JIRA_PROJECT_KEY, "maxResults": "50"},
+        )
+        board = _pick_board(board_payload.get("values", []))
+        board_id = (board or {}).get("id")
+        state["board_id"] = board_id
+        state.pop("sprint_checked_at", None)
+
+    sprint_end = _parse_iso(state.get("sprint_end", ""))
+    sprint_fresh = (
+        now - float(state.get("sprint_checked_at") or 0) < SPRINT_CACHE_SECONDS
+        and (sprint_end is None or sprint_end.timestamp() > now)
+    )
+    if board_id and not sprint_fresh:
         sprint_payload = _jira_get(
-            f"/rest/agile/1.0/board/{board['id']}/sprint",
+            f"/rest/agile/1.0/board/{board_id}/sprint",
             {"state": "active", "maxResults": "20"},
         )
-        sprint = _pick_active_sprint(sprint_payload.get("values", []))
+        sprint = _pick_active_sprint(sprint_payload.get("values", [])) or {}
+        state["sprint_id"] = sprint.get("id")
+        state["sprint_end"] = sprint.get("endDate", "")
+        state["sprint_checked_at"] = now
+    return board_id, state.get("sprint_id") if board_id else None
 
-    if sprint and sprint.get("id"):
-        jql = (
-            f'assignee = "{JIRA_USER}" AND project = {JIRA_PROJECT_KEY} '
-            f'AND sprint = {sprint["id"]} ORDER BY priority DESC, status ASC'
+
+def _search_issues(jql: str) -> list[dict]:
+    """Every issue matching ``jql``, following startAt pagination."""
+    issues = []
+    start_at = 0
+    while True:
+        payload = _jira_get(
+            "/rest/api/3/search",
+            {
+                "jql": jql,
+                "fields": ISSUE_FIELDS,
+                "startAt": str(start_at),
+                "maxResults": str(SEARCH_PAGE_SIZE),
+            },
         )
+        page = payload.get("issues", [])
+        issues.extend(page)
+        start_at += len(page)
+        if not page or start_at >= int(payload.get("total") or 0):
+            return issues
+
+
+def fetch_jira_issues(state: dict | None = None, now: float | None = None) -> list[dict]:
+    """Issues in the active sprint (or open ones) updated since the last check.
+
+    Without a ``last_checked`` in ``state``, or when the active sprint
+    changed, every matching issue is fetched.
+    """
+    if not JIRA_BASE_URL or not JIRA_USER or not JIRA_API_TOKEN:
+        print(f"[{datetime.now()}] Jira credentials missing, skipping sync.")
+        return []
+
+    state = state if state is not None else {}
+    now = time.time() if now is None else now
+    previous_sprint = state.get("sprint_id")
+    _board_id, sprint_id = resolve_board_and_sprint(state, now)
+
+    if sprint_id:
+        jql = f'assignee = "{JIRA_USER}" AND project = {JIRA_PROJECT_KEY} AND sprint = {sprint_id}'
     else:
         jql = (
             f'assignee = "{JIRA_USER}" AND project = {JIRA_PROJECT_KEY} '
-            "AND statusCategory != Done ORDER BY priority DESC, status ASC"
+            "AND statusCategory != Done"
         )
-
-    payload = _jira_get(
-        "/rest/api/3/search",
-        {
-            "jql": jql,
-            "fields": "summary,status,priority,issuetype,labels,updated",
-            "maxResults": "30",
-        },
-    )
+    last_checked = _parse_iso(state.get("last_checked", ""))
+    if last_checked and sprint_id == previous_sprint:
+        minutes = int((now - last_checked.timestamp()) // 60) + UPDATED_OVERLAP_MINUTES
+        # Relative minutes sidestep the Jira profile timezone absolute dates use.
+        jql += f' AND updated >= "-{minutes}m"'
+    jql += " ORDER BY priority DESC, status ASC"
 
     issues = []
-    for issue in payload.get("issues", []):
+    for issue in _search_issues(jql):
         fields = issue.get("fields") or {}
         issues.append(
             {
@@ -150,6 +232,7 @@ def fetch_jira_issues() -> list[dict]:
                 "summary": fields.get("summary", ""),
                 "status": (fields.get("status") or {}).get("name", ""),
                 "priority": ((fields.get("priority") or {}).get("name") or "needs-response"),
+                "labels": fields.get("labels") or [],
                 "updated": fields.get("updated", ""),
                 "url": _issue_url(issue.get("key", "")),
             }
@@ -157,70 +240,77 @@ def fetch_jira_issues() -> list[dict]:
     return issues
 
 
-def write_card(conn: sqlite3.Connection, issue: dict):
+def card_for_issue(issue: dict) -> dict:
+    """The card an issue maps to, as the dashboard's ``cards`` message takes it."""
     jira_key = issue.get("key", "")
     summary = f"{jira_key} — {issue.get('summary', '')}".strip()
-    proposed = json.dumps(
-        [
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "summary": summary,
+        "classification": str(issue.get("priority") or "needs-response").lower(),
+        "proposed_actions": [
             {
                 "type": "review_jira_issue",
                 "draft": f"Review and update Jira issue {jira_key}: {issue.get('summary', '')}",
                 "source": "jira",
                 "url": issue.get("url", ""),
             }
-        ]
-    )
-    conn.execute(
-        """INSERT INTO cards
-           (source, timestamp, summary, classification, status, proposed_actions, execution_status)
-           VALUES (?, ?, ?, ?, 'pending', ?, 'not_run')
-           ON CONFLICT(source, summary) DO UPDATE SET
-               timestamp=excluded.timestamp,
-               classification=excluded.classification,
-               proposed_actions=excluded.proposed_actions,
-               execution_status='not_run'""",
-        (
-            "jira",
-            datetime.now(timezone.utc).isoformat(),
-            summary,
-            str(issue.get("priority") or "needs-response").lower(),
-            proposed,
-        ),
-    )
+        ],
+    }
 
 
 def main():
     try:
-        with single_instance("jira-poller"):
-            issues = fetch_jira_issues()
+        with single_instance("jira-poller"), track_run("jira", DB_PATH) as run:
+            state = load_state()
+            checked_at = datetime.now(timezone.utc)
+            with run.phase("fetch"):
+                issues = fetch_jira_issues(state, checked_at.timestamp())
+            run.count(fetched=len(issues))
             if not issues:
-                print(f"[{datetime.now()}] No Jira issues found.")
+                print(f"[{datetime.now()}] No Jira issues changed.")
+                set_last_checked(checked_at.isoformat(), state)
                 return
 
-            conn = sqlite3.connect(DB_PATH)
-            try:
-                for issue in issues:
-                    write_card(conn, issue)
-                conn.commit()
-            finally:
-                conn.close()
+            ensure_inbox_schema(DB_PATH)
+            # The dashboard applies the upserts on its single writer; while it
+            # is down they wait durably in the ingest spool, which is enough
+            # to move the window on.
+            with run.phase("db_write"):
+                push_cards("jira", [card_for_issue(issue) for issue in issues])
+            run.count(written=len(issues))
 
             # Upsert into tasks.db if available
             if HAS_TASKS_DB:
-                for issue in issues:
-                    try:
-                        tasks_db.upsert_jira_task(
-                            jira_key=issue["key"],
-                            title=issue.get("summary", ""),
-                            jira_status=issue.get("status", ""),
-                            priority=issue.get("priority", "Medium"),
-                            metadata={"url": issue.get("url", ""), "labels": issue.get("labels", [])},
+                try:
+                    with run.phase("tasks"):
+                        counts = tasks_db.upsert_jira_tasks(
+                            [
+                                {
+                                    "jira_key": issue["key"],
+                                    "title": issue.get("summary", ""),
+                                    "jira_status": issue.get("status", ""),
+                                    "priority": issue.get("priority", "Medium"),
+                                    "metadata": {"url": issue.get("url", ""), "labels": issue.get("labels", [])},
+                                }
+                                for issue in issues
+                            ]
                         )
-                    except Exception as exc:
-                        print(f"[{datetime.now()}] tasks_db upsert failed for {issue.get('key', '?')}: {exc}")
-                print(f"[{datetime.now()}] Synced {len(issues)} issues to tasks.db")
-
-            set_last_checked(datetime.now(timezone.utc).isoformat())
+                    print(
+                        f"[{datetime.now()}] Synced {len(issues)} issues to tasks.db "
+                        f"({counts['created']} new, {counts['updated']} updated, {counts['unchanged']} unchanged)"
+                    )
+                except Exception as exc:
+                    # The window stays where it was so the next run fetches
+                    # these issues again; they may not change in Jira soon.
+                    print(f"[{datetime.now()}] tasks_db upsert failed: {exc}")
+                    run.fail(exc)
+                    return
+
+            # The check time is taken before the fetch so nothing updated
+            # meanwhile falls between two windows. It only advances once
+            # every write above succeeded.
+            set_last_checked(checked_at.isoformat(), state)
             print(f"[{datetime.now()}] Processed {len(issues)} Jira issues.")
     except RuntimeError as exc:
         print(f"[{datetime.now()}] {exc}")
@@ -12,6 +12,13 @@ from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from typing import Optional
 
+try:
+    # dashboard/migrate.py owns the inbox.db schema (including ``plans``).
+    from migrate import ensure_migrated
+    HAS_MIGRATIONS = True
+except ImportError:
+    HAS_MIGRATIONS = False
+
 
 # ---------------------------------------------------------------------------
 # Data classes
@@ -141,6 +148,9 @@ class PlanStore:
     # ------------------------------------------------------------------
 
     def _ensure_schema(self) -> None:
+        if HAS_MIGRATIONS:
+            ensure_migrated(self.db_path)
+            return
         conn = sqlite3.connect(self.db_path)
         try:
             conn.execute("""
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""Shared HTTP client for eng-buddy pollers.
+
+Every poller talks to its API through one process-wide ``PollerHTTPClient``
+(``shared_client()``), which:
+
+- keeps a few keep-alive connections per host, so a poll reuses its TLS
+  session instead of handshaking for every call;
+- revalidates repeat GETs with ``If-None-Match``/``If-Modified-Since`` and
+  answers a 304 from its cache;
+- retries 429/5xx answers and dropped connections with exponential backoff
+  and jitter, waiting out ``Retry-After`` or rate-limit reset headers for
+  every thread using that host;
+- retries once after a 401 when the caller can re-authenticate;
+- counts requests, errors, retries and latency per host (``stats()``).
+
+Failed calls raise ``urllib.error.HTTPError``/``URLError`` so the pollers'
+existing handlers keep working.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import random
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_TIMEOUT_SECONDS = 30
+MAX_IDLE_PER_HOST = 8
+# Idle connections older than this are dropped rather than risking one the
+# server has already closed.
+IDLE_TIMEOUT_SECONDS = 50
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 30
+# A server asking for a longer wait than this fails the call instead of
+# parking the poller.
+MAX_SERVER_DELAY_SECONDS = 120
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+CONDITIONAL_CACHE_ENTRIES = 256
+CONDITIONAL_CACHE_MAX_BODY_BYTES = 2 * 1024 * 1024
+LATENCY_SAMPLES = 512
+USER_AGENT = "eng-buddy-poller (gzip)"
+# Raised while sending on a pooled connection the server already closed.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class Response:
+    """A fully read response; ``from_cache`` is set when a 304 was answered from the cache."""
+
+    def __init__(self, status, headers, body, url, from_cache=False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.from_cache = from_cache
+
+    def text(self):
+        return self.body.decode("utf-8", "replace")
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+
+def _parse_reset(value, now):
+    """Seconds until a rate-limit reset given as a delta, an epoch or an ISO time."""
+    value = str(value or "").strip()
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, when.timestamp() - now)
+    # Epoch seconds (GitHub/Slack style) versus a delta (IETF RateLimit-Reset).
+    return max(0.0, number - now) if number > 1e9 else max(0.0, number)
+
+
+def server_delay(headers, now=None):
+    """The wait a response asks for, in seconds, or None when it names none.
+
+    ``Retry-After`` (seconds or an HTTP date) wins; otherwise a rate-limit
+    reset header is used.
+    """
+    now = time.time() if now is None else now
+    retry_after = str(headers.get("Retry-After") or "").strip()
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+    return _parse_reset(headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset"), now)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_CAP_SECONDS):
+    """Exponential backoff with equal jitter: half of each step is fixed, half random."""
+    step = min(cap, base * (2 ** attempt))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+def _jittered(delay):
+    """A server-named wait plus up to 10% (at most 1s) so waiting threads do not return in lockstep."""
+    return delay + random.uniform(0, min(1.0, delay * 0.1))
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))]
+
+
+class _Host:
+    """Pooled connections, the shared backoff deadline and counters for one host."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = []
+        self.blocked_until = 0.0
+        self.counters = Counter()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+
+class PollerHTTPClient:
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT_SECONDS,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE_SECONDS,
+        backoff_cap=BACKOFF_CAP_SECONDS,
+        max_idle_per_host=MAX_IDLE_PER_HOST,
+        cache_entries=CONDITIONAL_CACHE_ENTRIES,
+        sleep=time.sleep,
+        clock=time.monotonic,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_idle_per_host = max_idle_per_host
+        self.cache_entries = cache_entries
+        self._sleep = sleep
+        self._clock = clock
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._ssl_context = None
+
+    # -- public API ----------------------------------------------------------
+
+    def request(
+        self,
+        method,
+        url,
+        params=None,
+        headers=None,
+        data=None,
+        json_body=None,
+        timeout=None,
+        retries=None,
+        conditional=None,
+        reauth=None,
+        before_send=None,
+        on_backoff=None,
+    ):
+        """Send a request and return a ``Response`` once it succeeded.
+
+        ``data`` may be bytes or a dict (form-encoded); ``json_body`` is sent
+        as JSON. GETs are conditional unless ``conditional=False``.
+        ``reauth()`` returns replacement headers and is called at most once,
+        after a 401. ``before_send()`` runs before every attempt (a poller's
+        own rate budget) and ``on_backoff(seconds)`` whenever a retry waits.
+        """
+        if params:
+            url += ("&" if "?" in url else "?") + urllib.parse.urlencode(params, doseq=True)
+        headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **(headers or {})}
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        elif isinstance(data, dict):
+            data = urllib.parse.urlencode(data).encode("utf-8")
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        conditional = method == "GET" if conditional is None else conditional
+        retries = self.max_retries if retries is None else retries
+
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host = self._host(key)
+        attempt = 0
+        reauthed = False
+        while True:
+            self._wait(host)
+            if before_send is not None:
+                before_send()
+            cached = self._cached(url, headers) if conditional else None
+            send_headers = dict(headers)
+            if cached is not None:
+                if cached["etag"]:
+                    send_headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    send_headers["If-Modified-Since"] = cached["last_modified"]
+            try:
+                status, response_headers, body = self._send(host, key, method, target, send_headers, data, timeout)
+            except (OSError, http.client.HTTPException) as exc:
+                self._count(host, "errors")
+                if attempt >= retries:
+                    raise urllib.error.URLError(exc) from exc
+                self._back_off(host, backoff_delay(attempt, self.backoff_base, self.backoff_cap), on_backoff)
+                attempt += 1
+                continue
+
+            if status == 304 and cached is not None:
+                self._count(host, "not_modified")
+                return Response(200, cached["headers"], cached["body"], url, from_cache=True)
+            if status == 401 and reauth is not None and not reauthed:
+                reauthed = True
+                headers = {**headers, **reauth()}
+                continue
+            if status in RETRY_STATUSES and attempt < retries:
+                delay = server_delay(response_headers)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                elif delay <= MAX_SERVER_DELAY_SECONDS:
+                    delay = _jittered(delay)
+                if delay <= MAX_SERVER_DELAY_SECONDS:
+                    self._back_off(host, delay, on_backoff)
+                    attempt += 1
+                    continue
+            if status >= 400:
+                self._count(host, "errors")
+                raise urllib.error.HTTPError(
+                    url, status, http.client.responses.get(status, ""), response_headers, io.BytesIO(body)
+                )
+
+            self._note_rate_limit(host, response_headers)
+            if conditional and status == 200:
+                self._store(url, headers, response_headers, body)
+            return Response(status, response_headers, body, url)
+
+    def get_json(self, url, params=None, headers=None, **kwargs):
+        return self.request("GET", url, params=params, headers=headers, **kwargs).json()
+
+    def stats(self):
+        """Per-host counters and latency percentiles, keyed ``host:port``."""
+        with self._hosts_lock:
+            hosts = list(self._hosts.items())
+        report = {}
+        for (_scheme, hostname, port), host in hosts:
+            with host.lock:
+                entry = dict(host.counters)
+                samples = sorted(host.latencies)
+            if samples:
+                entry["latency_ms"] = {
+                    "p50": round(_percentile(samples, 0.5) * 1000, 1),
+                    "p95": round(_percentile(samples, 0.95) * 1000, 1),
+                    "max": round(samples[-1] * 1000, 1),
+                }
+            report[f"{hostname}:{port}"] = entry
+        return report
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._hosts_lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            with host.lock:
+                idle, host.idle = host.idle, []
+            for conn, _since in idle:
+                conn.close()
+
+    # -- connections ---------------------------------------------------------
+
+    def _host(self, key):
+        with self._hosts_lock:
+            return self._hosts.setdefault(key, _Host())
+
+    def _checkout(self, host, key, timeout, fresh=False):
+        """``(connection, reused)``: an idle pooled connection, or a new one."""
+        conn = None
+        with host.lock:
+            while host.idle and not fresh:
+                candidate, since = host.idle.pop()
+                if self._clock() - since < IDLE_TIMEOUT_SECONDS:
+                    conn = candidate
+                    break
+                candidate.close()
+            host.counters["connections_reused" if conn else "connections_opened"] += 1
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, hostname, port = key
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            return http.client.HTTPSConnection(hostname, port, timeout=timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(hostname, port, timeout=timeout), False
+
+    def _checkin(self, host, conn):
+        with host.lock:
+            if len(host.idle) < self.max_idle_per_host:
+                host.idle.append((conn, self._clock()))
+                return
+        conn.close()
+
+    def _send(self, host, key, method, target, headers, data, timeout):
+        """One round trip; a pooled connection the server dropped is replaced once."""
+        timeout = self.timeout if timeout is None else timeout
+        fresh = False
+        while True:
+            conn, reused = self._checkout(host, key, timeout, fresh=fresh)
+            started = time.perf_counter()
+            try:
+                conn.request(method, target, body=data, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and not fresh:
+                    self._count(host, "stale_connections")
+                    fresh = True
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            elapsed = time.perf_counter() - started
+            with host.lock:
+                host.counters["requests"] += 1
+                host.counters[f"status_{response.status // 100}xx"] += 1
+                host.latencies.append(elapsed)
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(host, conn)
+            if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+                body = gzip.decompress(body)
+            return response.status, response.headers, body
+
+    # -- backoff -------------------------------------------------------------
+
+    def _count(self, host, name):
+        with host.lock:
+            host.counters[name] += 1
+
+    def _wait(self, host):
+        while True:
+            with host.lock:
+                wait = host.blocked_until - self._clock()
+            if wait <= 0:
+                return
+            self._sleep(wait)
+
+    def _back_off(self, host, seconds, on_backoff=None):
+        with host.lock:
+            host.blocked_until = max(host.blocked_until, self._clock() + seconds)
+            host.counters["retries"] += 1
+        if on_backoff is not None:
+            on_backoff(seconds)
+
+    def _note_rate_limit(self, host, headers):
+        """Hold the host until its reset when a success spent the last of the quota."""
+        remaining = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+        if str(remaining or "").strip() not in ("0", "0.0"):
+            return
+        delay = _parse_reset(headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset"), time.time())
+        if delay:
+            with host.lock:
+                host.blocked_until = max(host.blocked_until, self._clock() + min(delay, MAX_SERVER_DELAY_SECONDS))
+
+    # -- conditional cache ---------------------------------------------------
+
+    @staticmethod
+    def _cache_key(url, headers):
+        # Responses are per credential: never serve one account's body to another.
+        auth = hashlib.sha256(str(headers.get("Authorization", "")).encode()).hexdigest()[:16]
+        return url, auth
+
+    def _cached(self, url, headers):
+        key = self._cache_key(url, headers)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _store(self, url, headers, response_headers, body):
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        key = self._cache_key(url, headers)
+        with self._cache_lock:
+            if not (etag or last_modified) or len(body) > CONDITIONAL_CACHE_MAX_BODY_BYTES:
+                self._cache.pop(key, None)
+                return
+            self._cache[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "headers": response_headers,
+                "body": body,
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client():
+    """The process-wide client, so pollers under the supervisor share pools and counters."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = PollerHTTPClient()
+        return _shared_client
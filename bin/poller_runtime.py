@@ -4,14 +4,28 @@
 from __future__ import annotations
 
 import contextlib
+import contextvars
 import fcntl
+import importlib
 import json
 import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 BASE_DIR = Path.home() / ".claude" / "eng-buddy"
 LOCK_DIR = BASE_DIR / "runtime" / "locks"
+# dashboard/migrate.py owns the inbox.db schema; it sits next to bin/ both in
+# the skills checkout and in the runtime dir.
+MIGRATIONS_DIR_CANDIDATES = [
+    Path(__file__).resolve().parent.parent / "dashboard",
+    BASE_DIR / "dashboard",
+]
 SETTINGS_CANDIDATES = [
     Path.home() / ".claude" / "settings.json",
     Path.home() / ".claude.json",
@@ -95,3 +109,262 @@ def single_instance(lock_name: str):
             fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
         finally:
             handle.close()
+
+
+def _load_dashboard_module(name: str):
+    for candidate in MIGRATIONS_DIR_CANDIDATES:
+        if (candidate / f"{name}.py").exists():
+            if str(candidate) not in sys.path:
+                sys.path.append(str(candidate))
+            break
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def load_migrations():
+    """Import the shared dashboard ``migrate`` module, or return None if absent."""
+    return _load_dashboard_module("migrate")
+
+
+def load_slack_directory():
+    """Import the shared dashboard ``slack_directory`` module, or return None if absent."""
+    return _load_dashboard_module("slack_directory")
+
+
+def load_ingest_channel():
+    """Import the shared dashboard ``ingest_channel`` module, or return None if absent."""
+    return _load_dashboard_module("ingest_channel")
+
+
+def ensure_inbox_schema(db_path) -> bool:
+    """Apply pending inbox.db migrations once per process before a poller writes."""
+    migrations = load_migrations()
+    if migrations is None:
+        return False
+    migrations.ensure_migrated(db_path)
+    return True
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate_per_minute`` sustained, ``burst`` up front."""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """``ThreadPoolExecutor`` whose tasks run in a copy of the submitter's context.
+
+    Worker threads otherwise start from an empty context, so anything the
+    caller keyed on a ``ContextVar`` (the supervisor's per-poller log routing)
+    would not reach them.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# poller_runs keeps this many recent runs per source (see PollerRun.save).
+RUN_HISTORY_PER_SOURCE = 500
+_active_runs: dict = {}
+
+
+class PollerRun:
+    """Timings and counters for one poller run, saved as a ``poller_runs`` row.
+
+    Worker threads add to the same run. Phase durations are summed across
+    threads, so phases that run concurrently can add up to more than the
+    run's wall time.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.phases = Counter()
+        self.api_calls = Counter()
+        self.items = Counter()
+        self.rate_limit_waits = 0
+        self.rate_limit_wait_seconds = 0.0
+        self.error_class = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.phases[name] += elapsed
+
+    def api_call(self, method: str, count: int = 1):
+        with self.lock:
+            self.api_calls[method] += count
+
+    def count(self, fetched: int = 0, written: int = 0, skipped: int = 0):
+        with self.lock:
+            self.items.update(fetched=fetched, written=written, skipped=skipped)
+
+    def rate_limited(self, seconds):
+        """Record a wait on a rate limit or retry backoff; zero-length waits are ignored."""
+        if seconds and seconds > 0:
+            with self.lock:
+                self.rate_limit_waits += 1
+                self.rate_limit_wait_seconds += seconds
+
+    def fail(self, exc: BaseException):
+        self.error_class = type(exc).__name__
+
+    def row(self) -> dict:
+        finished_at = datetime.now(timezone.utc)
+        with self.lock:
+            return {
+                "source": self.source,
+                "started_at": self.started_at.isoformat(),
+                "finished_at": finished_at.isoformat(),
+                "duration_ms": round((time.monotonic() - self.started) * 1000),
+                "status": "error" if self.error_class else "ok",
+                "error_class": self.error_class,
+                "phases_ms": json.dumps({name: round(seconds * 1000) for name, seconds in self.phases.items()}),
+                "api_calls": json.dumps(dict(self.api_calls)),
+                "items_fetched": self.items["fetched"],
+                "items_written": self.items["written"],
+                "items_skipped": self.items["skipped"],
+                "rate_limit_waits": self.rate_limit_waits,
+                "rate_limit_wait_ms": round(self.rate_limit_wait_seconds * 1000),
+            }
+
+    def save(self, db_path) -> bool:
+        """Insert this run and trim the source's history. Telemetry never fails a poll."""
+        row = self.row()
+        try:
+            ensure_inbox_schema(db_path)
+            conn = sqlite3.connect(db_path, timeout=10)
+            try:
+                with conn:
+                    conn.execute(
+                        f"INSERT INTO poller_runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                        tuple(row.values()),
+                    )
+                    conn.execute(
+                        """DELETE FROM poller_runs WHERE source = ? AND id <= (
+                               SELECT id FROM poller_runs WHERE source = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                           )""",
+                        (self.source, self.source, RUN_HISTORY_PER_SOURCE),
+                    )
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as exc:
+            print(f"[{datetime.now().strftime('%H:%M')}] Could not record {self.source} run telemetry: {exc}")
+            return False
+        return True
+
+
+@contextlib.contextmanager
+def track_run(source: str, db_path):
+    """Collect a ``PollerRun`` for the body and save it to ``db_path`` when the body ends.
+
+    An exception escaping the body is recorded as the run's error class and
+    re-raised; pollers that handle an error themselves call ``run.fail(exc)``.
+    """
+    run = PollerRun(source)
+    _active_runs[source] = run
+    try:
+        yield run
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            run.fail(exc)
+        raise
+    except BaseException as exc:
+        run.fail(exc)
+        raise
+    finally:
+        if _active_runs.get(source) is run:
+            del _active_runs[source]
+        run.save(db_path)
+
+
+def current_run(source: str) -> PollerRun:
+    """The run being tracked for ``source``, or a detached one nothing saves.
+
+    Lets API helpers count calls unconditionally, including when a test or
+    script calls them outside ``track_run``.
+    """
+    return _active_runs.get(source) or PollerRun(source)
+
+
+_ingest_client = None
+_ingest_client_lock = threading.Lock()
+# Cards per "cards" message, well under the channel's frame limit.
+CARD_BATCH_SIZE = 200
+
+
+def _ingest():
+    """The ingest channel module and this process's shared client, or ``(None, None)``."""
+    global _ingest_client
+    channel = load_ingest_channel()
+    if channel is None:
+        return None, None
+    with _ingest_client_lock:
+        if _ingest_client is None:
+            _ingest_client = channel.IngestClient()
+        return channel, _ingest_client
+
+
+def notify_dashboard(kind: str, payload: dict) -> bool:
+    """Send ``kind`` to the dashboard over the ingest channel; True once acknowledged.
+
+    The message is spooled on disk before it is sent, so one the dashboard
+    cannot take right now (down, restarting) is replayed in order by a later
+    call from any poller.
+    """
+    channel, client = _ingest()
+    if client is None:
+        return False
+    try:
+        return client.send(kind, payload)
+    except (OSError, channel.IngestError) as exc:
+        print(f"[{datetime.now().strftime('%H:%M')}] Could not spool dashboard {kind} notification: {exc}")
+        return False
+
+
+def push_cards(source: str, cards: list[dict]) -> bool:
+    """Hand card upserts for ``source`` to the dashboard's single writer.
+
+    Cards go out in ``CARD_BATCH_SIZE`` batches over the ingest channel and
+    are applied in order with every other poller's messages. Returns True once
+    all are acknowledged, False while some still wait in the spool. Raises
+    when a batch could not be spooled at all, so the caller keeps its
+    watermark and fetches the same items again.
+    """
+    channel, client = _ingest()
+    if client is None:
+        raise RuntimeError("ingest channel unavailable; cannot queue cards for the dashboard")
+    acknowledged = True
+    for start in range(0, len(cards), CARD_BATCH_SIZE):
+        batch = {"source": source, "cards": cards[start:start + CARD_BATCH_SIZE]}
+        acknowledged = client.send("cards", batch) and acknowledged
+    return acknowledged
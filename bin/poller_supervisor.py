@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+eng-buddy poller supervisor
+One resident process that hosts every poller as an asyncio task.
+
+launchd used to start a fresh interpreter per poller run, paying startup,
+imports, token/state reads and cold connections every few minutes. The
+supervisor imports each poller module once and calls its ``main()`` on a
+jittered per-source schedule in a worker thread, so module-level caches
+(Slack user directory, rate limiters, loaded credentials) survive between
+runs. A poller that raises or exits only fails its own run. Output is routed
+to the poller's usual log file, which the dashboard's status view reads;
+pollers fan out on ``poller_runtime.ContextThreadPoolExecutor`` so their
+worker threads' output follows.
+
+Control endpoint (127.0.0.1, ENG_BUDDY_SUPERVISOR_PORT, default 7779):
+  GET  /pollers            -> per-poller run status and per-host HTTP counters
+  POST /pollers/{id}/run   -> run now ({"status": "triggered" | "already_running"})
+
+SIGTERM/SIGINT stop scheduling and wait for in-flight runs to finish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import importlib.util
+import io
+import json
+import os
+import random
+import signal
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+from pathlib import Path
+
+from poller_http import shared_client
+
+BIN_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path.home() / ".claude" / "eng-buddy"
+SUPERVISOR_HOST = "127.0.0.1"
+SUPERVISOR_PORT = int(os.environ.get("ENG_BUDDY_SUPERVISOR_PORT", "7779"))
+# Each wait is stretched by up to this fraction so the pollers do not fire in
+# lockstep; the first runs are staggered over the same share. Waits are never
+# shortened: calendar-poller skips a run in the half-hour slot it already
+# fetched, so a wait under its 1800s interval could skip a whole slot.
+JITTER_FRACTION = 0.1
+SHUTDOWN_GRACE_SECONDS = 60
+
+POLLERS = (
+    {"id": "slack", "script": "slack-poller.py", "interval_seconds": 300, "log_file": "slack-poller.log"},
+    {"id": "gmail", "script": "gmail-poller.py", "interval_seconds": 600, "log_file": "gmail-poller.log"},
+    {"id": "calendar", "script": "calendar-poller.py", "interval_seconds": 1800, "log_file": "calendar-poller.log"},
+    {"id": "jira", "script": "jira-poller.py", "interval_seconds": 300, "log_file": "jira-poller.log"},
+    {
+        "id": "freshservice",
+        "script": "freshservice-enrichment.py",
+        "interval_seconds": 300,
+        "log_file": "freshservice-enrichment.log",
+    },
+)
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# The log the running poller writes to. A context variable rather than a
+# thread-local so the poller's worker threads, which run in a copy of its
+# context, write to the same file.
+_log_target: contextvars.ContextVar = contextvars.ContextVar("poller_log_target", default=None)
+
+
+class _ThreadRoutedStream(io.TextIOBase):
+    """``sys.stdout``/``sys.stderr`` stand-in that writes to the running poller's log."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def _target(self):
+        return _log_target.get() or self.fallback
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def writable(self):
+        return True
+
+
+class PollerSupervisor:
+    def __init__(self, pollers=POLLERS, bin_dir=BIN_DIR, log_dir=BASE_DIR, jitter=JITTER_FRACTION):
+        self.pollers = {poller["id"]: dict(poller) for poller in pollers}
+        self.bin_dir = Path(bin_dir)
+        self.log_dir = Path(log_dir)
+        self.jitter = jitter
+        self.status = {
+            poller_id: {
+                "runs": 0,
+                "failures": 0,
+                "running": False,
+                "last_started_at": None,
+                "last_finished_at": None,
+                "last_duration_seconds": None,
+                "last_error": None,
+                "next_run_at": None,
+            }
+            for poller_id in self.pollers
+        }
+        self._modules = {}
+        self._wake = {}
+        self._tasks = []
+        self._stopping = None
+        self._server = None
+
+    # -- running one poller --------------------------------------------------
+
+    def _load(self, poller_id):
+        module = self._modules.get(poller_id)
+        if module is None:
+            if str(self.bin_dir) not in sys.path:
+                sys.path.insert(0, str(self.bin_dir))
+            script = self.bin_dir / self.pollers[poller_id]["script"]
+            spec = importlib.util.spec_from_file_location(f"engbuddy_{poller_id}_poller", script)
+            module = importlib.util.module_from_spec(spec)
+            assert spec.loader is not None
+            spec.loader.exec_module(module)
+            self._modules[poller_id] = module
+        return module
+
+    def _run_blocking(self, poller_id):
+        """Run one poller's ``main()`` in this thread with output sent to its log."""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.log_dir / self.pollers[poller_id]["log_file"], "a", encoding="utf-8") as log:
+            token = _log_target.set(log)
+            try:
+                self._load(poller_id).main()
+            except SystemExit as exc:
+                if exc.code not in (None, 0):
+                    raise RuntimeError(f"exited with status {exc.code}") from exc
+            except BaseException:
+                traceback.print_exc(file=log)
+                raise
+            finally:
+                _log_target.reset(token)
+
+    async def run_once(self, poller_id):
+        """Run a poller now; returns True on success. Failures never propagate."""
+        status = self.status[poller_id]
+        status["running"] = True
+        status["last_started_at"] = _utc_now()
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(self._run_blocking, poller_id)
+            status["last_error"] = None
+            return True
+        except Exception as exc:
+            status["failures"] += 1
+            status["last_error"] = f"{type(exc).__name__}: {exc}"
+            print(f"[{datetime.now().strftime('%H:%M')}] {poller_id} run failed: {status['last_error']}")
+            return False
+        finally:
+            status["runs"] += 1
+            status["running"] = False
+            status["last_finished_at"] = _utc_now()
+            status["last_duration_seconds"] = round(time.monotonic() - started, 3)
+
+    # -- scheduling ----------------------------------------------------------
+
+    def _delay(self, poller_id, first=False):
+        interval = float(self.pollers[poller_id]["interval_seconds"])
+        if first:
+            return random.uniform(0, interval * self.jitter)
+        return interval * (1 + random.uniform(0, self.jitter))
+
+    async def _schedule(self, poller_id):
+        wake = self._wake[poller_id]
+        delay = self._delay(poller_id, first=True)
+        while not self._stopping.is_set():
+            self.status[poller_id]["next_run_at"] = datetime.fromtimestamp(
+                time.time() + delay, tz=timezone.utc
+            ).isoformat()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            if self._stopping.is_set():
+                break
+            await self.run_once(poller_id)
+            delay = self._delay(poller_id)
+
+    def trigger(self, poller_id) -> str:
+        """Wake ``poller_id``'s schedule for an immediate run."""
+        if poller_id not in self.pollers:
+            raise KeyError(poller_id)
+        if self.status[poller_id]["running"]:
+            return "already_running"
+        self._wake[poller_id].set()
+        return "triggered"
+
+    # -- control endpoint ----------------------------------------------------
+
+    async def _handle_control(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            length = 0
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    length = int(value.strip() or 0)
+            if length:
+                await reader.readexactly(length)
+            code, body = self._route(*(request_line[:2] if len(request_line) >= 2 else ("", "")))
+        except (ValueError, asyncio.IncompleteReadError):
+            code, body = 400, {"error": "bad request"}
+        data = json.dumps(body).encode()
+        reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[code]
+        writer.write(
+            f"HTTP/1.1 {code} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+        writer.close()
+
+    def _route(self, method, path):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["pollers"]:
+            if method != "GET":
+                return 405, {"error": "method not allowed"}
+            return 200, {"pollers": self.status, "http": shared_client().stats()}
+        if len(parts) == 3 and parts[0] == "pollers" and parts[2] == "run":
+            if method != "POST":
+                return 405, {"error": "method not allowed"}
+            try:
+                return 202, {"status": self.trigger(parts[1]), "poller": parts[1]}
+            except KeyError:
+                return 404, {"error": f"unknown poller: {parts[1]}"}
+        return 404, {"error": "not found"}
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self, host=SUPERVISOR_HOST, port=SUPERVISOR_PORT):
+        self._stopping = asyncio.Event()
+        self._wake = {poller_id: asyncio.Event() for poller_id in self.pollers}
+        self._tasks = [asyncio.ensure_future(self._schedule(poller_id)) for poller_id in self.pollers]
+        if port is not None:
+            self._server = await asyncio.start_server(self._handle_control, host, port)
+        return self
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1] if self._server else None
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+            for wake in self._wake.values():
+                wake.set()
+
+    async def shutdown(self, grace_seconds=SHUTDOWN_GRACE_SECONDS):
+        """Stop scheduling, then wait up to ``grace_seconds`` for running polls."""
+        self.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        done, pending = await asyncio.wait(self._tasks, timeout=grace_seconds)
+        for task in pending:
+            task.cancel()
+        return not pending
+
+    async def serve(self, host=SUPERVISOR_HOST, port=SUPERVISOR_PORT):
+        await self.start(host, port)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stop)
+        print(f"[{datetime.now().strftime('%H:%M')}] Supervising {', '.join(self.pollers)} on {host}:{self.port}")
+        await self._stopping.wait()
+        clean = await self.shutdown()
+        print(f"[{datetime.now().strftime('%H:%M')}] Supervisor stopped{'' if clean else ' (runs abandoned)'}")
+
+
+def main():
+    sys.stdout = _ThreadRoutedStream(sys.stdout)
+    sys.stderr = _ThreadRoutedStream(sys.stderr)
+    asyncio.run(PollerSupervisor().serve())
+
+
+if __name__ == "__main__":
+    main()
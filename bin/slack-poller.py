@@ -10,13 +10,21 @@ import os
 import re
 import sqlite3
 import subprocess
+import threading
 import time
-import urllib.error
-import urllib.parse
-import urllib.request
 from datetime import datetime, date, timezone
 from pathlib import Path
-from poller_runtime import single_instance
+from poller_http import shared_client
+from poller_runtime import (
+    ContextThreadPoolExecutor,
+    TokenBucket,
+    current_run,
+    ensure_inbox_schema,
+    load_slack_directory,
+    notify_dashboard,
+    single_instance,
+    track_run,
+)
 
 BASE_DIR = Path.home() / ".claude" / "eng-buddy"
 STATE_FILE = BASE_DIR / "slack-poller-state.json"
@@ -26,7 +34,32 @@ WATCHED_THREADS_FILE = BASE_DIR / "watched-threads.json"
 LOOKBACK_DAYS = 3
 EXCLUDED_CHANNELS = {"critical-broadcast"}
 BROADCAST_MARKERS = {"<!here>", "<!channel>", "<!everyone>", "@here", "@channel", "@everyone"}
-DASHBOARD_INVALIDATE_URL = "http://127.0.0.1:7777/api/cache-invalidate"
+# Conversations scanned in parallel; 1 keeps the old one-at-a-time walk.
+SLACK_SCAN_WORKERS = max(1, int(os.environ.get("ENG_BUDDY_SLACK_WORKERS", "6") or 6))
+# Runs between full re-scans of the lookback window; in between only deltas
+# past the stored channel/thread marks are fetched.
+SLACK_FULL_SYNC_INTERVAL_SECONDS = 6 * 3600
+# https://api.slack.com/apis/rate-limits — requests per minute per method tier.
+SLACK_TIER_RATES_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+SLACK_METHOD_TIERS = {
+    "auth.test": 4,
+    "users.info": 4,
+    "users.list": 2,
+    "users.conversations": 3,
+    "conversations.list": 2,
+    "conversations.history": 3,
+    "conversations.replies": 3,
+}
+# Run telemetry groups time spent in Slack calls by what they fetch.
+SLACK_METHOD_PHASES = {
+    "auth.test": "auth",
+    "users.info": "users",
+    "users.list": "users",
+    "users.conversations": "conversations",
+    "conversations.list": "conversations",
+    "conversations.history": "history",
+    "conversations.replies": "replies",
+}
 
 
 # ---------------------------------------------------------------------------
@@ -47,18 +80,7 @@ def save_state(state):
 
 
 def invalidate_dashboard_cache(source="slack"):
-    payload = json.dumps({"source": source}).encode("utf-8")
-    request = urllib.request.Request(
-        DASHBOARD_INVALIDATE_URL,
-        data=payload,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(request, timeout=2):
-            return
-    except (urllib.error.URLError, TimeoutError, OSError):
-        return
+    notify_dashboard("invalidate", {"source": source})
 
 
 # ---------------------------------------------------------------------------
@@ -184,29 +206,152 @@ def _load_slack_token_config():
     return "", ""
 
 
+class SlackRateLimiter:
+    """One bucket per Slack method, sized by its tier, plus a shared Retry-After pause.
+
+    Slack limits each method separately, so conversations.history and
+    conversations.replies each get their own tier-3 budget. A 429 on any
+    worker parks every worker until Slack's ``Retry-After`` has passed,
+    instead of each thread discovering the limit on its own.
+    """
+
+    def __init__(self, tier_rates=None, method_tiers=None):
+        self.tier_rates = tier_rates or SLACK_TIER_RATES_PER_MINUTE
+        self.method_tiers = method_tiers or SLACK_METHOD_TIERS
+        self.buckets = {}
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def bucket(self, method):
+        with self.lock:
+            bucket = self.buckets.get(method)
+            if bucket is None:
+                bucket = self.buckets[method] = TokenBucket(self.tier_rates[self.method_tiers.get(method, 3)])
+            return bucket
+
+    def acquire(self, method):
+        """Wait out any pause, then take a token for ``method``; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                wait = self.blocked_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        return waited + self.bucket(method).acquire()
+
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_rate_limiter = SlackRateLimiter()
+_http = shared_client()
+
+
 def _slack_api(method, token, params=None):
-    for attempt in range(4):
-        req = urllib.request.Request(
+    run = current_run("slack")
+
+    def before_send():
+        # Every attempt, retries included, spends from the method's budget.
+        run.rate_limited(_rate_limiter.acquire(method))
+        run.api_call(method)
+
+    def on_backoff(seconds):
+        _rate_limiter.pause(seconds)
+        run.rate_limited(seconds)
+
+    with run.phase(SLACK_METHOD_PHASES.get(method, method)):
+        payload = _http.request(
+            "POST",
             f"https://slack.com/api/{method}",
-            data=urllib.parse.urlencode(params or {}).encode(),
+            data=params or {},
             headers={"Authorization": f"Bearer {token}"},
-            method="POST",
-        )
+            before_send=before_send,
+            on_backoff=on_backoff,
+        ).json()
+    if payload.get("ok"):
+        return payload
+    raise RuntimeError(f"{method} failed: {payload}")
+
+
+_user_directories = {}
+_user_directories_lock = threading.Lock()
+
+
+class _ProcessUserCache:
+    """users.info memo for when the shared dashboard directory is not installed."""
+
+    def __init__(self, token):
+        self.token = token
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        return 0
+
+    def profile(self, user_id):
+        if not user_id:
+            return {}
+        with self._lock:
+            if user_id in self._users:
+                return self._users[user_id]
         try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                payload = json.loads(resp.read())
-        except urllib.error.HTTPError as exc:
-            if exc.code == 429 and attempt < 3:
-                retry_after = int(exc.headers.get("Retry-After", "1"))
-                time.sleep(max(1, retry_after))
-                continue
-            raise
+            profile = _slack_api("users.info", self.token, {"user": user_id}).get("user", {})
+        except Exception:
+            profile = {}
+        with self._lock:
+            return self._users.setdefault(user_id, profile)
+
+    def name(self, user_id):
+        profile = self.profile(user_id)
+        pdata = profile.get("profile", {})
+        return pdata.get("real_name") or pdata.get("display_name") or profile.get("name") or user_id
 
-        if payload.get("ok"):
-            return payload
-        raise RuntimeError(f"{method} failed: {payload}")
 
-    raise RuntimeError(f"{method} failed after retries")
+def _fetch_slack_user(token, user_id):
+    """users.info for the directory: ``{}`` when Slack answers ``ok: false``
+    (``user_not_found``), so only network and 5xx failures raise and get retried."""
+    try:
+        return _slack_api("users.info", token, {"user": user_id}).get("user", {})
+    except RuntimeError:
+        return {}
+
+
+def _user_directory(token, team_id=""):
+    """One user directory per token for the process, bulk-listed when stale.
+
+    Backed by the ``slack_users`` table in inbox.db, so users listed by one run
+    (or by the watched-thread pass) are not looked up again until the TTL.
+    Every call re-checks the TTL: under the supervisor the process, and so
+    the directory, outlives many runs.
+    """
+    with _user_directories_lock:
+        directory = _user_directories.get(token)
+        if directory is None:
+            directory_module = load_slack_directory()
+            if directory_module is None:
+                directory = _ProcessUserCache(token)
+            else:
+                directory = directory_module.SlackUserDirectory(
+                    DB_PATH,
+                    fetch_page=lambda cursor: _slack_api(
+                        "users.list",
+                        token,
+                        {"limit": str(directory_module.USERS_LIST_PAGE_SIZE), **({"cursor": cursor} if cursor else {})},
+                    ),
+                    fetch_user=lambda user_id: _fetch_slack_user(token, user_id),
+                    team_id=team_id,
+                )
+            _user_directories[token] = directory
+        try:
+            listed = directory.refresh()
+            if listed:
+                print(f"Slack user directory refreshed: {listed} user(s)")
+        except Exception as e:
+            print(f"Slack users.list unavailable, resolving users one at a time: {e}")
+        return directory
 
 
 def _message_sender_name(message, resolve_user_name):
@@ -219,10 +364,10 @@ def _message_sender_name(message, resolve_user_name):
     return ""
 
 
-def _build_my_mentions(token, me):
+def _build_my_mentions(me, user_profile):
     mentions = {f"<@{me}>"}
     try:
-        profile = _slack_api("users.info", token, {"user": me}).get("user", {})
+        profile = user_profile(me)
         pdata = profile.get("profile", {})
         for value in [profile.get("name"), pdata.get("display_name"), pdata.get("real_name")]:
             clean = _clean_text(value)
@@ -273,19 +418,25 @@ def _has_broadcast_marker(text):
     return any(marker in lowered for marker in BROADCAST_MARKERS)
 
 
-def _has_later_self_message(messages, me, message_ts, thread_ts=None):
-    for candidate in messages:
-        if candidate.get("user") != me:
-            continue
-        candidate_ts = float(candidate.get("ts", "0") or 0)
-        if candidate_ts <= message_ts:
+def _latest_self_messages(messages, me):
+    """Latest ts of my own messages, overall and per thread, in one sweep.
+
+    A message counts as responded when I posted after it: anywhere in the
+    conversation (``latest > ts``) or in its thread (``by_thread[thread] > ts``).
+    Returns ``(latest, by_thread)``; 0.0 means I never posted.
+    """
+    latest = 0.0
+    by_thread = {}
+    for message in messages:
+        if message.get("user") != me:
             continue
-        if thread_ts is not None:
-            candidate_thread_ts = candidate.get("thread_ts") or candidate.get("ts")
-            if candidate_thread_ts != thread_ts:
-                continue
-        return True
-    return False
+        message_ts = float(message.get("ts", "0") or 0)
+        if message_ts > latest:
+            latest = message_ts
+        thread_ts = message.get("thread_ts") or message.get("ts")
+        if message_ts > by_thread.get(thread_ts, 0.0):
+            by_thread[thread_ts] = message_ts
+    return latest, by_thread
 
 
 def _candidate_priority(item):
@@ -320,7 +471,6 @@ def _fetch_all_conversations(token):
         cursor = payload.get("response_metadata", {}).get("next_cursor", "")
         if not cursor:
             break
-        time.sleep(0.15)
     return conversations
 
 
@@ -344,7 +494,6 @@ def _fetch_conversation_history(token, channel_id, oldest):
         cursor = payload.get("response_metadata", {}).get("next_cursor", "")
         if not cursor or not batch:
             break
-        time.sleep(0.15)
     return messages
 
 
@@ -369,7 +518,6 @@ def _fetch_thread_replies(token, channel_id, thread_ts, oldest):
         cursor = payload.get("response_metadata", {}).get("next_cursor", "")
         if not cursor or not batch:
             break
-        time.sleep(0.15)
     return replies
 
 
@@ -412,42 +560,62 @@ def _record_candidate(bucket, item):
         bucket[key] = item
 
 
-def fetch_recent_participation_items(days=LOOKBACK_DAYS):
-    token, _team_id = _load_slack_token_config()
+def _ts_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _thread_key(channel_id, thread_ts):
+    return f"{channel_id}:{thread_ts}"
+
+
+def _scan_participation(days=LOOKBACK_DAYS, workers=None, marks=None):
+    """Scan joined conversations for participation candidates.
+
+    ``marks`` holds the high-water marks from the previous run
+    (``{"channels": {channel_id: ts}, "threads": {"channel:thread_ts": {...}}}``).
+    With marks, history is fetched from the channel mark (or from the oldest
+    tracked thread root, so the parents come back with their ``latest_reply``)
+    and only tracked threads whose parent shows a newer reply are re-read,
+    from their own mark. Every conversation still gets its history call:
+    ``updated`` from users.conversations tracks changes to the conversation
+    object (rename, topic, members), not new messages.
+    Returns ``(items, self_replies, new_marks)`` where ``self_replies`` lists
+    ``(channel_id, thread_ts or None, ts)`` for my own messages in the delta, so
+    older cards already in inbox.db can be marked responded.
+    """
+    token, team_id = _load_slack_token_config()
     if not token:
-        return []
+        return [], [], None
 
     try:
         me = _slack_api("auth.test", token).get("user_id", "")
         conversations = _fetch_all_conversations(token)
     except Exception as e:
         print(f"Slack direct retrieval unavailable: {e}")
-        return []
+        return [], [], None
 
     oldest = str(time.time() - days * 24 * 3600)
     oldest_float = float(oldest)
-    my_mentions = _build_my_mentions(token, me)
-    user_cache = {}
+    channel_marks = dict((marks or {}).get("channels") or {})
+    thread_marks = {
+        key: value
+        for key, value in ((marks or {}).get("threads") or {}).items()
+        if _ts_float(key.rpartition(":")[2]) >= oldest_float
+    }
+    tracked_by_channel = {}
+    for key, value in thread_marks.items():
+        channel_id, _sep, thread_ts = key.rpartition(":")
+        tracked_by_channel.setdefault(channel_id, []).append((thread_ts, _ts_float(value.get("latest_reply"))))
+
+    directory = _user_directory(token, team_id)
+    user_profile = directory.profile
+    user_name = directory.name
+    my_mentions = _build_my_mentions(me, user_profile)
     items = {}
 
-    def user_profile(user_id):
-        if not user_id:
-            return {}
-        if user_id not in user_cache:
-            user_cache[user_id] = _slack_api("users.info", token, {"user": user_id}).get("user", {})
-            time.sleep(0.05)
-        return user_cache[user_id]
-
-    def user_name(user_id):
-        profile = user_profile(user_id)
-        pdata = profile.get("profile", {})
-        return (
-            pdata.get("real_name")
-            or pdata.get("display_name")
-            or profile.get("name")
-            or user_id
-        )
-
     def is_human_sender(message):
         if message.get("bot_id") or message.get("subtype") == "bot_message" or message.get("bot_profile"):
             return False
@@ -471,25 +639,79 @@ def fetch_recent_participation_items(days=LOOKBACK_DAYS):
             continue
         recent_conversations.append(conv)
 
-    print(f"Scanning {len(recent_conversations)} joined Slack conversation(s) after exclusions...")
+    def thread_items(conv, channel_label, thread_ts, replies, found):
+        replied_at = _latest_self_messages(replies, me)[1].get(thread_ts, 0.0)
+        for reply in replies:
+            reply_ts = float(reply.get("ts", "0") or 0)
+            if reply_ts < oldest_float or reply.get("user") == me:
+                continue
 
-    for index, conv in enumerate(recent_conversations, start=1):
-        if index % 25 == 0:
-            print(f"Scanning Slack conversation {index}/{len(recent_conversations)}...")
+            sender = _message_sender_name(reply, user_name)
+            if sender.lower() == "jira":
+                continue
+
+            responded = replied_at > reply_ts
+            section, classification, draft_response = _classify_participation_item(reply.get("text"), responded)
+            found.append({
+                "sender": sender,
+                "channel": channel_label,
+                "channel_id": conv["id"],
+                "text": _clean_text(reply.get("text"))[:400],
+                "thread_ts": thread_ts,
+                "timestamp": datetime.fromtimestamp(reply_ts, timezone.utc).isoformat(),
+                "section": section,
+                "classification": classification,
+                "draft_response": draft_response,
+                "context_notes": "Message in a thread you participated in",
+                "responded": responded,
+            })
+
+    def scan_conversation(conv):
+        """Candidates and new marks for one conversation, in serial-walk order."""
+        found = []
+        self_replies = []
+        threads = {}
+        channel_mark = _ts_float(channel_marks.get(conv["id"]))
+        tracked = list(tracked_by_channel.get(conv["id"], []))
+        carried = {_thread_key(conv["id"], thread_ts): {"latest_reply": repr(mark)} for thread_ts, mark in tracked}
+        history_oldest = min([max(channel_mark, oldest_float), *(_ts_float(thread_ts) for thread_ts, _mark in tracked)])
         try:
-            history = _fetch_conversation_history(token, conv["id"], oldest)
+            raw_history = _fetch_conversation_history(token, conv["id"], repr(history_oldest))
         except Exception as e:
             print(f"Slack history failed for {conv.get('id')}: {e}")
-            continue
-
-        history = [m for m in history if m.get("type") == "message" and _clean_text(m.get("text"))]
-        if not history:
-            continue
+            return found, self_replies, channel_mark, carried
+        new_mark = max([channel_mark, *(_ts_float(m.get("ts")) for m in raw_history)])
+        tracked_ts = {thread_ts for thread_ts, _mark in tracked}
+        parents = {m.get("ts"): m for m in raw_history if m.get("ts") in tracked_ts}
+
+        history = [
+            m for m in raw_history
+            if m.get("type") == "message" and _clean_text(m.get("text")) and _ts_float(m.get("ts")) > channel_mark
+        ]
+        if not history and not tracked:
+            return found, self_replies, new_mark, threads
 
         history.sort(key=lambda m: float(m.get("ts", "0") or 0))
+        # A thread reply of mine in the delta (one also sent to the channel)
+        # whose root predates the mark: track that thread from now on instead
+        # of waiting for the next full scan to notice it.
+        for message in history:
+            thread_ts = message.get("thread_ts")
+            if (
+                message.get("user") == me
+                and thread_ts
+                and thread_ts != message.get("ts")
+                and thread_ts not in tracked_ts
+                and _ts_float(thread_ts) >= oldest_float
+            ):
+                tracked.append((thread_ts, oldest_float))
+                tracked_ts.add(thread_ts)
         channel_label = user_name(conv.get("user")) if conv.get("is_im") else (_clean_text(conv.get("name")) or conv.get("id"))
 
         if conv.get("is_im") or conv.get("is_mpim"):
+            latest_self, _by_thread = _latest_self_messages(history, me)
+            if latest_self:
+                self_replies.append((conv["id"], None, latest_self))
             for message in history:
                 message_ts = float(message.get("ts", "0") or 0)
                 if message_ts < oldest_float or message.get("user") == me:
@@ -503,31 +725,28 @@ def fetch_recent_participation_items(days=LOOKBACK_DAYS):
                 if sender.lower() == "jira":
                     continue
 
+                responded = latest_self > message_ts
                 if not (
                     is_human_sender(message)
                     or _mentions_me(message_text, my_mentions)
-                    or _has_later_self_message(history, me, message_ts)
+                    or responded
                 ):
                     continue
 
-                responded = _has_later_self_message(history, me, message_ts)
                 section, classification, draft_response = _classify_participation_item(message_text, responded)
-                _record_candidate(
-                    items,
-                    {
-                        "sender": sender,
-                        "channel": channel_label,
-                        "channel_id": conv["id"],
-                        "text": message_text[:400],
-                        "thread_ts": message.get("thread_ts") or message.get("ts"),
-                        "timestamp": datetime.fromtimestamp(message_ts, timezone.utc).isoformat(),
-                        "section": section,
-                        "classification": classification,
-                        "draft_response": draft_response,
-                        "context_notes": "Recent direct message" if not responded else "Recent direct message you already responded to",
-                        "responded": responded,
-                    },
-                )
+                found.append({
+                    "sender": sender,
+                    "channel": channel_label,
+                    "channel_id": conv["id"],
+                    "text": message_text[:400],
+                    "thread_ts": message.get("thread_ts") or message.get("ts"),
+                    "timestamp": datetime.fromtimestamp(message_ts, timezone.utc).isoformat(),
+                    "section": section,
+                    "classification": classification,
+                    "draft_response": draft_response,
+                    "context_notes": "Recent direct message" if not responded else "Recent direct message you already responded to",
+                    "responded": responded,
+                })
 
         for message in history:
             if float(message.get("ts", "0") or 0) < oldest_float:
@@ -546,22 +765,19 @@ def fetch_recent_participation_items(days=LOOKBACK_DAYS):
             mentions_me = _mentions_me(message_text, my_mentions)
             if mentions_me and not _has_broadcast_marker(message_text):
                 section, classification, draft_response = _classify_participation_item(message_text, False)
-                _record_candidate(
-                    items,
-                    {
-                        "sender": sender,
-                        "channel": channel_label,
-                        "channel_id": conv["id"],
-                        "text": message_text[:400],
-                        "thread_ts": message.get("thread_ts") or message.get("ts"),
-                        "timestamp": datetime.fromtimestamp(float(message["ts"]), timezone.utc).isoformat(),
-                        "section": section,
-                        "classification": classification,
-                        "draft_response": draft_response,
-                        "context_notes": "Recent mention in Slack",
-                        "responded": False,
-                    },
-                )
+                found.append({
+                    "sender": sender,
+                    "channel": channel_label,
+                    "channel_id": conv["id"],
+                    "text": message_text[:400],
+                    "thread_ts": message.get("thread_ts") or message.get("ts"),
+                    "timestamp": datetime.fromtimestamp(float(message["ts"]), timezone.utc).isoformat(),
+                    "section": section,
+                    "classification": classification,
+                    "draft_response": draft_response,
+                    "context_notes": "Recent mention in Slack",
+                    "responded": False,
+                })
 
             is_thread_root = message.get("reply_count") or message.get("thread_ts") == message.get("ts")
             if not is_thread_root:
@@ -583,44 +799,130 @@ def fetch_recent_participation_items(days=LOOKBACK_DAYS):
             if not participated:
                 continue
 
-            for reply in replies:
-                reply_ts = float(reply.get("ts", "0") or 0)
-                if reply_ts < oldest_float or reply.get("user") == me:
-                    continue
-
-                sender = _message_sender_name(reply, user_name)
-                if sender.lower() == "jira":
-                    continue
-
-                responded = _has_later_self_message(replies, me, reply_ts, thread_ts=thread_ts)
-                section, classification, draft_response = _classify_participation_item(reply.get("text"), responded)
-                _record_candidate(
-                    items,
-                    {
-                        "sender": sender,
-                        "channel": channel_label,
-                        "channel_id": conv["id"],
-                        "text": _clean_text(reply.get("text"))[:400],
-                        "thread_ts": thread_ts,
-                        "timestamp": datetime.fromtimestamp(reply_ts, timezone.utc).isoformat(),
-                        "section": section,
-                        "classification": classification,
-                        "draft_response": draft_response,
-                        "context_notes": "Message in a thread you participated in",
-                        "responded": responded,
-                    },
-                )
-
-        # Slack's history API gets flaky if we hammer conversation reads too quickly.
-        time.sleep(0.05)
-
-    return sorted(items.values(), key=lambda item: item["timestamp"], reverse=True)
-
-def write_to_inbox_db(item):
-    """Write a classified Slack message card to inbox.db."""
-    if not DB_PATH.exists():
-        return False
+            threads[_thread_key(conv["id"], thread_ts)] = {"latest_reply": replies[-1].get("ts") or thread_ts}
+            thread_items(conv, channel_label, thread_ts, replies, found)
 
+        # Participated threads whose root predates the channel mark: only
+        # replies newer than the thread's own mark.
+        for thread_ts, thread_mark in tracked:
+            key = _thread_key(conv["id"], thread_ts)
+            if key in threads:
+                continue
+            parent = parents.get(thread_ts)
+            if parent is not None and _ts_float(parent.get("latest_reply") or thread_ts) <= thread_mark:
+                threads[key] = carried.get(key, {"latest_reply": repr(thread_mark)})
+                continue
+            try:
+                replies = _fetch_thread_replies(token, conv["id"], thread_ts, repr(thread_mark))
+            except Exception as e:
+                print(f"Slack thread fetch failed for {conv.get('id')}:{thread_ts}: {e}")
+                threads[key] = {"latest_reply": repr(thread_mark)}
+                continue
+            latest = max([thread_mark, *(_ts_float(reply.get("ts")) for reply in replies)])
+            threads[key] = {"latest_reply": repr(latest)}
+            replies = [
+                reply for reply in replies
+                if reply.get("type") == "message"
+                and _clean_text(reply.get("text"))
+                and _ts_float(reply.get("ts")) > thread_mark
+            ]
+            if not replies:
+                continue
+            replies.sort(key=lambda reply: float(reply.get("ts", "0") or 0))
+            latest_self = _latest_self_messages(replies, me)[1].get(thread_ts, 0.0)
+            if latest_self:
+                self_replies.append((conv["id"], thread_ts, latest_self))
+            thread_items(conv, channel_label, thread_ts, replies, found)
+        return found, self_replies, new_mark, threads
+
+    workers = max(1, workers or SLACK_SCAN_WORKERS)
+    print(f"Scanning {len(recent_conversations)} joined Slack conversation(s) after exclusions ({workers} worker(s))...")
+
+    self_replies = []
+    new_marks = {"channels": {}, "threads": {}}
+    # map() yields in submission order, so candidates are recorded exactly as
+    # the one-worker walk would record them.
+    with ContextThreadPoolExecutor(max_workers=workers, thread_name_prefix="slack-scan") as pool:
+        scanned = pool.map(scan_conversation, recent_conversations)
+        for index, (conv, (found, replied, channel_mark, threads)) in enumerate(zip(recent_conversations, scanned), start=1):
+            if index % 25 == 0:
+                print(f"Scanning Slack conversation {index}/{len(recent_conversations)}...")
+            for item in found:
+                _record_candidate(items, item)
+            self_replies.extend(replied)
+            if channel_mark:
+                new_marks["channels"][conv["id"]] = repr(channel_mark)
+            new_marks["threads"].update(threads)
+
+    items = sorted(items.values(), key=lambda item: item["timestamp"], reverse=True)
+    return items, self_replies, new_marks
+
+
+def fetch_recent_participation_items(days=LOOKBACK_DAYS, workers=None):
+    """Full scan of the last ``days`` days, ignoring any stored marks."""
+    return _scan_participation(days=days, workers=workers)[0]
+
+
+def sync_recent_participation_items(state, days=LOOKBACK_DAYS, workers=None, now=None):
+    """Incremental scan driven by the marks kept under ``state["slack_sync"]``.
+
+    Falls back to a full scan when there are no marks yet, the lookback window
+    changed, or the last full scan is older than SLACK_FULL_SYNC_INTERVAL_SECONDS
+    (which also picks up threads I only joined since). Returns
+    ``(items, self_replies)`` and stores the new marks in ``state``.
+    """
+    now = time.time() if now is None else now
+    sync = state.get("slack_sync") or {}
+    full = (
+        not sync.get("full_sync_at")
+        or sync.get("days") != days
+        or now - _ts_float(sync.get("full_sync_at")) >= SLACK_FULL_SYNC_INTERVAL_SECONDS
+    )
+    items, self_replies, marks = _scan_participation(days=days, workers=workers, marks=None if full else sync)
+    if marks is None:
+        return items, self_replies
+    # Conversations missing from this listing keep their old mark.
+    channels = {} if full else dict(sync.get("channels") or {})
+    channels.update(marks["channels"])
+    state["slack_sync"] = {
+        "days": days,
+        "full_sync_at": now if full else sync.get("full_sync_at"),
+        "mode": "full" if full else "incremental",
+        "channels": channels,
+        "threads": marks["threads"],
+    }
+    return items, self_replies
+
+
+SLACK_CARD_UPSERT = """INSERT INTO cards
+   (source, timestamp, summary, classification, status,
+    proposed_actions, execution_status,
+    section, draft_response, context_notes, responded)
+   VALUES ('slack', ?, ?, ?, 'pending', ?, 'not_run', ?, ?, ?, ?)
+   ON CONFLICT(source, summary) DO UPDATE SET
+       timestamp=excluded.timestamp,
+       classification=excluded.classification,
+       status='pending',
+       proposed_actions=excluded.proposed_actions,
+       execution_status='not_run',
+       section=excluded.section,
+       draft_response=excluded.draft_response,
+       context_notes=excluded.context_notes,
+       responded=excluded.responded
+   WHERE (cards.responded = 0 OR excluded.responded = 1)
+     AND (cards.timestamp IS NOT excluded.timestamp
+          OR cards.classification IS NOT excluded.classification
+          OR cards.status IS NOT 'pending'
+          OR cards.proposed_actions IS NOT excluded.proposed_actions
+          OR cards.execution_status IS NOT 'not_run'
+          OR cards.section IS NOT excluded.section
+          OR cards.draft_response IS NOT excluded.draft_response
+          OR cards.context_notes IS NOT excluded.context_notes
+          OR cards.responded IS NOT excluded.responded)
+   RETURNING id"""
+
+
+def _slack_card_params(item):
     proposed_actions = json.dumps([{
         "type": "send_slack_reply",
         "channel_id": item.get("channel_id", ""),
@@ -630,63 +932,115 @@ def write_to_inbox_db(item):
         "sender": item.get("sender", ""),
         "channel_label": item.get("channel", ""),
     }])
+    return (
+        item.get("timestamp") or datetime.now(timezone.utc).isoformat(),
+        f"{item.get('sender') or 'Someone'} via {item.get('channel') or 'Slack'}: "
+        f"{(item.get('text') or item.get('context_notes') or item.get('draft_response') or '(no preview)')[:200]}",
+        item.get("classification", "fyi"),
+        proposed_actions,
+        item.get("section", "no-action"),
+        item.get("draft_response"),
+        item.get("context_notes"),
+        1 if item.get("responded") else 0,
+    )
+
 
+def write_items_to_inbox_db(items):
+    """Upsert classified Slack cards in one transaction.
+
+    The upsert's RETURNING row only comes back when the card was inserted or
+    something in it changed, so it doubles as the change check and re-seen
+    candidates cost neither a write nor a dashboard data-version bump. Returns
+    ``(changed_ids, responded_ids)``; the latter are the changed cards that
+    need cross-channel resolution. SQLite errors (a locked database) propagate
+    so the caller does not persist sync marks past messages it never wrote.
+    """
+    if not items or not DB_PATH.exists():
+        return [], []
+
+    changed_ids = []
+    responded_ids = []
+    conn = sqlite3.connect(DB_PATH)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        before = conn.total_changes
-        cursor = conn.execute(
-            """INSERT INTO cards
-               (source, timestamp, summary, classification, status,
-                proposed_actions, execution_status,
-                section, draft_response, context_notes, responded)
-               VALUES ('slack', ?, ?, ?, 'pending', ?, 'not_run', ?, ?, ?, ?)
-               ON CONFLICT(source, summary) DO UPDATE SET
-                   timestamp=excluded.timestamp,
-                   classification=excluded.classification,
-                   status='pending',
-                   proposed_actions=excluded.proposed_actions,
-                   execution_status='not_run',
-                   section=excluded.section,
-                   draft_response=excluded.draft_response,
-                   context_notes=excluded.context_notes,
-                   responded=excluded.responded
-               WHERE cards.responded = 0 OR excluded.responded = 1
-               RETURNING id""",
-            (
-                item.get("timestamp") or datetime.now(timezone.utc).isoformat(),
-                f"{item.get('sender') or 'Someone'} via {item.get('channel') or 'Slack'}: "
-                f"{(item.get('text') or item.get('context_notes') or item.get('draft_response') or '(no preview)')[:200]}",
-                item.get("classification", "fyi"),
-                proposed_actions,
-                item.get("section", "no-action"),
-                item.get("draft_response"),
-                item.get("context_notes"),
-                1 if item.get("responded") else 0,
-            ),
-        )
-        row = cursor.fetchone()
-        card_id = row[0] if row else None
-        changed = conn.total_changes > before
-        conn.commit()
+        with conn:
+            # sqlite3's executemany() cannot hand back RETURNING rows, so
+            # the statements run one by one inside the single transaction.
+            for item in items:
+                row = conn.execute(SLACK_CARD_UPSERT, _slack_card_params(item)).fetchone()
+                if row is None:
+                    continue
+                changed_ids.append(row[0])
+                if item.get("responded"):
+                    responded_ids.append(row[0])
+    finally:
+        conn.close()
+    return changed_ids, responded_ids
+
+
+def write_to_inbox_db(item):
+    """Write a classified Slack message card to inbox.db."""
+    changed_ids, responded_ids = write_items_to_inbox_db([item])
+    request_related_resolution(responded_ids)
+    return bool(changed_ids)
+
+
+def request_related_resolution(card_ids):
+    """Ask the dashboard to resolve cross-channel duplicates of responded cards in one message."""
+    card_ids = list(dict.fromkeys(card_ids))
+    if card_ids:
+        notify_dashboard("resolve_related", {"card_ids": card_ids})
 
-        # If this item was responded to, trigger cross-channel resolution
-        if changed and item.get("responded") and card_id:
-            try:
-                req = urllib.request.Request(
-                    f"http://127.0.0.1:7777/api/cards/{card_id}/resolve-related",
-                    data=b"{}",
-                    headers={"Content-Type": "application/json"},
-                    method="POST",
-                )
-                urllib.request.urlopen(req, timeout=10)
-            except Exception:
-                pass  # non-fatal, dashboard may not be running
 
+def apply_self_replies_to_db(self_replies, days=LOOKBACK_DAYS):
+    """Mark cards from earlier runs responded when my reply only arrived in this delta.
+
+    An incremental run no longer sees the older messages, so the "later self
+    message" check the full scan does per message is applied to what is
+    already in inbox.db instead. Returns the ids of cards that flipped; SQLite
+    errors propagate like in write_items_to_inbox_db.
+    """
+    if not self_replies or not DB_PATH.exists():
+        return []
+
+    window_start = datetime.fromtimestamp(time.time() - days * 24 * 3600, timezone.utc).isoformat()
+    replies = json.dumps([
+        [channel_id, thread_ts, datetime.fromtimestamp(self_ts, timezone.utc).isoformat()]
+        for channel_id, thread_ts, self_ts in self_replies
+    ])
+    channel_expr = "CASE WHEN json_valid(cards.proposed_actions) THEN json_extract(cards.proposed_actions, '$[0].channel_id') END"
+    thread_expr = "CASE WHEN json_valid(cards.proposed_actions) THEN json_extract(cards.proposed_actions, '$[0].thread_ts') END"
+    # One statement for the whole delta: the (source, timestamp_utc) index
+    # narrows to the lookback window, then each card is matched against the
+    # (channel, thread or NULL for a DM, reply time) tuples.
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            rows = conn.execute(
+                f"""UPDATE cards
+                    SET responded = 1, section = 'no-action', classification = 'responded',
+                        draft_response = NULL,
+                        context_notes = CASE context_notes
+                            WHEN 'Recent direct message' THEN 'Recent direct message you already responded to'
+                            ELSE context_notes END
+                    WHERE source = 'slack' AND responded = 0
+                      AND timestamp_utc >= datetime(?)
+                      AND context_notes IN ('Recent direct message', 'Message in a thread you participated in')
+                      AND EXISTS (
+                          SELECT 1 FROM json_each(?) AS reply
+                          WHERE json_extract(reply.value, '$[0]') = {channel_expr}
+                            AND julianday(cards.timestamp) < julianday(json_extract(reply.value, '$[2]'))
+                            AND CASE WHEN json_extract(reply.value, '$[1]') IS NULL
+                                THEN cards.context_notes = 'Recent direct message'
+                                ELSE cards.context_notes = 'Message in a thread you participated in'
+                                     AND json_extract(reply.value, '$[1]') = {thread_expr}
+                                END
+                      )
+                    RETURNING id""",
+                (window_start, replies),
+            ).fetchall()
+    finally:
         conn.close()
-        return changed
-    except sqlite3.OperationalError as e:
-        print(f"DB write error (non-fatal): {e}")
-        return False
+    return [row[0] for row in rows]
 
 
 # ---------------------------------------------------------------------------
@@ -732,7 +1086,7 @@ def fetch_watched_thread_replies(days=LOOKBACK_DAYS):
     if not watched:
         return []
 
-    token, _ = _load_slack_token_config()
+    token, team_id = _load_slack_token_config()
     if not token:
         return []
 
@@ -744,22 +1098,9 @@ def fetch_watched_thread_replies(days=LOOKBACK_DAYS):
 
     oldest = str(time.time() - days * 24 * 3600)
     oldest_float = float(oldest)
-    user_cache = {}
+    user_name = _user_directory(token, team_id).name
     items = {}
 
-    def user_name(user_id):
-        if not user_id:
-            return user_id
-        if user_id not in user_cache:
-            try:
-                user_cache[user_id] = _slack_api("users.info", token, {"user": user_id}).get("user", {})
-                time.sleep(0.05)
-            except Exception:
-                user_cache[user_id] = {}
-        profile = user_cache[user_id]
-        pdata = profile.get("profile", {})
-        return pdata.get("real_name") or pdata.get("display_name") or profile.get("name") or user_id
-
     for watched_thread in watched:
         channel_id = watched_thread.get("channel_id", "")
         thread_ts = watched_thread.get("thread_ts", "")
@@ -773,6 +1114,7 @@ def fetch_watched_thread_replies(days=LOOKBACK_DAYS):
             print(f"Watched thread fetch failed for {channel_id}:{thread_ts}: {e}")
             continue
 
+        replied_at = _latest_self_messages(replies, me)[1].get(thread_ts, 0.0)
         replies = [r for r in replies if r.get("type") == "message" and _clean_text(r.get("text")) and r.get("user") != me]
         for reply in replies:
             reply_ts = float(reply.get("ts", "0") or 0)
@@ -780,7 +1122,7 @@ def fetch_watched_thread_replies(days=LOOKBACK_DAYS):
                 continue
             sender = user_name(reply.get("user", ""))
             reply_text = _clean_text(reply.get("text", ""))[:400]
-            responded = _has_later_self_message(replies, me, reply_ts, thread_ts=thread_ts)
+            responded = replied_at > reply_ts
             section, classification, draft_response = _classify_participation_item(reply_text, responded)
             _record_candidate(
                 items,
@@ -806,14 +1148,37 @@ def fetch_watched_thread_replies(days=LOOKBACK_DAYS):
 # Main
 # ---------------------------------------------------------------------------
 
+def record_run_timing(state, run):
+    """Log this run's wall time and Slack API call counts, and keep them in the state file."""
+    duration = round(time.monotonic() - run.started, 2)
+    with run.lock:
+        calls = dict(run.api_calls)
+    state["last_run"] = {
+        "duration_seconds": duration,
+        "api_calls": calls,
+        "api_calls_total": sum(calls.values()),
+        "workers": SLACK_SCAN_WORKERS,
+        "mode": (state.get("slack_sync") or {}).get("mode", "full"),
+    }
+    print(
+        f"[{datetime.now().strftime('%H:%M')}] Slack run took {duration}s "
+        f"({state['last_run']['mode']} sync, {sum(calls.values())} API call(s), {SLACK_SCAN_WORKERS} worker(s))"
+    )
+
+
 def main():
     try:
-        with single_instance("slack-poller"):
+        with single_instance("slack-poller"), track_run("slack", DB_PATH) as run:
+            ensure_inbox_schema(DB_PATH)
             state = load_state()
             now = datetime.now()
 
             print(f"[{now.strftime('%H:%M')}] Fetching Slack participation from the last {LOOKBACK_DAYS} day(s)...")
-            messages = fetch_recent_participation_items(days=LOOKBACK_DAYS)
+            messages, self_replies = sync_recent_participation_items(state, days=LOOKBACK_DAYS)
+            with run.phase("db_write"):
+                resolved_ids = apply_self_replies_to_db(self_replies, days=LOOKBACK_DAYS)
+            if resolved_ids:
+                print(f"[{now.strftime('%H:%M')}] Marked {len(resolved_ids)} earlier card(s) responded")
 
             watched_replies = fetch_watched_thread_replies(days=LOOKBACK_DAYS)
             if watched_replies:
@@ -824,23 +1189,37 @@ def main():
                     if key not in seen_keys:
                         messages.append(item)
                         seen_keys.add(key)
+            run.count(fetched=len(messages))
 
             if not messages:
                 print(f"[{now.strftime('%H:%M')}] No new messages needing attention")
                 state["last_check"] = str(now.timestamp())
+                record_run_timing(state, run)
                 save_state(state)
+                if resolved_ids:
+                    request_related_resolution(resolved_ids)
+                    invalidate_dashboard_cache("slack")
                 return
 
             print(f"[{now.strftime('%H:%M')}] Processing {len(messages)} message(s)...")
 
-            needs_action_items = []
-            dashboard_changed = False
-
-            for item in messages:
-                if write_to_inbox_db(item):
-                    dashboard_changed = True
-                if item.get("section") == "needs-action" and not item.get("responded"):
-                    needs_action_items.append(item)
+            with run.phase("db_write"):
+                try:
+                    changed_ids, responded_ids = write_items_to_inbox_db(messages)
+                except sqlite3.OperationalError:
+                    # The self-reply flips above are committed; resolve them now
+                    # since the replayed delta will not flip them again.
+                    request_related_resolution(resolved_ids)
+                    if resolved_ids:
+                        invalidate_dashboard_cache("slack")
+                    raise
+            run.count(written=len(changed_ids), skipped=len(messages) - len(changed_ids))
+            request_related_resolution(resolved_ids + responded_ids)
+            dashboard_changed = bool(resolved_ids or changed_ids)
+            needs_action_items = [
+                item for item in messages
+                if item.get("section") == "needs-action" and not item.get("responded")
+            ]
 
             print(f"[{now.strftime('%H:%M')}] Ingested {len(messages)} message(s) to inbox.db")
 
@@ -857,10 +1236,15 @@ def main():
             )
 
             state["last_check"] = str(now.timestamp())
+            record_run_timing(state, run)
             save_state(state)
 
             if dashboard_changed:
                 invalidate_dashboard_cache("slack")
+    except sqlite3.OperationalError as exc:
+        # The scan already moved the marks in ``state``; leaving the state file
+        # alone makes the next run fetch the same delta again.
+        print(f"[{datetime.now().strftime('%H:%M')}] inbox.db write failed, keeping the previous sync marks: {exc}")
     except RuntimeError as exc:
         print(f"[{datetime.now().strftime('%H:%M')}] {exc}")
 
@@ -1,7 +1,8 @@
 #!/bin/bash
 # eng-buddy poller launcher
-# Syncs poller scripts to runtime dir, installs LaunchAgents with correct PATH,
-# loads them if not running, and triggers an initial poll of each.
+# Syncs poller scripts to runtime dir and installs one LaunchAgent for the
+# resident poller supervisor (poller_supervisor.py), which runs every poller on
+# its own schedule and starts each with an initial poll.
 
 set -euo pipefail
 
@@ -19,30 +20,30 @@ COMBINED_PATH="$CLAUDE_DIR:/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin"
 mkdir -p "$RUNTIME_BIN" "$LAUNCH_AGENTS_DIR"
 
 # --- Sync poller scripts + brain.py to runtime ---
-for f in slack-poller.py gmail-poller.py calendar-poller.py jira-poller.py freshservice-enrichment.py brain.py tasks_db.py; do
+for f in slack-poller.py gmail-poller.py calendar-poller.py jira-poller.py freshservice-poller.py freshservice-enrichment.py poller_supervisor.py brain.py tasks_db.py poller_runtime.py poller_http.py; do
     if [ -f "$SKILLS_BIN/$f" ]; then
         cp "$SKILLS_BIN/$f" "$RUNTIME_BIN/$f"
     fi
 done
 
-# --- Poller definitions: label, script, interval_seconds ---
-declare -a POLLERS=(
-    "com.engbuddy.slackpoller|slack-poller.py|300"
-    "com.engbuddy.gmailpoller|gmail-poller.py|600"
-    "com.engbuddy.calendarpoller|calendar-poller.py|1800"
-    "com.engbuddy.jirapoller|jira-poller.py|300"
-    "com.engbuddy.freshservice-enrichment|freshservice-enrichment.py|300"
-)
-
-CHANGED=0
-
-for entry in "${POLLERS[@]}"; do
-    IFS='|' read -r LABEL SCRIPT INTERVAL <<< "$entry"
+# --- Per-poller LaunchAgents from before the supervisor: retire them ---
+for LABEL in com.engbuddy.slackpoller com.engbuddy.gmailpoller com.engbuddy.calendarpoller \
+             com.engbuddy.jirapoller com.engbuddy.freshservice-enrichment; do
     PLIST="$LAUNCH_AGENTS_DIR/$LABEL.plist"
-    LOGFILE="$RUNTIME_DIR/${SCRIPT%.py}.log"
+    if [ -f "$PLIST" ]; then
+        launchctl bootout "gui/$(id -u)/$LABEL" 2>/dev/null || \
+            launchctl unload "$PLIST" 2>/dev/null || true
+        rm -f "$PLIST"
+        echo "  Retired: $LABEL"
+    fi
+done
+
+# --- Supervisor LaunchAgent: one resident process, restarted if it exits ---
+LABEL="com.engbuddy.pollersupervisor"
+PLIST="$LAUNCH_AGENTS_DIR/$LABEL.plist"
+LOGFILE="$RUNTIME_DIR/poller-supervisor.log"
 
-    # Generate plist with correct PATH
-    cat > "$PLIST.tmp" <<PLISTEOF
+cat > "$PLIST.tmp" <<PLISTEOF
 <?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
@@ -52,12 +53,16 @@ for entry in "${POLLERS[@]}"; do
     <key>ProgramArguments</key>
     <array>
         <string>$PYTHON</string>
-        <string>$RUNTIME_BIN/$SCRIPT</string>
+        <string>$RUNTIME_BIN/poller_supervisor.py</string>
     </array>
-    <key>StartInterval</key>
-    <integer>$INTERVAL</integer>
     <key>RunAtLoad</key>
     <true/>
+    <key>KeepAlive</key>
+    <true/>
+    <key>ExitTimeOut</key>
+    <integer>90</integer>
+    <key>WorkingDirectory</key>
+    <string>$RUNTIME_BIN</string>
     <key>StandardOutPath</key>
     <string>$LOGFILE</string>
     <key>StandardErrorPath</key>
@@ -73,36 +78,23 @@ for entry in "${POLLERS[@]}"; do
 </plist>
 PLISTEOF
 
-    # Only reload if plist changed or agent not loaded
-    if ! cmp -s "$PLIST.tmp" "$PLIST" 2>/dev/null; then
-        mv "$PLIST.tmp" "$PLIST"
-        CHANGED=1
-        # Unload old version if loaded
-        launchctl bootout "gui/$(id -u)/$LABEL" 2>/dev/null || true
+if ! cmp -s "$PLIST.tmp" "$PLIST" 2>/dev/null; then
+    mv "$PLIST.tmp" "$PLIST"
+    launchctl bootout "gui/$(id -u)/$LABEL" 2>/dev/null || true
+    launchctl bootstrap "gui/$(id -u)" "$PLIST" 2>/dev/null || \
+        launchctl load "$PLIST" 2>/dev/null || true
+    echo "  Installed + loaded: $LABEL"
+else
+    rm "$PLIST.tmp"
+    if ! launchctl list "$LABEL" &>/dev/null; then
         launchctl bootstrap "gui/$(id -u)" "$PLIST" 2>/dev/null || \
             launchctl load "$PLIST" 2>/dev/null || true
-        echo "  Installed + loaded: $LABEL (every ${INTERVAL}s)"
+        echo "  Loaded: $LABEL"
     else
-        rm "$PLIST.tmp"
-        # Check if loaded
-        if ! launchctl list "$LABEL" &>/dev/null; then
-            launchctl bootstrap "gui/$(id -u)" "$PLIST" 2>/dev/null || \
-                launchctl load "$PLIST" 2>/dev/null || true
-            echo "  Loaded: $LABEL (every ${INTERVAL}s)"
-        else
-            echo "  Already running: $LABEL"
-        fi
+        # Pick up the freshly synced poller scripts.
+        launchctl kickstart -k "gui/$(id -u)/$LABEL" 2>/dev/null || true
+        echo "  Restarted: $LABEL"
     fi
-done
-
-# --- Initial poll of each (in background, skip if recently polled) ---
-echo "  Running initial polls..."
-for entry in "${POLLERS[@]}"; do
-    IFS='|' read -r LABEL SCRIPT INTERVAL <<< "$entry"
-    (
-        cd "$RUNTIME_BIN"
-        PATH="$COMBINED_PATH" "$PYTHON" "$SCRIPT" >> "$RUNTIME_DIR/${SCRIPT%.py}.log" 2>&1 &
-    )
-done
+fi
 
 echo "POLLERS_OK"
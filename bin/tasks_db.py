@@ -7,11 +7,18 @@ call to :func:`get_conn`.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import sqlite3
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+try:
+    from poller_runtime import load_migrations
+    HAS_POLLER_RUNTIME = True
+except ImportError:
+    HAS_POLLER_RUNTIME = False
+
 DB_PATH: Path = Path.home() / ".claude" / "eng-buddy" / "tasks.db"
 
 _schema_ensured: bool = False
@@ -64,16 +71,11 @@ def get_conn() -> sqlite3.Connection:
     return conn
 
 
-def ensure_schema(conn: Optional[sqlite3.Connection] = None) -> None:
-    """Idempotently create all tables, indexes, triggers and FTS index."""
-    own_conn = conn is None
-    if own_conn:
-        conn = get_conn()
-
-    cur = conn.cursor()
-
-    # -- core tables ---------------------------------------------------------
-    cur.executescript(
+# Schema versions for tasks.db, applied through the shared user_version
+# runner in dashboard/migrate.py (see :func:`ensure_schema`).
+TASKS_MIGRATIONS: List[List[str]] = [
+    # 1: tasks, task events, FTS index and sync triggers
+    [
         """
         CREATE TABLE IF NOT EXISTS tasks (
             id              INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -89,15 +91,12 @@ def ensure_schema(conn: Optional[sqlite3.Connection] = None) -> None:
             completed_at    TEXT,
             deferred_until  TEXT,
             metadata        TEXT DEFAULT '{}'
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_tasks_status
-            ON tasks(status);
-        CREATE INDEX IF NOT EXISTS idx_tasks_jira_key
-            ON tasks(jira_key) WHERE jira_key IS NOT NULL;
-        CREATE INDEX IF NOT EXISTS idx_tasks_priority
-            ON tasks(priority, status);
-
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_jira_key ON tasks(jira_key) WHERE jira_key IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority, status)",
+        """
         CREATE TABLE IF NOT EXISTS task_events (
             id          INTEGER PRIMARY KEY AUTOINCREMENT,
             task_id     INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
@@ -105,47 +104,66 @@ def ensure_schema(conn: Optional[sqlite3.Connection] = None) -> None:
             detail      TEXT,
             actor       TEXT NOT NULL DEFAULT 'system',
             created_at  TEXT NOT NULL DEFAULT (datetime('now'))
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_task_events_task
-            ON task_events(task_id, created_at);
-        """
-    )
-
-    # -- FTS5 virtual table --------------------------------------------------
-    # executescript cannot handle virtual-table DDL reliably; use execute.
-    cur.execute(
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_task_events_task ON task_events(task_id, created_at)",
         """
         CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
             title, description, jira_key, metadata,
             content='tasks', content_rowid='id'
         )
-        """
-    )
-
-    # -- FTS sync triggers ---------------------------------------------------
-    cur.executescript(
+        """,
         """
         CREATE TRIGGER IF NOT EXISTS tasks_ai AFTER INSERT ON tasks BEGIN
             INSERT INTO tasks_fts(rowid, title, description, jira_key, metadata)
             VALUES (new.id, new.title, new.description, new.jira_key, new.metadata);
-        END;
-
+        END
+        """,
+        """
         CREATE TRIGGER IF NOT EXISTS tasks_ad AFTER DELETE ON tasks BEGIN
             INSERT INTO tasks_fts(tasks_fts, rowid, title, description, jira_key, metadata)
             VALUES ('delete', old.id, old.title, old.description, old.jira_key, old.metadata);
-        END;
-
+        END
+        """,
+        """
         CREATE TRIGGER IF NOT EXISTS tasks_au AFTER UPDATE ON tasks BEGIN
             INSERT INTO tasks_fts(tasks_fts, rowid, title, description, jira_key, metadata)
             VALUES ('delete', old.id, old.title, old.description, old.jira_key, old.metadata);
             INSERT INTO tasks_fts(rowid, title, description, jira_key, metadata)
             VALUES (new.id, new.title, new.description, new.jira_key, new.metadata);
-        END;
-        """
-    )
+        END
+        """,
+    ],
+    # 2: hash of the Jira fields last synced, so unchanged issues are skipped
+    [
+        "ALTER TABLE tasks ADD COLUMN jira_hash TEXT",
+    ],
+]
 
-    conn.commit()
+
+def ensure_schema(conn: Optional[sqlite3.Connection] = None) -> None:
+    """Apply pending :data:`TASKS_MIGRATIONS` steps, tracked in ``PRAGMA user_version``.
+
+    Uses the shared runner from ``dashboard/migrate.py`` when it is available;
+    otherwise runs the steps after the stored version itself, bumping it after
+    each one (step 2's ``ALTER TABLE`` cannot be replayed).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_conn()
+
+    migrations = load_migrations() if HAS_POLLER_RUNTIME else None
+    if migrations is not None:
+        migrations.apply_migrations(conn, TASKS_MIGRATIONS)
+    else:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, step in enumerate(TASKS_MIGRATIONS, start=1):
+            if number <= version:
+                continue
+            for sql in step:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
 
     if own_conn:
         conn.close()
@@ -320,6 +338,120 @@ def update_task(task_id: int, **fields: Any) -> bool:
         conn.close()
 
 
+def jira_task_hash(jira_status: str, priority: str) -> str:
+    """Content hash of the Jira fields a sync writes (status and mapped priority)."""
+    payload = json.dumps([jira_status, priority], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def upsert_jira_tasks(issues: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert or update many tasks keyed by ``jira_key`` in one transaction.
+
+    Each issue is a dict with ``jira_key``, ``title``, ``jira_status``,
+    ``priority`` and optional ``metadata``. Issues whose status and priority
+    hash to the stored ``jira_hash`` are skipped without a ``task_events``
+    row. Otherwise the rules of :func:`upsert_jira_task` apply: new issues
+    are created, existing ones get the Jira status and priority but keep
+    user-edited title/description, and ``Done`` completes the task.
+
+    Returns counts of ``created``, ``updated`` and ``unchanged`` issues.
+    """
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    if not issues:
+        return counts
+
+    conn = get_conn()
+    try:
+        keys = [issue["jira_key"] for issue in issues]
+        existing = {
+            row["jira_key"]: row
+            for row in conn.execute(
+                """
+                SELECT id, jira_key, status, jira_status, priority, jira_hash
+                FROM tasks WHERE jira_key IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps(keys),),
+            )
+        }
+        with conn:
+            for issue in issues:
+                jira_key = issue["jira_key"]
+                jira_status = issue.get("jira_status") or ""
+                mapped_priority = _JIRA_PRIORITY_MAP.get(str(issue.get("priority") or "").lower(), "medium")
+                content_hash = jira_task_hash(jira_status, mapped_priority)
+                is_done = jira_status.lower() == "done"
+                row = existing.get(jira_key)
+
+                if row is None:
+                    status = "completed" if is_done else "pending"
+                    cur = conn.execute(
+                        """
+                        INSERT INTO tasks (title, jira_key, jira_status, priority,
+                                           status, metadata, jira_hash, completed_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, CASE WHEN ? THEN datetime('now') END)
+                        """,
+                        (
+                            issue.get("title") or "",
+                            jira_key,
+                            jira_status,
+                            mapped_priority,
+                            status,
+                            json.dumps(issue.get("metadata") or {}),
+                            content_hash,
+                            is_done,
+                        ),
+                    )
+                    conn.execute(
+                        """
+                        INSERT INTO task_events (task_id, event_type, detail, actor)
+                        VALUES (?, 'created', ?, 'jira-sync')
+                        """,
+                        (cur.lastrowid, f"Synced from Jira: {jira_key}"),
+                    )
+                    existing[jira_key] = {"id": cur.lastrowid, "jira_key": jira_key, "status": status,
+                                          "jira_status": jira_status, "priority": mapped_priority,
+                                          "jira_hash": content_hash}
+                    counts["created"] += 1
+                    continue
+
+                if row["jira_hash"] == content_hash:
+                    counts["unchanged"] += 1
+                    continue
+                if row["jira_hash"] is None and (row["jira_status"], row["priority"]) == (jira_status, mapped_priority):
+                    # Synced before hashes were stored: record it, nothing changed.
+                    conn.execute("UPDATE tasks SET jira_hash = ? WHERE id = ?", (content_hash, row["id"]))
+                    counts["unchanged"] += 1
+                    continue
+
+                # Update existing — preserve user-edited title/description
+                update_parts = [
+                    "jira_status = ?",
+                    "priority = ?",
+                    "jira_hash = ?",
+                    "updated_at = datetime('now')",
+                ]
+                if is_done and row["status"] != "completed":
+                    update_parts.append("status = 'completed'")
+                    update_parts.append("completed_at = datetime('now')")
+                conn.execute(
+                    f"UPDATE tasks SET {', '.join(update_parts)} WHERE id = ?",
+                    (jira_status, mapped_priority, content_hash, row["id"]),
+                )
+                conn.execute(
+                    """
+                    INSERT INTO task_events (task_id, event_type, detail, actor)
+                    VALUES (?, 'updated', ?, 'jira-sync')
+                    """,
+                    (row["id"], f"Jira sync: status={jira_status}, priority={mapped_priority}"),
+                )
+                existing[jira_key] = dict(row, jira_status=jira_status, priority=mapped_priority,
+                                          jira_hash=content_hash)
+                counts["updated"] += 1
+        return counts
+    finally:
+        conn.close()
+
+
 def upsert_jira_task(
     jira_key: str,
     title: str,
@@ -331,77 +463,21 @@ def upsert_jira_task(
 
     On conflict the Jira status and priority are updated but user-edited
     title/description are preserved.  If the Jira status maps to ``Done``
-    the local status is set to ``'completed'``.
+    the local status is set to ``'completed'``.  Unchanged issues are left
+    alone (see :func:`upsert_jira_tasks`).
 
     Returns the task ID.
     """
-    mapped_priority = _JIRA_PRIORITY_MAP.get(priority.lower(), "medium")
-    meta_str = json.dumps(metadata or {})
-    is_done = jira_status.lower() == "done"
-
+    upsert_jira_tasks([{
+        "jira_key": jira_key,
+        "title": title,
+        "jira_status": jira_status,
+        "priority": priority,
+        "metadata": metadata,
+    }])
     conn = get_conn()
     try:
-        existing = conn.execute(
-            "SELECT * FROM tasks WHERE jira_key = ?", (jira_key,)
-        ).fetchone()
-
-        if existing is None:
-            # Insert new
-            status = "completed" if is_done else "pending"
-            cur = conn.execute(
-                """
-                INSERT INTO tasks (title, jira_key, jira_status, priority,
-                                   status, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (title, jira_key, jira_status, mapped_priority, status, meta_str),
-            )
-            task_id = cur.lastrowid
-            conn.execute(
-                """
-                INSERT INTO task_events (task_id, event_type, detail, actor)
-                VALUES (?, 'created', ?, 'jira-sync')
-                """,
-                (task_id, f"Synced from Jira: {jira_key}"),
-            )
-            if is_done:
-                conn.execute(
-                    "UPDATE tasks SET completed_at = datetime('now') WHERE id = ?",
-                    (task_id,),
-                )
-            conn.commit()
-            return task_id
-        else:
-            # Update existing — preserve user-edited title/description
-            task_id = existing["id"]
-            update_parts = [
-                "jira_status = ?",
-                "priority = ?",
-                "updated_at = datetime('now')",
-            ]
-            params: list[Any] = [jira_status, mapped_priority]
-
-            if is_done and existing["status"] != "completed":
-                update_parts.append("status = 'completed'")
-                update_parts.append("completed_at = datetime('now')")
-
-            params.append(task_id)
-            conn.execute(
-                f"UPDATE tasks SET {', '.join(update_parts)} WHERE id = ?",
-                params,
-            )
-            conn.execute(
-                """
-                INSERT INTO task_events (task_id, event_type, detail, actor)
-                VALUES (?, 'updated', ?, 'jira-sync')
-                """,
-                (
-                    task_id,
-                    f"Jira sync: status={jira_status}, priority={mapped_priority}",
-                ),
-            )
-            conn.commit()
-            return task_id
+        return conn.execute("SELECT id FROM tasks WHERE jira_key = ?", (jira_key,)).fetchone()["id"]
     finally:
         conn.close()
 
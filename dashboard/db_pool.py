@@ -0,0 +1,129 @@
+# dashboard/db_pool.py
+"""Pooled SQLite connections for inbox.db.
+
+Opening a connection per request re-ran the WAL pragma and threw away the
+per-connection statement cache and page cache every time. The pool keeps
+idle connections per database path, applies the tuning pragmas once when a
+connection is created, and hands connections back on ``close()`` so existing
+``conn = get_db() ... conn.close()`` call sites keep working unchanged.
+"""
+import sqlite3
+import threading
+from pathlib import Path
+
+CONNECT_TIMEOUT_SECONDS = 30
+CACHED_STATEMENTS = 256
+MAX_IDLE_PER_PATH = 8
+
+# Applied once per physical connection.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={CONNECT_TIMEOUT_SECONDS * 1000}",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose ``close()`` returns it to its pool."""
+
+    _pool = None
+    _pool_key = None
+    _checked_out = False
+
+    def close(self):
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        pool.release(self)
+
+    def close_for_real(self):
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(self, max_idle: int = MAX_IDLE_PER_PATH):
+        self.max_idle = max_idle
+        self._idle: dict[str, list[PooledConnection]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "released": 0, "discarded": 0, "in_use": 0}
+
+    def _open(self, key: str) -> PooledConnection:
+        conn = sqlite3.connect(
+            key,
+            timeout=CONNECT_TIMEOUT_SECONDS,
+            factory=PooledConnection,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn._pool = self
+        conn._pool_key = key
+        return conn
+
+    def acquire(self, path) -> PooledConnection:
+        key = str(Path(path))
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+            self._stats["reused" if conn else "created"] += 1
+            self._stats["in_use"] += 1
+        if conn is None:
+            try:
+                conn = self._open(key)
+            except Exception:
+                with self._lock:
+                    self._stats["created"] -= 1
+                    self._stats["in_use"] -= 1
+                raise
+        conn.row_factory = sqlite3.Row
+        conn._checked_out = True
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if not conn._checked_out:
+            return  # already returned; a second close() is a no-op
+        conn._checked_out = False
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            keep = False
+
+        with self._lock:
+            self._stats["in_use"] -= 1
+            idle = self._idle.setdefault(conn._pool_key, [])
+            if keep and len(idle) < self.max_idle:
+                idle.append(conn)
+                self._stats["released"] += 1
+                return
+            self._stats["discarded"] += 1
+        conn.close_for_real()
+
+    def close_all(self):
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close_for_real()
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["idle"] = {key: len(conns) for key, conns in self._idle.items() if conns}
+        total = data["created"] + data["reused"]
+        data["reuse_ratio"] = round(data["reused"] / total, 3) if total else 0.0
+        return data
+
+
+pool = ConnectionPool()
+
+
+def get_connection(path) -> PooledConnection:
+    return pool.acquire(path)
@@ -1,11 +1,12 @@
 import { describe, it, expect, vi, beforeEach } from 'vitest'
-import { fetchCards, performCardAction, fetchInboxView } from '../client'
+import { ETAG_CACHE_LIMIT, clearEtagCache, fetchCards, performCardAction, fetchInboxView } from '../client'
 
 const mockFetch = vi.fn()
 global.fetch = mockFetch
 
 beforeEach(() => {
   mockFetch.mockReset()
+  clearEtagCache()
 })
 
 describe('fetchCards', () => {
@@ -27,6 +28,51 @@ describe('fetchCards', () => {
     expect(result).toEqual(mockResponse)
   })
 
+  it('passes the keyset cursor and page size', async () => {
+    const mockResponse = { cards: [], counts: { pending: 0, held: 0, approved: 0, completed: 0, failed: 0 }, next_cursor: null }
+    mockFetch.mockResolvedValueOnce({ ok: true, json: () => Promise.resolve(mockResponse) })
+
+    await fetchCards('slack', { after: '2026-03-10 09:00:00,7', limit: 50 })
+    expect(mockFetch).toHaveBeenCalledWith('/api/cards?source=slack&after=2026-03-10+09%3A00%3A00%2C7&limit=50')
+  })
+
+  it('revalidates with If-None-Match and reuses the body on 304', async () => {
+    const mockResponse = { cards: [{ id: 1 }], counts: { pending: 1, held: 0, approved: 0, completed: 0, failed: 0 } }
+    mockFetch.mockResolvedValueOnce({
+      ok: true,
+      status: 200,
+      headers: new Headers({ ETag: 'W/"v1"' }),
+      json: () => Promise.resolve(mockResponse),
+    })
+    mockFetch.mockResolvedValueOnce({ ok: false, status: 304, headers: new Headers({ ETag: 'W/"v1"' }) })
+
+    await fetchCards('gmail')
+    const result = await fetchCards('gmail')
+
+    expect(mockFetch).toHaveBeenLastCalledWith('/api/cards?source=gmail', { headers: { 'If-None-Match': 'W/"v1"' } })
+    expect(result).toEqual(mockResponse)
+  })
+
+  it('keeps only the most recently used ETag entries', async () => {
+    mockFetch.mockImplementation((url: string) => Promise.resolve({
+      ok: true,
+      status: 200,
+      headers: new Headers({ ETag: `W/"${url}"` }),
+      json: () => Promise.resolve({ cards: [] }),
+    }))
+    const pages = Array.from({ length: ETAG_CACHE_LIMIT }, (_, index) => ({ after: `c${index}` }))
+    for (const page of pages) await fetchCards('gmail', page)
+    await fetchCards('gmail', pages[0])  // a hit keeps the first page warm
+    await fetchCards('gmail', { after: 'overflow' })
+
+    mockFetch.mockClear()
+    await fetchCards('gmail', pages[0])
+    await fetchCards('gmail', pages[1])
+    const [[, warm], [, evicted]] = mockFetch.mock.calls
+    expect(warm.headers['If-None-Match']).toBe('W/"/api/cards?source=gmail&after=c0"')
+    expect(evicted).toBeUndefined()
+  })
+
   it('throws on non-ok response', async () => {
     mockFetch.mockResolvedValueOnce({ ok: false, status: 500, statusText: 'Internal Server Error' })
 
@@ -1,4 +1,5 @@
 import type {
+  CardPage,
   CardsResponse,
   CardSource,
   PlanResponse,
@@ -25,15 +26,52 @@ import type {
   BriefingResponse,
 } from './types'
 
+// Last ETag and body per GET url; the server answers 304 while its data version is unchanged.
+// Every cursor page and filter combination is its own url, so the cache is an LRU
+// (Map keeps insertion order: a hit re-inserts, eviction drops the first key).
+export const ETAG_CACHE_LIMIT = 50
+const etagCache = new Map<string, { etag: string; body: unknown }>()
+
+function etagCacheGet(url: string) {
+  const entry = etagCache.get(url)
+  if (entry) {
+    etagCache.delete(url)
+    etagCache.set(url, entry)
+  }
+  return entry
+}
+
+function etagCacheSet(url: string, entry: { etag: string; body: unknown }) {
+  etagCache.delete(url)
+  etagCache.set(url, entry)
+  while (etagCache.size > ETAG_CACHE_LIMIT) {
+    etagCache.delete(etagCache.keys().next().value as string)
+  }
+}
+
 async function request<T>(url: string, options?: RequestInit): Promise<T> {
-  const res = options ? await fetch(url, options) : await fetch(url)
+  const cacheable = !options || (options.method ?? 'GET').toUpperCase() === 'GET'
+  const cached = cacheable ? etagCacheGet(url) : undefined
+  const res = cached
+    ? await fetch(url, { ...options, headers: { ...(options?.headers ?? {}), 'If-None-Match': cached.etag } })
+    : options ? await fetch(url, options) : await fetch(url)
+  if (res.status === 304 && cached) return cached.body as T
   if (!res.ok) throw new Error(`${res.status} ${res.statusText}`)
-  return res.json()
+  const body = await res.json()
+  const etag = cacheable ? res.headers?.get('ETag') : null
+  if (etag) etagCacheSet(url, { etag, body })
+  return body
+}
+
+export function clearEtagCache() {
+  etagCache.clear()
 }
 
-export async function fetchCards(source?: CardSource): Promise<CardsResponse> {
-  const param = source && source !== 'all' ? `source=${source}` : 'status=all'
-  return request<CardsResponse>(`/api/cards?${param}`)
+export async function fetchCards(source?: CardSource, page?: CardPage): Promise<CardsResponse> {
+  const params = new URLSearchParams(source && source !== 'all' ? { source } : { status: 'all' })
+  if (page?.after) params.set('after', page.after)
+  if (page?.limit) params.set('limit', String(page.limit))
+  return request<CardsResponse>(`/api/cards?${params}`)
 }
 
 export async function performCardAction(cardId: number, action: string, body?: Record<string, unknown>): Promise<unknown> {
@@ -29,6 +29,13 @@ export interface CardCounts {
 export interface CardsResponse {
   cards: Card[]
   counts: CardCounts
+  source_counts?: Record<string, number>
+  next_cursor?: string | null
+}
+
+export interface CardPage {
+  after?: string
+  limit?: number
 }
 
 export interface Poller {
@@ -1,3 +1,4 @@
+import { useEffect, useRef } from 'react'
 import { useCards } from '../../hooks/useCards'
 import { useUIStore } from '../../stores/ui'
 import { CardItem } from './CardItem'
@@ -5,7 +6,21 @@ import styles from './CardList.module.css'
 
 export function CardList() {
   const activeSource = useUIStore((s) => s.activeSource)
-  const { data, isLoading, isError } = useCards(activeSource)
+  const { data, isLoading, isError, hasNextPage, isFetchingNextPage, fetchNextPage } = useCards(activeSource)
+  const sentinelRef = useRef<HTMLDivElement>(null)
+
+  // Pull the next page once the end of the list scrolls into view.
+  useEffect(() => {
+    const sentinel = sentinelRef.current
+    if (!sentinel || !hasNextPage || typeof IntersectionObserver === 'undefined') return
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting) && !isFetchingNextPage) {
+        fetchNextPage()
+      }
+    }, { rootMargin: '400px' })
+    observer.observe(sentinel)
+    return () => observer.disconnect()
+  }, [hasNextPage, isFetchingNextPage, fetchNextPage])
 
   if (isError) {
     return <div className={styles.empty}>Failed to load cards. Check your connection.</div>
@@ -39,6 +54,11 @@ export function CardList() {
           }}
         />
       ))}
+      {hasNextPage && (
+        <div ref={sentinelRef} className={styles.sentinel} data-testid="card-list-more">
+          {isFetchingNextPage && <div className={`skeleton ${styles.skeletonCard}`} />}
+        </div>
+      )}
     </div>
   )
 }
@@ -2,7 +2,7 @@ import { describe, it, expect, vi } from 'vitest'
 import { renderHook, waitFor } from '@testing-library/react'
 import { QueryClient, QueryClientProvider } from '@tanstack/react-query'
 import { createElement } from 'react'
-import { useCards } from '../useCards'
+import { CARD_PAGE_SIZE, useCards } from '../useCards'
 import * as client from '../../api/client'
 
 vi.mock('../../api/client')
@@ -24,8 +24,9 @@ describe('useCards', () => {
     const { result } = renderHook(() => useCards('gmail'), { wrapper: createWrapper() })
 
     await waitFor(() => expect(result.current.isSuccess).toBe(true))
-    expect(result.current.data).toEqual(mockData)
-    expect(client.fetchCards).toHaveBeenCalledWith('gmail')
+    expect(result.current.data?.cards).toEqual(mockData.cards)
+    expect(result.current.data?.counts).toEqual(mockData.counts)
+    expect(client.fetchCards).toHaveBeenCalledWith('gmail', { after: undefined, limit: CARD_PAGE_SIZE })
   })
 
   it('uses "all" as default source', async () => {
@@ -35,6 +36,22 @@ describe('useCards', () => {
     const { result } = renderHook(() => useCards('all'), { wrapper: createWrapper() })
 
     await waitFor(() => expect(result.current.isSuccess).toBe(true))
-    expect(client.fetchCards).toHaveBeenCalledWith('all')
+    expect(client.fetchCards).toHaveBeenCalledWith('all', { after: undefined, limit: CARD_PAGE_SIZE })
+  })
+
+  it('loads the next page from next_cursor and merges cards', async () => {
+    const counts = { pending: 2, held: 0, approved: 0, completed: 0, failed: 0 }
+    vi.mocked(client.fetchCards)
+      .mockResolvedValueOnce({ cards: [{ id: 2, source: 'slack' }], counts, next_cursor: '2026-03-10 10:00:00,2' } as any)
+      .mockResolvedValueOnce({ cards: [{ id: 1, source: 'slack' }], counts, next_cursor: null } as any)
+
+    const { result } = renderHook(() => useCards('slack'), { wrapper: createWrapper() })
+
+    await waitFor(() => expect(result.current.hasNextPage).toBe(true))
+    await result.current.fetchNextPage()
+
+    await waitFor(() => expect(result.current.data?.cards.map((card) => card.id)).toEqual([2, 1]))
+    expect(client.fetchCards).toHaveBeenLastCalledWith('slack', { after: '2026-03-10 10:00:00,2', limit: CARD_PAGE_SIZE })
+    expect(result.current.hasNextPage).toBe(false)
   })
 })
@@ -1,10 +1,23 @@
-import { useQuery } from '@tanstack/react-query'
+import { useInfiniteQuery } from '@tanstack/react-query'
 import { fetchCards } from '../api/client'
-import type { CardSource } from '../api/types'
+import type { CardSource, CardsResponse } from '../api/types'
+
+export const CARD_PAGE_SIZE = 50
 
 export function useCards(source: CardSource) {
-  return useQuery({
-    queryKey: ['cards', source],
-    queryFn: () => fetchCards(source),
+  return useInfiniteQuery({
+    queryKey: ['cards', source, 'pages'],
+    queryFn: ({ pageParam }) => fetchCards(source, { after: pageParam, limit: CARD_PAGE_SIZE }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+    select: (data): CardsResponse => {
+      const last = data.pages[data.pages.length - 1]
+      return {
+        cards: data.pages.flatMap((page) => page.cards),
+        counts: last.counts,
+        source_counts: last.source_counts,
+        next_cursor: last.next_cursor,
+      }
+    },
   })
 }
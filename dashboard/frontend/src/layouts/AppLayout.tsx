@@ -25,13 +25,15 @@ export function AppLayout() {
 
   const counts = data?.counts ?? { pending: 0, held: 0, approved: 0, completed: 0, failed: 0 }
   const sourceCounts = useMemo(() => {
+    // Cards arrive a page at a time, so prefer the server's totals.
+    if (data?.source_counts) return data.source_counts
     const cards = data?.cards ?? []
     const result: Record<string, number> = {}
     for (const card of cards) {
       result[card.source] = (result[card.source] ?? 0) + 1
     }
     return result
-  }, [data?.cards])
+  }, [data?.source_counts, data?.cards])
 
   const handleSSE = useCallback(
     (_event: SSEEvent) => {
@@ -0,0 +1,407 @@
+# dashboard/ingest_channel.py
+"""Unix-socket ingest channel from the pollers to the dashboard.
+
+Pollers used to tell the dashboard about new work with one blocking
+``urllib`` POST per notification (``/api/cache-invalidate``,
+``/api/cards/resolve-related``), and a notification sent while the server was
+restarting was simply lost. Now every message (card batches, invalidations,
+resolve-related batches) is first written to an on-disk spool, one file per
+message, and then pushed over a local unix socket as a length-prefixed JSON
+frame (4-byte big-endian length + UTF-8 JSON body)::
+
+    {"id": "<hex>", "type": "invalidate", "payload": {...}, "sent_at": 1.0}
+
+The dashboard applies frames one at a time through a single writer, records
+the message id in ``ingest_messages`` in the same transaction, and only then
+answers ``{"ack": "<id>", "ok": true}``. The poller deletes a spool file once
+its ack arrives, so a server that is down, restarting or crashes mid-frame
+just leaves messages spooled; the next send replays them oldest first, and a
+replayed id that was already applied is acknowledged without re-running.
+
+A frame the dashboard rejects (unknown type, malformed payload) is answered
+``"ok": false``; one whose handler failed is answered ``"retry": true`` and
+stays spooled, holding back what follows, until it has failed
+``MAX_DELIVERY_ATTEMPTS`` times. Rejected, exhausted and expired messages are
+appended to ``dead-letter.jsonl`` in the spool directory instead of being
+replayed. Invalidations are coalesced on replay, and the spool refuses new
+messages past ``MAX_SPOOL_MESSAGES`` so a long outage cannot grow it without
+bound.
+"""
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+
+RUNTIME_DIR = Path.home() / ".claude" / "eng-buddy" / "runtime"
+SOCKET_PATH = Path(os.environ.get("ENG_BUDDY_INGEST_SOCKET", str(RUNTIME_DIR / "ingest.sock")))
+SPOOL_DIR = Path(os.environ.get("ENG_BUDDY_INGEST_SPOOL", str(RUNTIME_DIR / "ingest-spool")))
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+CLIENT_TIMEOUT_SECONDS = 10
+# Applied ids are kept long enough to cover any realistic replay, then pruned.
+DEDUPE_RETENTION_SECONDS = 7 * 24 * 3600
+PRUNE_EVERY_MESSAGES = 500
+# A message whose handler keeps failing is dead-lettered after this many tries
+# so it cannot block the spool behind it forever.
+MAX_DELIVERY_ATTEMPTS = 5
+# Past the dedupe retention an unacked message may already have been applied
+# and forgotten, so replaying it could apply it twice.
+MAX_MESSAGE_AGE_SECONDS = DEDUPE_RETENTION_SECONDS
+MAX_SPOOL_MESSAGES = 5000
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+# Idempotent message types: only the newest spooled copy of a payload is sent.
+COALESCED_TYPES = frozenset({"invalidate"})
+
+
+class IngestError(Exception):
+    """A frame was malformed, oversized or cut short, or the spool is full."""
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise IngestError(f"frame of {len(body)} bytes exceeds {MAX_FRAME_BYTES}")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def _decode_body(body: bytes) -> dict:
+    try:
+        message = json.loads(body)
+    except ValueError as exc:
+        raise IngestError(f"invalid frame body: {exc}") from exc
+    if not isinstance(message, dict):
+        raise IngestError("frame body must be a JSON object")
+    return message
+
+
+def _frame_length(header: bytes) -> int:
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise IngestError(f"frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return length
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise IngestError("connection closed mid-frame")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> dict:
+    """Read one frame from a blocking socket."""
+    length = _frame_length(_recv_exactly(sock, FRAME_HEADER.size))
+    return _decode_body(_recv_exactly(sock, length))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    """Read one frame from a stream; ``IncompleteReadError`` on a clean EOF."""
+    length = _frame_length(await reader.readexactly(FRAME_HEADER.size))
+    try:
+        body = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as exc:
+        raise IngestError("connection closed mid-frame") from exc
+    return _decode_body(body)
+
+
+def _fsync_dir(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ---------------------------------------------------------------------------
+# Poller side
+# ---------------------------------------------------------------------------
+
+
+class IngestClient:
+    """Spool-first sender used by the pollers.
+
+    Threads share one client; processes sharing a spool directory take turns
+    flushing under an ``flock`` so replay order holds across both.
+    """
+
+    def __init__(self, socket_path=None, spool_dir=None, timeout=CLIENT_TIMEOUT_SECONDS):
+        self.socket_path = Path(socket_path or SOCKET_PATH)
+        self.spool_dir = Path(spool_dir or SPOOL_DIR)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def spool(self, kind: str, payload: dict) -> Path:
+        """Durably queue one message and return its spool file.
+
+        Raises ``IngestError`` for an oversized message or a full spool.
+        """
+        message = {"id": uuid.uuid4().hex, "type": kind, "payload": payload, "sent_at": time.time()}
+        encode_frame(message)  # refuse oversized messages before they reach the spool
+        if len(self.pending()) >= MAX_SPOOL_MESSAGES:
+            raise IngestError(f"ingest spool holds {MAX_SPOOL_MESSAGES} messages; is the dashboard running?")
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{time.time_ns():020d}-{message['id']}.json"
+        self._write_atomic(path, message)
+        return path
+
+    def _write_atomic(self, path: Path, message: dict):
+        temp = path.with_name(f".{path.name}.tmp")
+        with open(temp, "wb") as handle:
+            handle.write(json.dumps(message).encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, path)
+        _fsync_dir(path.parent)
+
+    def dead_letters(self) -> list[dict]:
+        """Messages given up on, oldest first, each with a ``dead_reason``."""
+        path = self.spool_dir / DEAD_LETTER_FILE
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    def _dead_letter(self, path: Path, message: dict, reason: str):
+        with open(self.spool_dir / DEAD_LETTER_FILE, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({**message, "dead_reason": reason, "dead_at": time.time()}) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        path.unlink(missing_ok=True)
+
+    def _load_pending(self) -> list[tuple[Path, dict]]:
+        """Readable spooled messages, oldest first, minus superseded invalidations."""
+        loaded = []
+        for path in self.pending():
+            try:
+                loaded.append((path, json.loads(path.read_text(encoding="utf-8"))))
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                path.unlink(missing_ok=True)  # unreadable; nothing to replay
+        keys = [
+            json.dumps([message.get("type"), message.get("payload")], sort_keys=True)
+            if message.get("type") in COALESCED_TYPES
+            else None
+            for _path, message in loaded
+        ]
+        newest = {key: index for index, key in enumerate(keys) if key is not None}
+        kept = []
+        for index, (path, message) in enumerate(loaded):
+            if keys[index] is not None and newest[keys[index]] != index:
+                path.unlink(missing_ok=True)  # a later copy is sent instead
+                continue
+            kept.append((path, message))
+        return kept
+
+    def pending(self) -> list[Path]:
+        """Spooled messages, oldest first."""
+        if not self.spool_dir.exists():
+            return []
+        return sorted(path for path in self.spool_dir.glob("*.json") if not path.name.startswith("."))
+
+    @contextlib.contextmanager
+    def _flush_lock(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.spool_dir / ".lock", "a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def flush(self) -> int:
+        """Replay the spool in order; returns how many messages were acknowledged.
+
+        Stops at the first message without an ack, or whose handler failed
+        and may still succeed, leaving it and everything after it spooled for
+        the next attempt. Time spent unable to connect does not count against
+        a message's attempts.
+        """
+        with self._flush_lock():
+            if not self.pending():
+                return 0
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                return 0
+            delivered = 0
+            with sock:
+                for path, message in self._load_pending():
+                    if time.time() - float(message.get("sent_at") or 0) > MAX_MESSAGE_AGE_SECONDS:
+                        self._dead_letter(path, message, "expired")
+                        continue
+                    try:
+                        sock.sendall(encode_frame(message))
+                        ack = recv_frame(sock)
+                    except (OSError, IngestError):
+                        break
+                    if ack.get("ack") != message.get("id"):
+                        break
+                    if ack.get("ok"):
+                        path.unlink(missing_ok=True)
+                        delivered += 1
+                    elif not ack.get("retry"):
+                        self._dead_letter(path, message, f"rejected: {ack.get('error', '')}")
+                    else:
+                        message["attempts"] = int(message.get("attempts") or 0) + 1
+                        if message["attempts"] >= MAX_DELIVERY_ATTEMPTS:
+                            reason = f"failed {message['attempts']} times: {ack.get('error', '')}"
+                            self._dead_letter(path, message, reason)
+                            continue
+                        self._write_atomic(path, message)
+                        break
+            return delivered
+
+    def send(self, kind: str, payload: dict) -> bool:
+        """Spool a message and flush; False while it is still waiting in the spool."""
+        path = self.spool(kind, payload)
+        self.flush()
+        return not path.exists()
+
+
+# ---------------------------------------------------------------------------
+# Dashboard side
+# ---------------------------------------------------------------------------
+
+
+class IngestServer:
+    """Accepts frames on the unix socket and applies them through one writer.
+
+    ``handlers`` maps a message type to ``handler(conn, payload) -> result``.
+    The handler's writes commit together with the message id; raising
+    ``ValueError``/``TypeError``/``KeyError`` rejects the message, any other
+    exception is answered with ``"retry": true`` so the poller keeps it
+    spooled and counts the attempt.
+    ``on_commit(kind, result)`` runs on the event loop after each commit.
+    ``connect()`` returns a connection to the migrated inbox.db.
+    """
+
+    def __init__(self, handlers, connect, socket_path=None, on_commit=None):
+        self.handlers = dict(handlers)
+        self.connect = connect
+        self.socket_path = Path(socket_path or SOCKET_PATH)
+        self.on_commit = on_commit
+        self._server = None
+        self._queue = None
+        self._writer_task = None
+        self._connections = set()
+        self._applied = 0
+
+    async def start(self):
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists() or self.socket_path.is_symlink():
+            self.socket_path.unlink()  # left behind by a server that did not shut down cleanly
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+        self._server = await asyncio.start_unix_server(self._serve, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer_task
+            self._writer_task = None
+        while self._queue is not None and not self._queue.empty():
+            _message, applied = self._queue.get_nowait()
+            if not applied.done():
+                applied.set_exception(ConnectionAbortedError("ingest server closed"))
+        with contextlib.suppress(FileNotFoundError):
+            self.socket_path.unlink()
+
+    async def _serve(self, reader, writer):
+        self._connections.add(writer)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    message = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                applied = loop.create_future()
+                await self._queue.put((message, applied))
+                try:
+                    ack = await applied
+                except ConnectionAbortedError:
+                    break  # shutting down: no ack, the message stays spooled as is
+                except Exception as exc:
+                    error = f"{type(exc).__name__}: {exc}"
+                    ack = {"ack": message.get("id"), "ok": False, "retry": True, "error": error}
+                writer.write(encode_frame(ack))
+                await writer.drain()
+        except Exception:
+            pass  # no ack: the poller keeps the message spooled and retries
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _write_loop(self):
+        while True:
+            message, applied = await self._queue.get()
+            try:
+                ack, result = await asyncio.to_thread(self._apply, message)
+            except asyncio.CancelledError:
+                if not applied.done():
+                    applied.set_exception(ConnectionAbortedError("ingest server closed"))
+                raise
+            except Exception as exc:
+                if not applied.done():
+                    applied.set_exception(exc)
+                continue
+            if result is not None and self.on_commit is not None:
+                try:
+                    self.on_commit(message["type"], result)
+                except Exception:
+                    pass  # the message is committed; a failed follow-up must not un-ack it
+            if not applied.done():
+                applied.set_result(ack)
+
+    def _apply(self, message: dict):
+        """Apply one message; returns ``(ack, handler result or None)``."""
+        message_id = str(message.get("id") or "")
+        kind = message.get("type")
+        handler = self.handlers.get(kind)
+        if not message_id or handler is None:
+            return {"ack": message_id, "ok": False, "error": f"unknown message type: {kind!r}"}, None
+        payload = message.get("payload")
+        conn = self.connect()
+        try:
+            if conn.execute("SELECT 1 FROM ingest_messages WHERE id = ?", [message_id]).fetchone():
+                return {"ack": message_id, "ok": True, "duplicate": True}, None
+            try:
+                result = handler(conn, payload if isinstance(payload, dict) else {})
+            except (ValueError, TypeError, KeyError) as exc:
+                conn.rollback()
+                return {"ack": message_id, "ok": False, "error": str(exc)}, None
+            now = time.time()
+            conn.execute(
+                "INSERT INTO ingest_messages (id, type, received_at) VALUES (?, ?, ?)",
+                [message_id, kind, now],
+            )
+            self._applied += 1
+            if self._applied % PRUNE_EVERY_MESSAGES == 0:
+                conn.execute("DELETE FROM ingest_messages WHERE received_at < ?", [now - DEDUPE_RETENTION_SECONDS])
+            conn.commit()
+        finally:
+            conn.close()
+        return {"ack": message_id, "ok": True}, result if result is not None else {}
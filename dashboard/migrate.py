@@ -1,207 +1,557 @@
 # dashboard/migrate.py
-"""Run idempotent schema migrations on inbox.db."""
+"""Versioned schema migrations for inbox.db.
+
+Each entry in ``MIGRATIONS`` is one schema version. The database records the
+last applied version in ``PRAGMA user_version`` so only pending steps run;
+expensive one-off work (like the card dedupe) never repeats. A step is a list
+of SQL strings and, for data backfills, callables taking the connection. The
+same runner is used by the dashboard, the pollers, ``tasks_db`` and ``PlanStore``.
+"""
+import json
 import sqlite3
+import threading
+from email.utils import parseaddr
 from pathlib import Path
 
 DB_PATH = Path.home() / ".claude" / "eng-buddy" / "inbox.db"
 
 MIGRATIONS = [
-    # Base cards table (for fresh installs)
-    """CREATE TABLE IF NOT EXISTS cards (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        source TEXT,
-        timestamp TEXT,
-        summary TEXT,
-        classification TEXT,
-        status TEXT DEFAULT 'pending',
-        proposed_actions TEXT,
-        execution_status TEXT DEFAULT 'not_run',
-        execution_result TEXT,
-        executed_at TEXT,
-        section TEXT DEFAULT 'needs-action',
-        draft_response TEXT,
-        context_notes TEXT,
-        responded INTEGER DEFAULT 0,
-        filter_suggested INTEGER DEFAULT 0,
-        refinement_history TEXT,
-        analysis_metadata TEXT
-    )""",
-    # New columns for smart classification
-    "ALTER TABLE cards ADD COLUMN section TEXT DEFAULT 'needs-action'",
-    "ALTER TABLE cards ADD COLUMN draft_response TEXT",
-    "ALTER TABLE cards ADD COLUMN context_notes TEXT",
-    "ALTER TABLE cards ADD COLUMN responded INTEGER DEFAULT 0",
-    "ALTER TABLE cards ADD COLUMN filter_suggested INTEGER DEFAULT 0",
-    "ALTER TABLE cards ADD COLUMN analysis_metadata TEXT",
-    # Stats table
-    """CREATE TABLE IF NOT EXISTS stats (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT NOT NULL,
-        metric TEXT NOT NULL,
-        value REAL DEFAULT 0,
-        details TEXT
-    )""",
-    # Briefing cache
-    """CREATE TABLE IF NOT EXISTS briefings (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT UNIQUE NOT NULL,
-        content TEXT NOT NULL,
-        generated_at TEXT NOT NULL
-    )""",
-    # Filter suggestions tracking
-    """CREATE TABLE IF NOT EXISTS filter_suggestions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        source TEXT NOT NULL,
-        pattern TEXT NOT NULL,
-        ignore_count INTEGER DEFAULT 0,
-        suggested_at TEXT,
-        status TEXT DEFAULT 'tracking',
-        filter_id TEXT
-    )""",
-    # Chat sessions across cards/tasks/open-session transcripts
-    """CREATE TABLE IF NOT EXISTS chat_sessions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        scope TEXT NOT NULL,
-        source TEXT NOT NULL,
-        source_ref TEXT NOT NULL,
-        title TEXT,
-        created_at TEXT NOT NULL DEFAULT (datetime('now')),
-        updated_at TEXT NOT NULL DEFAULT (datetime('now')),
-        last_ingested_message_id INTEGER DEFAULT 0,
-        UNIQUE(scope, source_ref)
-    )""",
-    """CREATE TABLE IF NOT EXISTS chat_messages (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id INTEGER NOT NULL REFERENCES chat_sessions(id) ON DELETE CASCADE,
-        role TEXT NOT NULL,
-        content TEXT NOT NULL,
-        metadata TEXT,
-        created_at TEXT NOT NULL DEFAULT (datetime('now'))
-    )""",
-    "CREATE INDEX IF NOT EXISTS idx_chat_sessions_source ON chat_sessions(source, scope)",
-    "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_id, id)",
-    # Explicit action approval workflow + execution audit
-    """CREATE TABLE IF NOT EXISTS action_steps (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        entity_type TEXT NOT NULL,
-        entity_id TEXT NOT NULL,
-        action_name TEXT NOT NULL,
-        status TEXT NOT NULL DEFAULT 'proposed',
-        payload TEXT,
-        created_at TEXT NOT NULL DEFAULT (datetime('now')),
-        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
-    )""",
-    """CREATE TABLE IF NOT EXISTS decision_events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        entity_type TEXT NOT NULL,
-        entity_id TEXT NOT NULL,
-        action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
-        decision TEXT NOT NULL,
-        rationale TEXT,
-        actor TEXT NOT NULL DEFAULT 'user',
-        metadata TEXT,
-        created_at TEXT NOT NULL DEFAULT (datetime('now'))
-    )""",
-    """CREATE TABLE IF NOT EXISTS execution_attempts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        entity_type TEXT NOT NULL,
-        entity_id TEXT NOT NULL,
-        action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
-        action_name TEXT NOT NULL,
-        status TEXT NOT NULL DEFAULT 'running',
-        output TEXT,
-        error TEXT,
-        metadata TEXT,
-        started_at TEXT NOT NULL DEFAULT (datetime('now')),
-        finished_at TEXT
-    )""",
-    "CREATE INDEX IF NOT EXISTS idx_action_steps_entity ON action_steps(entity_type, entity_id, action_name, updated_at)",
-    "CREATE INDEX IF NOT EXISTS idx_decision_events_entity ON decision_events(entity_type, entity_id, decision, created_at)",
-    "CREATE INDEX IF NOT EXISTS idx_execution_attempts_entity ON execution_attempts(entity_type, entity_id, action_name, started_at)",
-    # Decision log
-    """CREATE TABLE IF NOT EXISTS decisions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        card_id INTEGER NOT NULL,
-        action TEXT NOT NULL,
-        source TEXT,
-        summary TEXT,
-        context_notes TEXT,
-        draft_response TEXT,
-        refinement_history TEXT,
-        execution_result TEXT,
-        decision_at TEXT NOT NULL,
-        tags TEXT
-    )""",
-    # FTS5 index for decision search
-    """CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5(
-        summary, context_notes, draft_response, execution_result, tags,
-        content='decisions', content_rowid='id'
-    )""",
-    # Triggers to keep FTS in sync
-    """CREATE TRIGGER IF NOT EXISTS decisions_ai AFTER INSERT ON decisions BEGIN
-        INSERT INTO decisions_fts(rowid, summary, context_notes, draft_response, execution_result, tags)
-        VALUES (new.id, new.summary, new.context_notes, new.draft_response, new.execution_result, new.tags);
-    END""",
-    """CREATE TRIGGER IF NOT EXISTS decisions_ad AFTER DELETE ON decisions BEGIN
-        INSERT INTO decisions_fts(decisions_fts, rowid, summary, context_notes, draft_response, execution_result, tags)
-        VALUES ('delete', old.id, old.summary, old.context_notes, old.draft_response, old.execution_result, old.tags);
-    END""",
-    """CREATE TRIGGER IF NOT EXISTS decisions_au AFTER UPDATE ON decisions BEGIN
-        INSERT INTO decisions_fts(decisions_fts, rowid, summary, context_notes, draft_response, execution_result, tags)
-        VALUES ('delete', old.id, old.summary, old.context_notes, old.draft_response, old.execution_result, old.tags);
-        INSERT INTO decisions_fts(rowid, summary, context_notes, draft_response, execution_result, tags)
-        VALUES (new.id, new.summary, new.context_notes, new.draft_response, new.execution_result, new.tags);
-    END""",
-    # Learning engine categories + captured hook events
-    """CREATE TABLE IF NOT EXISTS learning_categories (
-        name TEXT PRIMARY KEY,
-        description TEXT,
-        source TEXT NOT NULL DEFAULT 'system',
-        created_at TEXT NOT NULL DEFAULT (datetime('now'))
-    )""",
-    """CREATE TABLE IF NOT EXISTS learning_events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        session_id TEXT,
-        hook_event TEXT,
-        source TEXT,
-        scope TEXT,
-        tool_name TEXT,
-        category TEXT,
-        title TEXT,
-        note TEXT,
-        status TEXT NOT NULL DEFAULT 'captured',
-        requires_category_expansion INTEGER NOT NULL DEFAULT 0,
-        proposed_category TEXT,
-        metadata TEXT,
-        created_at TEXT NOT NULL DEFAULT (datetime('now'))
-    )""",
-    "CREATE INDEX IF NOT EXISTS idx_learning_events_session ON learning_events(session_id, created_at)",
-    "CREATE INDEX IF NOT EXISTS idx_learning_events_category ON learning_events(category, created_at)",
-    "CREATE INDEX IF NOT EXISTS idx_learning_events_pending ON learning_events(requires_category_expansion, created_at)",
-    # Refinement history on cards
-    "ALTER TABLE cards ADD COLUMN refinement_history TEXT",
-    # Deduplicate all cards: keep newest per (source, summary), delete older copies
-    """DELETE FROM cards WHERE id NOT IN (
-        SELECT MAX(id) FROM cards GROUP BY source, summary
-    )""",
-    # Unique index to prevent future duplicates (source + summary)
-    "CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_source_summary ON cards(source, summary)",
+    # 1: baseline schema (safe to replay on databases that predate versioning)
+    [
+        # Base cards table (for fresh installs)
+        """CREATE TABLE IF NOT EXISTS cards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT,
+            timestamp TEXT,
+            summary TEXT,
+            classification TEXT,
+            status TEXT DEFAULT 'pending',
+            proposed_actions TEXT,
+            execution_status TEXT DEFAULT 'not_run',
+            execution_result TEXT,
+            executed_at TEXT,
+            section TEXT DEFAULT 'needs-action',
+            draft_response TEXT,
+            context_notes TEXT,
+            responded INTEGER DEFAULT 0,
+            filter_suggested INTEGER DEFAULT 0,
+            refinement_history TEXT,
+            analysis_metadata TEXT
+        )""",
+        # Core columns missing from cards tables created by early versions
+        "ALTER TABLE cards ADD COLUMN source TEXT",
+        "ALTER TABLE cards ADD COLUMN timestamp TEXT",
+        "ALTER TABLE cards ADD COLUMN summary TEXT",
+        "ALTER TABLE cards ADD COLUMN classification TEXT",
+        "ALTER TABLE cards ADD COLUMN status TEXT DEFAULT 'pending'",
+        "ALTER TABLE cards ADD COLUMN proposed_actions TEXT",
+        "ALTER TABLE cards ADD COLUMN execution_status TEXT DEFAULT 'not_run'",
+        "ALTER TABLE cards ADD COLUMN execution_result TEXT",
+        "ALTER TABLE cards ADD COLUMN executed_at TEXT",
+        # New columns for smart classification
+        "ALTER TABLE cards ADD COLUMN section TEXT DEFAULT 'needs-action'",
+        "ALTER TABLE cards ADD COLUMN draft_response TEXT",
+        "ALTER TABLE cards ADD COLUMN context_notes TEXT",
+        "ALTER TABLE cards ADD COLUMN responded INTEGER DEFAULT 0",
+        "ALTER TABLE cards ADD COLUMN filter_suggested INTEGER DEFAULT 0",
+        "ALTER TABLE cards ADD COLUMN analysis_metadata TEXT",
+        # Stats table
+        """CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            value REAL DEFAULT 0,
+            details TEXT
+        )""",
+        # Briefing cache
+        """CREATE TABLE IF NOT EXISTS briefings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT UNIQUE NOT NULL,
+            content TEXT NOT NULL,
+            generated_at TEXT NOT NULL
+        )""",
+        # Filter suggestions tracking
+        """CREATE TABLE IF NOT EXISTS filter_suggestions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            pattern TEXT NOT NULL,
+            ignore_count INTEGER DEFAULT 0,
+            suggested_at TEXT,
+            status TEXT DEFAULT 'tracking',
+            filter_id TEXT
+        )""",
+        # Chat sessions across cards/tasks/open-session transcripts
+        """CREATE TABLE IF NOT EXISTS chat_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            source TEXT NOT NULL,
+            source_ref TEXT NOT NULL,
+            title TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+            last_ingested_message_id INTEGER DEFAULT 0,
+            UNIQUE(scope, source_ref)
+        )""",
+        """CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL REFERENCES chat_sessions(id) ON DELETE CASCADE,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            metadata TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_chat_sessions_source ON chat_sessions(source, scope)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_id, id)",
+        # Explicit action approval workflow + execution audit
+        """CREATE TABLE IF NOT EXISTS action_steps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            action_name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'proposed',
+            payload TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )""",
+        """CREATE TABLE IF NOT EXISTS decision_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
+            decision TEXT NOT NULL,
+            rationale TEXT,
+            actor TEXT NOT NULL DEFAULT 'user',
+            metadata TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )""",
+        """CREATE TABLE IF NOT EXISTS execution_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
+            action_name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            output TEXT,
+            error TEXT,
+            metadata TEXT,
+            started_at TEXT NOT NULL DEFAULT (datetime('now')),
+            finished_at TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_action_steps_entity ON action_steps(entity_type, entity_id, action_name, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_decision_events_entity ON decision_events(entity_type, entity_id, decision, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_execution_attempts_entity ON execution_attempts(entity_type, entity_id, action_name, started_at)",
+        # Decision log
+        """CREATE TABLE IF NOT EXISTS decisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            source TEXT,
+            summary TEXT,
+            context_notes TEXT,
+            draft_response TEXT,
+            refinement_history TEXT,
+            execution_result TEXT,
+            decision_at TEXT NOT NULL,
+            tags TEXT
+        )""",
+        # FTS5 index for decision search
+        """CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5(
+            summary, context_notes, draft_response, execution_result, tags,
+            content='decisions', content_rowid='id'
+        )""",
+        # Triggers to keep FTS in sync
+        """CREATE TRIGGER IF NOT EXISTS decisions_ai AFTER INSERT ON decisions BEGIN
+            INSERT INTO decisions_fts(rowid, summary, context_notes, draft_response, execution_result, tags)
+            VALUES (new.id, new.summary, new.context_notes, new.draft_response, new.execution_result, new.tags);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS decisions_ad AFTER DELETE ON decisions BEGIN
+            INSERT INTO decisions_fts(decisions_fts, rowid, summary, context_notes, draft_response, execution_result, tags)
+            VALUES ('delete', old.id, old.summary, old.context_notes, old.draft_response, old.execution_result, old.tags);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS decisions_au AFTER UPDATE ON decisions BEGIN
+            INSERT INTO decisions_fts(decisions_fts, rowid, summary, context_notes, draft_response, execution_result, tags)
+            VALUES ('delete', old.id, old.summary, old.context_notes, old.draft_response, old.execution_result, old.tags);
+            INSERT INTO decisions_fts(rowid, summary, context_notes, draft_response, execution_result, tags)
+            VALUES (new.id, new.summary, new.context_notes, new.draft_response, new.execution_result, new.tags);
+        END""",
+        # Learning engine categories + captured hook events
+        """CREATE TABLE IF NOT EXISTS learning_categories (
+            name TEXT PRIMARY KEY,
+            description TEXT,
+            source TEXT NOT NULL DEFAULT 'system',
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )""",
+        """CREATE TABLE IF NOT EXISTS learning_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            hook_event TEXT,
+            source TEXT,
+            scope TEXT,
+            tool_name TEXT,
+            category TEXT,
+            title TEXT,
+            note TEXT,
+            status TEXT NOT NULL DEFAULT 'captured',
+            requires_category_expansion INTEGER NOT NULL DEFAULT 0,
+            proposed_category TEXT,
+            metadata TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_learning_events_session ON learning_events(session_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_learning_events_category ON learning_events(category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_learning_events_pending ON learning_events(requires_category_expansion, created_at)",
+        # Refinement history on cards
+        "ALTER TABLE cards ADD COLUMN refinement_history TEXT",
+    ],
+    # 2: deduplicate cards once, then enforce uniqueness going forward
+    [
+        # Keep newest per (source, summary), delete older copies
+        """DELETE FROM cards WHERE id NOT IN (
+            SELECT MAX(id) FROM cards GROUP BY source, summary
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_source_summary ON cards(source, summary)",
+    ],
+    # 3: Freshservice enrichment pipeline (previously created on every audit write)
+    [
+        """CREATE TABLE IF NOT EXISTS classification_buckets (
+            id TEXT PRIMARY KEY,
+            description TEXT,
+            knowledge_files TEXT DEFAULT '[]',
+            confidence_keywords TEXT DEFAULT '[]',
+            ticket_count INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'emerging',
+            created_by_ticket INTEGER,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        )""",
+        """CREATE TABLE IF NOT EXISTS enrichment_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_id INTEGER,
+            stage TEXT,
+            model TEXT,
+            duration_ms INTEGER,
+            status TEXT,
+            response_summary TEXT,
+            created_at TEXT DEFAULT (datetime('now'))
+        )""",
+        "ALTER TABLE cards ADD COLUMN enrichment_status TEXT DEFAULT 'not_enriched'",
+    ],
+    # 4: plan index used by PlanStore
+    [
+        """CREATE TABLE IF NOT EXISTS plans (
+            card_id INTEGER PRIMARY KEY,
+            plan_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )""",
+    ],
+    # 5: sortable UTC timestamp + composite indexes for the card list/inbox queries
+    [
+        # Pollers write ISO strings with mixed offsets; datetime() normalizes them to
+        # UTC "YYYY-MM-DD HH:MM:SS", which sorts and range-compares correctly.
+        "ALTER TABLE cards ADD COLUMN timestamp_utc TEXT GENERATED ALWAYS AS (datetime(timestamp)) VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_cards_source_timestamp ON cards(source, timestamp_utc)",
+        "CREATE INDEX IF NOT EXISTS idx_cards_status_source_section ON cards(status, source, section, timestamp_utc)",
+        "CREATE INDEX IF NOT EXISTS idx_cards_timestamp ON cards(timestamp_utc)",
+        # learning_events.created_at defaults to datetime('now'); canonicalize any
+        # stragglers so range filters can compare the raw column.
+        """UPDATE learning_events SET created_at = datetime(created_at)
+           WHERE datetime(created_at) IS NOT NULL AND created_at != datetime(created_at)""",
+        "CREATE INDEX IF NOT EXISTS idx_learning_events_created ON learning_events(created_at)",
+    ],
+    # 6: Gmail threading keys derived at write time (see gmail_card_keys)
+    [
+        "ALTER TABLE cards ADD COLUMN thread_id TEXT",
+        "ALTER TABLE cards ADD COLUMN message_id TEXT",
+        "ALTER TABLE cards ADD COLUMN sender_email TEXT",
+        "ALTER TABLE cards ADD COLUMN dup_key TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_cards_source_dup_key ON cards(source, dup_key)",
+        "CREATE INDEX IF NOT EXISTS idx_cards_source_thread ON cards(source, thread_id)",
+        lambda conn: backfill_gmail_keys(conn),
+    ],
+    # 7: topic inverted index + extracted person per card for cross-channel
+    # resolution. Triggers queue written cards; the dashboard extracts terms
+    # for queued cards on demand.
+    [
+        """CREATE TABLE IF NOT EXISTS card_terms (
+            kind TEXT NOT NULL,
+            term TEXT NOT NULL,
+            card_id INTEGER NOT NULL,
+            PRIMARY KEY (kind, term, card_id)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_card_terms_card ON card_terms(card_id)",
+        """CREATE TABLE IF NOT EXISTS card_persons (
+            card_id INTEGER PRIMARY KEY,
+            person TEXT NOT NULL DEFAULT ''
+        )""",
+        "CREATE TABLE IF NOT EXISTS card_terms_queue (card_id INTEGER PRIMARY KEY)",
+        # An UPSERT's conflict policy overrides OR IGNORE inside a trigger, so
+        # re-upserting a card still waiting in the queue would abort with a
+        # UNIQUE error; queue with NOT EXISTS instead.
+        """CREATE TRIGGER IF NOT EXISTS cards_terms_insert AFTER INSERT ON cards
+           BEGIN
+               INSERT INTO card_terms_queue (card_id)
+               SELECT NEW.id WHERE NOT EXISTS (SELECT 1 FROM card_terms_queue WHERE card_id = NEW.id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS cards_terms_update
+           AFTER UPDATE OF summary, context_notes, proposed_actions ON cards
+           BEGIN
+               DELETE FROM card_terms WHERE card_id = OLD.id;
+               DELETE FROM card_persons WHERE card_id = OLD.id;
+               INSERT INTO card_terms_queue (card_id)
+               SELECT NEW.id WHERE NOT EXISTS (SELECT 1 FROM card_terms_queue WHERE card_id = NEW.id);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS cards_terms_delete AFTER DELETE ON cards
+           BEGIN
+               DELETE FROM card_terms WHERE card_id = OLD.id;
+               DELETE FROM card_persons WHERE card_id = OLD.id;
+               DELETE FROM card_terms_queue WHERE card_id = OLD.id;
+           END""",
+        "INSERT OR IGNORE INTO card_terms_queue (card_id) SELECT id FROM cards",
+    ],
+    # 8: per-source data versions for conditional GETs (ETag / 304)
+    [
+        """CREATE TABLE IF NOT EXISTS data_versions (
+            source TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )""",
+        """INSERT OR IGNORE INTO data_versions (source, version)
+           SELECT DISTINCT COALESCE(source, ''), 1 FROM cards""",
+        """CREATE TRIGGER IF NOT EXISTS cards_version_insert AFTER INSERT ON cards
+           BEGIN
+               INSERT INTO data_versions (source, version) VALUES (COALESCE(NEW.source, ''), 1)
+               ON CONFLICT(source) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS cards_version_update AFTER UPDATE ON cards
+           BEGIN
+               INSERT INTO data_versions (source, version) VALUES (COALESCE(NEW.source, ''), 1)
+               ON CONFLICT(source) DO UPDATE SET version = version + 1;
+               INSERT INTO data_versions (source, version)
+               SELECT COALESCE(OLD.source, ''), 1 WHERE COALESCE(OLD.source, '') != COALESCE(NEW.source, '')
+               ON CONFLICT(source) DO UPDATE SET version = version + 1;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS cards_version_delete AFTER DELETE ON cards
+           BEGIN
+               INSERT INTO data_versions (source, version) VALUES (COALESCE(OLD.source, ''), 1)
+               ON CONFLICT(source) DO UPDATE SET version = version + 1;
+           END""",
+    ],
+    # 9: persistent Slack user directory (see slack_directory.py)
+    [
+        """CREATE TABLE IF NOT EXISTS slack_users (
+            user_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            real_name TEXT NOT NULL DEFAULT '',
+            display_name TEXT NOT NULL DEFAULT '',
+            email TEXT NOT NULL DEFAULT '',
+            is_bot INTEGER NOT NULL DEFAULT 0,
+            is_app_user INTEGER NOT NULL DEFAULT 0,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            fetched_at REAL NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_slack_users_email ON slack_users(email)",
+        """CREATE TABLE IF NOT EXISTS slack_user_syncs (
+            team_id TEXT PRIMARY KEY,
+            listed_at REAL NOT NULL DEFAULT 0
+        )""",
+    ],
+    # 10: Gmail message ids already processed, evicted by age (gmail-poller.py)
+    [
+        """CREATE TABLE IF NOT EXISTS gmail_seen_messages (
+            message_id TEXT PRIMARY KEY,
+            seen_at REAL NOT NULL
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_gmail_seen_messages_seen_at ON gmail_seen_messages(seen_at)",
+    ],
+    # 11: calendar cards keyed on the Google event id (message_id) so syncs
+    # update rows in place instead of deleting and re-inserting them
+    [
+        """UPDATE cards SET message_id = json_extract(proposed_actions, '$[0].id')
+           WHERE source = 'calendar' AND message_id IS NULL AND json_valid(proposed_actions)
+             AND COALESCE(json_extract(proposed_actions, '$[0].id'), '') != ''""",
+        """DELETE FROM cards WHERE source = 'calendar' AND message_id IS NOT NULL AND id NOT IN (
+            SELECT MAX(id) FROM cards WHERE source = 'calendar' AND message_id IS NOT NULL GROUP BY message_id
+        )""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_calendar_event ON cards(message_id) WHERE source = 'calendar'",
+    ],
+    # 12: one row per poller run with phase timings and counters
+    # (poller_runtime.PollerRun; read by /api/pollers/{source}/runs)
+    [
+        """CREATE TABLE IF NOT EXISTS poller_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'ok',
+            error_class TEXT,
+            phases_ms TEXT NOT NULL DEFAULT '{}',
+            api_calls TEXT NOT NULL DEFAULT '{}',
+            items_fetched INTEGER NOT NULL DEFAULT 0,
+            items_written INTEGER NOT NULL DEFAULT 0,
+            items_skipped INTEGER NOT NULL DEFAULT 0,
+            rate_limit_waits INTEGER NOT NULL DEFAULT 0,
+            rate_limit_wait_ms INTEGER NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_poller_runs_source ON poller_runs(source, id)",
+    ],
+    # 13: ids of ingest-channel messages already applied, so a frame replayed
+    # from a poller's spool after a lost ack is acknowledged without re-running
+    # (ingest_channel.IngestServer)
+    [
+        """CREATE TABLE IF NOT EXISTS ingest_messages (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            received_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_ingest_messages_received ON ingest_messages(received_at)",
+    ],
 ]
 
+_migrated_paths: set[str] = set()
+_migrated_lock = threading.Lock()
+
+
+def _is_benign(error: sqlite3.Error) -> bool:
+    message = str(error).lower()
+    return "duplicate column" in message or "already exists" in message
 
-def migrate():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    for sql in MIGRATIONS:
+
+def gmail_card_keys(summary, proposed_actions, card_id=None) -> dict:
+    """Derive the indexed Gmail threading columns for one card.
+
+    ``dup_key`` groups copies of the same conversation: the thread id, else the
+    message id, else sender + subject. Cards with none of those fall back to
+    ``card:<id>`` (``None`` while the id is not known yet).
+    """
+    actions = proposed_actions
+    if not isinstance(actions, list):
         try:
-            conn.execute(sql)
-        except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
-            if "duplicate column" not in str(e).lower() and "already exists" not in str(e).lower():
-                print(f"Migration warning: {e}")
-    conn.commit()
-    conn.close()
+            actions = json.loads(proposed_actions or "[]")
+        except (json.JSONDecodeError, TypeError):
+            actions = []
+    if not isinstance(actions, list):
+        actions = []
+    primary = next((action for action in actions if isinstance(action, dict)), {})
+
+    summary = str(summary or "").strip()
+    sender = str(primary.get("to_email") or "").strip()
+    subject = str(primary.get("subject") or "").strip()
+    if ":" in summary:
+        summary_sender, summary_subject = summary.split(":", 1)
+        sender = sender or summary_sender.strip()
+        subject = subject or summary_subject.strip()
+    else:
+        sender = sender or summary
+
+    thread_id = str(primary.get("thread_id") or "").strip()
+    message_id = str(primary.get("message_id") or "").strip()
+    if thread_id:
+        dup_key = f"thread:{thread_id.lower()}"
+    elif message_id:
+        dup_key = f"message:{message_id.lower()}"
+    elif sender and subject:
+        dup_key = f"sender-subject:{sender.lower()}|{subject.lower()}"
+    else:
+        dup_key = f"card:{card_id}" if card_id is not None else None
+
+    sender_email = parseaddr(sender)[1].strip().lower()
+    return {
+        "thread_id": thread_id or None,
+        "message_id": message_id or None,
+        "sender_email": sender_email if "@" in sender_email else None,
+        "dup_key": dup_key,
+    }
+
+
+def backfill_gmail_keys(conn: sqlite3.Connection) -> int:
+    """Fill the derived Gmail columns on rows that do not have them yet.
+
+    Runs inside the caller's transaction. Uses ``idx_cards_source_dup_key`` so
+    it is a cheap no-op once every Gmail card has been keyed.
+    """
+    rows = conn.execute(
+        "SELECT id, summary, proposed_actions FROM cards WHERE source = 'gmail' AND dup_key IS NULL"
+    ).fetchall()
+    for card_id, summary, proposed_actions in rows:
+        keys = gmail_card_keys(summary, proposed_actions, card_id)
+        conn.execute(
+            "UPDATE cards SET thread_id = ?, message_id = ?, sender_email = ?, dup_key = ? WHERE id = ?",
+            (keys["thread_id"], keys["message_id"], keys["sender_email"], keys["dup_key"], card_id),
+        )
+    return len(rows)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection, migrations) -> int:
+    """Apply the steps of ``migrations`` newer than ``PRAGMA user_version``.
+
+    Each step runs in its own write transaction and bumps ``user_version`` on
+    commit, so a crash mid-way resumes from the failed step. Returns the number
+    of steps applied.
+    """
+    target = len(migrations)
+    if schema_version(conn) >= target:
+        return 0
+
+    applied = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        # Re-read under the write lock: another process may have migrated.
+        version = schema_version(conn)
+        if version >= target:
+            conn.rollback()
+            return applied
+        try:
+            for sql in migrations[version]:
+                try:
+                    if callable(sql):
+                        sql(conn)  # data backfill that needs Python
+                    else:
+                        conn.execute(sql)
+                except (sqlite3.OperationalError, sqlite3.IntegrityError) as e:
+                    # Replayed DDL is fine; anything else leaves the version
+                    # unbumped so the step runs again on the next start.
+                    if not _is_benign(e):
+                        raise
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied += 1
+
+
+def migrate(db_path=None) -> int:
+    path = Path(db_path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        return apply_migrations(conn, MIGRATIONS)
+    finally:
+        conn.close()
+
+
+def ensure_migrated(db_path=None):
+    """Run pending migrations at most once per database per process.
+
+    Hot paths call this instead of issuing their own DDL; after the first call
+    it is a set lookup.
+    """
+    key = str(Path(db_path or DB_PATH))
+    if key in _migrated_paths:
+        return
+    with _migrated_lock:
+        if key in _migrated_paths:
+            return
+        migrate(key)
+        _migrated_paths.add(key)
 
 
 if __name__ == "__main__":
-    migrate()
-    print("Migrations complete.")
+    applied = migrate()
+    print(f"Migrations complete ({applied} applied).")
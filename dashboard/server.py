@@ -1,6 +1,10 @@
 import asyncio
+import contextvars
+import functools
 import hashlib
+import inspect
 import json
+import math
 import os
 import re
 import sqlite3
@@ -9,6 +13,10 @@ import sys
 import tempfile
 import time
 import threading
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
 from datetime import date, datetime, timedelta, timezone
 from difflib import SequenceMatcher
 from pathlib import Path
@@ -16,11 +24,15 @@ from contextlib import asynccontextmanager
 
 import ptyprocess
 import uvicorn
-from fastapi import Body, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from fastapi import Body, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from migrate import migrate
+import db_pool
+import ingest_channel
+import slack_directory
+from migrate import ensure_migrated, gmail_card_keys
 
 # Add parent dir so bin/ imports are available when running from dashboard/
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -81,19 +93,163 @@ class BrowserExecuteRequest(BaseModel):
 
 # In-memory cache for Jira sprint data
 _jira_cache = {"data": None, "fetched_at": 0}
-# Source-level stale flags used to emit SSE cache invalidation events.
-_stale_sources = set()
-# Queue for real-time plan execution events pushed to SSE stream.
-import queue as _queue_mod
-_plan_event_queue: _queue_mod.Queue = _queue_mod.Queue()
+EVENT_BUS_QUEUE_SIZE = 256
+
+
+class EventSubscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, event: dict):
+        # Slow consumers lose their oldest events rather than stalling publishers.
+        while self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                break
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """In-process pub/sub fan-out for the /api/events SSE stream.
+
+    Every subscriber gets its own bounded queue and sees every event. Publishing
+    is safe from worker threads and never touches the database.
+    """
+
+    def __init__(self, maxsize: int = EVENT_BUS_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._subscribers: set[EventSubscription] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self) -> EventSubscription:
+        subscription = EventSubscription(asyncio.get_running_loop(), self.maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: dict):
+        event = {"event": event_type, "data": json.dumps(data)}
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        for subscription in subscribers:
+            if subscription.loop is current_loop:
+                subscription.deliver(event)
+            elif not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "queued": sum(sub.queue.qsize() for sub in subscribers),
+            "dropped": sum(sub.dropped for sub in subscribers),
+        }
+
+
+_event_bus = EventBus()
+# Highest card id already announced as an SSE "message" event.
+_last_announced_card_id: int | None = None
+
 
 def _emit_plan_event(event_type: str, data: dict):
     """Push plan execution events to SSE stream."""
-    _plan_event_queue.put({"event": event_type, "data": json.dumps(data)})
+    _event_bus.publish(event_type, data)
+
+
+INBOX_VIEW_CACHE_SIZE = 32
+INBOX_VIEW_CACHE_MAX_AGE_SECONDS = 900
+
+
+class InboxViewCache:
+    """LRU of computed /api/inbox-view payloads keyed by (source, days, page).
+
+    An entry is dropped when its source is marked stale, when the source's data
+    version moved (a writer that skipped /api/cache-invalidate), or once the
+    first card in it would leave the retention window.
+    """
+
+    def __init__(self, maxsize: int = INBOX_VIEW_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evicted": 0, "invalidated": 0, "stale": 0, "expired": 0}
+
+    def get(self, key: tuple, version: int, now: datetime):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reason = None
+                if entry["version"] != version:
+                    reason = "stale"
+                elif now >= entry["expires_at"]:
+                    reason = "expired"
+                if reason:
+                    del self._entries[key]
+                    self._stats[reason] += 1
+                    entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["payload"]
+
+    def put(self, key: tuple, version: int, expires_at: datetime, payload: dict):
+        with self._lock:
+            self._entries[key] = {"version": version, "expires_at": expires_at, "payload": payload}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def invalidate_source(self, source: str):
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == source]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidated"] += len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = dict(self._stats)
+            data["size"] = len(self._entries)
+        data["maxsize"] = self.maxsize
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 3) if lookups else 0.0
+        return data
+
+
+_inbox_view_cache = InboxViewCache()
+
+
+def _mark_source_stale(source: str):
+    """Drop cached views for ``source`` and tell every SSE subscriber it is stale."""
+    _inbox_view_cache.invalidate_source(source)
+    _event_bus.publish("cache-invalidate", {"source": source})
 
 _suggestion_refresh_lock = threading.Lock()
 _suggestion_worker_started = False
-_running_syncs: dict[str, subprocess.Popen] = {}
+# bin/poller_supervisor.py hosts the pollers and takes run requests here.
+POLLER_SUPERVISOR_URL = os.environ.get(
+    "ENG_BUDDY_SUPERVISOR_URL",
+    f"http://127.0.0.1:{os.environ.get('ENG_BUDDY_SUPERVISOR_PORT', '7779')}",
+)
 POLLER_DEFINITIONS = (
     {
         "id": "slack",
@@ -132,11 +288,25 @@ POLLER_DEFINITIONS = (
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     STATIC_DIR.mkdir(exist_ok=True)
-    migrate()
+    ensure_migrated(DB_PATH)
+    await asyncio.to_thread(_drain_card_terms_queue)
+    try:
+        _announce_new_cards()
+    except sqlite3.OperationalError:
+        pass
     if BACKGROUND_SUGGESTIONS_ENABLED:
         _start_suggestion_refresh_worker()
+    ingest = ingest_channel.IngestServer(INGEST_HANDLERS, get_db, on_commit=_ingest_committed)
+    try:
+        await ingest.start()
+    except OSError as exc:
+        print(f"Ingest socket unavailable ({exc}); pollers will spool until the next start")
+        ingest = None
     yield
+    if ingest is not None:
+        await ingest.close()
     await _browser_client.close()
+    db_pool.pool.close_all()
 
 app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
@@ -273,28 +443,85 @@ def _should_use_codex_fallback(stdout: str = "", stderr: str = "", returncode: i
     return not message.strip() or any(marker in message for marker in fallback_markers)
 
 
+CLAUDE_PRINT_ARGS = ("claude", "--dangerously-skip-permissions", "--print")
+
+
+def _codex_exec_args(output_path: str) -> list[str]:
+    return [
+        "codex",
+        "exec",
+        "--dangerously-bypass-approvals-and-sandbox",
+        "--skip-git-repo-check",
+        "--ephemeral",
+        "--color",
+        "never",
+        "-C",
+        str(ENG_BUDDY_DIR),
+        "-o",
+        output_path,
+        "-",
+    ]
+
+
+def _new_codex_output_path() -> str:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+        return f.name
+
+
+def _consume_codex_output(output_path: str | None) -> str:
+    """Read and remove the file codex writes its final message to."""
+    if not output_path:
+        return ""
+    path = Path(output_path)
+    output_text = ""
+    if path.exists():
+        try:
+            output_text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            output_text = ""
+    try:
+        path.unlink()
+    except OSError:
+        pass
+    return output_text
+
+
+def _merge_codex_fallback(
+    result: subprocess.CompletedProcess, codex_result: subprocess.CompletedProcess
+) -> subprocess.CompletedProcess:
+    if codex_result.returncode == 0:
+        fallback_note = (result.stderr or result.stdout or "Claude unavailable").strip()
+        return subprocess.CompletedProcess(
+            args=codex_result.args,
+            returncode=0,
+            stdout=codex_result.stdout,
+            stderr=f"Claude fallback triggered: {fallback_note[:500]}",
+        )
+
+    combined_error = "\n".join(
+        part.strip()
+        for part in (
+            result.stderr or result.stdout or "Claude failed",
+            codex_result.stderr or codex_result.stdout or "Codex fallback failed",
+        )
+        if part and part.strip()
+    )
+    return subprocess.CompletedProcess(
+        args=codex_result.args,
+        returncode=codex_result.returncode or result.returncode,
+        stdout=codex_result.stdout or result.stdout,
+        stderr=combined_error,
+    )
+
+
 def _run_codex_exec(prompt: str, timeout: int = 60) -> subprocess.CompletedProcess:
     output_path = None
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            output_path = f.name
+        output_path = _new_codex_output_path()
 
         try:
             result = subprocess.run(
-                [
-                    "codex",
-                    "exec",
-                    "--dangerously-bypass-approvals-and-sandbox",
-                    "--skip-git-repo-check",
-                    "--ephemeral",
-                    "--color",
-                    "never",
-                    "-C",
-                    str(ENG_BUDDY_DIR),
-                    "-o",
-                    output_path,
-                    "-",
-                ],
+                _codex_exec_args(output_path),
                 input=prompt,
                 capture_output=True,
                 text=True,
@@ -311,13 +538,8 @@ def _run_codex_exec(prompt: str, timeout: int = 60) -> subprocess.CompletedProce
                 stderr=(stderr + "\nCodex timed out").strip(),
             )
 
-        output_text = ""
-        if output_path and Path(output_path).exists():
-            try:
-                output_text = Path(output_path).read_text(encoding="utf-8", errors="replace")
-            except OSError:
-                output_text = ""
-
+        output_text = _consume_codex_output(output_path)
+        output_path = None
         return subprocess.CompletedProcess(
             args=result.args,
             returncode=result.returncode,
@@ -325,17 +547,14 @@ def _run_codex_exec(prompt: str, timeout: int = 60) -> subprocess.CompletedProce
             stderr=result.stderr,
         )
     finally:
-        if output_path:
-            try:
-                Path(output_path).unlink()
-            except OSError:
-                pass
+        _consume_codex_output(output_path)
 
 
 def _run_claude_print(prompt: str, timeout: int = 60) -> subprocess.CompletedProcess:
+    """Blocking Claude call for worker threads. Request handlers use ``_llm_print``."""
     try:
         result = subprocess.run(
-            ["claude", "--dangerously-skip-permissions", "--print", prompt],
+            [*CLAUDE_PRINT_ARGS, prompt],
             capture_output=True,
             text=True,
             timeout=timeout,
@@ -345,7 +564,7 @@ def _run_claude_print(prompt: str, timeout: int = 60) -> subprocess.CompletedPro
         stdout = exc.stdout if isinstance(exc.stdout, str) else ""
         stderr = exc.stderr if isinstance(exc.stderr, str) else ""
         result = subprocess.CompletedProcess(
-            args=["claude", "--dangerously-skip-permissions", "--print"],
+            args=list(CLAUDE_PRINT_ARGS),
             returncode=124,
             stdout=stdout,
             stderr=(stderr + "\nClaude timed out").strip(),
@@ -354,32 +573,317 @@ def _run_claude_print(prompt: str, timeout: int = 60) -> subprocess.CompletedPro
     if not _should_use_codex_fallback(result.stdout, result.stderr, result.returncode):
         return result
 
-    codex_result = _run_codex_exec(prompt, timeout=timeout)
-    if codex_result.returncode == 0:
-        fallback_note = (result.stderr or result.stdout or "Claude unavailable").strip()
+    return _merge_codex_fallback(result, _run_codex_exec(prompt, timeout=timeout))
+
+
+# ========== LLM JOB ENGINE ==========
+# Request handlers never block the event loop on an LLM subprocess. Each
+# LLM-backed endpoint runs as a job: the CLI is spawned with asyncio, at most
+# LLM_JOB_CONCURRENCY CLIs run at once, job progress is pushed to /api/events
+# as ``llm_job`` events, and a job can be cancelled (killing its subprocess).
+
+LLM_JOB_CONCURRENCY = max(1, int(os.environ.get("ENG_BUDDY_LLM_CONCURRENCY", "3") or 3))
+LLM_JOB_HISTORY_LIMIT = 200
+
+
+async def _exec_cli_async(
+    args: list[str],
+    *,
+    timeout: int,
+    env: dict,
+    label: str,
+    input_text: str | None = None,
+) -> subprocess.CompletedProcess:
+    """Async counterpart of ``subprocess.run(..., capture_output=True, text=True)``.
+
+    Timeouts map to returncode 124 and a missing binary to 127 so the result
+    feeds straight into ``_should_use_codex_fallback``. Cancelling the awaiting
+    task kills the child process.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+    except FileNotFoundError:
         return subprocess.CompletedProcess(
-            args=codex_result.args,
-            returncode=0,
-            stdout=codex_result.stdout,
-            stderr=f"Claude fallback triggered: {fallback_note[:500]}",
+            args=args, returncode=127, stdout="", stderr=f"{args[0]}: command not found"
         )
 
-    combined_error = "\n".join(
-        part.strip()
-        for part in (
-            result.stderr or result.stdout or "Claude failed",
-            codex_result.stderr or codex_result.stdout or "Codex fallback failed",
+    payload = input_text.encode("utf-8") if input_text is not None else None
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(payload), timeout=timeout)
+    except asyncio.TimeoutError:
+        await _kill_cli_process(proc)
+        return subprocess.CompletedProcess(
+            args=args[:3], returncode=124, stdout="", stderr=f"{label} timed out"
         )
-        if part and part.strip()
-    )
+    except asyncio.CancelledError:
+        await _kill_cli_process(proc)
+        raise
+
     return subprocess.CompletedProcess(
-        args=codex_result.args,
-        returncode=codex_result.returncode or result.returncode,
-        stdout=codex_result.stdout or result.stdout,
-        stderr=combined_error,
+        args=args,
+        returncode=proc.returncode,
+        stdout=stdout.decode("utf-8", errors="replace"),
+        stderr=stderr.decode("utf-8", errors="replace"),
     )
 
 
+async def _kill_cli_process(proc: asyncio.subprocess.Process):
+    if proc.returncode is not None:
+        return
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        return
+    await proc.wait()
+
+
+async def _run_codex_exec_async(prompt: str, timeout: int = 60) -> subprocess.CompletedProcess:
+    output_path = _new_codex_output_path()
+    try:
+        result = await _exec_cli_async(
+            _codex_exec_args(output_path),
+            timeout=timeout,
+            env=_codex_env(),
+            label="Codex",
+            input_text=prompt,
+        )
+        output_text = _consume_codex_output(output_path)
+        output_path = None
+        if result.returncode == 124:
+            return result
+        return subprocess.CompletedProcess(
+            args=result.args,
+            returncode=result.returncode,
+            stdout=output_text or result.stdout,
+            stderr=result.stderr,
+        )
+    finally:
+        _consume_codex_output(output_path)
+
+
+async def _run_claude_print_async(prompt: str, timeout: int = 60) -> subprocess.CompletedProcess:
+    result = await _exec_cli_async(
+        [*CLAUDE_PRINT_ARGS, prompt],
+        timeout=timeout,
+        env=_claude_env(),
+        label="Claude",
+    )
+    if not _should_use_codex_fallback(result.stdout, result.stderr, result.returncode):
+        return result
+
+    _current_llm_job_progress("codex_fallback")
+    return _merge_codex_fallback(result, await _run_codex_exec_async(prompt, timeout=timeout))
+
+
+class LLMJob:
+    def __init__(self, job_id: str, kind: str, subject_id=None):
+        self.id = job_id
+        self.kind = kind
+        self.subject_id = subject_id
+        self.status = "queued"
+        self.phase = "queued"
+        self.llm_calls = 0
+        self.created_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.task: asyncio.Task | None = None
+
+    def to_dict(self, include_result: bool = False) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "subject_id": self.subject_id,
+            "status": self.status,
+            "phase": self.phase,
+            "llm_calls": self.llm_calls,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "status_code": self.status_code,
+        }
+        if include_result and self.status == "completed" and not isinstance(self.result, Response):
+            data["result"] = jsonable_encoder(self.result)
+        return data
+
+
+_current_llm_job: contextvars.ContextVar = contextvars.ContextVar("eng_buddy_llm_job", default=None)
+
+
+class LLMJobEngine:
+    """Registry and bounded execution pool for LLM-backed request work."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._jobs: dict[str, LLMJob] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop = None
+        self.running = 0
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they first block on; rebuild per loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+            self.running = 0
+        return self._semaphore
+
+    def _publish(self, job: LLMJob):
+        if job.id not in self._jobs:
+            return
+        _emit_plan_event("llm_job", job.to_dict(include_result=job.finished_at is not None))
+
+    def _announce(self, job: LLMJob):
+        """Register ``job`` and publish its state; later phases publish too."""
+        if job.id in self._jobs:
+            return
+        self._jobs[job.id] = job
+        while len(self._jobs) > LLM_JOB_HISTORY_LIMIT:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].finished_at is None:
+                break
+            del self._jobs[oldest_id]
+        self._publish(job)
+
+    def set_phase(self, job: LLMJob | None, phase: str):
+        if job is None or job.phase == phase:
+            return
+        job.phase = phase
+        self._publish(job)
+
+    def submit(self, kind: str, work, subject_id=None, announce: bool = True) -> LLMJob:
+        """Start ``work`` as a job.
+
+        With ``announce=False`` the job stays out of the registry and emits no
+        events until its work first reaches ``llm_slot``, so a request served
+        from a cache never shows up as an LLM job.
+        """
+        job = LLMJob(uuid.uuid4().hex[:12], kind, subject_id)
+        job.task = asyncio.create_task(self._run(job, work))
+        # Background jobs are never awaited; retrieve failures so they are not logged as lost.
+        job.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        if announce:
+            self._announce(job)
+        return job
+
+    async def _run(self, job: LLMJob, work):
+        _current_llm_job.set(job)
+        job.status = "running"
+        try:
+            job.result = await work()
+            job.status = "completed"
+            return job.result
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except HTTPException as exc:
+            job.status = "failed"
+            job.error = str(exc.detail)
+            job.status_code = exc.status_code
+            raise
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            job.status_code = 500
+            raise
+        finally:
+            job.phase = job.status
+            job.finished_at = time.time()
+            self._publish(job)
+
+    @asynccontextmanager
+    async def llm_slot(self):
+        job = _current_llm_job.get()
+        if job is not None:
+            self._announce(job)
+        slots = self._slots()
+        if slots.locked():
+            self.set_phase(job, "waiting_for_slot")
+        async with slots:
+            self.running += 1
+            if job is not None:
+                job.llm_calls += 1
+            self.set_phase(job, "llm_running")
+            try:
+                yield
+            finally:
+                self.running -= 1
+                self.set_phase(job, "processing")
+
+    def get(self, job_id: str) -> LLMJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[LLMJob]:
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+
+_llm_jobs = LLMJobEngine(LLM_JOB_CONCURRENCY)
+
+
+def _current_llm_job_progress(phase: str):
+    _llm_jobs.set_phase(_current_llm_job.get(), phase)
+
+
+async def _llm_print(prompt: str, timeout: int = 60) -> subprocess.CompletedProcess:
+    """Run the Claude CLI (with Codex fallback) inside a bounded job slot."""
+    async with _llm_jobs.llm_slot():
+        return await _run_claude_print_async(prompt, timeout=timeout)
+
+
+def _llm_job_endpoint(kind: str, subject_param: str | None = None):
+    """Run an endpoint body as an LLM job.
+
+    By default the request awaits the job and returns its result, so response
+    contracts are unchanged. With ``?background=true`` the endpoint answers
+    202 with the job id immediately; progress and the final result arrive as
+    ``llm_job`` events on /api/events.
+    """
+
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        async def endpoint(*args, background: bool = False, **kwargs):
+            # Awaited requests announce the job only once it calls the LLM,
+            # so cache hits don't broadcast llm_job events to every tab.
+            job = _llm_jobs.submit(
+                kind,
+                lambda: func(*args, **kwargs),
+                subject_id=kwargs.get(subject_param) if subject_param else None,
+                announce=background,
+            )
+            if background:
+                return JSONResponse(status_code=202, content=job.to_dict())
+            return await job.task
+
+        functools.update_wrapper(endpoint, func)
+        endpoint.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(
+                    "background", inspect.Parameter.KEYWORD_ONLY, default=False, annotation=bool
+                ),
+            ]
+        )
+        return endpoint
+
+    return decorate
+
+
 def _extract_balanced_json(text: str, opening: str):
     """Extract and parse the first balanced JSON object/array from text."""
     if opening not in ("{", "["):
@@ -485,7 +989,7 @@ def _load_briefing_calendar_meetings(conn: sqlite3.Connection, target_date: date
         """SELECT timestamp, summary, context_notes, proposed_actions
            FROM cards
            WHERE source = 'calendar'
-           ORDER BY timestamp ASC"""
+           ORDER BY timestamp_utc ASC"""
     ).fetchall()
 
     meetings = []
@@ -513,10 +1017,80 @@ def _briefing_meeting_signature(meetings):
     return signature
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH, timeout=30)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    return conn
+    """Borrow a pooled inbox.db connection; ``close()`` hands it back."""
+    ensure_migrated(DB_PATH)
+    return db_pool.get_connection(DB_PATH)
+
+
+# ========== CONDITIONAL GET ==========
+# data_versions is bumped by triggers on every card write (migration 8). The
+# table is only re-read when inbox.db or its WAL changed on disk, so an
+# unchanged database answers If-None-Match without opening a connection.
+ETAG_TIME_BUCKET_SECONDS = 60
+POLLER_STATUS_ETAG_SECONDS = 15  # countdowns in /api/pollers/status go stale quickly
+_data_versions_lock = threading.Lock()
+_data_versions_cache: dict = {"key": None, "versions": {}}
+
+
+def _file_signature(path: Path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _data_versions() -> dict:
+    """Per-source card write counters, e.g. ``{"slack": 41, "gmail": 7}``."""
+    db_path = Path(DB_PATH)
+    wal_path = db_path.with_name(db_path.name + "-wal")
+    cached_key = _data_versions_cache["key"]
+    if cached_key and cached_key[0] == str(db_path):
+        key = (str(db_path), _file_signature(db_path), _file_signature(wal_path))
+        if key == cached_key:
+            return _data_versions_cache["versions"]
+
+    # Sign the files only after a first read: migrating and the first read
+    # transaction create or rewrite the WAL. The authoritative read comes after
+    # the signature, so a concurrent commit can only cause an extra re-read.
+    conn = get_db()
+    try:
+        conn.execute("SELECT 1 FROM data_versions LIMIT 1").fetchall()
+        key = (str(db_path), _file_signature(db_path), _file_signature(wal_path))
+        versions = {row["source"]: row["version"] for row in conn.execute("SELECT source, version FROM data_versions")}
+    finally:
+        conn.close()
+    with _data_versions_lock:
+        _data_versions_cache["key"] = key
+        _data_versions_cache["versions"] = versions
+    return versions
+
+
+def _data_version(source: str | None = None) -> int:
+    """Counter for one source, or the sum over all sources when ``source`` is None."""
+    versions = _data_versions()
+    if source is None:
+        return sum(versions.values())
+    return versions.get(source, 0)
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _time_bucket(seconds: int = ETAG_TIME_BUCKET_SECONDS) -> int:
+    return int(time.time() // seconds)
+
+
+def _conditional(request: Request, response: Response, etag: str):
+    """Return a 304 when the client already holds ``etag``; otherwise tag ``response``."""
+    if_none_match = request.headers.get("if-none-match", "")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 
 def _parse_json_dict(raw_value, default=None):
@@ -591,20 +1165,42 @@ def _gmail_card_details(card: dict):
 
 
 def _gmail_duplicate_key(card: dict):
-    details = _gmail_card_details(card)
-    thread_id = details["thread_id"].strip().lower()
-    if thread_id:
-        return f"thread:{thread_id}"
-
-    message_id = details["message_id"].strip().lower()
-    if message_id:
-        return f"message:{message_id}"
-
-    sender = (details["to_email"] or details["sender"]).strip().lower()
-    subject = details["subject"].strip().lower()
-    if sender and subject:
-        return f"sender-subject:{sender}|{subject}"
-    return f"card:{card.get('id')}"
+    if card.get("dup_key"):
+        return card["dup_key"]
+    return gmail_card_keys(card.get("summary"), card.get("proposed_actions"), card.get("id"))["dup_key"]
+
+
+def _gmail_collapsed_table(columns):
+    """Gmail cards ranked within their ``dup_key`` group, best copy first.
+
+    The representative is the copy with a draft, then the newest one; the
+    group size and member ids ride along for ``analysis_metadata``.
+    """
+    group = "COALESCE(dup_key, 'card:' || id)"
+    return f"""(
+        SELECT {', '.join(columns)},
+               COUNT(*) OVER dup_group AS _duplicate_count,
+               group_concat(id) OVER dup_group AS _duplicate_ids,
+               ROW_NUMBER() OVER (
+                   PARTITION BY {group}
+                   ORDER BY TRIM(COALESCE(draft_response, '')) != '' DESC, timestamp_utc DESC, id DESC
+               ) AS _duplicate_rank
+          FROM cards
+         WHERE source = 'gmail' AND timestamp_utc >= ?
+        WINDOW dup_group AS (PARTITION BY {group})
+    )"""
+
+
+def _merge_gmail_duplicates(card: dict):
+    count = card.pop("_duplicate_count", 1) or 1
+    ids = card.pop("_duplicate_ids", "") or ""
+    card.pop("_duplicate_rank", None)
+    if count > 1:
+        meta = dict(card.get("analysis_metadata") or {})
+        meta["duplicate_count"] = count
+        meta["duplicate_card_ids"] = sorted(int(value) for value in str(ids).split(",") if value)
+        card["analysis_metadata"] = meta
+    return card
 
 
 def _gmail_card_preference_key(card: dict):
@@ -618,43 +1214,17 @@ def _gmail_card_preference_key(card: dict):
     )
 
 
-def _collapse_gmail_duplicates(cards: list[dict]):
-    grouped = {}
-    for card in cards:
-        grouped.setdefault(_gmail_duplicate_key(card), []).append(card)
-
-    collapsed = []
-    for group in grouped.values():
-        representative = max(group, key=_gmail_card_preference_key)
-        if len(group) == 1:
-            collapsed.append(representative)
-            continue
-
-        merged = dict(representative)
-        meta = dict(representative.get("analysis_metadata") or {})
-        meta["duplicate_count"] = len(group)
-        meta["duplicate_card_ids"] = [int(item.get("id") or 0) for item in group]
-        merged["analysis_metadata"] = meta
-        collapsed.append(merged)
-
-    return sorted(collapsed, key=_gmail_card_preference_key, reverse=True)
-
-
 def _find_related_gmail_card_ids(conn, card: dict):
-    target_key = _gmail_duplicate_key(card)
-    if target_key.startswith("card:"):
+    row = conn.execute("SELECT dup_key FROM cards WHERE id = ?", [card["id"]]).fetchone()
+    target_key = (row["dup_key"] if row else None) or _gmail_duplicate_key(card)
+    if not target_key or target_key.startswith("card:"):
         return [int(card["id"])]
 
     rows = conn.execute(
-        "SELECT id, summary, proposed_actions FROM cards WHERE source = 'gmail'",
+        "SELECT id FROM cards WHERE source = 'gmail' AND dup_key = ?",
+        [target_key],
     ).fetchall()
-    related_ids = []
-    for row in rows:
-        candidate = dict(row)
-        if _gmail_duplicate_key(candidate) == target_key:
-            related_ids.append(int(candidate["id"]))
-
-    return sorted(set(related_ids or [int(card["id"])]))
+    return sorted({int(row["id"]) for row in rows} | {int(card["id"])})
 
 
 def _normalize_gmail_label(value: str):
@@ -813,7 +1383,7 @@ def _collect_suggestion_context():
         if text:
             knowledge_docs.append({"path": str(path.relative_to(ENG_BUDDY_DIR)), "content": text})
 
-    fourteen_days_ago = (datetime.now(timezone.utc) - timedelta(days=14)).isoformat(sep=" ")
+    fourteen_days_ago = _sql_utc(datetime.now(timezone.utc) - timedelta(days=14))
     conn = get_db()
     try:
         card_rows = conn.execute(
@@ -829,8 +1399,8 @@ def _collect_suggestion_context():
         learning_rows = conn.execute(
             """SELECT category, title, note, status, created_at
                FROM learning_events
-               WHERE datetime(created_at) >= datetime(?)
-               ORDER BY datetime(created_at) DESC, id DESC
+               WHERE created_at >= ?
+               ORDER BY created_at DESC, id DESC
                LIMIT 30""",
             [fourteen_days_ago],
         ).fetchall()
@@ -1035,7 +1605,7 @@ def _refresh_suggestions_sync():
         finally:
             conn.close()
 
-        _stale_sources.add(SUGGESTION_SOURCE)
+        _mark_source_stale(SUGGESTION_SOURCE)
         return {"status": "ok", "inserted": inserted, "updated": updated, "generated": len(generated), "skipped": skipped}
     finally:
         _suggestion_refresh_lock.release()
@@ -1181,6 +1751,13 @@ def _parse_anchor_date(raw: str = "") -> date:
         raise HTTPException(400, "date must be YYYY-MM-DD") from exc
 
 
+def _sql_utc(value: datetime) -> str:
+    """Format like SQLite's datetime(): UTC "YYYY-MM-DD HH:MM:SS" for sargable comparisons."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
 def _date_range_bounds(anchor: date, range_name: str):
     normalized = (range_name or "day").strip().lower()
     if normalized not in {"day", "week"}:
@@ -1193,133 +1770,13 @@ def _date_range_bounds(anchor: date, range_name: str):
     return normalized, start, end
 
 
-def _ensure_audit_schema():
-    conn = get_db()
-    try:
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS action_steps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT NOT NULL,
-                action_name TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'proposed',
-                payload TEXT,
-                created_at TEXT NOT NULL DEFAULT (datetime('now')),
-                updated_at TEXT NOT NULL DEFAULT (datetime('now'))
-            )"""
-        )
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS decision_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT NOT NULL,
-                action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
-                decision TEXT NOT NULL,
-                rationale TEXT,
-                actor TEXT NOT NULL DEFAULT 'user',
-                metadata TEXT,
-                created_at TEXT NOT NULL DEFAULT (datetime('now'))
-            )"""
-        )
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS execution_attempts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT NOT NULL,
-                action_step_id INTEGER REFERENCES action_steps(id) ON DELETE SET NULL,
-                action_name TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'running',
-                output TEXT,
-                error TEXT,
-                metadata TEXT,
-                started_at TEXT NOT NULL DEFAULT (datetime('now')),
-                finished_at TEXT
-            )"""
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_action_steps_entity ON action_steps(entity_type, entity_id, action_name, updated_at)"
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_decision_events_entity ON decision_events(entity_type, entity_id, decision, created_at)"
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_execution_attempts_entity ON execution_attempts(entity_type, entity_id, action_name, started_at)"
-        )
-        # Freshservice enrichment pipeline tables
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS classification_buckets (
-                id TEXT PRIMARY KEY,
-                description TEXT,
-                knowledge_files TEXT DEFAULT '[]',
-                confidence_keywords TEXT DEFAULT '[]',
-                ticket_count INTEGER DEFAULT 0,
-                status TEXT DEFAULT 'emerging',
-                created_by_ticket INTEGER,
-                created_at TEXT DEFAULT (datetime('now')),
-                updated_at TEXT DEFAULT (datetime('now'))
-            )"""
-        )
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS enrichment_runs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                card_id INTEGER,
-                stage TEXT,
-                model TEXT,
-                duration_ms INTEGER,
-                status TEXT,
-                response_summary TEXT,
-                created_at TEXT DEFAULT (datetime('now'))
-            )"""
-        )
-        # Add enrichment_status column to cards if missing
-        cursor = conn.execute("PRAGMA table_info(cards)")
-        existing_cols = {row[1] for row in cursor.fetchall()}
-        if "enrichment_status" not in existing_cols:
-            conn.execute(
-                "ALTER TABLE cards ADD COLUMN enrichment_status TEXT DEFAULT 'not_enriched'"
-            )
-        conn.commit()
-    finally:
-        conn.close()
-
-
-def _ensure_learning_events_schema():
-    conn = get_db()
-    try:
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS learning_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT,
-                hook_event TEXT,
-                source TEXT,
-                scope TEXT,
-                tool_name TEXT,
-                category TEXT,
-                title TEXT,
-                note TEXT,
-                status TEXT NOT NULL DEFAULT 'captured',
-                requires_category_expansion INTEGER NOT NULL DEFAULT 0,
-                proposed_category TEXT,
-                metadata TEXT,
-                created_at TEXT NOT NULL DEFAULT (datetime('now'))
-            )"""
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_learning_events_session ON learning_events(session_id, created_at)"
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_learning_events_category ON learning_events(category, created_at)"
-        )
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_learning_events_pending ON learning_events(requires_category_expansion, created_at)"
-        )
-        conn.commit()
-    finally:
-        conn.close()
+def _ensure_schema():
+    """Bring inbox.db to the current schema version; a no-op after the first call per DB."""
+    ensure_migrated(DB_PATH)
 
 
 def _record_decision(entity_type: str, entity_id: str, action_name: str, decision: str, rationale: str = "", actor: str = "user", metadata=None):
-    _ensure_audit_schema()
+    _ensure_schema()
     entity = (entity_type or "").strip().lower()
     if entity not in {"card", "task"}:
         raise HTTPException(400, "entity_type must be card or task")
@@ -1391,7 +1848,6 @@ def _record_decision(entity_type: str, entity_id: str, action_name: str, decisio
                 pass
         if normalized_decision in {"rejected", "refined"} and (rationale or "").strip():
             try:
-                _ensure_learning_events_schema()
                 conn.execute(
                     """INSERT INTO learning_events (
                            session_id, hook_event, source, scope, tool_name, category,
@@ -1419,7 +1875,7 @@ def _record_decision(entity_type: str, entity_id: str, action_name: str, decisio
 
 
 def _require_approved_decision(entity_type: str, entity_id: str, action_name: str, decision_event_id: int):
-    _ensure_audit_schema()
+    _ensure_schema()
     if not decision_event_id:
         raise HTTPException(400, "decision_event_id is required")
     entity = (entity_type or "").strip().lower()
@@ -1455,7 +1911,7 @@ def _require_approved_decision(entity_type: str, entity_id: str, action_name: st
 def _mark_action_step_status(action_step_id: int, status: str, payload=None):
     if not action_step_id:
         return
-    _ensure_audit_schema()
+    _ensure_schema()
     conn = get_db()
     try:
         conn.execute(
@@ -1470,7 +1926,7 @@ def _mark_action_step_status(action_step_id: int, status: str, payload=None):
 
 
 def _start_execution_attempt(entity_type: str, entity_id: str, action_name: str, action_step_id: int = None, metadata=None):
-    _ensure_audit_schema()
+    _ensure_schema()
     conn = get_db()
     try:
         conn.execute(
@@ -1496,7 +1952,7 @@ def _start_execution_attempt(entity_type: str, entity_id: str, action_name: str,
 def _finish_execution_attempt(attempt_id: int, status: str, output: str = "", error: str = ""):
     if not attempt_id:
         return
-    _ensure_audit_schema()
+    _ensure_schema()
     conn = get_db()
     try:
         conn.execute(
@@ -1726,12 +2182,16 @@ def _trigger_chat_learning(session_id: int):
 
 def _row_to_card(row):
     card = dict(row)
-    try:
-        card["proposed_actions"] = json.loads(card.get("proposed_actions") or "[]")
-    except (json.JSONDecodeError, TypeError):
-        card["proposed_actions"] = []
-    card["analysis_metadata"] = _card_analysis_metadata(card)
-    card["enrichment_status"] = card.get("enrichment_status", "not_enriched") or "not_enriched"
+    # Projected rows (``fields=``) only carry some columns; normalise what is there.
+    if "proposed_actions" in card:
+        try:
+            card["proposed_actions"] = json.loads(card.get("proposed_actions") or "[]")
+        except (json.JSONDecodeError, TypeError):
+            card["proposed_actions"] = []
+    if "analysis_metadata" in card:
+        card["analysis_metadata"] = _card_analysis_metadata(card)
+    if "enrichment_status" in card:
+        card["enrichment_status"] = card.get("enrichment_status", "not_enriched") or "not_enriched"
     return card
 
 
@@ -1761,16 +2221,15 @@ def _next_business_day_end(local_timestamp: datetime):
     return datetime.combine(next_day, datetime.max.time(), tzinfo=local_timestamp.tzinfo)
 
 
-def _should_include_in_inbox_view(card: dict, source: str, days: int, now_utc: datetime, now_local: datetime):
+def _inbox_view_retained_until(card: dict, source: str, days: int, now_local: datetime):
+    """Moment ``card`` ages out of the inbox view; ``None`` when it never does."""
     card_timestamp = _parse_card_timestamp(card.get("timestamp"))
     if card_timestamp is None:
-        return True
-
-    if card_timestamp >= now_utc - timedelta(days=days):
-        return True
+        return None
 
+    recent_until = card_timestamp + timedelta(days=days)
     if source != "slack":
-        return False
+        return recent_until
 
     section = (card.get("section") or "").lower()
     classification = (card.get("classification") or "").lower()
@@ -1789,14 +2248,14 @@ def _should_include_in_inbox_view(card: dict, source: str, days: int, now_utc: d
     ) and not is_needs_action
 
     if not is_no_action:
-        return False
+        return recent_until
 
     local_timestamp = card_timestamp.astimezone(now_local.tzinfo or timezone.utc)
-    retention_deadline = max(
+    return max(
         local_timestamp + timedelta(days=days),
         _next_business_day_end(local_timestamp),
     )
-    return now_local <= retention_deadline
+
 
 @app.get("/app")
 @app.get("/app/{path:path}")
@@ -1849,7 +2308,16 @@ async def send_debug_log_to_claude(body: dict = Body(default={})):
 
 
 @app.get("/api/pollers/status")
-async def get_poller_status():
+async def get_poller_status(request: Request, response: Response):
+    signatures = [
+        (_file_signature(_eng_buddy_path(poller["state_file"])), _file_signature(_eng_buddy_path(poller["log_file"])))
+        for poller in POLLER_DEFINITIONS
+    ]
+    not_modified = _conditional(
+        request, response, _etag("pollers", signatures, _time_bucket(POLLER_STATUS_ETAG_SECONDS))
+    )
+    if not_modified:
+        return not_modified
     now = datetime.now(timezone.utc)
     return {
         "pollers": [_build_poller_status(poller, now) for poller in POLLER_DEFINITIONS],
@@ -1857,6 +2325,129 @@ async def get_poller_status():
     }
 
 
+# /api/pollers/{source}/runs compares the latest runs with the runs before them.
+POLLER_RUNS_RECENT = 5
+POLLER_RUNS_BASELINE = 50
+# A regression needs a real baseline and a slowdown that is both relative and
+# absolute, so a 40ms run taking 80ms does not raise the flag.
+POLLER_REGRESSION_MIN_BASELINE = 10
+POLLER_REGRESSION_RATIO = 1.5
+POLLER_REGRESSION_MIN_DELTA_MS = 1000
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _duration_stats(values) -> dict | None:
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "p50_ms": _percentile(values, 0.5),
+        "p95_ms": _percentile(values, 0.95),
+        "max_ms": max(values),
+    }
+
+
+def _poller_run_dict(row) -> dict:
+    run = dict(row)
+    run["phases_ms"] = _parse_json_dict(run.get("phases_ms"), {})
+    run["api_calls"] = _parse_json_dict(run.get("api_calls"), {})
+    return run
+
+
+def _summarize_poller_runs(runs: list[dict]) -> dict:
+    """p50/p95 of successful runs' durations and phases, plus error and wait totals."""
+    ok = [run for run in runs if run["status"] == "ok"]
+    phase_names = sorted({name for run in ok for name in run["phases_ms"]})
+    return {
+        "runs": len(runs),
+        "errors": len(runs) - len(ok),
+        "duration": _duration_stats([run["duration_ms"] for run in ok]),
+        "phases": {name: _duration_stats([run["phases_ms"].get(name) for run in ok]) for name in phase_names},
+        "api_calls_per_run": _duration_stats([sum(run["api_calls"].values()) for run in ok]),
+        "rate_limit_wait_ms": sum(run["rate_limit_wait_ms"] for run in runs),
+    }
+
+
+def _regressed(recent: dict | None, baseline: dict | None) -> dict | None:
+    if not recent or not baseline or baseline["count"] < POLLER_REGRESSION_MIN_BASELINE:
+        return None
+    ratio = recent["p50_ms"] / baseline["p50_ms"] if baseline["p50_ms"] else None
+    regressed = (
+        recent["p50_ms"] - baseline["p50_ms"] >= POLLER_REGRESSION_MIN_DELTA_MS
+        and (ratio is None or ratio >= POLLER_REGRESSION_RATIO)
+    )
+    return {
+        "regressed": regressed,
+        "recent_p50_ms": recent["p50_ms"],
+        "baseline_p50_ms": baseline["p50_ms"],
+        "ratio": round(ratio, 2) if ratio is not None else None,
+    }
+
+
+def _poller_regression(recent: dict, baseline: dict) -> dict:
+    """Flag the recent runs when their p50 exceeds the trailing baseline's p50.
+
+    The whole run and each phase are checked, so a slow run points at the
+    phase (history fetches, user lookups, DB writes...) that got slower.
+    """
+    overall = _regressed(recent["duration"], baseline["duration"])
+    phases = {}
+    for name, stats in recent["phases"].items():
+        verdict = _regressed(stats, baseline["phases"].get(name))
+        if verdict is not None:
+            phases[name] = verdict
+    return {
+        "regressed": bool(overall and overall["regressed"]),
+        "duration": overall,
+        "regressed_phases": sorted(name for name, verdict in phases.items() if verdict["regressed"]),
+        "phases": phases,
+    }
+
+
+@app.get("/api/pollers/{source}/runs")
+async def get_poller_runs(
+    source: str,
+    limit: int = 20,
+    recent: int = POLLER_RUNS_RECENT,
+    baseline: int = POLLER_RUNS_BASELINE,
+):
+    """Recent ``poller_runs`` rows for ``source`` with p50/p95 aggregates and a regression flag."""
+    limit = max(1, min(int(limit), 500))
+    recent = max(1, min(int(recent), 100))
+    baseline = max(1, min(int(baseline), 500))
+
+    conn = get_db()
+    try:
+        rows = conn.execute(
+            """SELECT id, source, started_at, finished_at, duration_ms, status, error_class,
+                      phases_ms, api_calls, items_fetched, items_written, items_skipped,
+                      rate_limit_waits, rate_limit_wait_ms
+               FROM poller_runs
+               WHERE source = ?
+               ORDER BY id DESC
+               LIMIT ?""",
+            [source, max(limit, recent + baseline)],
+        ).fetchall()
+    finally:
+        conn.close()
+
+    runs = [_poller_run_dict(row) for row in rows]
+    recent_summary = _summarize_poller_runs(runs[:recent])
+    baseline_summary = _summarize_poller_runs(runs[recent:recent + baseline])
+    return {
+        "source": source,
+        "runs": runs[:limit],
+        "recent": recent_summary,
+        "baseline": baseline_summary,
+        "regression": _poller_regression(recent_summary, baseline_summary),
+    }
+
+
 @app.post("/api/restart")
 async def restart_server():
     """Restart the dashboard through its launchd-managed launcher with a fresh-data sync."""
@@ -1951,7 +2542,7 @@ async def get_daily_log(day: str):
 
 @app.get("/api/learnings/summary")
 async def get_learnings_summary(range: str = "day", date: str = ""):
-    _ensure_learning_events_schema()
+    _ensure_schema()
     anchor = _parse_anchor_date(date)
     range_name, start, end = _date_range_bounds(anchor, range)
 
@@ -1962,33 +2553,33 @@ async def get_learnings_summary(range: str = "day", date: str = ""):
                       status,
                       COUNT(*) AS count
                FROM learning_events
-               WHERE datetime(created_at) >= datetime(?)
-                 AND datetime(created_at) < datetime(?)
+               WHERE created_at >= ?
+                 AND created_at < ?
                GROUP BY category, status
                ORDER BY count DESC""",
-            [start.isoformat(sep=" "), end.isoformat(sep=" ")],
+            [_sql_utc(start), _sql_utc(end)],
         ).fetchall()
         top_titles = conn.execute(
             """SELECT COALESCE(NULLIF(title, ''), '(untitled)') AS title,
                       COUNT(*) AS count
                FROM learning_events
-               WHERE datetime(created_at) >= datetime(?)
-                 AND datetime(created_at) < datetime(?)
+               WHERE created_at >= ?
+                 AND created_at < ?
                GROUP BY title
                ORDER BY count DESC, title ASC
                LIMIT 10""",
-            [start.isoformat(sep=" "), end.isoformat(sep=" ")],
+            [_sql_utc(start), _sql_utc(end)],
         ).fetchall()
         pending = conn.execute(
             """SELECT COALESCE(NULLIF(proposed_category, ''), 'uncategorized') AS category,
                       COUNT(*) AS count
                FROM learning_events
                WHERE requires_category_expansion = 1
-                 AND datetime(created_at) >= datetime(?)
-                 AND datetime(created_at) < datetime(?)
+                 AND created_at >= ?
+                 AND created_at < ?
                GROUP BY proposed_category
                ORDER BY count DESC, category ASC""",
-            [start.isoformat(sep=" "), end.isoformat(sep=" ")],
+            [_sql_utc(start), _sql_utc(end)],
         ).fetchall()
     finally:
         conn.close()
@@ -2014,7 +2605,7 @@ async def get_learnings_summary(range: str = "day", date: str = ""):
 
 @app.get("/api/learnings/events")
 async def get_learning_events(range: str = "day", date: str = "", limit: int = 200):
-    _ensure_learning_events_schema()
+    _ensure_schema()
     anchor = _parse_anchor_date(date)
     range_name, start, end = _date_range_bounds(anchor, range)
     limit = max(1, min(int(limit), 1000))
@@ -2026,11 +2617,11 @@ async def get_learning_events(range: str = "day", date: str = "", limit: int = 2
                       category, title, note, status, requires_category_expansion,
                       proposed_category, created_at
                FROM learning_events
-               WHERE datetime(created_at) >= datetime(?)
-                 AND datetime(created_at) < datetime(?)
-               ORDER BY datetime(created_at) DESC, id DESC
+               WHERE created_at >= ?
+                 AND created_at < ?
+               ORDER BY created_at DESC, id DESC
                LIMIT ?""",
-            [start.isoformat(sep=" "), end.isoformat(sep=" "), limit],
+            [_sql_utc(start), _sql_utc(end), limit],
         ).fetchall()
     finally:
         conn.close()
@@ -2088,32 +2679,157 @@ async def get_knowledge_doc(path: str):
         "modified_at": datetime.fromtimestamp(resolved.stat().st_mtime).isoformat(),
     }
 
+# ========== CARD PAGES ==========
+# Columns left out of list payloads unless asked for with ``fields=``.
+CARD_HEAVY_FIELDS = ("execution_result", "refinement_history", "analysis_metadata")
+# Always selected: the keyset cursor is built from them.
+CARD_CURSOR_FIELDS = ("id", "timestamp_utc")
+CARD_PAGE_MAX = 500
+CARD_STATUSES = ("pending", "held", "approved", "completed", "failed")
+
+
+def _card_columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_xinfo(cards)").fetchall()]
+
+
+def _card_field_selection(conn, fields: str | None, required=()):
+    """Resolve a ``fields=`` list into card columns that exist in this DB.
+
+    Tokens are column names plus ``default`` (everything except
+    ``CARD_HEAVY_FIELDS``) and ``all``. No value means ``default``.
+    """
+    available = _card_columns(conn)
+    tokens = {token.strip() for token in str(fields or "").split(",") if token.strip()}
+    wanted = set(CARD_CURSOR_FIELDS) | set(required)
+    if not tokens or "default" in tokens:
+        wanted.update(column for column in available if column not in CARD_HEAVY_FIELDS)
+    if "all" in tokens:
+        wanted.update(available)
+    wanted.update(tokens)
+    return [column for column in available if column in wanted]
+
+
+def _parse_card_cursor(after: str | None):
+    if not after:
+        return None
+    timestamp, sep, card_id = after.rpartition(",")
+    if not sep:
+        raise HTTPException(400, "after must be '<timestamp_utc>,<id>'")
+    try:
+        return timestamp.strip() or None, int(card_id)
+    except ValueError:
+        raise HTTPException(400, "after must be '<timestamp_utc>,<id>'")
+
+
+def _card_cursor_clause(cursor):
+    """Keyset predicate for ``ORDER BY timestamp_utc DESC, id DESC`` (NULLs sort last)."""
+    timestamp, card_id = cursor
+    if timestamp is None:
+        return "(timestamp_utc IS NULL AND id < ?)", [card_id]
+    return (
+        "(timestamp_utc < ? OR (timestamp_utc = ? AND id < ?) OR timestamp_utc IS NULL)",
+        [timestamp, timestamp, card_id],
+    )
+
+
+def _card_cursor(row):
+    return f"{row['timestamp_utc'] or ''},{row['id']}"
+
+
+def _card_page_size(limit: int | None):
+    if limit is None:
+        return None
+    return max(1, min(limit, CARD_PAGE_MAX))
+
+
+def _fetch_card_page(
+    conn,
+    columns,
+    where: list[str],
+    params: list,
+    after: str | None,
+    limit: int | None,
+    table: str = "cards",
+    table_params=(),
+):
+    """Run one keyset page over ``cards``; returns ``(rows, next_cursor)``.
+
+    Without ``limit`` every matching row is returned and ``next_cursor`` is None.
+    ``table`` may be a subquery over ``cards`` (with ``table_params``) as long
+    as it exposes ``id`` and ``timestamp_utc``.
+    """
+    cursor = _parse_card_cursor(after)
+    clauses = list(where)
+    params = [*table_params, *params]
+    if cursor:
+        clause, cursor_params = _card_cursor_clause(cursor)
+        clauses.append(clause)
+        params.extend(cursor_params)
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY timestamp_utc DESC, id DESC"
+    page_size = _card_page_size(limit)
+    if page_size is None:
+        return conn.execute(query, params).fetchall(), None
+    rows = conn.execute(f"{query} LIMIT ?", [*params, page_size + 1]).fetchall()
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, _card_cursor(rows[-1])
+
+
 @app.get("/api/cards")
-async def get_cards(source: str = None, status: str | None = None, section: str = None):
+async def get_cards(
+    request: Request,
+    response: Response,
+    source: str = None,
+    status: str | None = None,
+    section: str = None,
+    after: str | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+):
+    # Counts span every source, so any card write changes the payload.
+    not_modified = _conditional(request, response, _etag("cards", _data_version()))
+    if not_modified:
+        return not_modified
+
     conn = get_db()
     try:
-        query = "SELECT * FROM cards WHERE 1=1"
+        where = []
         params = []
         if status is None:
             status = "all" if source == "calendar" else "pending"
         if status != "all":
-            query += " AND status = ?"
+            where.append("status = ?")
             params.append(status)
         if source:
-            query += " AND source = ?"
+            where.append("source = ?")
             params.append(source)
         if section:
-            query += " AND section = ?"
+            where.append("section = ?")
             params.append(section)
-        query += " ORDER BY timestamp DESC"
-        rows = conn.execute(query, params).fetchall()
+        columns = _card_field_selection(conn, fields)
+        rows, next_cursor = _fetch_card_page(conn, columns, where, params, after, limit)
         cards = [_row_to_card(row) for row in rows]
-        counts = {}
-        for s in ["pending", "held", "approved", "completed", "failed"]:
-            counts[s] = conn.execute(
-                "SELECT COUNT(*) FROM cards WHERE status = ?", [s]
-            ).fetchone()[0]
-        return {"cards": cards, "counts": counts}
+
+        counts = {s: 0 for s in CARD_STATUSES}
+        source_counts = {}
+        for row in conn.execute(
+            "SELECT status, source, COUNT(*) AS n FROM cards GROUP BY status, source"
+        ).fetchall():
+            if row["status"] in counts:
+                counts[row["status"]] += row["n"]
+            if status == "all" or row["status"] == status:
+                key = row["source"] or ""
+                source_counts[key] = source_counts.get(key, 0) + row["n"]
+        return {
+            "cards": cards,
+            "counts": counts,
+            "source_counts": source_counts,
+            "next_cursor": next_cursor,
+        }
     finally:
         conn.close()
 
@@ -2143,15 +2859,21 @@ def _group_suggestion_cards(cards):
 
 
 @app.get("/api/suggestions")
-async def get_suggestions(refresh: bool = False):
+async def get_suggestions(request: Request, response: Response, refresh: bool = False):
     refresh_result = None
     if refresh:
         refresh_result = _refresh_suggestions_sync()
+    else:
+        not_modified = _conditional(
+            request, response, _etag("suggestions", _data_version(SUGGESTION_SOURCE))
+        )
+        if not_modified:
+            return not_modified
 
     conn = get_db()
     try:
         rows = conn.execute(
-            "SELECT * FROM cards WHERE source = ? ORDER BY timestamp DESC, id DESC",
+            "SELECT * FROM cards WHERE source = ? ORDER BY timestamp_utc DESC, id DESC",
             [SUGGESTION_SOURCE],
         ).fetchall()
         cards = [_row_to_card(row) for row in rows]
@@ -2644,9 +3366,9 @@ Rules:
 """
 
 
-def _generate_plan_for_card(card_id: int, card: dict, feedback: str = ""):
+async def _generate_plan_for_card(card_id: int, card: dict, feedback: str = ""):
     prompt = _build_plan_generation_prompt(card_id, card, feedback=feedback)
-    result = _run_claude_print(prompt, timeout=75)
+    result = await _llm_print(prompt, timeout=75)
     if result.returncode != 0:
         raise HTTPException(502, f"Plan generation failed: {result.stderr[:200]}")
 
@@ -2664,6 +3386,7 @@ async def get_card_plan(card_id: int):
 
 
 @app.post("/api/cards/{card_id}/plan/generate")
+@_llm_job_endpoint("generate_plan", "card_id")
 async def generate_card_plan(card_id: int, body: dict = Body(default={})):
     store = _get_plan_store()
     force = bool(body.get("force", False))
@@ -2683,9 +3406,9 @@ async def generate_card_plan(card_id: int, body: dict = Body(default={})):
     finally:
         conn.close()
 
-    plan = _generate_plan_for_card(card_id, card, feedback=feedback)
+    plan = await _generate_plan_for_card(card_id, card, feedback=feedback)
     store.save(plan)
-    _stale_sources.add("plans")
+    _mark_source_stale("plans")
     return {"plan": plan.to_dict(), "generated": True}
 
 
@@ -2706,7 +3429,7 @@ async def update_plan_step(card_id: int, step_index: int, body: dict = Body(...)
     else:
         step.status = new_status
     store.save(plan)
-    _stale_sources.add("plans")
+    _mark_source_stale("plans")
     return {"step": step.to_dict()}
 
 
@@ -2723,7 +3446,7 @@ async def approve_remaining_steps(card_id: int, body: dict = Body(...)):
             step.status = "approved"
             approved += 1
     store.save(plan)
-    _stale_sources.add("plans")
+    _mark_source_stale("plans")
     return {"approved_count": approved, "plan": plan.to_dict()}
 
 
@@ -2808,6 +3531,7 @@ async def plan_step_complete(card_id: int, step_index: int, body: dict = Body(..
 
 
 @app.post("/api/cards/{card_id}/plan/regenerate")
+@_llm_job_endpoint("regenerate_plan", "card_id")
 async def regenerate_plan(card_id: int, body: dict = Body(...)):
     store = _get_plan_store()
     feedback = str(body.get("feedback") or "").strip()
@@ -2822,9 +3546,9 @@ async def regenerate_plan(card_id: int, body: dict = Body(...)):
         conn.close()
 
     store.delete(card_id)
-    plan = _generate_plan_for_card(card_id, card, feedback=feedback)
+    plan = await _generate_plan_for_card(card_id, card, feedback=feedback)
     store.save(plan)
-    _stale_sources.add("plans")
+    _mark_source_stale("plans")
     return {"status": "generated", "feedback": feedback, "plan": plan.to_dict()}
 
 
@@ -2833,38 +3557,98 @@ async def approve_all_cards_guard():
     raise HTTPException(405, "Bulk card approval is disabled. Approve cards one-by-one.")
 
 
+# Columns the retention, collapsing and grouping logic reads.
+INBOX_VIEW_FIELDS = (
+    "source", "timestamp", "summary", "classification", "status",
+    "section", "responded", "proposed_actions", "draft_response", "dup_key",
+)
+
+
+def _project_inbox_card(card: dict, requested: set):
+    keep = set(requested)
+    if "duplicate_count" in (card.get("analysis_metadata") or {}):
+        keep.add("analysis_metadata")  # collapse bookkeeping always travels
+    return {key: value for key, value in card.items() if key in keep}
+
+
 @app.get("/api/inbox-view")
-async def get_inbox_view(source: str, days: int = 3):
-    """Return grouped inbox cards for Slack/Gmail across recent activity."""
+async def get_inbox_view(
+    request: Request,
+    response: Response,
+    source: str,
+    days: int = 3,
+    after: str | None = None,
+    limit: int | None = None,
+    fields: str | None = None,
+):
+    """Return grouped inbox cards for Slack/Gmail across recent activity.
+
+    ``after``/``limit`` page through the underlying rows newest-first; a page
+    can hold fewer than ``limit`` cards once retention and Gmail collapsing
+    have run, so keep following ``next_cursor`` until it is null.
+    """
     if source not in {"slack", "gmail"}:
         raise HTTPException(400, "source must be slack or gmail")
+    version = _data_version(source)
+    # Retention windows move with the clock, hence the time bucket.
+    not_modified = _conditional(request, response, _etag("inbox-view", source, version, _time_bucket()))
+    if not_modified:
+        return not_modified
     days = max(1, min(days, 14))
     now_utc = datetime.now(timezone.utc)
     now_local = now_utc.astimezone()
+    cache_key = (source, days, after, limit, fields, str(DB_PATH))
+    cached = _inbox_view_cache.get(cache_key, version, now_utc)
+    if cached is not None:
+        return cached
     lookback_days = max(days, 7) if source == "slack" else days
-    cutoff = (now_utc - timedelta(days=lookback_days)).isoformat()
+    cutoff = _sql_utc(now_utc - timedelta(days=lookback_days))
 
     conn = get_db()
     try:
-        rows = conn.execute(
-            """SELECT * FROM cards
-               WHERE source = ?
-                 AND timestamp >= ?
-               ORDER BY timestamp DESC""",
-            [source, cutoff],
-        ).fetchall()
+        requested = set(_card_field_selection(conn, fields))
+        columns = _card_field_selection(conn, fields, required=INBOX_VIEW_FIELDS)
+        if source == "gmail":
+            # Copies of one conversation collapse in SQL on the indexed dup_key
+            # (filled by migration 6 and the Gmail poller; reads never write).
+            rows, next_cursor = _fetch_card_page(
+                conn,
+                [*columns, "_duplicate_count", "_duplicate_ids", "_duplicate_rank"],
+                ["_duplicate_rank = 1"],
+                [],
+                after,
+                limit,
+                table=_gmail_collapsed_table(columns),
+                table_params=[cutoff],
+            )
+        else:
+            rows, next_cursor = _fetch_card_page(
+                conn,
+                columns,
+                ["source = ?", "timestamp_utc >= ?"],
+                [source, cutoff],
+                after,
+                limit,
+            )
     finally:
         conn.close()
 
     cards = []
+    # The cached view is good until its first card ages out of retention.
+    expires_at = now_utc + timedelta(seconds=INBOX_VIEW_CACHE_MAX_AGE_SECONDS)
     for row in rows:
         card = _row_to_card(row)
-        if not _should_include_in_inbox_view(card, source, days, now_utc, now_local):
-            continue
+        retained_until = _inbox_view_retained_until(card, source, days, now_local)
+        if retained_until is not None:
+            if now_utc > retained_until:
+                continue
+            expires_at = min(expires_at, retained_until)
+        if source == "gmail":
+            card = _merge_gmail_duplicates(card)
         cards.append(card)
 
     if source == "gmail":
-        cards = _collapse_gmail_duplicates(cards)
+        cards.sort(key=_gmail_card_preference_key, reverse=True)
 
     needs_sections = {"needs-action", "action-needed", "needs_response", "needs-response"}
     no_action_sections = {"no-action", "noise", "responded", "fyi", "alert"}
@@ -2893,12 +3677,20 @@ async def get_inbox_view(source: str, days: int = 3):
         else:
             no_action.append(card)
 
-    return {
+    payload = {
         "source": source,
         "days": days,
-        "needs_action": needs_action,
-        "no_action": no_action,
+        "needs_action": [_project_inbox_card(card, requested) for card in needs_action],
+        "no_action": [_project_inbox_card(card, requested) for card in no_action],
+        "next_cursor": next_cursor,
     }
+    _inbox_view_cache.put(cache_key, version, expires_at, payload)
+    return payload
+
+
+@app.get("/api/inbox-view/cache")
+async def inbox_view_cache_stats():
+    return _inbox_view_cache.stats()
 
 
 def _parse_active_tasks():
@@ -3187,7 +3979,7 @@ def _queue_claude_sync_event(message: str):
         handle.write(f"- [{timestamp}] {text}\n")
 
 
-def _build_task_daily_log_line(task: dict, close_note: str = ""):
+async def _build_task_daily_log_line(task: dict, close_note: str = ""):
     """Use Claude to draft a concise daily-log line for a completed task."""
     jira_keys = ", ".join(_task_jira_keys(task)) or "none"
     prompt = (
@@ -3201,7 +3993,7 @@ def _build_task_daily_log_line(task: dict, close_note: str = ""):
         f"Description:\n{task.get('description', '')}\n\n"
         f"Close note: {close_note or '(none)'}\n"
     )
-    result = _run_claude_print(prompt, timeout=45)
+    result = await _llm_print(prompt, timeout=45)
     if result.returncode != 0:
         raise RuntimeError(result.stderr[:200] or "claude daily-log generation failed")
 
@@ -3235,14 +4027,20 @@ def _related_cards_for_task(conn, task):
     sql = (
         "SELECT id, source, summary, status, timestamp "
         "FROM cards WHERE (" + " OR ".join(queries) + ") "
-        "ORDER BY timestamp DESC LIMIT 8"
+        "ORDER BY timestamp_utc DESC LIMIT 8"
     )
     rows = conn.execute(sql, params).fetchall()
     return [dict(r) for r in rows]
 
 
 @app.get("/api/tasks")
-async def get_tasks():
+async def get_tasks(request: Request, response: Response):
+    # Tasks come from active-tasks.md; related cards can come from any source.
+    not_modified = _conditional(
+        request, response, _etag("tasks", _file_signature(TASKS_FILE), _data_version())
+    )
+    if not_modified:
+        return not_modified
     tasks = _parse_active_tasks()
     conn = get_db()
     try:
@@ -3288,7 +4086,7 @@ async def get_task_timeline(task_number: int, limit: int = 500):
         raise HTTPException(404, f"task #{task_number} not found")
     limit = max(1, min(int(limit), 2000))
     entity_id = str(task_number)
-    _ensure_audit_schema()
+    _ensure_schema()
     conn = get_db()
     try:
         chat_rows = conn.execute(
@@ -3380,6 +4178,7 @@ async def open_task_session(task_number: int):
 
 
 @app.post("/api/tasks/{task_number}/refine")
+@_llm_job_endpoint("refine_task", "task_number")
 async def refine_task(task_number: int, body: dict = Body(...)):
     """Single-turn refinement for an active task."""
     task = _get_task_by_number(task_number)
@@ -3419,7 +4218,7 @@ async def refine_task(task_number: int, body: dict = Body(...)):
         conversation += f"{role.upper()}: {content}\n"
     conversation += f"USER: {user_message}\n"
 
-    result = _run_claude_print(conversation, timeout=60)
+    result = await _llm_print(conversation, timeout=60)
     if result.returncode != 0:
         raise HTTPException(502, f"task refine failed: {result.stderr[:200]}")
     response = result.stdout.strip()
@@ -3494,7 +4293,7 @@ async def close_task(task_number: int, body: dict = Body(default={})):
     updated_task = _get_task_by_number(task_number) or task
     timestamp = datetime.now().strftime("%H:%M")
     try:
-        summary_line = _build_task_daily_log_line(updated_task, note)
+        summary_line = await _build_task_daily_log_line(updated_task, note)
         entry = f"- {timestamp} | {summary_line}"
     except Exception:
         fallback_detail = note or f"status set to {new_status}"
@@ -3532,6 +4331,7 @@ async def close_task(task_number: int, body: dict = Body(default={})):
 
 
 @app.post("/api/tasks/{task_number}/write-jira")
+@_llm_job_endpoint("write_task_to_jira", "task_number")
 async def write_task_to_jira(task_number: int, body: dict = Body(default={})):
     """Post a task update to Jira using the first linked key unless overridden."""
     task = _get_task_by_number(task_number)
@@ -3575,7 +4375,7 @@ async def write_task_to_jira(task_number: int, body: dict = Body(default={})):
         'Return ONLY JSON: {"issue_key":"...", "comment":"...", "result":"posted"}'
     )
 
-    result = _run_claude_print(prompt, timeout=75)
+    result = await _llm_print(prompt, timeout=75)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -3649,6 +4449,7 @@ async def hold_card(card_id: int):
             "UPDATE cards SET status = 'held' WHERE id = ?", [card_id]
         )
         conn.commit()
+        _publish_card_change(conn, card_id)
         return {"id": card_id, "status": "held"}
     finally:
         conn.close()
@@ -3665,6 +4466,7 @@ async def update_card_status(card_id: int, body: dict):
             "UPDATE cards SET status = ? WHERE id = ?", [new_status, card_id]
         )
         conn.commit()
+        _publish_card_change(conn, card_id)
         return {"id": card_id, "status": new_status}
     finally:
         conn.close()
@@ -3715,7 +4517,7 @@ async def deny_suggestion(card_id: int, body: dict = Body(default={})):
     finally:
         conn.close()
 
-    _stale_sources.add(SUGGESTION_SOURCE)
+    _mark_source_stale(SUGGESTION_SOURCE)
     return {"card_id": card_id, "status": "held"}
 
 
@@ -3789,7 +4591,7 @@ async def approve_suggestion(card_id: int, body: dict = Body(default={})):
             output=json.dumps({"task_number": task_number, "automation_draft_file": automation_draft_file}),
         )
         _record_stat("suggestions_approved")
-        _stale_sources.add(SUGGESTION_SOURCE)
+        _mark_source_stale(SUGGESTION_SOURCE)
         return {
             "card_id": card_id,
             "status": "completed",
@@ -3816,7 +4618,7 @@ async def get_card_timeline(card_id: int, limit: int = 500):
 
     limit = max(1, min(int(limit), 2000))
     entity_id = str(card_id)
-    _ensure_audit_schema()
+    _ensure_schema()
     conn = get_db()
     try:
         chat_rows = conn.execute(
@@ -3905,6 +4707,7 @@ async def close_card(card_id: int, body: dict = Body(default={})):
             [card_id],
         )
         conn.commit()
+        _publish_card_change(conn, card_id)
     finally:
         conn.close()
 
@@ -3926,6 +4729,7 @@ async def close_card(card_id: int, body: dict = Body(default={})):
 
 
 @app.post("/api/cards/{card_id}/write-jira")
+@_llm_job_endpoint("write_card_to_jira", "card_id")
 async def write_card_to_jira(card_id: int, body: dict = Body(default={})):
     conn = get_db()
     try:
@@ -3973,7 +4777,7 @@ async def write_card_to_jira(card_id: int, body: dict = Body(default={})):
         f"user_note: {note or '(none)'}\n\n"
         'Return ONLY JSON: {"issue_key":"...", "comment":"...", "result":"posted"}'
     )
-    result = _run_claude_print(prompt, timeout=75)
+    result = await _llm_print(prompt, timeout=75)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -4040,6 +4844,7 @@ async def save_card_to_daily_log(card_id: int, body: dict = Body(default={})):
     }
 
 @app.post("/api/cards/{card_id}/send-slack")
+@_llm_job_endpoint("send_slack_draft", "card_id")
 async def send_slack_draft(card_id: int, body: dict = Body(default={})):
     """Send the draft response to Slack via MCP."""
     conn = get_db()
@@ -4084,7 +4889,7 @@ async def send_slack_draft(card_id: int, body: dict = Body(default={})):
         f"Channel: {channel}, thread_ts: {thread_ts}, "
         f"text: {json.dumps(draft)}"
     )
-    result = _run_claude_print(prompt, timeout=30)
+    result = await _llm_print(prompt, timeout=30)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -4096,6 +4901,7 @@ async def send_slack_draft(card_id: int, body: dict = Body(default={})):
         [card_id]
     )
     conn.commit()
+    _publish_card_change(conn, card_id)
     conn.close()
 
     _record_stat("drafts_sent")
@@ -4110,6 +4916,7 @@ async def send_slack_draft(card_id: int, body: dict = Body(default={})):
 
 
 @app.post("/api/cards/{card_id}/send-email")
+@_llm_job_endpoint("send_email_draft", "card_id")
 async def send_email_draft(card_id: int, body: dict = Body(default={})):
     """Send the draft email response via Gmail MCP."""
     conn = get_db()
@@ -4152,7 +4959,7 @@ async def send_email_draft(card_id: int, body: dict = Body(default={})):
         f"Body: {json.dumps(draft)}, "
         f"threadId: {thread_id}"
     )
-    result = _run_claude_print(prompt, timeout=30)
+    result = await _llm_print(prompt, timeout=30)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -4164,6 +4971,7 @@ async def send_email_draft(card_id: int, body: dict = Body(default={})):
         [card_id]
     )
     conn.commit()
+    _publish_card_change(conn, card_id)
     conn.close()
 
     _record_stat("drafts_sent")
@@ -4178,6 +4986,7 @@ async def send_email_draft(card_id: int, body: dict = Body(default={})):
 
 
 @app.post("/api/cards/{card_id}/gmail-analyze")
+@_llm_job_endpoint("analyze_gmail_card", "card_id")
 async def analyze_gmail_card(card_id: int, body: dict = Body(default={})):
     """Generate Gmail-specific category, label, and draft suggestions."""
     conn = get_db()
@@ -4194,7 +5003,7 @@ async def analyze_gmail_card(card_id: int, body: dict = Body(default={})):
     replace_draft = bool(body.get("replace_draft", False))
 
     prompt = _build_gmail_analysis_prompt(card, include_labels=include_labels, include_draft=include_draft)
-    result = _run_claude_print(prompt, timeout=60)
+    result = await _llm_print(prompt, timeout=60)
     if result.returncode != 0:
         raise HTTPException(502, f"Gmail analysis failed: {result.stderr[:200]}")
 
@@ -4237,6 +5046,7 @@ async def analyze_gmail_card(card_id: int, body: dict = Body(default={})):
 
 
 @app.post("/api/cards/{card_id}/gmail-auto-label")
+@_llm_job_endpoint("auto_label_gmail_card", "card_id")
 async def auto_label_gmail_card(card_id: int, body: dict = Body(default={})):
     """Use Gmail MCP to create/apply suggested labels to the email."""
     conn = get_db()
@@ -4262,7 +5072,7 @@ async def auto_label_gmail_card(card_id: int, body: dict = Body(default={})):
     labels = meta.get("gmail_suggested_labels", [])
     if not labels:
         prompt = _build_gmail_analysis_prompt(card, include_labels=True, include_draft=False)
-        analysis_result = _run_claude_print(prompt, timeout=60)
+        analysis_result = await _llm_print(prompt, timeout=60)
         if analysis_result.returncode != 0:
             _mark_action_step_status(action_step_id, "failed")
             _finish_execution_attempt(attempt_id, "failed", error=analysis_result.stderr[:500])
@@ -4297,7 +5107,7 @@ async def auto_label_gmail_card(card_id: int, body: dict = Body(default={})):
         "4. Call modify_email on the chosen message_id with addLabelIds set to those IDs.\n"
         'Return ONLY JSON: {"status":"labeled","labels":["..."],"message_id":"..."}'
     )
-    result = _run_claude_print(prompt, timeout=60)
+    result = await _llm_print(prompt, timeout=60)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -4327,6 +5137,7 @@ async def auto_label_gmail_card(card_id: int, body: dict = Body(default={})):
 
 
 @app.post("/api/cards/{card_id}/archive-email")
+@_llm_job_endpoint("archive_gmail_card", "card_id")
 async def archive_gmail_card(card_id: int, body: dict = Body(default={})):
     """Archive a Gmail card by removing the INBOX label on the matching message."""
     conn = get_db()
@@ -4363,7 +5174,7 @@ async def archive_gmail_card(card_id: int, body: dict = Body(default={})):
         f"If thread_id is unavailable, call search_emails with query {json.dumps(search_query)} and archive the best recent match.\n"
         'Return ONLY JSON: {"status":"archived","message_id":"...","message_ids":["..."]}'
     )
-    result = _run_claude_print(prompt, timeout=45)
+    result = await _llm_print(prompt, timeout=45)
     if result.returncode != 0:
         _mark_action_step_status(action_step_id, "failed")
         _finish_execution_attempt(attempt_id, "failed", error=result.stderr[:500])
@@ -4378,6 +5189,7 @@ async def archive_gmail_card(card_id: int, body: dict = Body(default={})):
             related_ids,
         )
         conn.commit()
+        _publish_card_change(conn, related_ids)
     finally:
         conn.close()
 
@@ -4394,48 +5206,66 @@ async def archive_gmail_card(card_id: int, body: dict = Body(default={})):
     }
 
 
-async def card_event_generator():
-    """Yield new cards as SSE events with optional source cache invalidation."""
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _announce_new_cards() -> set[str]:
+    """Publish cards written by pollers since the last announcement.
+
+    Runs once per invalidation (not per SSE client) and returns the sources of
+    the announced cards.
+    """
+    global _last_announced_card_id
     conn = get_db()
     try:
-        row = conn.execute("SELECT MAX(id) FROM cards").fetchone()[0]
-        last_id = row or 0
+        if _last_announced_card_id is None:
+            _last_announced_card_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cards").fetchone()[0]
+            return set()
+        rows = conn.execute(
+            "SELECT * FROM cards WHERE id > ? ORDER BY id ASC", [_last_announced_card_id]
+        ).fetchall()
     finally:
         conn.close()
 
-    while True:
-        await asyncio.sleep(10)
+    sources = set()
+    for row in rows:
+        card = _row_to_card(row)
+        _last_announced_card_id = card["id"]
+        sources.add(card.get("source", ""))
+        _event_bus.publish("message", card)
+    return sources
 
-        # Flush explicit stale-source notifications (triggered by pollers).
-        if _stale_sources:
-            sources = list(_stale_sources)
-            _stale_sources.clear()
-            for src in sources:
-                yield f"event: cache-invalidate\ndata: {json.dumps({'source': src})}\n\n"
 
-        # Drain plan execution events
-        while not _plan_event_queue.empty():
+def _publish_card_change(conn: sqlite3.Connection, card_ids):
+    """Invalidate the sources of mutated cards using the caller's connection."""
+    ids = [int(card_id) for card_id in ([card_ids] if isinstance(card_ids, int) else card_ids)]
+    if not ids:
+        return
+    placeholders = ",".join("?" for _ in ids)
+    rows = conn.execute(
+        f"SELECT DISTINCT source FROM cards WHERE id IN ({placeholders})", ids
+    ).fetchall()
+    for row in rows:
+        if row[0]:
+            _mark_source_stale(row[0])
+
+
+async def card_event_generator():
+    """Stream event-bus events to one SSE client; idle clients cost no DB work."""
+    subscription = _event_bus.subscribe()
+    try:
+        while True:
             try:
-                evt = _plan_event_queue.get_nowait()
+                evt = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if evt["event"] == "message":
+                yield f"data: {evt['data']}\n\n"
+            else:
                 yield f"event: {evt['event']}\ndata: {evt['data']}\n\n"
-            except Exception:
-                break
-
-        conn = get_db()
-        try:
-            rows = conn.execute(
-                "SELECT * FROM cards WHERE id > ? ORDER BY id ASC", [last_id]
-            ).fetchall()
-            seen_sources = set()
-            for row in rows:
-                card = _row_to_card(row)
-                last_id = card["id"]
-                seen_sources.add(card.get("source", ""))
-                yield f"data: {json.dumps(card)}\n\n"
-            for src in seen_sources:
-                yield f"event: cache-invalidate\ndata: {json.dumps({'source': src})}\n\n"
-        finally:
-            conn.close()
+    finally:
+        _event_bus.unsubscribe(subscription)
 
 @app.get("/api/events")
 async def card_events():
@@ -4448,6 +5278,43 @@ async def card_events():
         }
     )
 
+
+@app.get("/api/db/pool")
+async def db_pool_stats():
+    return db_pool.pool.stats()
+
+
+@app.get("/api/events/stats")
+async def event_bus_stats():
+    return _event_bus.stats()
+
+
+@app.get("/api/llm-jobs")
+async def list_llm_jobs():
+    return {
+        "jobs": [job.to_dict() for job in _llm_jobs.list()],
+        "max_concurrency": _llm_jobs.max_concurrency,
+        "running": _llm_jobs.running,
+    }
+
+
+@app.get("/api/llm-jobs/{job_id}")
+async def get_llm_job(job_id: str):
+    job = _llm_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    return job.to_dict(include_result=True)
+
+
+@app.post("/api/llm-jobs/{job_id}/cancel")
+async def cancel_llm_job(job_id: str):
+    job = _llm_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "job not found")
+    if not _llm_jobs.cancel(job_id):
+        raise HTTPException(409, f"job already {job.status}")
+    return {"status": "cancelling", "job_id": job_id}
+
 @app.websocket("/ws/execute/{card_id}")
 async def execute_card(websocket: WebSocket, card_id: int):
     await websocket.accept()
@@ -4614,6 +5481,7 @@ exit 1
         await websocket.close()
 
 @app.post("/api/cards/{card_id}/refine")
+@_llm_job_endpoint("refine_card", "card_id")
 async def refine_card(card_id: int, body: dict = Body(...)):
     """Single-turn chat about a card. Returns Claude's response."""
     conn = get_db()
@@ -4668,7 +5536,7 @@ async def refine_card(card_id: int, body: dict = Body(...)):
         conversation += f"{role.upper()}: {content}\n"
     conversation += f"USER: {user_message}\n"
 
-    result = _run_claude_print(conversation, timeout=60)
+    result = await _llm_print(conversation, timeout=60)
 
     response_text = result.stdout.strip()
 
@@ -5005,6 +5873,7 @@ def _build_jira_sprint_prompt():
 
 
 @app.get("/api/jira/sprint")
+@_llm_job_endpoint("jira_sprint")
 async def jira_sprint(refresh: bool = False):
     """Fetch current sprint tasks via Claude CLI + Atlassian MCP."""
     import time
@@ -5015,7 +5884,7 @@ async def jira_sprint(refresh: bool = False):
     prompt = _build_jira_sprint_prompt()
 
     try:
-        result = _run_claude_print(prompt, timeout=75)
+        result = await _llm_print(prompt, timeout=75)
         if result.returncode != 0:
             raise HTTPException(502, f"Jira fetch failed: {result.stderr[:200]}")
         parsed = _extract_balanced_json(result.stdout.strip(), "[")
@@ -5066,18 +5935,34 @@ async def notify(body: dict):
     return {"ok": True, "notified": True}
 
 
+def _invalidated_sources(source=None) -> set[str]:
+    """Announce cards written since the last invalidation; returns the stale sources."""
+    try:
+        sources = _announce_new_cards()
+    except sqlite3.OperationalError:
+        sources = set()
+    if source:
+        sources.add(source)
+    return sources
+
+
 @app.post("/api/cache-invalidate")
 async def cache_invalidate(body: dict):
     """Allow pollers to notify the dashboard that a source cache is stale."""
-    source = body.get("source")
-    if source:
-        _stale_sources.add(source)
+    for src in sorted(_invalidated_sources(body.get("source"))):
+        _mark_source_stale(src)
     return {"ok": True}
 
 
+def _supervisor_request(method: str, path: str) -> dict:
+    request = urllib.request.Request(f"{POLLER_SUPERVISOR_URL}{path}", data=b"" if method == "POST" else None, method=method)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
 @app.post("/api/pollers/{poller_id}/sync")
 async def force_sync_poller(poller_id: str):
-    """Trigger an immediate poller sync."""
+    """Trigger an immediate poller sync through the resident poller supervisor."""
     poller = None
     for p in POLLER_DEFINITIONS:
         if p["id"] == poller_id:
@@ -5086,44 +5971,20 @@ async def force_sync_poller(poller_id: str):
     if not poller:
         raise HTTPException(404, f"unknown poller: {poller_id}")
 
-    # Check if already running
-    existing = _running_syncs.get(poller_id)
-    if existing and existing.poll() is None:
-        return {"status": "already_syncing", "poller": poller_id}
-
-    script_map = {
-        "slack": "slack-poller.py",
-        "gmail": "gmail-poller.py",
-        "calendar": "calendar-poller.py",
-        "jira": "jira-poller.py",
-    }
-    script_name = script_map.get(poller_id)
-    if not script_name:
-        raise HTTPException(400, f"no script for poller: {poller_id}")
-
-    script_path = ENG_BUDDY_DIR / "bin" / script_name
-    if not script_path.exists():
-        script_path = RUNTIME_DIR / "bin" / script_name
-    if not script_path.exists():
-        raise HTTPException(500, f"poller script not found: {script_name}")
-
-    # Clean up finished syncs to avoid accumulating dead Popen objects
-    for pid, p in list(_running_syncs.items()):
-        if p.poll() is not None:
-            del _running_syncs[pid]
-
-    proc = subprocess.Popen(
-        [sys.executable, str(script_path)],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        cwd=str(ENG_BUDDY_DIR),
-    )
-    _running_syncs[poller_id] = proc
+    try:
+        result = await asyncio.to_thread(_supervisor_request, "POST", f"/pollers/{poller_id}/run")
+    except urllib.error.HTTPError as exc:
+        raise HTTPException(502, f"poller supervisor rejected {poller_id}: HTTP {exc.code}")
+    except (urllib.error.URLError, OSError):
+        raise HTTPException(503, "poller supervisor is not running")
 
+    if result.get("status") == "already_running":
+        return {"status": "already_syncing", "poller": poller_id}
     return {"status": "syncing", "poller": poller_id}
 
 
 @app.get("/api/briefing")
+@_llm_job_endpoint("briefing")
 async def get_briefing(regenerate: bool = False):
     """Generate or return cached morning briefing."""
     from datetime import date, timedelta
@@ -5150,7 +6011,7 @@ async def get_briefing(regenerate: bool = False):
 
         # Gather data for briefing
         pending_cards = conn.execute(
-            "SELECT source, section, summary, context_notes, draft_response FROM cards WHERE status = 'pending' ORDER BY timestamp DESC LIMIT 30"
+            "SELECT source, section, summary, context_notes, draft_response FROM cards WHERE status = 'pending' ORDER BY timestamp_utc DESC LIMIT 30"
         ).fetchall()
 
         # Get yesterday's stats
@@ -5201,7 +6062,7 @@ Return a JSON object with these sections:
 Return ONLY the JSON. No prose."""
 
     try:
-        result = _run_claude_print(prompt, timeout=60)
+        result = await _llm_print(prompt, timeout=60)
         if result.returncode != 0:
             briefing = {"error": "Failed to generate briefing", "raw": result.stderr[:500]}
         else:
@@ -5253,6 +6114,7 @@ async def get_filter_suggestions():
 
 
 @app.post("/api/filters/create")
+@_llm_job_endpoint("create_gmail_filter")
 async def create_gmail_filter(body: dict):
     """Create a Gmail filter via MCP and record it."""
     pattern = body.get("pattern", "")
@@ -5268,7 +6130,7 @@ async def create_gmail_filter(body: dict):
         f"and action to add label '{label_name}' and skip inbox (removeLabelIds: ['INBOX']). "
         f"Return the filter ID."
     )
-    result = _run_claude_print(prompt, timeout=30)
+    result = await _llm_print(prompt, timeout=30)
 
     if suggestion_id:
         conn = get_db()
@@ -5311,6 +6173,7 @@ async def dismiss_card(card_id: int, body: dict = Body(default={})):
             "UPDATE cards SET section = 'no-action' WHERE id = ?", [card_id]
         )
         conn.commit()
+        _publish_card_change(conn, card_id)
 
         # Track for adaptive filtering
         row = conn.execute("SELECT source, summary FROM cards WHERE id = ?", [card_id]).fetchone()
@@ -5350,17 +6213,24 @@ def _track_ignored_pattern(conn, summary):
 # Cross-channel resolution helpers
 # ---------------------------------------------------------------------------
 
-def _extract_person_name(card: dict) -> str:
-    """Extract person name from card summary and proposed_actions."""
+def _extract_person_name(card: dict, aliases: dict | None = None) -> str:
+    """Extract person name from card summary and proposed_actions.
+
+    ``aliases`` (see ``slack_directory.alias_map``) maps emails, Slack handles
+    and user ids to the directory's real name, so a Gmail sender and a Slack
+    sender resolve to the same person.
+    """
+    aliases = aliases or {}
     summary = card.get("summary", "")
     # Gmail format: "Name <email>: Subject"
-    email_match = re.match(r"^(.+?)\s*<[^>]+>", summary)
+    email_match = re.match(r"^(.+?)\s*<([^>]+)>", summary)
     if email_match:
-        return email_match.group(1).strip()
+        return aliases.get(email_match.group(2).strip().lower()) or email_match.group(1).strip()
     # Slack format: "Name via #channel: text"
     slack_match = re.match(r"^(.+?)\s+via\s+", summary)
     if slack_match:
-        return slack_match.group(1).strip()
+        name = slack_match.group(1).strip()
+        return aliases.get(name.lower()) or name
     # Try proposed_actions for sender info
     actions = card.get("proposed_actions")
     if isinstance(actions, str):
@@ -5372,12 +6242,12 @@ def _extract_person_name(card: dict) -> str:
         for a in actions:
             sender = a.get("sender", "") or a.get("to_email", "")
             if sender:
-                name_match = re.match(r"^(.+?)\s*<", sender)
+                name_match = re.match(r"^(.+?)\s*<([^>]+)>", sender)
                 if name_match:
-                    return name_match.group(1).strip()
+                    return aliases.get(name_match.group(2).strip().lower()) or name_match.group(1).strip()
                 if "@" in sender:
-                    return sender.split("@")[0].replace(".", " ").title()
-                return sender
+                    return aliases.get(sender.strip().lower()) or sender.split("@")[0].replace(".", " ").title()
+                return aliases.get(sender.lower()) or sender
     return ""
 
 
@@ -5419,6 +6289,143 @@ def _topic_similarity(words_a: set, words_b: set) -> float:
     return len(intersection) / len(union) if union else 0.0
 
 
+RESOLVE_NEEDS_SECTIONS = ("needs-action", "action-needed", "needs-response", "needs_response")
+# A pending card is resolved with the responded one when both scores clear these.
+RELATED_PERSON_THRESHOLD = 0.8
+RELATED_TOPIC_THRESHOLD = 0.3
+
+
+def _sync_card_terms(conn) -> int:
+    """(Re)index the cards queued by the ``cards_terms_*`` triggers.
+
+    Runs on the ingest writer after every poller message, so resolve requests
+    normally find the queue empty. Writes are left for the caller to commit.
+    """
+    rows = conn.execute(
+        """SELECT q.card_id, c.id, c.summary, c.context_notes, c.proposed_actions
+           FROM card_terms_queue q
+           LEFT JOIN cards c ON c.id = q.card_id"""
+    ).fetchall()
+    if not rows:
+        return 0
+    aliases = slack_directory.alias_map(conn)
+    for row in rows:
+        card_id = row["card_id"]
+        conn.execute("DELETE FROM card_terms WHERE card_id = ?", [card_id])
+        conn.execute("DELETE FROM card_persons WHERE card_id = ?", [card_id])
+        if row["id"] is not None:
+            card = dict(row)
+            person = _extract_person_name(card, aliases)
+            terms = [("topic", word) for word in _extract_topic_words(card)]
+            conn.execute("INSERT INTO card_persons (card_id, person) VALUES (?, ?)", [card_id, person])
+            conn.executemany(
+                "INSERT OR IGNORE INTO card_terms (kind, term, card_id) VALUES (?, ?, ?)",
+                [(kind, term, card_id) for kind, term in terms],
+            )
+        conn.execute("DELETE FROM card_terms_queue WHERE card_id = ?", [card_id])
+    return len(rows)
+
+
+def _drain_card_terms_queue():
+    """Index whatever cards were queued while the dashboard was not running."""
+    conn = get_db()
+    try:
+        _sync_card_terms(conn)
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass
+    finally:
+        conn.close()
+
+
+def _related_card_candidates(conn, topics: set, exclude_source: str):
+    """Pending needs-action cards that could reach the topic threshold with the source.
+
+    A Jaccard score of ``RELATED_TOPIC_THRESHOLD`` over the source's ``n``
+    words needs at least ``needed = ceil(threshold * n)`` of them shared, so
+    any such card shares one of the ``n - needed + 1`` rarest words. Only
+    those are looked up in ``card_terms``: the common words that would pull
+    in a large share of the backlog are skipped and nothing scoring is lost.
+    Person names are not prefiltered because fuzzy matches ("kim" /
+    "kimberly lee", "jonathan" / "jonathon") need not share a token;
+    ``_person_similarity`` scores the shortlist against ``card_persons``.
+    Returns ``(rows, topics_by_card_id)``.
+    """
+    if not topics:
+        return [], {}
+    term_marks = ",".join("?" for _ in topics)
+    frequency = dict(conn.execute(
+        f"SELECT term, COUNT(*) FROM card_terms WHERE kind = 'topic' AND term IN ({term_marks}) GROUP BY term",
+        sorted(topics),
+    ).fetchall())
+    needed = max(1, math.ceil(RELATED_TOPIC_THRESHOLD * len(topics) - 1e-9))
+    topic_terms = sorted(topics, key=lambda term: (frequency.get(term, 0), term))[:len(topics) - needed + 1]
+    topic_marks = ",".join("?" for _ in topic_terms)
+    section_marks = ",".join("?" for _ in RESOLVE_NEEDS_SECTIONS)
+    rows = conn.execute(
+        f"""SELECT c.*, p.person AS indexed_person
+            FROM cards c
+            JOIN card_persons p ON p.card_id = c.id
+            WHERE c.id IN (SELECT card_id FROM card_terms WHERE kind = 'topic' AND term IN ({topic_marks}))
+              AND c.source != ?
+              AND c.responded = 0
+              AND c.section IN ({section_marks})
+              AND c.status = 'pending'""",
+        [*topic_terms, exclude_source, *RESOLVE_NEEDS_SECTIONS],
+    ).fetchall()
+    if not rows:
+        return [], {}
+
+    ids = [row["id"] for row in rows]
+    id_marks = ",".join("?" for _ in ids)
+    topics_by_id = {card_id: set() for card_id in ids}
+    for row in conn.execute(
+        f"SELECT card_id, term FROM card_terms WHERE kind = 'topic' AND card_id IN ({id_marks})",
+        ids,
+    ).fetchall():
+        topics_by_id[row["card_id"]].add(row["term"])
+    return rows, topics_by_id
+
+
+def _resolve_related_for_card(conn, source_card: dict, aliases: dict):
+    """Mark pending cards from other sources matching the responded card's person + topic.
+
+    Updates are left uncommitted for the caller. Returns ``(resolved, reason)``.
+    """
+    source_name = _extract_person_name(source_card, aliases)
+    source_topics = _extract_topic_words(source_card)
+    source_source = source_card.get("source", "")
+
+    if not source_name:
+        return [], "no person name extracted"
+
+    candidates, topics_by_id = _related_card_candidates(conn, source_topics, source_source)
+    resolved = []
+    for row in candidates:
+        candidate = _row_to_card(row)
+        person_score = _person_similarity(source_name, candidate.pop("indexed_person", ""))
+        topic_score = _topic_similarity(source_topics, topics_by_id.get(candidate["id"], set()))
+
+        if person_score >= RELATED_PERSON_THRESHOLD and topic_score >= RELATED_TOPIC_THRESHOLD:
+            existing_notes = candidate.get("context_notes", "") or ""
+            new_notes = f"{existing_notes}\nAuto-resolved: responded via {source_source}".strip()
+            conn.execute(
+                """UPDATE cards
+                   SET responded = 1, section = 'no-action', classification = 'responded',
+                       context_notes = ?
+                   WHERE id = ?""",
+                [new_notes, candidate["id"]],
+            )
+            resolved.append({
+                "id": candidate["id"],
+                "source": candidate.get("source"),
+                "summary": candidate.get("summary", "")[:100],
+                "person_score": round(person_score, 2),
+                "topic_score": round(topic_score, 2),
+            })
+    return resolved, None
+
+
 @app.post("/api/cards/{card_id}/resolve-related")
 async def resolve_related_cards(card_id: int):
     """Find and auto-resolve cross-channel cards matching person + topic."""
@@ -5432,79 +6439,167 @@ async def resolve_related_cards(card_id: int):
         if not source_card.get("responded"):
             return {"resolved": 0, "cards": []}
 
-        source_name = _extract_person_name(source_card)
-        source_topics = _extract_topic_words(source_card)
-        source_source = source_card.get("source", "")
-
-        if not source_name:
-            return {"resolved": 0, "cards": [], "reason": "no person name extracted"}
-
-        needs_sections = ("needs-action", "action-needed", "needs-response", "needs_response")
-        placeholders = ",".join("?" for _ in needs_sections)
-        candidates = conn.execute(
-            f"""SELECT * FROM cards
-                WHERE source != ?
-                  AND responded = 0
-                  AND section IN ({placeholders})
-                  AND status = 'pending'""",
-            [source_source, *needs_sections],
-        ).fetchall()
+        # Catch-up for cards no poller message announced (normally none).
+        if _sync_card_terms(conn):
+            conn.commit()
+        resolved, reason = _resolve_related_for_card(conn, source_card, slack_directory.alias_map(conn))
+        if reason:
+            return {"resolved": 0, "cards": [], "reason": reason}
 
-        resolved = []
-        affected_sources = set()
+        if resolved:
+            conn.commit()
+            for src in {card.get("source", "") for card in resolved}:
+                _mark_source_stale(src)
 
-        for row in candidates:
-            candidate = _row_to_card(row)
-            cand_name = _extract_person_name(candidate)
-            cand_topics = _extract_topic_words(candidate)
+    finally:
+        conn.close()
 
-            person_score = _person_similarity(source_name, cand_name)
-            topic_score = _topic_similarity(source_topics, cand_topics)
+    return {"resolved": len(resolved), "cards": resolved}
 
-            if person_score >= 0.8 and topic_score >= 0.3:
-                existing_notes = candidate.get("context_notes", "") or ""
-                new_notes = f"{existing_notes}\nAuto-resolved: responded via {source_source}".strip()
-                conn.execute(
-                    """UPDATE cards
-                       SET responded = 1, section = 'no-action', classification = 'responded',
-                           context_notes = ?
-                       WHERE id = ?""",
-                    [new_notes, candidate["id"]],
-                )
-                resolved.append({
-                    "id": candidate["id"],
-                    "source": candidate.get("source"),
-                    "summary": candidate.get("summary", "")[:100],
-                    "person_score": round(person_score, 2),
-                    "topic_score": round(topic_score, 2),
-                })
-                affected_sources.add(candidate.get("source", ""))
 
-        if resolved:
-            conn.commit()
-            for src in affected_sources:
-                _stale_sources.add(src)
+@app.post("/api/cards/resolve-related")
+async def resolve_related_cards_batch(body: dict = Body(...)):
+    """Batch form of ``/api/cards/{id}/resolve-related`` for pollers.
 
+    Takes ``{"card_ids": [...]}``, resolves every responded card in one
+    transaction and returns the per-card results keyed by id. Unknown or
+    unresponded ids are reported as skipped rather than failing the batch.
+    """
+    conn = get_db()
+    try:
+        try:
+            results, affected_sources = _resolve_related_batch(conn, body.get("card_ids"))
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+        conn.commit()
+        if affected_sources:
+            for src in sorted(affected_sources):
+                _mark_source_stale(src)
     finally:
         conn.close()
 
-    return {"resolved": len(resolved), "cards": resolved}
+    return {
+        "resolved": sum(result["resolved"] for result in results.values()),
+        "results": {str(card_id): result for card_id, result in results.items()},
+    }
+
+
+def _resolve_related_batch(conn, raw_ids) -> tuple[dict, set]:
+    """Resolve related cards for each responded id in ``raw_ids``.
+
+    Returns ``(results by card id, affected sources)`` and leaves the writes
+    uncommitted for the caller. Raises ``ValueError`` for malformed ids.
+    """
+    if not isinstance(raw_ids, list):
+        raise ValueError("card_ids must be a list")
+    try:
+        card_ids = list(dict.fromkeys(int(card_id) for card_id in raw_ids))
+    except (TypeError, ValueError):
+        raise ValueError("card_ids must be integers")
+
+    results = {}
+    affected_sources = set()
+    rows = {}
+    for start in range(0, len(card_ids), 500):
+        chunk = card_ids[start:start + 500]
+        marks = ",".join("?" for _ in chunk)
+        for row in conn.execute(f"SELECT * FROM cards WHERE id IN ({marks})", chunk).fetchall():
+            rows[row["id"]] = row
+    _sync_card_terms(conn)
+    aliases = slack_directory.alias_map(conn)
+    for card_id in card_ids:
+        row = rows.get(card_id)
+        if row is None:
+            results[card_id] = {"resolved": 0, "cards": [], "reason": "card not found"}
+            continue
+        source_card = _row_to_card(row)
+        if not source_card.get("responded"):
+            results[card_id] = {"resolved": 0, "cards": []}
+            continue
+        resolved, reason = _resolve_related_for_card(conn, source_card, aliases)
+        results[card_id] = {"resolved": len(resolved), "cards": resolved}
+        if reason:
+            results[card_id]["reason"] = reason
+        affected_sources.update(card.get("source", "") for card in resolved)
+
+    return results, affected_sources
+
+
+# Message types the ingest channel accepts from the pollers. Each handler runs
+# on the channel's single writer and returns the sources to mark stale once
+# its writes have committed (see ingest_channel.IngestServer).
+def _ingest_invalidate(conn, payload: dict) -> dict:
+    # Pollers invalidate right after writing cards: index them while the
+    # write is fresh instead of on the next resolve request.
+    _sync_card_terms(conn)
+    return {"sources": sorted(_invalidated_sources(payload.get("source")))}
+
+
+def _ingest_resolve_related(conn, payload: dict) -> dict:
+    results, affected_sources = _resolve_related_batch(conn, payload.get("card_ids"))
+    return {
+        "sources": sorted(affected_sources),
+        "resolved": sum(result["resolved"] for result in results.values()),
+    }
+
+
+def _ingest_cards(conn, payload: dict) -> dict:
+    """Upsert a poller's card batch on ``(source, summary)``.
+
+    Each card carries ``summary`` and optionally ``timestamp``,
+    ``classification`` and ``proposed_actions``; an existing card keeps its
+    status and other user state and is queued to run again.
+    """
+    source = payload["source"]
+    if not isinstance(source, str) or not source:
+        raise ValueError("card batch needs a source")
+    rows = []
+    for card in payload["cards"]:
+        proposed = card.get("proposed_actions") or []
+        rows.append((
+            source,
+            card.get("timestamp") or datetime.now(timezone.utc).isoformat(),
+            str(card["summary"]),
+            str(card.get("classification") or "needs-response"),
+            proposed if isinstance(proposed, str) else json.dumps(proposed),
+        ))
+    conn.executemany(
+        """INSERT INTO cards
+           (source, timestamp, summary, classification, status, proposed_actions, execution_status)
+           VALUES (?, ?, ?, ?, 'pending', ?, 'not_run')
+           ON CONFLICT(source, summary) DO UPDATE SET
+               timestamp=excluded.timestamp,
+               classification=excluded.classification,
+               proposed_actions=excluded.proposed_actions,
+               execution_status='not_run'""",
+        rows,
+    )
+    _sync_card_terms(conn)
+    # New rows are only visible to the announcement once committed.
+    return {"sources": [source], "written": len(rows), "announce": True}
+
+
+INGEST_HANDLERS = {
+    "cards": _ingest_cards,
+    "invalidate": _ingest_invalidate,
+    "resolve_related": _ingest_resolve_related,
+}
+
+
+def _ingest_committed(kind: str, result: dict):
+    sources = set(result.get("sources", ()))
+    if result.get("announce"):
+        sources |= _invalidated_sources()
+    for src in sorted(sources):
+        _mark_source_stale(src)
 
 
 def _record_stat(metric, value=1, details=None):
     """Record a stat to the stats table."""
     from datetime import date
+    _ensure_schema()
     conn = get_db()
     try:
-        conn.execute(
-            """CREATE TABLE IF NOT EXISTS stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                metric TEXT NOT NULL,
-                value REAL DEFAULT 0,
-                details TEXT
-            )"""
-        )
         conn.execute(
             "INSERT INTO stats (date, metric, value, details) VALUES (?, ?, ?, ?)",
             [date.today().isoformat(), metric, value, details]
@@ -0,0 +1,265 @@
+# dashboard/slack_directory.py
+"""Persistent Slack user directory kept in inbox.db.
+
+Every Slack poll used to resolve names with one ``users.info`` call per
+unseen user, in a cache that died with the process. The directory stores
+users in the ``slack_users`` table, fills it in bulk from paginated
+``users.list`` once the last full listing is older than the TTL, and falls
+back to ``users.info`` only for users the listing did not cover (new hires,
+shared-channel guests) or whose row went stale. The Slack poller paths and
+the dashboard's person-name extraction read the same rows.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SLACK_USER_TTL_SECONDS = 24 * 3600
+# A users.info call that raised (timeout, 5xx past its retries) is not asked
+# again for this long, which is shorter than a poll interval so the next run
+# retries it.
+SLACK_USER_RETRY_SECONDS = 60
+USERS_LIST_PAGE_SIZE = 1000
+
+USER_COLUMNS = ("user_id", "name", "real_name", "display_name", "email", "is_bot", "is_app_user", "deleted")
+
+
+def _clean(value) -> str:
+    return str(value or "").strip()
+
+
+def user_row(user: dict) -> dict:
+    """Flatten a Slack user object into ``slack_users`` columns."""
+    profile = user.get("profile") or {}
+    return {
+        "user_id": _clean(user.get("id")),
+        "name": _clean(user.get("name")),
+        "real_name": _clean(profile.get("real_name") or user.get("real_name")),
+        "display_name": _clean(profile.get("display_name")),
+        "email": _clean(profile.get("email")).lower(),
+        "is_bot": 1 if user.get("is_bot") else 0,
+        "is_app_user": 1 if user.get("is_app_user") else 0,
+        "deleted": 1 if user.get("deleted") else 0,
+    }
+
+
+def user_object(row) -> dict:
+    """Rebuild the subset of the Slack user object the pollers read."""
+    row = dict(row)
+    return {
+        "id": row["user_id"],
+        "name": row["name"],
+        "is_bot": bool(row["is_bot"]),
+        "is_app_user": bool(row["is_app_user"]),
+        "deleted": bool(row["deleted"]),
+        "profile": {
+            "real_name": row["real_name"],
+            "display_name": row["display_name"],
+            "email": row["email"],
+        },
+    }
+
+
+def display_name(user: dict, fallback: str = "") -> str:
+    profile = user.get("profile") or {}
+    return profile.get("real_name") or profile.get("display_name") or user.get("name") or fallback
+
+
+_alias_lock = threading.Lock()
+_alias_cache: dict = {"key": None, "aliases": {}}
+
+
+def _build_alias_map(rows) -> dict:
+    claims = {}
+    canonical_by_id = {}
+    for user_id, name, real_name, display, email in rows:
+        canonical = real_name or display or name
+        if not canonical:
+            continue
+        canonical_by_id[user_id] = canonical
+        for alias in (name, display, email, real_name):
+            if alias:
+                claims.setdefault(alias.lower(), set()).add(user_id)
+    # A display name that is also someone else's real name (or handle) would
+    # otherwise resolve to whichever row came first and auto-link the wrong
+    # person's cards; keep only aliases a single user claims.
+    aliases = {
+        alias: canonical_by_id[next(iter(owners))] for alias, owners in claims.items() if len(owners) == 1
+    }
+    for user_id, canonical in canonical_by_id.items():
+        aliases[user_id.lower()] = canonical
+    return aliases
+
+
+def alias_map(conn) -> dict:
+    """Lowercased user id, email, handle and display name -> real name.
+
+    Aliases shared by more than one user are dropped. The map is rebuilt only
+    when ``slack_users`` changes: every write upserts ``fetched_at`` to the
+    current time and rows are never deleted, so the row count and the newest
+    ``fetched_at`` identify a version. Callers must not mutate the result.
+    """
+    try:
+        database = next((row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main"), "")
+        count, newest = conn.execute("SELECT COUNT(*), MAX(fetched_at) FROM slack_users").fetchone()
+    except sqlite3.OperationalError:
+        return {}
+    key = (database, count, newest)
+    with _alias_lock:
+        if database and _alias_cache["key"] == key:
+            return _alias_cache["aliases"]
+    rows = conn.execute(
+        "SELECT user_id, name, real_name, display_name, email FROM slack_users WHERE deleted = 0"
+    ).fetchall()
+    aliases = _build_alias_map(rows)
+    with _alias_lock:
+        _alias_cache["key"] = key
+        _alias_cache["aliases"] = aliases
+    return aliases
+
+
+class SlackUserDirectory:
+    """Thread-safe read-through view of ``slack_users``.
+
+    ``fetch_page(cursor)`` returns one ``users.list`` payload and
+    ``fetch_user(user_id)`` one ``users.info`` user; either may be None for a
+    read-only directory. ``fetch_user`` returns an empty user when Slack says
+    the user does not exist, which is remembered for ``ttl_seconds``, and
+    raises on a transient failure, which is retried after ``retry_seconds``.
+    """
+
+    def __init__(self, db_path, fetch_page=None, fetch_user=None, ttl_seconds=SLACK_USER_TTL_SECONDS, team_id="",
+                 retry_seconds=SLACK_USER_RETRY_SECONDS):
+        self.db_path = Path(db_path)
+        self.fetch_page = fetch_page
+        self.fetch_user = fetch_user
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.team_id = team_id or ""
+        self._users = {}
+        self._fetched_at = {}
+        self._unresolvable = {}  # user_id -> time before which users.info is not asked again
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stats = {"hits": 0, "fetched": 0, "listed": 0, "list_pages": 0}
+        self._load()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _load(self):
+        if not self.db_path.exists():
+            return
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"SELECT {', '.join(USER_COLUMNS)}, fetched_at FROM slack_users").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+        for row in rows:
+            self._users[row["user_id"]] = user_object(row)
+            self._fetched_at[row["user_id"]] = row["fetched_at"] or 0.0
+
+    def _store(self, users, listed_at=None):
+        now = time.time()
+        rows = [user_row(user) for user in users if user.get("id")]
+        with self._write_lock:
+            if self.db_path.exists():
+                self._persist(rows, now, listed_at)
+        with self._lock:
+            for row in rows:
+                self._users[row["user_id"]] = user_object(row)
+                self._fetched_at[row["user_id"]] = now
+
+    def _persist(self, rows, fetched_at, listed_at):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    f"""INSERT INTO slack_users ({', '.join(USER_COLUMNS)}, fetched_at)
+                        VALUES ({', '.join('?' for _ in USER_COLUMNS)}, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            {', '.join(f'{col} = excluded.{col}' for col in USER_COLUMNS[1:])},
+                            fetched_at = excluded.fetched_at""",
+                    [tuple(row[col] for col in USER_COLUMNS) + (fetched_at,) for row in rows],
+                )
+                if listed_at is not None:
+                    conn.execute(
+                        """INSERT INTO slack_user_syncs (team_id, listed_at) VALUES (?, ?)
+                           ON CONFLICT(team_id) DO UPDATE SET listed_at = excluded.listed_at""",
+                        (self.team_id, listed_at),
+                    )
+        except sqlite3.OperationalError as e:
+            # Schema not migrated yet: the rows still serve this process.
+            print(f"Slack user directory not persisted: {e}")
+        finally:
+            conn.close()
+
+    def listed_at(self) -> float:
+        if not self.db_path.exists():
+            return 0.0
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT listed_at FROM slack_user_syncs WHERE team_id = ?", (self.team_id,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        finally:
+            conn.close()
+        return float(row["listed_at"]) if row else 0.0
+
+    def refresh(self, force=False) -> int:
+        """Re-list the workspace when the last full listing is past the TTL."""
+        if self.fetch_page is None:
+            return 0
+        if not force and time.time() - self.listed_at() < self.ttl_seconds:
+            return 0
+        started = time.time()
+        users = []
+        cursor = ""
+        while True:
+            payload = self.fetch_page(cursor)
+            self.stats["list_pages"] += 1
+            users.extend(payload.get("members", []))
+            cursor = (payload.get("response_metadata") or {}).get("next_cursor", "")
+            if not cursor:
+                break
+        self._store(users, listed_at=started)
+        self.stats["listed"] += len(users)
+        return len(users)
+
+    def profile(self, user_id) -> dict:
+        """The user's profile, calling ``users.info`` only when missing or stale."""
+        if not user_id:
+            return {}
+        now = time.time()
+        with self._lock:
+            user = self._users.get(user_id)
+            fresh = user is not None and now - self._fetched_at.get(user_id, 0.0) < self.ttl_seconds
+            backoff = now < self._unresolvable.get(user_id, 0.0)
+            if fresh or self.fetch_user is None or backoff:
+                self.stats["hits"] += 1
+                return user or {}
+        try:
+            fetched = self.fetch_user(user_id) or {}
+        except Exception:
+            # Transient: later lookups in this run reuse whatever is stored,
+            # a later run asks again.
+            with self._lock:
+                self._unresolvable[user_id] = now + self.retry_seconds
+            return user or {}
+        self.stats["fetched"] += 1
+        if fetched.get("id"):
+            self._store([fetched])
+            with self._lock:
+                self._unresolvable.pop(user_id, None)
+                return self._users[user_id]
+        # Slack answered that there is no such user; that holds like a row does.
+        with self._lock:
+            self._unresolvable[user_id] = now + self.ttl_seconds
+        return user or {}
+
+    def name(self, user_id) -> str:
+        return display_name(self.profile(user_id), user_id or "")
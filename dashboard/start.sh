@@ -278,10 +278,13 @@ print_status() {
 
 sync_from_skills_repo() {
   local skills_dashboard="$HOME/.claude/skills/eng-buddy/dashboard"
-  # Sync server.py if skills repo version is newer
-  if [[ -f "$skills_dashboard/server.py" ]]; then
-    cp "$skills_dashboard/server.py" "$DASHBOARD_DIR/server.py"
-  fi
+  # Sync server.py and the modules it imports if skills repo version is newer
+  local module
+  for module in server.py migrate.py db_pool.py slack_directory.py ingest_channel.py; do
+    if [[ -f "$skills_dashboard/$module" ]]; then
+      cp "$skills_dashboard/$module" "$DASHBOARD_DIR/$module"
+    fi
+  done
   # Sync React build if it exists in skills repo
   if [[ -d "$skills_dashboard/static-react" ]]; then
     rm -rf "$DASHBOARD_DIR/static-react"
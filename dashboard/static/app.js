@@ -961,7 +961,7 @@ async function loadTwoSectionView(source, options = {}) {
 
   try {
     const [inboxR, suggestionsR] = await Promise.all([
-      fetch(`/api/inbox-view?source=${source}&days=3`),
+      fetch(`/api/inbox-view?source=${source}&days=3&fields=default,analysis_metadata`),
       source === 'gmail' ? fetch('/api/filters/suggestions') : Promise.resolve(null),
     ]);
 
@@ -1053,7 +1053,7 @@ async function loadCalendarView(options = {}) {
   }
 
   try {
-    const r = await fetch('/api/cards?source=calendar');
+    const r = await fetch('/api/cards?source=calendar&fields=default,analysis_metadata');
     const data = await r.json();
 
     const upcomingConfig = getUpcomingWeekConfig();
@@ -1801,7 +1801,7 @@ async function loadJiraStatusView(options = {}) {
   try {
     const [sprintR, cardsR] = await Promise.all([
       fetch(`/api/jira/sprint?refresh=${options.forceRefresh ? 'true' : 'false'}`),
-      fetch('/api/cards?source=jira&status=all'),
+      fetch('/api/cards?source=jira&status=all&fields=default,analysis_metadata'),
     ]);
     const data = await sprintR.json();
     const cardsData = await cardsR.json();
@@ -2538,7 +2538,7 @@ async function openCardInAll(cardId) {
 // -- Counts -------------------------------------------------------------------
 
 function updateCounts() {
-  fetch('/api/cards?status=pending')
+  fetch('/api/cards?status=pending&limit=1&fields=id')
     .then(r => r.json())
     .then(data => {
       setCounts(data.counts || {});
@@ -2564,7 +2564,9 @@ async function loadQueue(source = 'all', options = {}) {
     queue.innerHTML = '<div style="color:#666;padding:40px;text-align:center;letter-spacing:4px">LOADING...</div>';
   }
 
-  const url = source === 'all' ? '/api/cards?status=all' : `/api/cards?source=${source}`;
+  const url = source === 'all'
+    ? '/api/cards?status=all&fields=default,analysis_metadata'
+    : `/api/cards?source=${source}&fields=default,analysis_metadata`;
   try {
     const r = await fetch(url);
     const data = await r.json();
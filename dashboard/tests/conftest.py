@@ -1,6 +1,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add dashboard/ to path (for server.py and related modules)
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -8,3 +10,28 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 _planner_path = str(Path(__file__).parent.parent.parent / "bin" / "planner")
 if _planner_path not in sys.path:
     sys.path.insert(0, _planner_path)
+
+
+@pytest.fixture(autouse=True)
+def _ingest_channel_in_tmp(tmp_path, monkeypatch):
+    """Keep poller notifications in the test's tmp dir instead of ~/.claude."""
+    import ingest_channel
+
+    monkeypatch.setattr(ingest_channel, "SOCKET_PATH", tmp_path / "ingest.sock")
+    monkeypatch.setattr(ingest_channel, "SPOOL_DIR", tmp_path / "ingest-spool")
+    runtime = sys.modules.get("poller_runtime")
+    if runtime is not None:
+        monkeypatch.setattr(runtime, "_ingest_client", None)
+
+
+@pytest.fixture
+def async_llm():
+    """Wrap a sync fake LLM runner so it can stand in for ``_run_claude_print_async``."""
+
+    def wrap(fake):
+        async def runner(prompt, timeout=60):
+            return fake(prompt, timeout=timeout)
+
+        return runner
+
+    return wrap
@@ -0,0 +1,126 @@
+"""Local HTTP stand-in for the Freshservice ticket endpoints the poller uses.
+
+Serves ``/api/v2/tickets`` (``updated_since``, no ``total``) and
+``/api/v2/tickets/filter`` (with ``total``) from an in-memory ticket table.
+Tickets without a ``workspace_id`` query live in workspace 1. Every request
+is recorded in ``requests`` as ``(path, query)``; ``throttle`` answers the
+next requests with 429 and a ``Retry-After``.
+"""
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FreshserviceStandIn:
+    def __init__(self):
+        self.tickets = {}
+        self.requests = []
+        self.throttled = 0
+        self.retry_after = "1"
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -- tickets -------------------------------------------------------------
+
+    def put_ticket(self, ticket_id, updated_at, workspace_id=1, **fields):
+        with self._lock:
+            ticket = self.tickets.setdefault(ticket_id, {
+                "id": ticket_id,
+                "subject": f"Ticket {ticket_id}",
+                "type": "Incident",
+                "status": 2,
+                "priority": 2,
+                "workspace_id": workspace_id,
+            })
+            ticket.update(fields, updated_at=updated_at, workspace_id=workspace_id)
+            return ticket
+
+    def delete_ticket(self, ticket_id):
+        with self._lock:
+            self.tickets.pop(ticket_id, None)
+
+    def throttle(self, times=1, retry_after="1"):
+        with self._lock:
+            self.throttled = times
+            self.retry_after = retry_after
+
+    def calls(self, path):
+        return [query for request_path, query in self.requests if request_path == path]
+
+    # -- server --------------------------------------------------------------
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urllib.parse.urlsplit(self.path)
+                query = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+                with standin._lock:
+                    standin.requests.append((parsed.path, query))
+                    if standin.throttled:
+                        standin.throttled -= 1
+                        return self._reply(429, {"message": "rate limited"}, {"Retry-After": standin.retry_after})
+                    status, body = standin.handle_get(parsed.path, query)
+                self._reply(status, body)
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -- endpoints -----------------------------------------------------------
+
+    def handle_get(self, path, query):
+        workspace_id = int(query.get("workspace_id", 1))
+        tickets = [t for t in self.tickets.values() if t["workspace_id"] == workspace_id]
+        if path == "/api/v2/tickets":
+            since = query.get("updated_since", "")
+            tickets = [t for t in tickets if t["updated_at"] >= since]
+            return 200, {"tickets": self._page(tickets, query)}
+        if path == "/api/v2/tickets/filter":
+            tickets = [t for t in tickets if self._matches(t, query["query"].strip('"'))]
+            return 200, {"tickets": self._page(tickets, query), "total": len(tickets)}
+        return 404, {"message": "not found"}
+
+    @staticmethod
+    def _page(tickets, query):
+        # Newest first, as Freshservice lists them.
+        tickets = sorted(tickets, key=lambda t: t["id"], reverse=True)
+        size = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        return tickets[(page - 1) * size:page * size]
+
+    @staticmethod
+    def _matches(ticket, filter_query):
+        """``field:value`` terms are ANDed, except ``status`` terms, which are ORed."""
+        statuses = set()
+        for field, value in re.findall(r"(\w+):(\d+)", filter_query):
+            if field == "status":
+                statuses.add(int(value))
+            elif ticket.get("responder_id" if field == "agent_id" else field) != int(value):
+                return False
+        return not statuses or ticket["status"] in statuses
@@ -0,0 +1,236 @@
+"""Local HTTP stand-in for the slice of the Gmail API the poller uses.
+
+Serves ``profile``, ``messages`` (list/get), ``history`` and ``threads/{id}``
+from an in-memory mailbox so the poller can run end to end offline, plus the
+multipart ``/batch/gmail/v1`` endpoint for ``messages.get``. Every request is
+recorded in ``requests`` as ``(method, path, query)``; sub-requests of a batch
+are recorded with method ``"BATCH"`` after the batch's own ``("POST",
+"batch", {})`` entry.
+"""
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "/gmail/v1/users/me"
+BATCH_PATH = "/batch/gmail/v1"
+
+
+class GmailStandIn:
+    def __init__(self, history_page_size=2):
+        self.messages = {}
+        self.history = []  # (history_id, message_id), ascending
+        self.history_id = 1000
+        self.oldest_history_id = 0
+        self.history_page_size = history_page_size
+        self.requests = []
+        self.failures = {}  # request path -> [status, remaining count or None]
+        self.rejected_tokens = set()
+        self._lock = threading.Lock()
+        self._server = None
+
+    # -- mailbox -------------------------------------------------------------
+
+    def add_message(self, msg_id, thread_id=None, sender="Ann <ann@example.com>", subject="Hello",
+                    internal_ms=1_700_000_000_000, labels=("INBOX",), snippet=""):
+        with self._lock:
+            self.history_id += 1
+            self.messages[msg_id] = {
+                "id": msg_id,
+                "threadId": thread_id or msg_id,
+                "labelIds": list(labels),
+                "snippet": snippet or f"snippet {msg_id}",
+                "internalDate": str(internal_ms),
+                "historyId": str(self.history_id),
+                "payload": {"headers": [
+                    {"name": "From", "value": sender},
+                    {"name": "To", "value": "me@example.com"},
+                    {"name": "Subject", "value": subject},
+                ]},
+            }
+            self.history.append((self.history_id, msg_id))
+            return self.history_id
+
+    def expire_history(self):
+        """Make every historyId issued so far too old for history.list."""
+        with self._lock:
+            self.oldest_history_id = self.history_id + 1
+
+    def fail_message(self, msg_id, status, times=1):
+        """Answer ``messages/{msg_id}`` with ``status`` for the next ``times``
+        requests, batched or not; ``times=None`` fails until cleared."""
+        with self._lock:
+            self.failures[f"messages/{msg_id}"] = [status, times]
+
+    def fail_thread(self, thread_id, status, times=1):
+        """Answer ``threads/{thread_id}`` with ``status``, like fail_message."""
+        with self._lock:
+            self.failures[f"threads/{thread_id}"] = [status, times]
+
+    def clear_failures(self):
+        with self._lock:
+            self.failures.clear()
+
+    def calls(self, path_prefix):
+        return [entry for entry in self.requests if entry[1].startswith(path_prefix)]
+
+    # -- server --------------------------------------------------------------
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{PREFIX}"
+
+    def __enter__(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path, query = standin.split_path(self.path)
+                standin.requests.append(("GET", path, query))
+                if not standin.authorized(self.headers):
+                    return self._reply(401, {"error": {"code": 401}})
+                status, body = standin.handle_get(path, query)
+                self._reply(status, body)
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if urllib.parse.urlsplit(self.path).path != BATCH_PATH:
+                    return self._reply(404, {"error": {"code": 404}})
+                standin.requests.append(("POST", "batch", {}))
+                if not standin.authorized(self.headers):
+                    return self._reply(401, {"error": {"code": 401}})
+                boundary = "standin_batch"
+                body = standin.handle_batch(data.decode(), self.headers.get("Content-Type", ""), boundary)
+                self._reply(200, body.encode(), f"multipart/mixed; boundary={boundary}")
+
+            def _reply(self, status, body, content_type="application/json"):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -- endpoints -----------------------------------------------------------
+
+    @staticmethod
+    def split_path(raw_path):
+        parsed = urllib.parse.urlsplit(raw_path)
+        return parsed.path[len(PREFIX):].lstrip("/"), urllib.parse.parse_qs(parsed.query)
+
+    def authorized(self, headers):
+        token = (headers.get("Authorization") or "").removeprefix("Bearer ")
+        return token not in self.rejected_tokens
+
+    def handle_batch(self, data, content_type, boundary):
+        """Run each ``GET`` part and wrap the answers as a multipart response."""
+        request_boundary = re.search(r"boundary=([^;\s]+)", content_type).group(1)
+        out = []
+        for chunk in data.split(f"--{request_boundary}")[1:]:
+            if chunk.startswith("--"):
+                break
+            part_headers, _, request = chunk.strip("\r\n").partition("\r\n\r\n")
+            content_id = re.search(r"Content-ID:\s*<([^>]+)>", part_headers).group(1)
+            _method, target = request.splitlines()[0].split()[:2]
+            path, query = self.split_path(target)
+            self.requests.append(("BATCH", path, query))
+            status, body = self.handle_get(path, query)
+            out.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n"
+                "\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                "\r\n"
+                f"{json.dumps(body)}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return "".join(out)
+
+    def _injected_failure(self, path):
+        failure = self.failures.get(path)
+        if not failure:
+            return None
+        status, remaining = failure
+        if remaining is not None:
+            failure[1] -= 1
+            if failure[1] <= 0:
+                del self.failures[path]
+        return status
+
+    def handle_get(self, path, query):
+        with self._lock:
+            if path == "profile":
+                return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+            if path == "messages":
+                return 200, self._list_messages(query)
+            if path.startswith("messages/"):
+                msg_id = path.split("/", 1)[1]
+                status = self._injected_failure(path)
+                if status:
+                    return status, {"error": {"code": status}}
+                message = self.messages.get(msg_id)
+                return (200, message) if message else (404, {"error": {"code": 404}})
+            if path == "history":
+                return self._list_history(query)
+            if path.startswith("threads/"):
+                thread_id = path.split("/", 1)[1]
+                status = self._injected_failure(path)
+                if status:
+                    return status, {"error": {"code": status}}
+                messages = [m for m in self.messages.values() if m["threadId"] == thread_id]
+                if not messages:
+                    return 404, {"error": {"code": 404}}
+                history_id = max(int(m["historyId"]) for m in messages)
+                return 200, {"id": thread_id, "historyId": str(history_id), "messages": messages}
+        return 404, {"error": {"code": 404}}
+
+    def _list_messages(self, query):
+        inbox = [m for m in self.messages.values() if "INBOX" in m["labelIds"]]
+        inbox.sort(key=lambda m: int(m["internalDate"]), reverse=True)
+        size = int(query.get("maxResults", ["100"])[0])
+        offset = int(query.get("pageToken", ["0"])[0])
+        page = inbox[offset:offset + size]
+        body = {"messages": [{"id": m["id"], "threadId": m["threadId"]} for m in page]}
+        if offset + size < len(inbox):
+            body["nextPageToken"] = str(offset + size)
+        return body
+
+    def _list_history(self, query):
+        start = int(query["startHistoryId"][0])
+        if start < self.oldest_history_id:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        records = [(hid, msg_id) for hid, msg_id in self.history if hid > start]
+        offset = int(query.get("pageToken", ["0"])[0])
+        page = records[offset:offset + self.history_page_size]
+        body = {
+            "historyId": str(self.history_id),
+            "history": [
+                {
+                    "id": str(hid),
+                    "messagesAdded": [{"message": {
+                        "id": msg_id,
+                        "threadId": self.messages[msg_id]["threadId"],
+                        "labelIds": self.messages[msg_id]["labelIds"],
+                    }}],
+                }
+                for hid, msg_id in page
+            ],
+        }
+        if offset + self.history_page_size < len(records):
+            body["nextPageToken"] = str(offset + self.history_page_size)
+        return 200, body
@@ -1,10 +1,15 @@
 import importlib.util
+import sqlite3
+import sys
 from datetime import date
 from pathlib import Path
 
 
 def _load_calendar_poller():
-    module_path = Path(__file__).resolve().parents[2] / "bin" / "calendar-poller.py"
+    bin_dir = Path(__file__).resolve().parents[2] / "bin"
+    if str(bin_dir) not in sys.path:
+        sys.path.insert(0, str(bin_dir))
+    module_path = bin_dir / "calendar-poller.py"
     spec = importlib.util.spec_from_file_location("calendar_poller", module_path)
     module = importlib.util.module_from_spec(spec)
     assert spec.loader is not None
@@ -40,31 +45,116 @@ def test_format_event_summary_uses_readable_start_label():
     assert summary == "Mon 03/09 14:30 — Planning Review"
 
 
-def test_fetch_events_fans_out_by_day_and_dedupes(monkeypatch):
+def test_fetch_events_lists_the_window_once_then_syncs_incrementally(monkeypatch):
     module = _load_calendar_poller()
-    requested_dates = []
-    responses = {
-        date(2026, 3, 9): [
-            {"id": "evt-1", "summary": "Sprint Planning", "start": "2026-03-09T07:30:00-07:00", "end": "2026-03-09T08:00:00-07:00"},
-        ],
-        date(2026, 3, 10): [
-            {"id": "evt-1", "summary": "Sprint Planning", "start": "2026-03-09T07:30:00-07:00", "end": "2026-03-09T08:00:00-07:00"},
-            {"id": "evt-2", "summary": "Weekly Sync", "start": "2026-03-10T11:00:00-07:00", "end": "2026-03-10T11:30:00-07:00"},
-        ],
+    calls = []
+    pages = {
+        # Full listing: one ranged call, paginated, ending in a sync token.
+        "": {"items": [_item("evt-2", "Weekly Sync", "2026-03-10T11:00:00-07:00")], "nextPageToken": "p2"},
+        "p2": {"items": [_item("evt-1", "Sprint Planning", "2026-03-09T07:30:00-07:00")], "nextSyncToken": "sync-1"},
     }
 
-    monkeypatch.setattr(module, "compute_fetch_window", lambda today=None: (date(2026, 3, 9), date(2026, 3, 11)))
-
-    def fake_fetch(target_date):
-        requested_dates.append(target_date)
-        return responses.get(target_date, [])
-
-    monkeypatch.setattr(module, "_fetch_events_for_date", fake_fetch)
-
-    events = module.fetch_events()
-
-    assert requested_dates == [date(2026, 3, 9), date(2026, 3, 10), date(2026, 3, 11)]
-    assert events == [
-        {"id": "evt-1", "summary": "Sprint Planning", "start": "2026-03-09T07:30:00-07:00", "end": "2026-03-09T08:00:00-07:00"},
-        {"id": "evt-2", "summary": "Weekly Sync", "start": "2026-03-10T11:00:00-07:00", "end": "2026-03-10T11:30:00-07:00"},
-    ]
+    def fake_get(path, params):
+        calls.append(dict(params))
+        if "syncToken" in params:
+            if params["syncToken"] == "gone":
+                raise module.urllib.error.HTTPError(path, 410, "Gone", {}, None)
+            return {
+                "items": [
+                    {"id": "evt-1", "status": "cancelled"},
+                    _item("evt-3", "Retro", "2026-03-11T15:00:00-07:00"),
+                    _item("evt-9", "Next month", "2026-04-20T15:00:00-07:00"),
+                ],
+                "nextSyncToken": "sync-2",
+            }
+        return pages[params.get("pageToken", "")]
+
+    monkeypatch.setattr(module, "_calendar_get", fake_get)
+    state = {}
+    events, removed, mode = module.fetch_events(state, today=date(2026, 3, 9))
+
+    assert mode == "full"
+    assert [event["id"] for event in events] == ["evt-1", "evt-2"]
+    assert removed == []
+    assert calls[0]["timeMin"] == "2026-03-09T00:00:00Z"
+    assert calls[0]["timeMax"] == "2026-03-16T00:00:00Z"
+    assert len(calls) == 2
+    assert state == {"sync_token": "sync-1", "window": ["2026-03-09", "2026-03-15"]}
+
+    calls.clear()
+    events, removed, mode = module.fetch_events(state, today=date(2026, 3, 9))
+    assert mode == "incremental"
+    assert calls == [{"syncToken": "sync-1", "singleEvents": "true", "maxResults": "250"}]
+    assert [event["id"] for event in events] == ["evt-3"]
+    assert removed == ["evt-1", "evt-9"]
+    assert state["sync_token"] == "sync-2"
+
+    # An expired token or a new window falls back to the ranged listing.
+    state["sync_token"] = "gone"
+    _events, _removed, mode = module.fetch_events(state, today=date(2026, 3, 9))
+    assert mode == "full"
+    _events, _removed, mode = module.fetch_events(state, today=date(2026, 3, 10))
+    assert mode == "full"
+    assert state["window"] == ["2026-03-10", "2026-03-15"]
+
+
+def test_write_to_db_updates_cards_in_place(monkeypatch, tmp_path):
+    module = _load_calendar_poller()
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    planning = module._normalize_event(_item("evt-1", "Sprint Planning", "2026-03-09T07:30:00-07:00"))
+    sync = module._normalize_event(_item("evt-2", "Weekly Sync", "2026-03-10T11:00:00-07:00"))
+    lunch = module._normalize_event(_item("evt-3", "Lunch", "2026-03-10T12:00:00-07:00"))
+
+    assert module.write_to_db([planning, sync, lunch]) == {"inserted": 3, "updated": 0, "deleted": 0, "unchanged": 0}
+    conn = sqlite3.connect(db_path)
+    ids = dict(conn.execute("SELECT message_id, id FROM cards WHERE source = 'calendar'").fetchall())
+    conn.execute("UPDATE cards SET status = 'held' WHERE id = ?", (ids["evt-2"],))
+    conn.commit()
+
+    moved = module._normalize_event(_item("evt-2", "Weekly Sync", "2026-03-10T13:00:00-07:00"))
+    assert module.write_to_db([planning, moved]) == {"inserted": 0, "updated": 1, "deleted": 1, "unchanged": 1}
+    rows = conn.execute(
+        "SELECT message_id, id, status, summary FROM cards WHERE source = 'calendar' ORDER BY message_id"
+    ).fetchall()
+    assert [(row[0], row[1]) for row in rows] == [("evt-1", ids["evt-1"]), ("evt-2", ids["evt-2"])]
+    assert rows[1][2:] == ("held", "Tue 03/10 13:00 — Weekly Sync")
+
+    # Incremental writes only touch what the delta names.
+    assert module.write_to_db([], removed_ids=["evt-1"], full=False)["deleted"] == 1
+    assert [row[0] for row in conn.execute("SELECT message_id FROM cards WHERE source = 'calendar'")] == ["evt-2"]
+    conn.close()
+
+
+
+def test_write_to_db_disambiguates_events_that_share_a_summary(monkeypatch, tmp_path):
+    module = _load_calendar_poller()
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    standup = module._normalize_event(_item("evt-aaaaaa", "Standup", "2026-03-10T09:00:00-07:00"))
+    twin = module._normalize_event(_item("evt-bbbbbb", "Standup", "2026-03-10T09:00:00-07:00"))
+    retro = module._normalize_event(_item("evt-cccccc", "Retro", "2026-03-10T15:00:00-07:00"))
+
+    assert module.write_to_db([standup, twin, retro]) == {"inserted": 3, "updated": 0, "deleted": 0, "unchanged": 0}
+    conn = sqlite3.connect(db_path)
+    summaries = dict(conn.execute("SELECT message_id, summary FROM cards WHERE source = 'calendar'").fetchall())
+    assert summaries["evt-aaaaaa"] == "Tue 03/10 09:00 — Standup"
+    assert summaries["evt-bbbbbb"] == "Tue 03/10 09:00 — Standup [bbbbbb]"
+
+    # The disambiguated card is stable on the next sync.
+    assert module.write_to_db([standup, twin, retro])["unchanged"] == 3
+
+    # Two events swapping slots: both rows are written, neither is dropped.
+    swapped_standup = module._normalize_event(_item("evt-aaaaaa", "Retro", "2026-03-10T15:00:00-07:00"))
+    swapped_retro = module._normalize_event(_item("evt-cccccc", "Standup", "2026-03-10T09:00:00-07:00"))
+    counts = module.write_to_db([swapped_standup, twin, swapped_retro])
+    assert counts["updated"] == 2
+    summaries = dict(conn.execute("SELECT message_id, summary FROM cards WHERE source = 'calendar'").fetchall())
+    assert summaries["evt-aaaaaa"] == "Tue 03/10 15:00 — Retro [aaaaaa]"
+    assert summaries["evt-cccccc"] == "Tue 03/10 09:00 — Standup"
+    conn.close()
+
+def _item(event_id, summary, start):
+    return {"id": event_id, "status": "confirmed", "summary": summary, "start": {"dateTime": start}, "end": {"dateTime": start}}
@@ -0,0 +1,68 @@
+import sqlite3
+
+import db_pool
+
+
+def test_pool_applies_pragmas_once_and_reuses_connections(tmp_path):
+    pool = db_pool.ConnectionPool()
+    db_path = tmp_path / "inbox.db"
+
+    conn = pool.acquire(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+    assert conn.row_factory is sqlite3.Row
+    conn.close()
+
+    again = pool.acquire(db_path)
+    assert again is conn
+    again.close()
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == {str(db_path): 1}
+    pool.close_all()
+
+
+def test_pool_rolls_back_uncommitted_work_and_ignores_double_close(tmp_path):
+    pool = db_pool.ConnectionPool()
+    db_path = tmp_path / "inbox.db"
+
+    conn = pool.acquire(db_path)
+    conn.execute("CREATE TABLE cards (id INTEGER PRIMARY KEY, summary TEXT)")
+    conn.commit()
+    conn.execute("INSERT INTO cards (summary) VALUES ('never committed')")
+    conn.row_factory = None
+    conn.close()
+    conn.close()
+
+    reused = pool.acquire(db_path)
+    assert reused.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 0
+    assert reused.row_factory is sqlite3.Row
+    other = pool.acquire(db_path)
+    assert other is not reused
+    reused.close()
+    other.close()
+
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == {str(db_path): 2}
+    pool.close_all()
+
+
+def test_pool_keys_connections_by_database_path(tmp_path):
+    pool = db_pool.ConnectionPool(max_idle=1)
+    first = pool.acquire(tmp_path / "a.db")
+    second = pool.acquire(tmp_path / "b.db")
+    third = pool.acquire(tmp_path / "a.db")
+    for conn in (first, second, third):
+        conn.close()
+
+    stats = pool.stats()
+    assert stats["created"] == 3
+    assert stats["discarded"] == 1
+    assert stats["idle"] == {str(tmp_path / "a.db"): 1, str(tmp_path / "b.db"): 1}
+    pool.close_all()
+    assert pool.stats()["idle"] == {}
@@ -2,10 +2,10 @@ import sqlite3
 import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from server import DB_PATH, get_db, _ensure_audit_schema
+from server import DB_PATH, get_db, _ensure_schema
 
 # Trigger migration on import
-_ensure_audit_schema()
+_ensure_schema()
 
 def test_enrichment_status_column_exists():
     """After migration, cards table should have enrichment_status column."""
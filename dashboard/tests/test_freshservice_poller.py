@@ -0,0 +1,143 @@
+import contextlib
+import importlib.util
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from freshservice_standin import FreshserviceStandIn
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+AGENT, GROUP = 101, 202
+
+
+def _load_freshservice_poller():
+    if str(BIN_DIR) not in sys.path:
+        sys.path.insert(0, str(BIN_DIR))
+    spec = importlib.util.spec_from_file_location("freshservice_poller", BIN_DIR / "freshservice-poller.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _offline_poller(monkeypatch, tmp_path, standin):
+    module = _load_freshservice_poller()
+    monkeypatch.setattr(module, "FRESHSERVICE_BASE", standin.base_url)
+    monkeypatch.setattr(module, "API_KEY", "key")
+    monkeypatch.setattr(module, "AGENT_ID", AGENT)
+    monkeypatch.setattr(module, "GROUP_ID", GROUP)
+    monkeypatch.setattr(module, "DB_PATH", tmp_path / "inbox.db")
+    monkeypatch.setattr(module, "STATE_FILE", tmp_path / "freshservice-ingestor-state.json")
+    monkeypatch.setattr(module, "HEALTH_FILE", tmp_path / "health" / "freshservice.json")
+    monkeypatch.setattr(module, "single_instance", lambda name: contextlib.nullcontext())
+    invalidations = []
+    monkeypatch.setattr(module, "invalidate_dashboard_cache", lambda: invalidations.append(1))
+    monkeypatch.setattr(module, "_rate_limiter", module.FreshserviceRateLimiter(rate_per_minute=6000, burst=50))
+    module.invalidations = invalidations
+    return module
+
+
+def _cards(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute(
+            "SELECT json_extract(analysis_metadata, '$.ticket_id'), id FROM cards WHERE source = 'freshservice'"
+        ).fetchall())
+    finally:
+        conn.close()
+
+
+def _runs(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM poller_runs WHERE source = 'freshservice' ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_delta_sync_advances_watermark_and_detects_deletions(monkeypatch, tmp_path):
+    with FreshserviceStandIn() as standin:
+        for ticket_id in range(1, 71):
+            standin.put_ticket(ticket_id, "2026-03-01T00:00:00Z", responder_id=AGENT)
+        for ticket_id in range(100, 105):
+            standin.put_ticket(ticket_id, "2026-03-01T00:00:00Z", workspace_id=2, group_id=GROUP)
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+
+        module.main()
+        cards = _cards(module.DB_PATH)
+        assert len(cards) == 75
+        # 70 tickets at 30 per page: page 1, then pages 2-3 concurrently.
+        assert sorted(query["page"] for query in standin.calls("/api/v2/tickets/filter")) == ["1", "1", "2", "3"]
+        state = json.loads(module.STATE_FILE.read_text())
+        first_watermark = state["updated_since"]
+        (run,) = _runs(module.DB_PATH)
+        assert run["status"] == "ok" and run["error_class"] is None
+        assert json.loads(run["api_calls"]) == {"/api/v2/tickets/filter": 4}
+        assert set(json.loads(run["phases_ms"])) == {"fetch", "db_write"}
+        assert (run["items_fetched"], run["items_written"], run["items_skipped"]) == (75, 75, 0)
+
+        # Nothing changed: the delta returns nothing and no row is touched.
+        standin.requests.clear()
+        module.invalidations.clear()
+        module.main()
+        assert standin.calls("/api/v2/tickets/filter") == []
+        assert [query["updated_since"] for query in standin.calls("/api/v2/tickets")] == [first_watermark] * 2
+        assert module.invalidations == []
+        assert json.loads(_runs(module.DB_PATH)[-1]["api_calls"]) == {"/api/v2/tickets": 2}
+
+        # One edit, one ticket resolved (drops out of both views).
+        standin.put_ticket(5, "2030-01-01T00:00:00Z", responder_id=AGENT, subject="Printer on fire")
+        standin.put_ticket(6, "2030-01-01T00:05:00Z", responder_id=AGENT, status=4)
+        module.main()
+        after = _cards(module.DB_PATH)
+        assert 6 not in after and len(after) == 74
+        assert after[5] == cards[5]  # updated in place
+        assert {key: value for key, value in after.items() if key != 5} == {
+            key: value for key, value in cards.items() if key not in (5, 6)
+        }
+        assert json.loads(module.STATE_FILE.read_text())["updated_since"] == "2030-01-01T00:05:00Z"
+        conn = sqlite3.connect(module.DB_PATH)
+        assert conn.execute("SELECT summary FROM cards WHERE id = ?", (cards[5],)).fetchone()[0] == "#5 [Incident] Printer on fire"
+        conn.close()
+
+        # Deleted tickets never show up in a delta; the periodic full listing removes them.
+        standin.delete_ticket(7)
+        state = json.loads(module.STATE_FILE.read_text())
+        state["full_sync_at"] = time.time() - module.FULL_SYNC_INTERVAL_SECONDS
+        module.STATE_FILE.write_text(json.dumps(state))
+        module.main()
+        assert 7 not in _cards(module.DB_PATH)
+        assert len(_cards(module.DB_PATH)) == 73
+
+
+def test_throttled_pages_wait_for_retry_after(monkeypatch, tmp_path):
+    with FreshserviceStandIn() as standin:
+        for ticket_id in range(1, 4):
+            standin.put_ticket(ticket_id, "2026-03-01T00:00:00Z", responder_id=AGENT)
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        standin.throttle(times=1, retry_after="1")
+
+        started = time.monotonic()
+        module.main()
+
+        assert time.monotonic() - started >= 1.0
+        assert len(_cards(module.DB_PATH)) == 3
+        # The throttled request was retried rather than dropping view 1.
+        assert len(standin.calls("/api/v2/tickets/filter")) == 3
+        (run,) = _runs(module.DB_PATH)
+        assert run["rate_limit_waits"] == 1 and run["rate_limit_wait_ms"] >= 1000
+        assert json.loads(run["api_calls"]) == {"/api/v2/tickets/filter": 3}
+
+
+def test_failed_listing_is_recorded_as_an_errored_run(monkeypatch, tmp_path):
+    with FreshserviceStandIn() as standin:
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        monkeypatch.setattr(module, "FRESHSERVICE_BASE", standin.base_url + "/missing")
+        module.main()
+
+        (run,) = _runs(module.DB_PATH)
+        assert (run["status"], run["error_class"]) == ("error", "HTTPError")
+        assert _cards(module.DB_PATH) == {}
@@ -0,0 +1,308 @@
+import contextlib
+import importlib.util
+import json
+import sqlite3
+import sys
+import urllib.error
+from pathlib import Path
+
+import pytest
+
+from gmail_standin import GmailStandIn
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+
+
+def _load_gmail_poller():
+    if str(BIN_DIR) not in sys.path:
+        sys.path.insert(0, str(BIN_DIR))
+    spec = importlib.util.spec_from_file_location("gmail_poller", BIN_DIR / "gmail-poller.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _offline_poller(monkeypatch, tmp_path, standin, sweep=False):
+    module = _load_gmail_poller()
+    import poller_http
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    monkeypatch.setattr(module, "STATE_FILE", tmp_path / "gmail-poller-state.json")
+    monkeypatch.setattr(module, "GMAIL_BASE", standin.base_url)
+    monkeypatch.setattr(module, "get_token", lambda: "token")
+    monkeypatch.setattr(module, "single_instance", lambda name: contextlib.nullcontext())
+    monkeypatch.setattr(module, "notify", lambda **kwargs: None)
+    monkeypatch.setattr(module, "invalidate_dashboard_cache", lambda source="gmail": None)
+    # Injected 5xx failures are still retried, just without real backoff waits.
+    monkeypatch.setattr(module, "_http", poller_http.PollerHTTPClient(backoff_base=0.001))
+    if not sweep:
+        monkeypatch.setattr(module, "sweep_responded_cards", lambda token, changed_threads=None: (0, [], set()))
+    monkeypatch.setattr(sys, "argv", ["gmail-poller.py"])
+    return module
+
+
+def _card_count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM cards WHERE source = 'gmail'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_history_sync_fetches_only_new_messages_and_falls_back_when_expired(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        for index in range(60):
+            standin.add_message(f"m{index:03d}", subject=f"Burst {index}", internal_ms=1_700_000_000_000 + index)
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        monkeypatch.setattr(module, "LIST_PAGE_SIZE", 25)
+
+        module.main()
+        state = json.loads(module.STATE_FILE.read_text())
+        # More than the old 50-message cap, listed over three pages.
+        assert _card_count(module.DB_PATH) == 60
+        assert len([path for _method, path, _query in standin.requests if path == "messages"]) == 3
+        assert len(standin.calls("batch")) == 1
+        assert [entry for entry in standin.requests if entry[0] == "GET" and entry[1].startswith("messages/")] == []
+        assert state["sync_mode"] == "full"
+        assert state["history_id"] == str(standin.history_id)
+        assert "seen_msg_ids" not in state
+
+        standin.requests.clear()
+        for index in range(60, 63):
+            standin.add_message(f"m{index:03d}", subject=f"Later {index}")
+        module.main()
+        fetched = [path for _method, path, _query in standin.requests if path.startswith("messages/")]
+        assert fetched == ["messages/m060", "messages/m061", "messages/m062"]
+        assert [path for _method, path, _query in standin.requests if path == "messages"] == []
+        assert len(standin.calls("history")) == 2  # paginated
+        assert _card_count(module.DB_PATH) == 63
+        assert json.loads(module.STATE_FILE.read_text())["sync_mode"] == "history"
+
+        standin.requests.clear()
+        standin.expire_history()
+        standin.add_message("m063", subject="After expiry")
+        module.main()
+        fetched = [path for _method, path, _query in standin.requests if path.startswith("messages/")]
+        # Full listing again, but the seen table filters everything but the new one.
+        assert fetched == ["messages/m063"]
+        assert json.loads(module.STATE_FILE.read_text())["sync_mode"] == "full"
+        assert _card_count(module.DB_PATH) == 64
+
+
+def test_failed_fetch_keeps_history_id_for_retry(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        standin.add_message("m1")
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        module.main()
+        first_history_id = json.loads(module.STATE_FILE.read_text())["history_id"]
+
+        standin.add_message("m2", subject="Flaky")
+        standin.fail_message("m2", 500, times=None)
+        module.main()
+        assert json.loads(module.STATE_FILE.read_text())["history_id"] == first_history_id
+
+        standin.clear_failures()
+        module.main()
+        assert _card_count(module.DB_PATH) == 2
+        assert json.loads(module.STATE_FILE.read_text())["history_id"] == str(standin.history_id)
+
+
+def test_deleted_message_is_marked_seen_and_lets_history_id_advance(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        standin.add_message("m1")
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        module.main()
+
+        standin.add_message("gone", subject="Deleted before the fetch")
+        standin.add_message("m2")
+        standin.fail_message("gone", 404, times=None)
+        module.main()
+        assert json.loads(module.STATE_FILE.read_text())["history_id"] == str(standin.history_id)
+        assert _card_count(module.DB_PATH) == 2
+        conn = sqlite3.connect(module.DB_PATH)
+        assert "gone" in module.load_seen_ids(conn)
+        conn.close()
+
+        standin.requests.clear()
+        standin.add_message("m3")
+        module.main()
+        fetched = [path for _method, path, _query in standin.requests if path.startswith("messages/")]
+        assert fetched == ["messages/m3"]
+        assert json.loads(module.STATE_FILE.read_text())["history_id"] == str(standin.history_id)
+
+
+def test_metadata_fetches_are_batched_and_failed_parts_retried_individually(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        for index in range(150):
+            standin.add_message(f"m{index:03d}", subject=f"Burst {index}", internal_ms=1_700_000_000_000 + index)
+        module = _offline_poller(monkeypatch, tmp_path, standin)
+        tokens = iter(["fresh", "fresh"])
+        refreshes = []
+        monkeypatch.setattr(module, "get_token", lambda: refreshes.append(1) or next(tokens))
+        standin.rejected_tokens.add("stale")
+        standin.fail_message("m010", 503)
+        standin.fail_message("m120", 401)
+
+        messages, failures, gone = module.get_messages([f"m{index:03d}" for index in range(150)], "stale")
+
+        assert failures == {} and gone == set()
+        assert sorted(messages) == [f"m{index:03d}" for index in range(150)]
+        assert messages["m120"]["payload"]["headers"][2] == {"name": "Subject", "value": "Burst 120"}
+        # 100 + 50 parts; the first batch is resent once after a whole-request 401.
+        assert len(standin.calls("batch")) == 3
+        assert len([entry for entry in standin.requests if entry[0] == "BATCH"]) == 150
+        individual = [path for method, path, _query in standin.requests if method == "GET"]
+        assert individual == ["messages/m010", "messages/m120"]
+        assert len(refreshes) == 2  # once for the rejected batch, once for the 401 part
+
+        standin.fail_message("m001", 500, times=None)
+        standin.fail_message("m002", 404, times=None)
+        messages, failures, gone = module.get_messages(["m000", "m001", "m002"], "fresh")
+        assert list(messages) == ["m000"]
+        assert list(failures) == ["m001"]
+        assert gone == {"m002"}
+
+
+def test_response_sweep_checks_only_threads_i_replied_in(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        for index in range(6):
+            standin.add_message(
+                f"m{index}", thread_id=f"t{index}", sender="Boss <boss@example.com>",
+                subject=f"Can you review plan {index}?", internal_ms=1_700_000_000_000 + index * 1000,
+            )
+        module = _offline_poller(monkeypatch, tmp_path, standin, sweep=True)
+        monkeypatch.setattr(module, "USER_EMAIL", "me@example.com")
+        sweeps = []
+        real_sweep = module.sweep_responded_cards
+        monkeypatch.setattr(
+            module, "sweep_responded_cards",
+            lambda token, changed_threads=None: sweeps.append(changed_threads) or real_sweep(token, changed_threads),
+        )
+        posted = []
+        monkeypatch.setattr(module, "notify_dashboard", lambda kind, payload: posted.append((kind, payload)) or True)
+
+        conn = sqlite3.connect(module.DB_PATH)
+        module.main()
+        open_cards = conn.execute(
+            "SELECT COUNT(*) FROM cards WHERE source = 'gmail' AND responded = 0 AND section = 'action-needed'"
+        ).fetchone()[0]
+        assert open_cards == 6
+        assert sweeps == [None]  # first run is a full listing: every open card
+        assert len(standin.calls("threads/")) == 6
+
+        standin.requests.clear()
+        standin.add_message(
+            "r2", thread_id="t2", sender="Me <me@example.com>", subject="Re: plan 2",
+            internal_ms=1_800_000_000_000, labels=("SENT",),
+        )
+        module.main()
+        assert sweeps[-1] == {"t2"}
+        assert [path for _method, path, _query in standin.requests if path.startswith("threads/")] == ["threads/t2"]
+        responded = conn.execute("SELECT summary FROM cards WHERE responded = 1").fetchall()
+        assert [row[0] for row in responded] == ["Boss <boss@example.com>: Can you review plan 2?"]
+        assert len(posted) == 1 and posted[0][0] == "resolve_related" and len(posted[0][1]["card_ids"]) == 1
+
+        standin.requests.clear()
+        module.main()
+        assert sweeps[-1] == set()
+        assert standin.calls("threads/") == []
+        conn.close()
+
+
+def test_failed_sweeps_are_retried_and_open_cards_reswept_periodically(monkeypatch, tmp_path):
+    with GmailStandIn() as standin:
+        for index in range(3):
+            standin.add_message(
+                f"m{index}", thread_id=f"t{index}", sender="Boss <boss@example.com>",
+                subject=f"Can you review plan {index}?", internal_ms=1_700_000_000_000 + index * 1000,
+            )
+        module = _offline_poller(monkeypatch, tmp_path, standin, sweep=True)
+        monkeypatch.setattr(module, "USER_EMAIL", "me@example.com")
+        monkeypatch.setattr(module, "notify_dashboard", lambda kind, payload: True)
+        sweeps = []
+        real_sweep = module.sweep_responded_cards
+        monkeypatch.setattr(
+            module, "sweep_responded_cards",
+            lambda token, changed_threads=None: sweeps.append(changed_threads) or real_sweep(token, changed_threads),
+        )
+
+        def responded():
+            conn = sqlite3.connect(module.DB_PATH)
+            try:
+                return {row[0] for row in conn.execute("SELECT thread_id FROM cards WHERE responded = 1")}
+            finally:
+                conn.close()
+
+        def reply(thread_id, msg_id):
+            standin.add_message(
+                msg_id, thread_id=thread_id, sender="Me <me@example.com>", subject="Re: plan",
+                internal_ms=1_800_000_000_000, labels=("SENT",),
+            )
+
+        module.main()
+        assert sweeps == [None]
+
+        # A transient threads.get failure is carried in state, not dropped.
+        reply("t1", "r1")
+        standin.fail_thread("t1", 500, times=None)
+        module.main()
+        assert sweeps[-1] == {"t1"}
+        assert responded() == set()
+        assert json.loads(module.STATE_FILE.read_text())["sweep_pending_threads"] == ["t1"]
+
+        standin.clear_failures()
+        module.main()
+        assert sweeps[-1] == {"t1"}
+        assert responded() == {"t1"}
+        assert json.loads(module.STATE_FILE.read_text())["sweep_pending_threads"] == []
+
+        # A sweep that raises (here: the token refresh) keeps its threads too.
+        reply("t2", "r2")
+        tokens = iter(["token", urllib.error.URLError("down")])
+
+        def flaky_token():
+            value = next(tokens, "token")
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        monkeypatch.setattr(module, "get_token", flaky_token)
+        with pytest.raises(urllib.error.URLError):
+            module.main()
+        assert json.loads(module.STATE_FILE.read_text())["sweep_pending_threads"] == ["t2"]
+        module.main()
+        assert sweeps[-1] == {"t2"}
+        assert responded() == {"t1", "t2"}
+
+        # Once the last full sweep is old enough every open card is checked again,
+        # catching replies the history delta never named.
+        reply("t0", "r0")
+        state = json.loads(module.STATE_FILE.read_text())
+        state["sweep_full_at"] -= module.SWEEP_FULL_INTERVAL_SECONDS
+        state["history_id"] = str(standin.history_id)  # the delta does not mention t0
+        module.STATE_FILE.write_text(json.dumps(state))
+        module.main()
+        assert sweeps[-1] is None
+        assert responded() == {"t0", "t1", "t2"}
+
+
+def test_seen_store_evicts_by_age_and_keeps_the_newest(monkeypatch, tmp_path):
+    module = _load_gmail_poller()
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "SEEN_MAX_ROWS", 3)
+    conn = sqlite3.connect(db_path)
+
+    module.remember_seen_ids(conn, ["old"], now=0)
+    for offset, msg_id in enumerate(["a", "b", "c", "d"]):
+        module.remember_seen_ids(conn, [msg_id], now=module.SEEN_TTL_SECONDS + offset)
+    module.remember_seen_ids(conn, ["a"], now=module.SEEN_TTL_SECONDS + 10)  # first sighting wins
+
+    assert module.load_seen_ids(conn, now=module.SEEN_TTL_SECONDS + 5) == {"b", "c", "d"}
+    state = {"seen_msg_ids": ["legacy"]}
+    module.import_legacy_seen_ids(conn, state)
+    assert state == {}
+    assert "legacy" in module.load_seen_ids(conn)
+    conn.close()
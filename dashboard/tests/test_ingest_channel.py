@@ -0,0 +1,169 @@
+import asyncio
+import json
+import socket
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+import ingest_channel
+from migrate import ensure_migrated
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are capped near 100 bytes, which pytest's tmp_path can exceed.
+    with tempfile.TemporaryDirectory(prefix="eb-ingest-", dir="/tmp") as directory:
+        yield Path(directory) / "ingest.sock"
+
+
+def _channel(tmp_path, socket_path, fail=None):
+    db_path = tmp_path / "inbox.db"
+    ensure_migrated(db_path)
+    applied, committed = [], []
+
+    def record(conn, payload):
+        if fail and payload.get("n") in fail:
+            raise fail[payload["n"]]
+        conn.execute("CREATE TABLE IF NOT EXISTS seen (n INTEGER)")
+        conn.execute("INSERT INTO seen (n) VALUES (?)", [payload["n"]])
+        applied.append(payload["n"])
+        return {"n": payload["n"]}
+
+    server = ingest_channel.IngestServer(
+        {"record": record},
+        lambda: sqlite3.connect(db_path),
+        socket_path=socket_path,
+        on_commit=lambda kind, result: committed.append((kind, result)),
+    )
+    client = ingest_channel.IngestClient(socket_path=socket_path, spool_dir=tmp_path / "spool", timeout=5)
+    return server, client, db_path, applied, committed
+
+
+def test_frames_are_length_prefixed_json():
+    frame = ingest_channel.encode_frame({"id": "a", "type": "invalidate"})
+    assert frame[:4] == len(frame[4:]).to_bytes(4, "big")
+    assert json.loads(frame[4:]) == {"id": "a", "type": "invalidate"}
+
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(frame + ingest_channel.FRAME_HEADER.pack(ingest_channel.MAX_FRAME_BYTES + 1))
+        assert ingest_channel.recv_frame(right) == {"id": "a", "type": "invalidate"}
+        with pytest.raises(ingest_channel.IngestError):
+            ingest_channel.recv_frame(right)
+
+
+@pytest.mark.asyncio
+async def test_messages_spool_while_the_dashboard_is_down_and_replay_in_order(tmp_path, socket_path):
+    server, client, db_path, applied, committed = _channel(tmp_path, socket_path)
+
+    # Nothing is listening: every message stays on disk, oldest first.
+    for n in range(3):
+        assert await asyncio.to_thread(client.send, "record", {"n": n}) is False
+    assert [json.loads(path.read_text())["payload"]["n"] for path in client.pending()] == [0, 1, 2]
+
+    await server.start()
+    try:
+        # The next send flushes the backlog ahead of itself.
+        assert await asyncio.to_thread(client.send, "record", {"n": 3}) is True
+        assert applied == [0, 1, 2, 3]
+        assert client.pending() == []
+        assert committed == [("record", {"n": n}) for n in range(4)]
+
+        # An ack lost after commit: the replayed id is acknowledged, not re-applied.
+        spooled = client.spool("record", {"n": 4})
+        message = json.loads(spooled.read_text())
+        assert await asyncio.to_thread(client.flush) == 1
+        spooled.write_text(json.dumps(message))
+        assert await asyncio.to_thread(client.flush) == 1
+        assert applied == [0, 1, 2, 3, 4]
+    finally:
+        await server.close()
+
+    assert not socket_path.exists()
+    conn = sqlite3.connect(db_path)
+    assert [row[0] for row in conn.execute("SELECT n FROM seen ORDER BY rowid")] == [0, 1, 2, 3, 4]
+    assert conn.execute("SELECT COUNT(*) FROM ingest_messages WHERE type = 'record'").fetchone()[0] == 5
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_messages_are_dead_lettered_and_failures_stay_spooled(tmp_path, socket_path):
+    failures = {1: ValueError("bad payload"), 3: sqlite3.OperationalError("database is locked")}
+    server, client, _db_path, applied, committed = _channel(tmp_path, socket_path, fail=failures)
+    await server.start()
+    try:
+        assert await asyncio.to_thread(client.send, "nope", {"n": 0}) is True
+        assert await asyncio.to_thread(client.send, "record", {"n": 1}) is True
+        assert await asyncio.to_thread(client.send, "record", {"n": 2}) is True
+        assert applied == [2] and committed == [("record", {"n": 2})]
+        assert [(dead["type"], dead["dead_reason"]) for dead in client.dead_letters()] == [
+            ("nope", "rejected: unknown message type: 'nope'"),
+            ("record", "rejected: bad payload"),
+        ]
+
+        # A transient failure leaves the message, and everything behind it, for the next flush.
+        assert await asyncio.to_thread(client.send, "record", {"n": 3}) is False
+        client.spool("record", {"n": 4})
+        assert [json.loads(path.read_text())["payload"]["n"] for path in client.pending()] == [3, 4]
+        assert json.loads(client.pending()[0].read_text())["attempts"] == 1
+
+        del failures[3]
+        assert await asyncio.to_thread(client.flush) == 2
+        assert applied == [2, 3, 4] and client.pending() == []
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_a_message_that_keeps_failing_stops_blocking_the_spool(tmp_path, socket_path):
+    failures = {0: RuntimeError("handler bug")}
+    server, client, _db_path, applied, _committed = _channel(tmp_path, socket_path, fail=failures)
+    await server.start()
+    try:
+        client.spool("record", {"n": 0})
+        client.spool("record", {"n": 1})
+        for _ in range(ingest_channel.MAX_DELIVERY_ATTEMPTS - 1):
+            assert await asyncio.to_thread(client.flush) == 0
+        assert applied == [] and len(client.pending()) == 2
+
+        # The last allowed attempt dead-letters it and the rest goes through.
+        assert await asyncio.to_thread(client.flush) == 1
+        assert applied == [1] and client.pending() == []
+        (dead,) = client.dead_letters()
+        assert dead["payload"] == {"n": 0}
+        assert dead["dead_reason"] == f"failed {ingest_channel.MAX_DELIVERY_ATTEMPTS} times: RuntimeError: handler bug"
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_spool_expires_coalesces_and_is_capped(tmp_path, socket_path, monkeypatch):
+    server, client, _db_path, applied, _committed = _channel(tmp_path, socket_path)
+
+    # Older than the dedupe window: it may have been applied and forgotten.
+    stale = client.spool("record", {"n": 0})
+    message = json.loads(stale.read_text())
+    message["sent_at"] -= ingest_channel.MAX_MESSAGE_AGE_SECONDS + 1
+    stale.write_text(json.dumps(message))
+    # A run of identical invalidations while the dashboard is down.
+    for n in range(3):
+        client.spool("invalidate", {"source": "slack"})
+        client.spool("record", {"n": n + 1})
+
+    monkeypatch.setattr(ingest_channel, "MAX_SPOOL_MESSAGES", len(client.pending()))
+    with pytest.raises(ingest_channel.IngestError):
+        client.spool("record", {"n": 99})
+
+    seen = []
+    server.handlers["invalidate"] = lambda conn, payload: seen.append(len(applied)) or {}
+    await server.start()
+    try:
+        assert await asyncio.to_thread(client.flush) == 4
+    finally:
+        await server.close()
+    assert applied == [1, 2, 3]
+    # Only the newest invalidation is sent, after every record spooled before it.
+    assert seen == [2]
+    assert [(dead["payload"], dead["dead_reason"]) for dead in client.dead_letters()] == [({"n": 0}, "expired")]
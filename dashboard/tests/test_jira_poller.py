@@ -0,0 +1,159 @@
+import contextlib
+import importlib.util
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import ingest_channel
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+
+
+def _load_jira_poller():
+    if str(BIN_DIR) not in sys.path:
+        sys.path.insert(0, str(BIN_DIR))
+    spec = importlib.util.spec_from_file_location("jira_poller", BIN_DIR / "jira-poller.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _issue(index, status="In Progress", priority="High"):
+    return {
+        "key": f"ITWORK2-{index}",
+        "fields": {
+            "summary": f"Issue {index}",
+            "status": {"name": status},
+            "priority": {"name": priority},
+            "labels": ["ops"],
+            "updated": "2026-03-09T10:00:00.000+0000",
+        },
+    }
+
+
+def _fake_jira(module, monkeypatch, issues):
+    calls = []
+
+    def fake_get(path, params=None):
+        calls.append((path, dict(params or {})))
+        if path == "/rest/agile/1.0/board":
+            return {"values": [{"id": 7, "name": "Systems", "location": {"name": "ITWORK2"}}]}
+        if path == "/rest/agile/1.0/board/7/sprint":
+            return {"values": [{"id": 42, "state": "active", "name": "SYSTEMS 12", "endDate": "2026-03-20T00:00:00Z"}]}
+        start, size = int(params["startAt"]), int(params["maxResults"])
+        return {"startAt": start, "total": len(issues), "issues": issues[start:start + size]}
+
+    monkeypatch.setattr(module, "JIRA_BASE_URL", "https://jira.example.com")
+    monkeypatch.setattr(module, "JIRA_USER", "me@example.com")
+    monkeypatch.setattr(module, "JIRA_API_TOKEN", "token")
+    monkeypatch.setattr(module, "_jira_get", fake_get)
+    return calls
+
+
+def test_fetch_paginates_and_caches_board_and_sprint(monkeypatch):
+    module = _load_jira_poller()
+    monkeypatch.setattr(module, "SEARCH_PAGE_SIZE", 2)
+    calls = _fake_jira(module, monkeypatch, [_issue(index) for index in range(5)])
+    now = 1_773_000_000.0  # 2026-03-08, before the sprint ends
+    state = {}
+
+    issues = module.fetch_jira_issues(state, now)
+    assert [issue["key"] for issue in issues] == [f"ITWORK2-{index}" for index in range(5)]
+    assert issues[0]["labels"] == ["ops"]
+    searches = [params for path, params in calls if path == "/rest/api/3/search"]
+    assert [params["startAt"] for params in searches] == ["0", "2", "4"]
+    assert "updated >=" not in searches[0]["jql"]
+    assert "sprint = 42" in searches[0]["jql"]
+
+    calls.clear()
+    state["last_checked"] = "2026-03-08T19:50:00+00:00"
+    module.fetch_jira_issues(state, now)
+    assert [path for path, _params in calls if "agile" in path] == []
+    assert 'updated >= "-15m"' in calls[0][1]["jql"]
+
+    # Once the cache expires the sprint is looked up again, but not the board.
+    calls.clear()
+    module.fetch_jira_issues(state, now + module.SPRINT_CACHE_SECONDS + 1)
+    assert [path for path, _params in calls if "agile" in path] == ["/rest/agile/1.0/board/7/sprint"]
+
+
+def test_bulk_upsert_skips_unchanged_issues(monkeypatch, tmp_path):
+    module = _load_jira_poller()
+    tasks_db = module.tasks_db
+    monkeypatch.setattr(tasks_db, "DB_PATH", tmp_path / "tasks.db")
+    monkeypatch.setattr(tasks_db, "_schema_ensured", False)
+
+    def issues(done_index=None):
+        return [
+            {
+                "jira_key": f"ITWORK2-{index}",
+                "title": f"Issue {index}",
+                "jira_status": "Done" if index == done_index else "In Progress",
+                "priority": "High",
+                "metadata": {"url": ""},
+            }
+            for index in range(3)
+        ]
+
+    assert tasks_db.upsert_jira_tasks(issues()) == {"created": 3, "updated": 0, "unchanged": 0}
+    assert tasks_db.upsert_jira_tasks(issues()) == {"created": 0, "updated": 0, "unchanged": 3}
+    assert tasks_db.upsert_jira_tasks(issues(done_index=1)) == {"created": 0, "updated": 1, "unchanged": 2}
+
+    conn = sqlite3.connect(tasks_db.DB_PATH)
+    events = conn.execute("SELECT event_type, COUNT(*) FROM task_events GROUP BY event_type").fetchall()
+    assert dict(events) == {"created": 3, "updated": 1}
+    status = conn.execute("SELECT status, completed_at IS NOT NULL FROM tasks WHERE jira_key = 'ITWORK2-1'").fetchone()
+    assert status == ("completed", 1)
+    conn.close()
+
+    assert tasks_db.upsert_jira_task("ITWORK2-1", "Issue 1", "Done", "High") == tasks_db.get_task_by_jira_key("ITWORK2-1")["id"]
+
+
+def test_failed_tasks_upsert_keeps_the_last_checked_window(monkeypatch, tmp_path):
+    module = _load_jira_poller()
+    _fake_jira(module, monkeypatch, [_issue(index) for index in range(3)])
+    monkeypatch.setattr(module, "DB_PATH", tmp_path / "inbox.db")
+    monkeypatch.setattr(module, "STATE_FILE", tmp_path / "jira-ingestor-state.json")
+    monkeypatch.setattr(module, "single_instance", lambda name: contextlib.nullcontext())
+    monkeypatch.setattr(module.tasks_db, "DB_PATH", tmp_path / "tasks.db")
+    monkeypatch.setattr(module.tasks_db, "_schema_ensured", False)
+    previous = "2026-03-08T19:50:00+00:00"
+    module.STATE_FILE.write_text(json.dumps({"last_checked": previous}))
+    upsert = module.tasks_db.upsert_jira_tasks
+
+    def locked(tasks):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(module.tasks_db, "upsert_jira_tasks", locked)
+    module.main()
+    assert json.loads(module.STATE_FILE.read_text())["last_checked"] == previous
+    # With the dashboard down the cards wait in the ingest spool as one batch.
+    (spooled,) = ingest_channel.IngestClient().pending()
+    batch = json.loads(spooled.read_text())
+    assert batch["type"] == "cards" and batch["payload"]["source"] == "jira"
+    summaries = [card["summary"] for card in batch["payload"]["cards"]]
+    assert summaries == [f"ITWORK2-{index} — Issue {index}" for index in range(3)]
+
+    # The next run fetches the same window and the tasks land.
+    monkeypatch.setattr(module.tasks_db, "upsert_jira_tasks", upsert)
+    module.main()
+    assert json.loads(module.STATE_FILE.read_text())["last_checked"] > previous
+    conn = sqlite3.connect(tmp_path / "tasks.db")
+    assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3
+    conn.close()
+
+
+def test_tasks_schema_fallback_runs_each_step_once(monkeypatch, tmp_path):
+    module = _load_jira_poller()
+    tasks_db = module.tasks_db
+    monkeypatch.setattr(tasks_db, "HAS_POLLER_RUNTIME", False)
+    conn = sqlite3.connect(tmp_path / "tasks.db")
+    try:
+        tasks_db.ensure_schema(conn)
+        tasks_db.ensure_schema(conn)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(tasks_db.TASKS_MIGRATIONS)
+        assert "jira_hash" in [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+    finally:
+        conn.close()
@@ -0,0 +1,172 @@
+import sqlite3
+
+import pytest
+
+import migrate as migrate_module
+
+
+def _version(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_migrate_upgrades_legacy_db_and_dedupes_once(tmp_path):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE cards (id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT, summary TEXT, status TEXT)")
+    conn.executemany(
+        "INSERT INTO cards (source, summary, status) VALUES (?, ?, 'pending')",
+        [("slack", "dup"), ("slack", "dup"), ("gmail", "solo")],
+    )
+    conn.commit()
+    conn.close()
+
+    applied = migrate_module.migrate(db_path)
+
+    assert applied == len(migrate_module.MIGRATIONS)
+    assert _version(db_path) == len(migrate_module.MIGRATIONS)
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT id, summary FROM cards ORDER BY id").fetchall()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(cards)").fetchall()}
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert rows == [(2, "dup"), (3, "solo")]
+    assert {"analysis_metadata", "enrichment_status", "refinement_history"} <= columns
+    assert {"classification_buckets", "enrichment_runs", "plans", "decisions", "learning_events"} <= tables
+
+    assert migrate_module.migrate(db_path) == 0
+
+
+def test_apply_migrations_runs_only_pending_steps(tmp_path):
+    conn = sqlite3.connect(tmp_path / "other.db")
+    steps = [
+        ["CREATE TABLE a (id INTEGER)"],
+        ["CREATE TABLE b (id INTEGER)"],
+    ]
+    assert migrate_module.apply_migrations(conn, steps[:1]) == 1
+    assert migrate_module.apply_migrations(conn, steps) == 1
+    assert migrate_module.apply_migrations(conn, steps) == 0
+    assert migrate_module.schema_version(conn) == 2
+    conn.close()
+
+
+def test_failed_step_is_not_recorded_as_applied(tmp_path):
+    conn = sqlite3.connect(tmp_path / "other.db")
+    conn.execute("CREATE TABLE a (id INTEGER)")
+    conn.executemany("INSERT INTO a (id) VALUES (?)", [(1,), (1,)])
+    conn.commit()
+    steps = [
+        ["CREATE TABLE IF NOT EXISTS a (id INTEGER)"],  # benign replay
+        ["CREATE TABLE b (id INTEGER)", "CREATE UNIQUE INDEX idx_a_id ON a(id)"],
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        migrate_module.apply_migrations(conn, steps)
+    assert migrate_module.schema_version(conn) == 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'b'").fetchone() is None
+
+    conn.execute("DELETE FROM a WHERE rowid = 2")
+    conn.commit()
+    assert migrate_module.apply_migrations(conn, steps) == 1
+    assert migrate_module.schema_version(conn) == 2
+    conn.close()
+
+
+def test_upserting_a_queued_card_does_not_trip_the_terms_queue(tmp_path):
+    conn = sqlite3.connect(tmp_path / "inbox.db")
+    migrate_module.apply_migrations(conn, migrate_module.MIGRATIONS[:7])
+    upsert = """INSERT INTO cards (id, source, summary) VALUES (1, 'jira', ?)
+                ON CONFLICT(id) DO UPDATE SET summary = excluded.summary"""
+    conn.execute(upsert, ["first"])
+    conn.execute(upsert, ["second"])  # card 1 is still queued
+    conn.commit()
+    assert conn.execute("SELECT card_id FROM card_terms_queue").fetchall() == [(1,)]
+    assert conn.execute("SELECT summary FROM cards").fetchall() == [("second",)]
+    conn.close()
+
+
+def test_ensure_migrated_runs_once_per_path(tmp_path, monkeypatch):
+    calls = []
+    real_migrate = migrate_module.migrate
+    monkeypatch.setattr(migrate_module, "migrate", lambda db_path=None: calls.append(db_path) or real_migrate(db_path))
+
+    first = tmp_path / "first.db"
+    second = tmp_path / "second.db"
+    for _ in range(3):
+        migrate_module.ensure_migrated(first)
+    migrate_module.ensure_migrated(second)
+
+    assert calls == [str(first), str(second)]
+
+
+def _plan(conn, sql, params=()):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+
+
+def test_card_and_learning_queries_use_indexes(tmp_path):
+    db_path = tmp_path / "inbox.db"
+    migrate_module.migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO cards (source, summary, timestamp, status) VALUES ('slack', 'a', '2026-03-02T10:00:00-05:00', 'pending')"
+    )
+    assert conn.execute("SELECT timestamp_utc FROM cards").fetchone()[0] == "2026-03-02 15:00:00"
+
+    inbox_plan = _plan(
+        conn,
+        "SELECT * FROM cards WHERE source = ? AND timestamp_utc >= ? ORDER BY timestamp_utc DESC, id DESC",
+        ("slack", "2026-03-01 00:00:00"),
+    )
+    assert "USING INDEX idx_cards_source_timestamp (source=? AND timestamp_utc>?)" in inbox_plan
+
+    list_plan = _plan(
+        conn,
+        "SELECT * FROM cards WHERE status = ? AND source = ? AND section = ? ORDER BY timestamp_utc DESC, id DESC",
+        ("pending", "slack", "needs-action"),
+    )
+    assert "USING INDEX idx_cards_status_source_section (status=? AND source=? AND section=?)" in list_plan
+
+    learnings_plan = _plan(
+        conn,
+        "SELECT * FROM learning_events WHERE created_at >= ? AND created_at < ? ORDER BY created_at DESC, id DESC",
+        ("2026-03-01 00:00:00", "2026-03-02 00:00:00"),
+    )
+    assert "USING INDEX idx_learning_events_created (created_at>? AND created_at<?)" in learnings_plan
+    conn.close()
+
+
+def test_gmail_keys_backfilled_and_indexed(tmp_path):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE cards (id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT, summary TEXT, status TEXT, proposed_actions TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO cards (source, summary, status, proposed_actions) VALUES (?, ?, 'pending', ?)",
+        [
+            ("gmail", "Ann <ann@example.com>: Budget", '[{"thread_id": "T-1", "message_id": "m-1", "to_email": "ann@example.com"}]'),
+            ("gmail", "Ann <ann@example.com>: Budget [dup]", '[{"thread_id": "t-1", "message_id": "m-2"}]'),
+            ("gmail", "Bob <bob@example.com>: Lunch", "not json"),
+            ("gmail", "", "[]"),
+            ("slack", "Ann: Budget", "[]"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    migrate_module.migrate(db_path)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT id, thread_id, message_id, sender_email, dup_key FROM cards ORDER BY id").fetchall()
+    assert rows == [
+        (1, "T-1", "m-1", "ann@example.com", "thread:t-1"),
+        (2, "t-1", "m-2", "ann@example.com", "thread:t-1"),
+        (3, None, None, "bob@example.com", "sender-subject:bob <bob@example.com>|lunch"),
+        (4, None, None, None, "card:4"),
+        (5, None, None, None, None),
+    ]
+    plan = _plan(conn, "SELECT id FROM cards WHERE source = 'gmail' AND dup_key = ?", ("thread:t-1",))
+    assert "USING COVERING INDEX idx_cards_source_dup_key (source=? AND dup_key=?)" in plan
+    conn.close()
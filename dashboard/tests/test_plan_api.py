@@ -238,7 +238,7 @@ async def test_approve_remaining(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_regenerate(tmp_path, monkeypatch):
+async def test_regenerate(tmp_path, monkeypatch, async_llm):
     plans_dir = tmp_path / "plans"
     db_path = tmp_path / "inbox.db"
     monkeypatch.setattr(server, "PLANS_DIR", str(plans_dir))
@@ -271,13 +271,13 @@ async def test_regenerate(tmp_path, monkeypatch):
     }
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps(claude_payload),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -295,7 +295,7 @@ async def test_regenerate(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_generate_plan_on_demand(tmp_path, monkeypatch):
+async def test_generate_plan_on_demand(tmp_path, monkeypatch, async_llm):
     plans_dir = tmp_path / "plans"
     db_path = tmp_path / "inbox.db"
     monkeypatch.setattr(server, "PLANS_DIR", str(plans_dir))
@@ -325,13 +325,13 @@ async def test_generate_plan_on_demand(tmp_path, monkeypatch):
     }
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps(claude_payload),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
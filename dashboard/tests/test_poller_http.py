@@ -0,0 +1,211 @@
+import json
+import socket
+import sys
+import threading
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+if str(BIN_DIR) not in sys.path:
+    sys.path.insert(0, str(BIN_DIR))
+
+import poller_http  # noqa: E402
+
+
+class KeepAliveStandIn:
+    """HTTP/1.1 server that scripts responses per path and records every connection.
+
+    ``/etag`` serves a body tagged ``"v1"`` and answers 304 to a matching
+    ``If-None-Match``; other paths answer from ``script(path, ...)`` and then
+    ``200 {"ok": true}``.
+    """
+
+    def __init__(self):
+        self.connections = []
+        self.requests = []
+        self.scripts = {}
+        self._lock = threading.Lock()
+
+    def script(self, path, *responses):
+        with self._lock:
+            self.scripts.setdefault(path, []).extend(responses)
+
+    def drop_connections(self):
+        """Close every open connection from the server side, as an idle timeout would."""
+        with self._lock:
+            for sock in self.connections:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin.connections.append(self.connection)
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.requests.append((self.path, dict(self.headers)))
+                    scripted = standin.scripts.get(self.path)
+                    status, headers, body = scripted.pop(0) if scripted else (200, {}, {"ok": True})
+                if self.path == "/etag":
+                    if self.headers.get("If-None-Match") == '"v1"':
+                        status, body = 304, None
+                    headers = {"ETag": '"v1"'}
+                    body = body if status == 304 else {"version": 1}
+                data = b"" if body is None else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.drop_connections()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _host_stats(client, standin):
+    return client.stats()[standin.url.split("//", 1)[1]]
+
+
+def test_keep_alive_connections_are_pooled_per_host():
+    with KeepAliveStandIn() as standin:
+        client = poller_http.PollerHTTPClient()
+        for _ in range(10):
+            assert client.get_json(f"{standin.url}/ok") == {"ok": True}
+        assert len(standin.connections) == 1
+
+        # Concurrent callers each hold at most one connection at a time.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: client.get_json(f"{standin.url}/ok"), range(40)))
+        assert results == [{"ok": True}] * 40
+        assert len(standin.connections) <= 5
+
+        # An idle connection the server closed is replaced transparently.
+        standin.drop_connections()
+        opened = len(standin.connections)
+        assert client.get_json(f"{standin.url}/ok") == {"ok": True}
+        assert len(standin.connections) == opened + 1
+
+        stats = _host_stats(client, standin)
+        assert stats["requests"] == 51
+        assert stats["connections_opened"] == len(standin.connections)
+        assert stats["connections_reused"] == 51 - len(standin.connections) + stats["stale_connections"]
+        assert stats["stale_connections"] == 1
+        assert stats["status_2xx"] == 51 and "errors" not in stats
+        assert 0 < stats["latency_ms"]["p50"] <= stats["latency_ms"]["p95"] <= stats["latency_ms"]["max"]
+        client.close()
+
+
+def test_conditional_get_is_answered_from_cache_per_credential():
+    with KeepAliveStandIn() as standin:
+        client = poller_http.PollerHTTPClient()
+        first = client.request("GET", f"{standin.url}/etag", headers={"Authorization": "Bearer a"})
+        second = client.request("GET", f"{standin.url}/etag", headers={"Authorization": "Bearer a"})
+        other = client.request("GET", f"{standin.url}/etag", headers={"Authorization": "Bearer b"})
+
+        assert first.json() == second.json() == other.json() == {"version": 1}
+        assert (first.from_cache, second.from_cache, other.from_cache) == (False, True, False)
+        sent = [headers.get("If-None-Match") for _path, headers in standin.requests]
+        assert sent == [None, '"v1"', None]
+        assert _host_stats(client, standin)["not_modified"] == 1
+
+
+def test_backoff_follows_retry_after_then_grows_exponentially():
+    with KeepAliveStandIn() as standin:
+        clock = FakeClock()
+        client = poller_http.PollerHTTPClient(backoff_base=1.0, sleep=clock.sleep, clock=clock)
+        standin.script(
+            "/flaky",
+            (429, {"Retry-After": "3"}, {"error": "slow down"}),
+            (503, {}, {}),
+            (503, {}, {}),
+        )
+        backoffs = []
+        assert client.get_json(f"{standin.url}/flaky", on_backoff=backoffs.append) == {"ok": True}
+
+        assert clock.sleeps == pytest.approx(backoffs)
+        retry_after, first, second = clock.sleeps
+        assert 3.0 <= retry_after <= 3.3  # the server's wait plus a little jitter
+        assert 1.0 <= first <= 2.0  # step 2s, half of it jittered
+        assert 2.0 <= second <= 4.0  # step 4s
+        assert _host_stats(client, standin)["retries"] == 3
+
+        # Exhausted retries surface as the usual HTTPError, body intact.
+        standin.script("/down", *[(503, {}, {"error": "down"})] * 3)
+        with pytest.raises(urllib.error.HTTPError) as raised:
+            client.get_json(f"{standin.url}/down", retries=2)
+        assert raised.value.code == 503
+        assert json.loads(raised.value.read()) == {"error": "down"}
+
+        # A wait longer than the cap fails at once instead of parking the poller.
+        sleeps = len(clock.sleeps)
+        standin.script("/later", (429, {"Retry-After": "3600"}, {}))
+        with pytest.raises(urllib.error.HTTPError):
+            client.get_json(f"{standin.url}/later")
+        assert len(clock.sleeps) == sleeps
+
+
+def test_reauth_once_and_exhausted_quota_holds_the_host():
+    with KeepAliveStandIn() as standin:
+        clock = FakeClock()
+        client = poller_http.PollerHTTPClient(sleep=clock.sleep, clock=clock)
+        standin.script("/me", (401, {}, {"error": "expired"}))
+        refreshes = []
+        response = client.request(
+            "GET",
+            f"{standin.url}/me",
+            headers={"Authorization": "Bearer stale"},
+            reauth=lambda: refreshes.append(1) or {"Authorization": "Bearer fresh"},
+        )
+        assert response.json() == {"ok": True} and refreshes == [1]
+        assert [headers["Authorization"] for _path, headers in standin.requests] == ["Bearer stale", "Bearer fresh"]
+        assert clock.sleeps == []
+
+        # The last request of the window: the next one waits for the reset.
+        standin.script("/quota", (200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "5"}, {"ok": True}))
+        client.get_json(f"{standin.url}/quota")
+        client.get_json(f"{standin.url}/ok")
+        assert clock.sleeps == [5.0]
@@ -0,0 +1,150 @@
+import asyncio
+import importlib.util
+import json
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+
+
+def _load_supervisor():
+    if str(BIN_DIR) not in sys.path:
+        sys.path.insert(0, str(BIN_DIR))
+    spec = importlib.util.spec_from_file_location("poller_supervisor", BIN_DIR / "poller_supervisor.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fake_pollers(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "steady.py").write_text(textwrap.dedent("""
+        import threading
+        RUNS = 0
+        release = threading.Event()
+        release.set()
+
+        def main():
+            global RUNS
+            RUNS += 1
+            release.wait(5)
+            print(f"steady run {RUNS}")
+    """))
+    (bin_dir / "crashy.py").write_text(textwrap.dedent("""
+        import sys
+        RUNS = 0
+
+        def main():
+            global RUNS
+            RUNS += 1
+            if RUNS == 1:
+                raise ValueError("boom")
+            sys.exit(2)
+    """))
+    (bin_dir / "fanout.py").write_text(textwrap.dedent("""
+        from poller_runtime import ContextThreadPoolExecutor
+
+        def main():
+            with ContextThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(lambda n: print(f"worker {n}"), range(2)))
+    """))
+    return bin_dir, (
+        {"id": "steady", "script": "steady.py", "interval_seconds": 3600, "log_file": "steady.log"},
+        {"id": "crashy", "script": "crashy.py", "interval_seconds": 3600, "log_file": "crashy.log"},
+        {"id": "fanout", "script": "fanout.py", "interval_seconds": 3600, "log_file": "fanout.log"},
+    )
+
+
+async def _control(port, method, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: 0\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.decode().partition("\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+async def _until(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_runs_triggers_and_isolates_crashes(tmp_path, monkeypatch):
+    module = _load_supervisor()
+    bin_dir, pollers = _fake_pollers(tmp_path)
+    routed = module._ThreadRoutedStream(sys.stdout)
+    monkeypatch.setattr(sys, "stdout", routed)
+    supervisor = module.PollerSupervisor(pollers, bin_dir=bin_dir, log_dir=tmp_path / "logs", jitter=0.0)
+    await supervisor.start(port=0)
+    try:
+        # With no jitter the first runs start immediately.
+        await _until(lambda: all(status["runs"] == 1 for status in supervisor.status.values()))
+        assert supervisor.status["crashy"]["failures"] == 1
+        assert supervisor.status["crashy"]["last_error"] == "ValueError: boom"
+        assert supervisor.status["steady"]["failures"] == 0
+
+        # Immediate runs over the control endpoint; the module stays loaded.
+        steady = supervisor._modules["steady"]
+        steady.release.clear()
+        code, body = await _control(supervisor.port, "POST", "/pollers/steady/run")
+        assert (code, body) == (202, {"status": "triggered", "poller": "steady"})
+        await _until(lambda: supervisor.status["steady"]["running"])
+        code, body = await _control(supervisor.port, "POST", "/pollers/steady/run")
+        assert body["status"] == "already_running"
+        steady.release.set()
+        await _until(lambda: supervisor.status["steady"]["runs"] == 2)
+        # Both runs counted on the same module object: it was not re-imported.
+        assert steady.RUNS == 2 and supervisor._modules["steady"] is steady
+
+        await _control(supervisor.port, "POST", "/pollers/crashy/run")
+        await _until(lambda: supervisor.status["crashy"]["runs"] == 2)
+        assert supervisor.status["crashy"]["last_error"] == "RuntimeError: exited with status 2"
+
+        code, body = await _control(supervisor.port, "GET", "/pollers")
+        assert code == 200 and body["pollers"]["steady"]["runs"] == 2
+        assert (await _control(supervisor.port, "POST", "/pollers/nope/run"))[0] == 404
+    finally:
+        assert await supervisor.shutdown(grace_seconds=5)
+
+    logs = tmp_path / "logs"
+    assert (logs / "steady.log").read_text() == "steady run 1\nsteady run 2\n"
+    assert "ValueError: boom" in (logs / "crashy.log").read_text()
+    # Output from a poller's worker threads lands in its own log too.
+    assert sorted((logs / "fanout.log").read_text().splitlines()) == ["worker 0", "worker 1"]
+
+
+def test_jitter_never_shortens_a_wait():
+    module = _load_supervisor()
+    calendar = [poller for poller in module.POLLERS if poller["id"] == "calendar"]
+    supervisor = module.PollerSupervisor(calendar, jitter=0.1)
+    delays = [supervisor._delay("calendar") for _ in range(200)]
+    # calendar-poller skips a second run in the same half-hour slot.
+    assert min(delays) >= 1800 and max(delays) <= 1800 * 1.1
+    assert max(supervisor._delay("calendar", first=True) for _ in range(200)) <= 180
+
+
+@pytest.mark.asyncio
+async def test_shutdown_waits_for_in_flight_runs(tmp_path):
+    module = _load_supervisor()
+    bin_dir, pollers = _fake_pollers(tmp_path)
+    supervisor = module.PollerSupervisor(pollers[:1], bin_dir=bin_dir, log_dir=tmp_path / "logs", jitter=0.0)
+    supervisor._load("steady").release.clear()
+    await supervisor.start(port=None)
+    await _until(lambda: supervisor.status["steady"]["running"])
+
+    shutdown = asyncio.ensure_future(supervisor.shutdown(grace_seconds=5))
+    await asyncio.sleep(0.1)
+    assert not shutdown.done()
+    supervisor._modules["steady"].release.set()
+    assert await shutdown
+    assert supervisor.status["steady"]["runs"] == 1
+    assert supervisor.status["steady"]["running"] is False
@@ -11,6 +11,7 @@ import migrate as migrate_module
 import server
 from server import app
 
+
 @pytest.mark.asyncio
 async def test_health():
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -70,6 +71,238 @@ def test_run_claude_print_keeps_non_fallbackable_claude_error(monkeypatch):
     assert result.stderr == "invalid prompt format"
 
 
+@pytest.mark.asyncio
+async def test_run_claude_print_async_falls_back_to_codex_on_rate_limit(monkeypatch):
+    monkeypatch.setattr(server, "CODEX_FALLBACK_ENABLED", True)
+    calls = []
+
+    async def fake_exec(args, *, timeout, env, label, input_text=None):
+        calls.append(args[0])
+        if args[0] == "claude":
+            return subprocess.CompletedProcess(args=args, returncode=1, stdout="", stderr="429 rate limit exceeded")
+        output_index = args.index("-o") + 1
+        Path(args[output_index]).write_text("codex fallback reply", encoding="utf-8")
+        assert input_text == "hello"
+        return subprocess.CompletedProcess(args=args, returncode=0, stdout="", stderr="")
+
+    monkeypatch.setattr(server, "_exec_cli_async", fake_exec)
+
+    result = await server._run_claude_print_async("hello", timeout=5)
+
+    assert calls == ["claude", "codex"]
+    assert result.returncode == 0
+    assert result.stdout == "codex fallback reply"
+    assert "Claude fallback triggered" in result.stderr
+
+
+@pytest.mark.asyncio
+async def test_exec_cli_async_times_out_and_kills_process():
+    result = await server._exec_cli_async(
+        [sys.executable, "-c", "import time; time.sleep(30)"],
+        timeout=0.2,
+        env=dict(server.os.environ),
+        label="Claude",
+    )
+
+    assert result.returncode == 124
+    assert "Claude timed out" in result.stderr
+    assert server._should_use_codex_fallback(result.stdout, result.stderr, result.returncode) or not server.CODEX_FALLBACK_ENABLED
+
+
+@pytest.mark.asyncio
+async def test_llm_jobs_respect_concurrency_limit(monkeypatch):
+    engine = server.LLMJobEngine(max_concurrency=2)
+    monkeypatch.setattr(server, "_llm_jobs", engine)
+    monkeypatch.setattr(server, "_emit_plan_event", lambda event_type, data: None)
+    peak = {"now": 0, "max": 0}
+
+    async def fake_runner(prompt, timeout=60):
+        peak["now"] += 1
+        peak["max"] = max(peak["max"], peak["now"])
+        await server.asyncio.sleep(0.05)
+        peak["now"] -= 1
+        return subprocess.CompletedProcess(args=["claude"], returncode=0, stdout=prompt, stderr="")
+
+    monkeypatch.setattr(server, "_run_claude_print_async", fake_runner)
+
+    async def work(index):
+        result = await server._llm_print(f"prompt-{index}")
+        return result.stdout
+
+    jobs = [engine.submit("test", lambda index=index: work(index)) for index in range(5)]
+    results = await server.asyncio.gather(*(job.task for job in jobs))
+
+    assert results == [f"prompt-{index}" for index in range(5)]
+    assert peak["max"] == 2
+    assert all(job.status == "completed" and job.llm_calls == 1 for job in jobs)
+
+
+@pytest.mark.asyncio
+async def test_background_llm_job_returns_job_id_and_can_be_cancelled(monkeypatch, tmp_path):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+               id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT, summary TEXT, classification TEXT,
+               status TEXT, proposed_actions TEXT, execution_status TEXT DEFAULT 'not_run',
+               execution_result TEXT, executed_at TEXT, section TEXT DEFAULT 'needs-action',
+               draft_response TEXT, context_notes TEXT, responded INTEGER DEFAULT 0,
+               refinement_history TEXT, analysis_metadata TEXT
+           )"""
+    )
+    conn.execute(
+        "INSERT INTO cards (id, source, timestamp, summary, status, proposed_actions) VALUES (1, 'gmail', ?, 'Budget', 'pending', '[]')",
+        [datetime.now(timezone.utc).isoformat()],
+    )
+    conn.commit()
+    conn.close()
+
+    engine = server.LLMJobEngine(max_concurrency=1)
+    events = []
+    started = server.asyncio.Event()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+    monkeypatch.setattr(server, "_llm_jobs", engine)
+    monkeypatch.setattr(server, "_emit_plan_event", lambda event_type, data: events.append((event_type, data)))
+
+    async def slow_runner(prompt, timeout=60):
+        started.set()
+        await server.asyncio.sleep(30)
+
+    monkeypatch.setattr(server, "_run_claude_print_async", slow_runner)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.post("/api/cards/1/gmail-analyze?background=true", json={})
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        assert r.json()["kind"] == "analyze_gmail_card"
+        assert r.json()["subject_id"] == 1
+
+        await server.asyncio.wait_for(started.wait(), timeout=5)
+        status = await client.get(f"/api/llm-jobs/{job_id}")
+        assert status.json()["phase"] == "llm_running"
+
+        cancelled = await client.post(f"/api/llm-jobs/{job_id}/cancel")
+        assert cancelled.status_code == 200
+        await server.asyncio.sleep(0)
+        await server.asyncio.sleep(0)
+
+        final = await client.get(f"/api/llm-jobs/{job_id}")
+        assert final.json()["status"] == "cancelled"
+        again = await client.post(f"/api/llm-jobs/{job_id}/cancel")
+        assert again.status_code == 409
+
+    assert all(event_type == "llm_job" for event_type, _ in events)
+    assert events[-1][1]["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_cached_llm_endpoint_creates_no_job(monkeypatch, async_llm):
+    engine = server.LLMJobEngine(max_concurrency=1)
+    events = []
+    prompts = []
+    monkeypatch.setattr(server, "_llm_jobs", engine)
+    monkeypatch.setattr(server, "_emit_plan_event", lambda event_type, data: events.append((event_type, data)))
+    monkeypatch.setattr(server, "_run_claude_print_async", async_llm(
+        lambda prompt, timeout=60: prompts.append(prompt) or subprocess.CompletedProcess(
+            args=["claude"], returncode=0, stdout="[]", stderr=""
+        )
+    ))
+    monkeypatch.setitem(server._jira_cache, "data", {"issues": [], "total": 0})
+    monkeypatch.setitem(server._jira_cache, "fetched_at", server.time.time())
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        cached = await client.get("/api/jira/sprint")
+        assert cached.json() == {"issues": [], "total": 0}
+        assert events == [] and engine.list() == []
+
+        fetched = await client.get("/api/jira/sprint?refresh=true")
+        assert fetched.json()["total"] == 0
+
+    assert len(prompts) == 1
+    assert [job.kind for job in engine.list()] == ["jira_sprint"]
+    assert {event_type for event_type, _ in events} == {"llm_job"}
+    assert events[-1][1]["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_event_bus_fans_out_to_every_subscriber_and_drops_oldest():
+    bus = server.EventBus(maxsize=2)
+    first = bus.subscribe()
+    second = bus.subscribe()
+
+    for index in range(3):
+        bus.publish("cache-invalidate", {"source": f"s{index}"})
+
+    for subscription in (first, second):
+        received = [json.loads(subscription.queue.get_nowait()["data"])["source"] for _ in range(2)]
+        assert received == ["s1", "s2"]
+        assert subscription.dropped == 1
+
+    bus.unsubscribe(first)
+    bus.publish("plan_complete", {"card_id": 1})
+    assert first.queue.empty()
+    assert second.queue.qsize() == 1
+    assert bus.stats()["subscribers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_event_bus_accepts_publishes_from_worker_threads():
+    bus = server.EventBus()
+    subscription = bus.subscribe()
+
+    worker = server.threading.Thread(target=bus.publish, args=("cache-invalidate", {"source": "suggestions"}))
+    worker.start()
+    worker.join()
+
+    event = await server.asyncio.wait_for(subscription.queue.get(), timeout=2)
+    assert event["event"] == "cache-invalidate"
+    assert json.loads(event["data"]) == {"source": "suggestions"}
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidate_pushes_new_cards_and_invalidation_to_sse(monkeypatch, tmp_path):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+               id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT, summary TEXT, classification TEXT,
+               status TEXT, proposed_actions TEXT, execution_status TEXT DEFAULT 'not_run',
+               execution_result TEXT, executed_at TEXT, section TEXT DEFAULT 'needs-action',
+               draft_response TEXT, context_notes TEXT, responded INTEGER DEFAULT 0
+           )"""
+    )
+    conn.execute("INSERT INTO cards (id, source, summary, status, proposed_actions) VALUES (1, 'slack', 'old', 'pending', '[]')")
+    conn.commit()
+
+    bus = server.EventBus()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+    monkeypatch.setattr(server, "_event_bus", bus)
+    monkeypatch.setattr(server, "_last_announced_card_id", None)
+    server._announce_new_cards()
+
+    stream = server.card_event_generator()
+    pending = server.asyncio.ensure_future(stream.__anext__())
+    await server.asyncio.sleep(0)
+    assert bus.stats()["subscribers"] == 1
+
+    conn.execute("INSERT INTO cards (id, source, summary, status, proposed_actions) VALUES (2, 'slack', 'new', 'pending', '[]')")
+    conn.commit()
+    conn.close()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.post("/api/cache-invalidate", json={"source": "slack"})
+    assert r.status_code == 200
+
+    first = await server.asyncio.wait_for(pending, timeout=2)
+    second = await server.asyncio.wait_for(stream.__anext__(), timeout=2)
+    await stream.aclose()
+
+    assert first.startswith("data: ")
+    assert json.loads(first[len("data: "):])["summary"] == "new"
+    assert second == 'event: cache-invalidate\ndata: {"source": "slack"}\n\n'
+    assert bus.stats()["subscribers"] == 0
+
+
 @pytest.mark.asyncio
 async def test_restart_uses_launchd_managed_start_script(monkeypatch):
     captured = {}
@@ -94,6 +327,36 @@ async def test_restart_uses_launchd_managed_start_script(monkeypatch):
     assert captured["start_new_session"] is True
 
 
+@pytest.mark.asyncio
+async def test_force_sync_asks_the_poller_supervisor(monkeypatch):
+    requests = []
+    replies = iter([{"status": "triggered"}, {"status": "already_running"}])
+
+    def fake_request(method, path):
+        requests.append((method, path))
+        return next(replies)
+
+    monkeypatch.setattr(server, "_supervisor_request", fake_request)
+    monkeypatch.setattr(server.subprocess, "Popen", lambda *args, **kwargs: pytest.fail("no subprocess per sync"))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/api/pollers/gmail/sync")
+        second = await client.post("/api/pollers/gmail/sync")
+        unknown = await client.post("/api/pollers/nope/sync")
+
+        def unreachable(method, path):
+            raise server.urllib.error.URLError("connection refused")
+
+        monkeypatch.setattr(server, "_supervisor_request", unreachable)
+        down = await client.post("/api/pollers/jira/sync")
+
+    assert first.json() == {"status": "syncing", "poller": "gmail"}
+    assert second.json() == {"status": "already_syncing", "poller": "gmail"}
+    assert requests == [("POST", "/pollers/gmail/run")] * 2
+    assert unknown.status_code == 404
+    assert down.status_code == 503
+
+
 @pytest.mark.asyncio
 async def test_restart_status_defaults_to_idle(tmp_path, monkeypatch):
     monkeypatch.setattr(server, "RESTART_STATUS_FILE", tmp_path / "dashboard-restart-status.json")
@@ -309,6 +572,54 @@ async def test_get_poller_status_returns_poller_timing(tmp_path, monkeypatch):
     assert slack["next_run_at"] is not None
     assert slack["health"] in {"running", "stale", "unknown"}
 
+@pytest.mark.asyncio
+async def test_poller_runs_report_percentiles_and_flag_a_regressed_phase(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    migrate_module.migrate(db_path)
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+
+    def run(source, history_ms, write_ms, status="ok"):
+        return (
+            source, "2026-03-10T09:00:00+00:00", "2026-03-10T09:00:01+00:00", history_ms + write_ms, status,
+            None if status == "ok" else "HTTPError",
+            json.dumps({"history": history_ms, "db_write": write_ms}), json.dumps({"conversations.history": 12}),
+        )
+
+    rows = [run("slack", 800 + index, 200) for index in range(20)]
+    rows.append(run("slack", 10, 0, status="error"))
+    rows += [run("slack", 800, 5000 + index) for index in range(4)]
+    rows += [run("gmail", 500, 100) for _ in range(3)]
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        """INSERT INTO poller_runs (source, started_at, finished_at, duration_ms, status, error_class, phases_ms, api_calls)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        slack = (await client.get("/api/pollers/slack/runs", params={"limit": 3})).json()
+        gmail = (await client.get("/api/pollers/gmail/runs")).json()
+
+    assert [item["phases_ms"]["db_write"] for item in slack["runs"]] == [5003, 5002, 5001]
+    assert slack["runs"][0]["api_calls"] == {"conversations.history": 12}
+    # The latest five runs: four slow writes and one failure, which only counts as an error.
+    assert slack["recent"]["runs"] == 5 and slack["recent"]["errors"] == 1
+    assert slack["recent"]["phases"]["db_write"]["p50_ms"] == 5002
+    assert slack["baseline"]["duration"]["count"] == 20
+    assert slack["baseline"]["duration"]["p50_ms"] == 1010
+    assert slack["baseline"]["duration"]["p95_ms"] == 1018
+    regression = slack["regression"]
+    assert regression["regressed"] is True
+    assert regression["regressed_phases"] == ["db_write"]
+    assert regression["phases"]["history"]["regressed"] is False
+
+    # Three runs are no baseline: nothing is flagged.
+    assert gmail["regression"] == {"regressed": False, "duration": None, "regressed_phases": [], "phases": {}}
+    assert gmail["recent"]["duration"]["p50_ms"] == 600
+
+
 @pytest.mark.asyncio
 async def test_get_cards_returns_list():
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -361,7 +672,7 @@ async def test_get_cards_calendar_defaults_to_all_statuses(tmp_path, monkeypatch
 
 
 @pytest.mark.asyncio
-async def test_get_briefing_uses_calendar_cards_for_meetings(tmp_path, monkeypatch):
+async def test_get_briefing_uses_calendar_cards_for_meetings(tmp_path, monkeypatch, async_llm):
     today = datetime.now().date()
     tomorrow = today + timedelta(days=1)
     db_path = tmp_path / "inbox.db"
@@ -441,8 +752,8 @@ async def test_get_briefing_uses_calendar_cards_for_meetings(tmp_path, monkeypat
     monkeypatch.setitem(sys.modules, "brain", types.SimpleNamespace(build_context_prompt=lambda: "CTX"))
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps(
@@ -457,7 +768,7 @@ async def test_get_briefing_uses_calendar_cards_for_meetings(tmp_path, monkeypat
                 }
             ),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -484,6 +795,86 @@ async def test_card_has_required_fields():
         for field in ["id", "source", "summary", "classification", "status", "proposed_actions"]:
             assert field in card, f"missing field: {field}"
 
+def _seed_paged_cards(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT,
+            summary TEXT, classification TEXT, status TEXT,
+            proposed_actions TEXT, section TEXT, draft_response TEXT,
+            context_notes TEXT, responded INTEGER, execution_result TEXT,
+            analysis_metadata TEXT
+        )"""
+    )
+    rows = [
+        (1, "slack", "2026-03-10T09:00:00+00:00", "pending"),
+        (2, "slack", "2026-03-10T10:00:00+00:00", "pending"),
+        (3, "gmail", "2026-03-10T10:00:00+00:00", "pending"),
+        (4, "gmail", "2026-03-10T11:00:00+00:00", "held"),
+        (5, "slack", None, "pending"),
+    ]
+    for card_id, source, timestamp, status in rows:
+        conn.execute(
+            """INSERT INTO cards
+               (id, source, timestamp, summary, classification, status, proposed_actions,
+                section, responded, execution_result, analysis_metadata)
+               VALUES (?, ?, ?, ?, 'normal', ?, '[]', 'needs-action', 0, 'big blob', '{"category": "gap"}')""",
+            [card_id, source, timestamp, f"card {card_id}", status],
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+
+
+@pytest.mark.asyncio
+async def test_get_cards_keyset_pages_cover_every_card_once(tmp_path, monkeypatch):
+    _seed_paged_cards(tmp_path, monkeypatch)
+
+    seen = []
+    after = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(5):
+            params = {"status": "all", "limit": 2}
+            if after:
+                params["after"] = after
+            r = await client.get("/api/cards", params=params)
+            assert r.status_code == 200
+            payload = r.json()
+            seen.extend(card["id"] for card in payload["cards"])
+            after = payload["next_cursor"]
+            if not after:
+                break
+
+        everything = (await client.get("/api/cards", params={"status": "all"})).json()
+
+    assert seen == [4, 3, 2, 1, 5]
+    assert [card["id"] for card in everything["cards"]] == seen
+    assert everything["next_cursor"] is None
+    assert everything["counts"] == {"pending": 4, "held": 1, "approved": 0, "completed": 0, "failed": 0}
+    assert everything["source_counts"] == {"slack": 3, "gmail": 2}
+
+
+@pytest.mark.asyncio
+async def test_get_cards_projects_fields_and_skips_heavy_columns(tmp_path, monkeypatch):
+    _seed_paged_cards(tmp_path, monkeypatch)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        default = (await client.get("/api/cards", params={"source": "slack"})).json()
+        narrow = (await client.get("/api/cards", params={"source": "slack", "fields": "summary"})).json()
+        full = (await client.get("/api/cards", params={"source": "slack", "fields": "default,analysis_metadata"})).json()
+        bad = await client.get("/api/cards", params={"after": "not-a-cursor"})
+
+    card = default["cards"][0]
+    assert "summary" in card and "proposed_actions" in card
+    assert not {"execution_result", "refinement_history", "analysis_metadata"} & set(card)
+    assert default["source_counts"] == {"slack": 3, "gmail": 1}
+    assert set(narrow["cards"][0]) == {"id", "timestamp_utc", "summary"}
+    assert full["cards"][0]["analysis_metadata"]["category"] == "gap"
+    assert "execution_result" not in full["cards"][0]
+    assert bad.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_hold_card(tmp_path, monkeypatch):
     db_path = tmp_path / "inbox.db"
@@ -581,6 +972,57 @@ async def test_inbox_view_collapses_gmail_duplicates_and_prefers_draft(tmp_path,
     assert payload["needs_action"][0]["analysis_metadata"]["duplicate_count"] == 2
 
 
+@pytest.mark.asyncio
+async def test_inbox_view_collapses_gmail_threads_across_pages(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT,
+            summary TEXT, classification TEXT, status TEXT,
+            proposed_actions TEXT, section TEXT, draft_response TEXT,
+            context_notes TEXT, responded INTEGER
+        )"""
+    )
+    now = datetime.now(timezone.utc)
+    for card_id, minutes, thread in [(31, 5, "thread-a"), (32, 10, "thread-b"), (33, 15, "thread-a")]:
+        conn.execute(
+            """INSERT INTO cards
+               (id, source, timestamp, summary, classification, status, proposed_actions, section, responded)
+               VALUES (?, 'gmail', ?, ?, 'needs-response', 'pending', ?, 'needs-action', 0)""",
+            [
+                card_id,
+                (now - timedelta(minutes=minutes)).isoformat(),
+                f"Sender <s@example.com>: card {card_id}",
+                json.dumps([{"thread_id": thread, "message_id": f"msg-{card_id}"}]),
+            ],
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+
+    pages = []
+    after = None
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        while True:
+            params = {"source": "gmail", "days": 3, "limit": 1}
+            if after:
+                params["after"] = after
+            payload = (await client.get("/api/inbox-view", params=params)).json()
+            pages.append([card["id"] for card in payload["needs_action"]])
+            after = payload["next_cursor"]
+            if not after:
+                break
+
+    assert pages == [[31], [32]]
+
+    conn = server.get_db()
+    try:
+        assert server._find_related_gmail_card_ids(conn, {"id": 33}) == [31, 33]
+    finally:
+        conn.close()
+
+
 @pytest.mark.asyncio
 async def test_inbox_view_keeps_slack_no_action_through_monday_eod(tmp_path, monkeypatch):
     db_path = tmp_path / "inbox.db"
@@ -823,7 +1265,7 @@ async def test_task_daily_log_endpoint_appends_entry(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_card_refine_persists_chat_history(tmp_path, monkeypatch):
+async def test_card_refine_persists_chat_history(tmp_path, monkeypatch, async_llm):
     db_path = tmp_path / "inbox.db"
     conn = sqlite3.connect(db_path)
     conn.execute(
@@ -868,10 +1310,10 @@ async def test_card_refine_persists_chat_history(tmp_path, monkeypatch):
     monkeypatch.setattr(server, "_trigger_chat_learning", lambda session_id: None)
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"], returncode=0, stdout="assistant reply", stderr=""
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -1011,7 +1453,7 @@ async def test_open_session_creates_chat_session(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_gmail_analyze_persists_detected_labels_and_draft(tmp_path, monkeypatch):
+async def test_gmail_analyze_persists_detected_labels_and_draft(tmp_path, monkeypatch, async_llm):
     db_path = tmp_path / "inbox.db"
     conn = sqlite3.connect(db_path)
     conn.execute(
@@ -1047,8 +1489,8 @@ async def test_gmail_analyze_persists_detected_labels_and_draft(tmp_path, monkey
     monkeypatch.setattr(server, "DB_PATH", db_path)
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps(
@@ -1060,7 +1502,7 @@ async def test_gmail_analyze_persists_detected_labels_and_draft(tmp_path, monkey
                 }
             ),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -1084,7 +1526,7 @@ async def test_gmail_analyze_persists_detected_labels_and_draft(tmp_path, monkey
 
 
 @pytest.mark.asyncio
-async def test_gmail_auto_label_requires_decision_and_records_labels(tmp_path, monkeypatch):
+async def test_gmail_auto_label_requires_decision_and_records_labels(tmp_path, monkeypatch, async_llm):
     db_path = tmp_path / "inbox.db"
     conn = sqlite3.connect(db_path)
     conn.execute(
@@ -1119,13 +1561,13 @@ async def test_gmail_auto_label_requires_decision_and_records_labels(tmp_path, m
     monkeypatch.setattr(server, "DB_PATH", db_path)
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=60: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=60: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps({"status": "labeled", "labels": ["Finance", "Urgent"], "message_id": "msg-12"}),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -1153,7 +1595,7 @@ async def test_gmail_auto_label_requires_decision_and_records_labels(tmp_path, m
 
 
 @pytest.mark.asyncio
-async def test_archive_email_requires_decision_and_moves_card_to_no_action(tmp_path, monkeypatch):
+async def test_archive_email_requires_decision_and_moves_card_to_no_action(tmp_path, monkeypatch, async_llm):
     db_path = tmp_path / "inbox.db"
     conn = sqlite3.connect(db_path)
     conn.execute(
@@ -1184,13 +1626,13 @@ async def test_archive_email_requires_decision_and_moves_card_to_no_action(tmp_p
     monkeypatch.setattr(server, "DB_PATH", db_path)
     monkeypatch.setattr(
         server,
-        "_run_claude_print",
-        lambda prompt, timeout=45: subprocess.CompletedProcess(
+        "_run_claude_print_async",
+        async_llm(lambda prompt, timeout=45: subprocess.CompletedProcess(
             args=["claude"],
             returncode=0,
             stdout=json.dumps({"status": "archived", "message_id": "msg-13"}),
             stderr="",
-        ),
+        )),
     )
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
@@ -1768,3 +2210,331 @@ def test_build_jira_sprint_prompt_targets_systems_board(monkeypatch):
     assert 'assignee = "kioja.kudumu@klaviyo.com"' in prompt
     assert "project = ITWORK2" in prompt
     assert "sprint = <selected_sprint_id>" in prompt
+
+
+@pytest.mark.asyncio
+async def test_resolve_related_uses_term_index(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT,
+            summary TEXT, classification TEXT, status TEXT,
+            proposed_actions TEXT, section TEXT, draft_response TEXT,
+            context_notes TEXT, responded INTEGER
+        )"""
+    )
+    cards = [
+        (1, "gmail", "Dana Scully <dana@example.com>: Quarterly budget review", 1, "no-action"),
+        (2, "slack", "Dana Scully via #finance: quarterly budget review numbers?", 0, "needs-action"),
+        (3, "slack", "Fox Mulder via #finance: quarterly budget review numbers?", 0, "needs-action"),
+        (4, "slack", "Dana Scully via #random: lunch plans", 0, "needs-action"),
+        (5, "jira", "Dana Scully via #ops: unrelated", 0, "needs-action"),
+    ]
+    for card_id, source, summary, responded, section in cards:
+        conn.execute(
+            """INSERT INTO cards (id, source, timestamp, summary, classification, status, proposed_actions, section, context_notes, responded)
+               VALUES (?, ?, '2026-03-10T09:00:00+00:00', ?, 'normal', 'pending', '[]', ?, '', ?)""",
+            [card_id, source, summary, section, responded],
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+
+    pooled = server.get_db()
+    try:
+        assert server._sync_card_terms(pooled) == 5
+        assert server._sync_card_terms(pooled) == 0
+        # Editing a card re-queues it through the trigger.
+        pooled.execute("UPDATE cards SET summary = 'Dana Scully via #ops: quarterly budget review numbers?' WHERE id = 5")
+        pooled.commit()
+        assert pooled.execute("SELECT card_id FROM card_terms_queue").fetchall()[0][0] == 5
+    finally:
+        pooled.close()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.post("/api/cards/1/resolve-related")
+
+    assert r.status_code == 200
+    assert sorted(card["id"] for card in r.json()["cards"]) == [2, 5]
+    check = sqlite3.connect(db_path)
+    assert check.execute("SELECT responded, section FROM cards WHERE id = 2").fetchone() == (1, "no-action")
+    assert check.execute("SELECT responded FROM cards WHERE id IN (3, 4) ORDER BY id").fetchall() == [(0,), (0,)]
+    check.close()
+
+
+
+
+def test_related_candidates_skip_common_terms_without_losing_matches(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "inbox.db")
+    conn = server.get_db()
+    try:
+        rows = [
+            (f"Someone {index} via #ops: budget question {index}", "slack") for index in range(40)
+        ] + [
+            ("Dana Scully via #finance: quarterly budget numbers", "slack"),  # shares budget, quarterly, scully
+            ("Dana Scully via #finance: forecast budget", "slack"),  # shares budget, scully
+        ]
+        for summary, source in rows:
+            conn.execute(
+                """INSERT INTO cards (source, timestamp, summary, classification, status, proposed_actions, section, context_notes, responded)
+                   VALUES (?, '2026-03-10T09:00:00+00:00', ?, 'normal', 'pending', '[]', 'needs-action', '', 0)""",
+                [source, summary],
+            )
+        server._sync_card_terms(conn)
+        conn.commit()
+        topics = {"budget", "quarterly", "review", "scully"}
+        statements = []
+        conn.set_trace_callback(statements.append)
+        candidates, topics_by_id = server._related_card_candidates(conn, topics, "gmail")
+        conn.set_trace_callback(None)
+    finally:
+        conn.close()
+
+    # "budget" is on every card, so it is left out of the lookup. Every card
+    # that could reach the topic threshold still shares a rarer word.
+    assert [row["summary"] for row in candidates] == [
+        "Dana Scully via #finance: quarterly budget numbers",
+        "Dana Scully via #finance: forecast budget",
+    ]
+    lookup = next(sql for sql in statements if "SELECT c.*" in sql)
+    assert "'budget'" not in lookup
+    scored = [server._topic_similarity(topics, words) for words in topics_by_id.values()]
+    assert max(scored) >= server.RELATED_TOPIC_THRESHOLD
+
+
+@pytest.mark.asyncio
+async def test_ingest_messages_index_card_terms_on_the_writer(tmp_path, monkeypatch):
+    import ingest_channel
+    import tempfile
+
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "inbox.db")
+    monkeypatch.setattr(server, "_mark_source_stale", lambda source: None)
+    with tempfile.TemporaryDirectory(prefix="eb-ingest-", dir="/tmp") as directory:
+        socket_path = Path(directory) / "ingest.sock"
+        channel = ingest_channel.IngestServer(
+            server.INGEST_HANDLERS, server.get_db, socket_path=socket_path, on_commit=server._ingest_committed
+        )
+        client = ingest_channel.IngestClient(socket_path=socket_path, spool_dir=tmp_path / "spool")
+        await channel.start()
+        try:
+            card = {"summary": "ITWORK2-7 — Rotate keys", "classification": "high"}
+            assert await server.asyncio.to_thread(client.send, "cards", {"source": "jira", "cards": [card]})
+            conn = sqlite3.connect(server.DB_PATH)
+            conn.execute(
+                """INSERT INTO cards (source, timestamp, summary, classification, status, proposed_actions, section, context_notes)
+                   VALUES ('slack', '2026-03-10T09:00:00+00:00', 'Dana via #ops: rotate keys', 'normal', 'pending', '[]', 'needs-action', '')"""
+            )
+            conn.commit()
+            assert await server.asyncio.to_thread(client.send, "invalidate", {"source": "slack"})
+        finally:
+            await channel.close()
+
+    conn = sqlite3.connect(server.DB_PATH)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM card_terms_queue").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(DISTINCT card_id) FROM card_terms WHERE term = 'rotate'").fetchone()[0] == 2
+    finally:
+        conn.close()
+@pytest.mark.asyncio
+async def test_resolve_related_batch_resolves_many_cards_in_one_call(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT,
+            summary TEXT, classification TEXT, status TEXT,
+            proposed_actions TEXT, section TEXT, draft_response TEXT,
+            context_notes TEXT, responded INTEGER
+        )"""
+    )
+    cards = [
+        (1, "gmail", "Dana Scully <dana@example.com>: Quarterly budget review", 1, "no-action"),
+        (2, "slack", "Dana Scully via #finance: quarterly budget review numbers?", 0, "needs-action"),
+        (3, "slack", "Fox Mulder via #ops: pager rotation swap", 1, "no-action"),
+        (4, "gmail", "Fox Mulder <fox@example.com>: Pager rotation swap", 0, "needs-action"),
+        (5, "slack", "Walter Skinner via #ops: lunch", 0, "needs-action"),
+        # Fuzzy names with no token in common still match.
+        (6, "gmail", "Jonathan <jon@example.com>: Vendor contract renewal", 1, "no-action"),
+        (7, "slack", "Jonathon via #legal: vendor contract renewal?", 0, "needs-action"),
+    ]
+    for card_id, source, summary, responded, section in cards:
+        conn.execute(
+            """INSERT INTO cards (id, source, timestamp, summary, classification, status, proposed_actions, section, context_notes, responded)
+               VALUES (?, ?, '2026-03-10T09:00:00+00:00', ?, 'normal', 'pending', '[]', ?, '', ?)""",
+            [card_id, source, summary, section, responded],
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        r = await client.post("/api/cards/resolve-related", json={"card_ids": [1, 3, 5, 99, 1, 6]})
+        bad = await client.post("/api/cards/resolve-related", json={"card_ids": "1"})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["resolved"] == 3
+    assert [card["id"] for card in body["results"]["1"]["cards"]] == [2]
+    assert [card["id"] for card in body["results"]["6"]["cards"]] == [7]
+    assert [card["id"] for card in body["results"]["3"]["cards"]] == [4]
+    assert body["results"]["5"] == {"resolved": 0, "cards": []}
+    assert body["results"]["99"]["reason"] == "card not found"
+    assert bad.status_code == 400
+    check = sqlite3.connect(db_path)
+    assert check.execute("SELECT id FROM cards WHERE responded = 1 ORDER BY id").fetchall() == [
+        (1,), (2,), (3,), (4,), (6,), (7,)
+    ]
+    check.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_channel_applies_poller_messages_through_the_server_handlers(tmp_path, monkeypatch):
+    import ingest_channel
+    import tempfile
+
+    db_path = tmp_path / "inbox.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE cards (
+            id INTEGER PRIMARY KEY, source TEXT, timestamp TEXT,
+            summary TEXT, classification TEXT, status TEXT,
+            proposed_actions TEXT, section TEXT, draft_response TEXT,
+            context_notes TEXT, responded INTEGER
+        )"""
+    )
+    for card_id, source, summary, responded in (
+        (1, "gmail", "Dana Scully <dana@example.com>: Quarterly budget review", 1),
+        (2, "slack", "Dana Scully via #finance: quarterly budget review numbers?", 0),
+    ):
+        conn.execute(
+            """INSERT INTO cards (id, source, timestamp, summary, classification, status, proposed_actions, section, context_notes, responded)
+               VALUES (?, ?, '2026-03-10T09:00:00+00:00', ?, 'normal', 'pending', '[]', 'needs-action', '', ?)""",
+            [card_id, source, summary, responded],
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(server, "DB_PATH", db_path)
+    monkeypatch.setattr(server, "_last_announced_card_id", 2)
+    stale = []
+    monkeypatch.setattr(server, "_mark_source_stale", stale.append)
+
+    with tempfile.TemporaryDirectory(prefix="eb-ingest-", dir="/tmp") as directory:
+        socket_path = Path(directory) / "ingest.sock"
+        channel = ingest_channel.IngestServer(
+            server.INGEST_HANDLERS, server.get_db, socket_path=socket_path, on_commit=server._ingest_committed
+        )
+        client = ingest_channel.IngestClient(socket_path=socket_path, spool_dir=tmp_path / "spool")
+        await channel.start()
+        try:
+            assert await server.asyncio.to_thread(client.send, "resolve_related", {"card_ids": [1]})
+            assert await server.asyncio.to_thread(client.send, "invalidate", {"source": "jira"})
+            # Malformed ids are rejected and dead-lettered rather than retried forever.
+            assert await server.asyncio.to_thread(client.send, "resolve_related", {"card_ids": "1"})
+
+            # Card batches are upserted on (source, summary) by the same writer.
+            card = {"summary": "ITWORK2-1 — Rotate keys", "classification": "high", "proposed_actions": []}
+            assert await server.asyncio.to_thread(client.send, "cards", {"source": "jira", "cards": [card]})
+            check = sqlite3.connect(db_path)
+            check.execute("UPDATE cards SET status = 'held' WHERE source = 'jira'")
+            check.commit()
+            check.close()
+            card["classification"] = "low"
+            assert await server.asyncio.to_thread(client.send, "cards", {"source": "jira", "cards": [card]})
+        finally:
+            await channel.close()
+
+    assert stale == ["slack", "jira", "jira", "jira"]
+    assert client.pending() == []
+    assert [dead["type"] for dead in client.dead_letters()] == ["resolve_related"]
+    check = sqlite3.connect(db_path)
+    assert check.execute("SELECT id FROM cards WHERE responded = 1 ORDER BY id").fetchall() == [(1,), (2,)]
+    assert check.execute("SELECT summary, classification, status FROM cards WHERE source = 'jira'").fetchall() == [
+        ("ITWORK2-1 — Rotate keys", "low", "held")
+    ]
+    assert check.execute("SELECT type FROM ingest_messages ORDER BY received_at").fetchall() == [
+        ("resolve_related",), ("invalidate",), ("cards",), ("cards",)
+    ]
+    check.close()
+
+
+def test_extract_person_name_resolves_slack_directory_aliases():
+    aliases = {"dana@example.com": "Dana Scully", "u123": "Dana Scully", "dscully": "Dana Scully"}
+
+    assert server._extract_person_name({"summary": "D. S. <Dana@example.com>: Budget"}, aliases) == "Dana Scully"
+    assert server._extract_person_name({"summary": "U123 via #finance: numbers?"}, aliases) == "Dana Scully"
+    assert server._extract_person_name(
+        {"summary": "", "proposed_actions": '[{"sender": "dana@example.com"}]'}, aliases
+    ) == "Dana Scully"
+    assert server._extract_person_name({"summary": "Fox Mulder via #x: hi"}, aliases) == "Fox Mulder"
+    assert server._extract_person_name({"summary": "D. S. <dana@example.com>: Budget"}) == "D. S."
+
+
+@pytest.mark.asyncio
+async def test_cards_etag_returns_304_until_a_card_write(tmp_path, monkeypatch):
+    _seed_paged_cards(tmp_path, monkeypatch)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/api/cards", params={"source": "slack"})
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+
+        monkeypatch.setattr(server, "get_db", lambda: pytest.fail("304 path must not open inbox.db"))
+        cached = await client.get("/api/cards", params={"source": "slack"}, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        monkeypatch.undo()
+        monkeypatch.setattr(server, "DB_PATH", tmp_path / "inbox.db")
+
+        slack_view = (await client.get("/api/inbox-view", params={"source": "slack"})).headers["etag"]
+        gmail_view = (await client.get("/api/inbox-view", params={"source": "gmail"})).headers["etag"]
+
+        conn = sqlite3.connect(tmp_path / "inbox.db")
+        conn.execute("UPDATE cards SET status = 'completed' WHERE id = 1")
+        conn.commit()
+        conn.close()
+
+        changed = await client.get("/api/cards", params={"source": "slack"}, headers={"If-None-Match": etag})
+        slack_after = await client.get("/api/inbox-view", params={"source": "slack"}, headers={"If-None-Match": slack_view})
+        gmail_after = await client.get("/api/inbox-view", params={"source": "gmail"}, headers={"If-None-Match": gmail_view})
+
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["counts"]["completed"] == 1
+    assert slack_after.status_code == 200
+    assert gmail_after.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_inbox_view_cache_hits_until_source_invalidated(tmp_path, monkeypatch):
+    _seed_paged_cards(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "_inbox_view_cache", server.InboxViewCache(maxsize=2))
+    recent = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    conn = sqlite3.connect(tmp_path / "inbox.db")
+    conn.execute("UPDATE cards SET timestamp = ?", [recent])
+    conn.commit()
+    conn.close()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = (await client.get("/api/inbox-view", params={"source": "slack"})).json()
+        again = (await client.get("/api/inbox-view", params={"source": "slack"})).json()
+        await client.get("/api/inbox-view", params={"source": "gmail"})
+        await client.get("/api/inbox-view", params={"source": "gmail", "days": 5})
+
+    assert again == first
+    stats = server._inbox_view_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evicted"], stats["size"]) == (1, 3, 1, 2)
+
+    server._mark_source_stale("gmail")
+    assert server._inbox_view_cache.stats()["invalidated"] == 2
+
+    # A card ageing out of retention expires the entry on its own.
+    key = ("slack", 3, None, None, None, "x")
+    now = datetime.now(timezone.utc)
+    server._inbox_view_cache.put(key, 1, now + timedelta(minutes=1), {"cached": True})
+    assert server._inbox_view_cache.get(key, 1, now) == {"cached": True}
+    assert server._inbox_view_cache.get(key, 2, now) is None
+    server._inbox_view_cache.put(key, 1, now + timedelta(minutes=1), {"cached": True})
+    assert server._inbox_view_cache.get(key, 1, now + timedelta(minutes=2)) is None
+    stats = server._inbox_view_cache.stats()
+    assert (stats["stale"], stats["expired"]) == (1, 1)
@@ -0,0 +1,128 @@
+import sqlite3
+
+import migrate as migrate_module
+import slack_directory
+
+
+def _member(user_id, real_name, email="", **extra):
+    return {"id": user_id, "name": real_name.split()[0].lower(), "profile": {"real_name": real_name, "email": email}, **extra}
+
+
+def test_directory_lists_once_and_persists_between_processes(tmp_path):
+    db_path = tmp_path / "inbox.db"
+    migrate_module.migrate(db_path)
+    pages = {
+        "": {"members": [_member("U1", "Dana Scully", "Dana@Example.com")], "response_metadata": {"next_cursor": "p2"}},
+        "p2": {"members": [_member("U2", "Build Bot", is_bot=True)], "response_metadata": {"next_cursor": ""}},
+    }
+    listed, fetched = [], []
+
+    def fetch_page(cursor):
+        listed.append(cursor)
+        return pages[cursor]
+
+    def fetch_user(user_id):
+        fetched.append(user_id)
+        return _member(user_id, "Fox Mulder")
+
+    directory = slack_directory.SlackUserDirectory(db_path, fetch_page=fetch_page, fetch_user=fetch_user)
+    assert directory.refresh() == 2
+    assert directory.refresh() == 0  # within the TTL
+    assert listed == ["", "p2"]
+
+    assert directory.name("U1") == "Dana Scully"
+    assert directory.profile("U2")["is_bot"] is True
+    assert directory.name("U3") == "Fox Mulder"
+    assert directory.name("U3") == "Fox Mulder"
+    assert fetched == ["U3"]
+
+    # A later run starts warm from inbox.db: no listing, no users.info.
+    again = slack_directory.SlackUserDirectory(db_path, fetch_page=fetch_page, fetch_user=fetch_user)
+    assert again.refresh() == 0
+    assert [again.name(user_id) for user_id in ("U1", "U2", "U3")] == ["Dana Scully", "Build Bot", "Fox Mulder"]
+    assert listed == ["", "p2"] and fetched == ["U3"]
+
+    conn = sqlite3.connect(db_path)
+    aliases = slack_directory.alias_map(conn)
+    conn.close()
+    assert aliases["dana@example.com"] == "Dana Scully"
+    assert aliases["u3"] == "Fox Mulder"
+
+    # Rows past the TTL are refreshed one at a time.
+    stale = slack_directory.SlackUserDirectory(db_path, fetch_user=fetch_user, ttl_seconds=0)
+    stale.name("U1")
+    assert fetched == ["U3", "U1"]
+
+
+def test_directory_without_inbox_db_keeps_users_in_memory(tmp_path):
+    db_path = tmp_path / "missing.db"
+    directory = slack_directory.SlackUserDirectory(db_path, fetch_user=lambda user_id: _member(user_id, "Dana Scully"))
+    assert directory.name("U1") == "Dana Scully"
+    assert not db_path.exists()
+
+    failing = slack_directory.SlackUserDirectory(db_path, fetch_user=lambda user_id: 1 / 0)
+    assert failing.name("U9") == "U9"
+    assert failing.profile("U9") == {}
+
+
+def test_transient_lookup_failures_are_retried_and_missing_users_remembered(tmp_path, monkeypatch):
+    db_path = tmp_path / "inbox.db"
+    migrate_module.migrate(db_path)
+    clock = {"now": 1_000_000.0}
+    monkeypatch.setattr(slack_directory.time, "time", lambda: clock["now"])
+    answers = {"U1": [TimeoutError("timed out"), _member("U1", "Dana Scully")], "U9": [{}]}
+    fetched = []
+
+    def fetch_user(user_id):
+        fetched.append(user_id)
+        answer = answers[user_id].pop(0) if len(answers[user_id]) > 1 else answers[user_id][0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    directory = slack_directory.SlackUserDirectory(db_path, fetch_user=fetch_user)
+    # Within one run a failed lookup is not repeated for every message.
+    assert directory.name("U1") == "U1"
+    assert directory.name("U1") == "U1"
+    assert directory.name("U9") == "U9"
+    assert directory.name("U9") == "U9"
+    assert fetched == ["U1", "U9"]
+
+    # The next run, a poll interval later, asks again for the timed-out user
+    # only; Slack's "no such user" holds for the TTL.
+    clock["now"] += 300
+    assert directory.name("U1") == "Dana Scully"
+    assert directory.name("U9") == "U9"
+    assert fetched == ["U1", "U9", "U1"]
+
+    clock["now"] += slack_directory.SLACK_USER_TTL_SECONDS
+    directory.name("U9")
+    assert fetched[-1] == "U9"
+
+
+def test_alias_map_drops_shared_aliases_and_rebuilds_on_change(tmp_path):
+    db_path = tmp_path / "inbox.db"
+    migrate_module.migrate(db_path)
+    directory = slack_directory.SlackUserDirectory(db_path)
+    dana = _member("U1", "Dana Scully", "dana@example.com")
+    dana["profile"]["display_name"] = "Fox"
+    directory._store([dana, _member("U2", "Fox")])
+
+    statements = []
+    conn = sqlite3.connect(db_path)
+    conn.set_trace_callback(statements.append)
+    aliases = slack_directory.alias_map(conn)
+    # Dana's display name is Fox's real name: it names neither of them.
+    assert "fox" not in aliases
+    assert aliases["dana"] == "Dana Scully"
+    assert aliases["u2"] == "Fox"
+    assert aliases["dana@example.com"] == "Dana Scully"
+
+    statements.clear()
+    assert slack_directory.alias_map(conn) is aliases
+    assert not any("user_id, name" in statement for statement in statements)
+
+    directory._store([_member("U3", "Walter Skinner")])
+    refreshed = slack_directory.alias_map(conn)
+    conn.close()
+    assert refreshed["walter"] == "Walter Skinner"
@@ -0,0 +1,404 @@
+import contextlib
+import importlib.util
+import json
+import sqlite3
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+BIN_DIR = Path(__file__).resolve().parents[2] / "bin"
+
+
+def _load_slack_poller():
+    if str(BIN_DIR) not in sys.path:
+        sys.path.insert(0, str(BIN_DIR))
+    spec = importlib.util.spec_from_file_location("slack_poller", BIN_DIR / "slack-poller.py")
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fake_workspace(now):
+    """A handful of channels, DMs and threads exercising every candidate path."""
+    me = "UME"
+    conversations = [{"id": "D1", "is_im": True, "user": "U1", "updated": now}]
+    history = {
+        "D1": [
+            {"type": "message", "user": "U1", "text": "can you review this?", "ts": f"{now - 300:.6f}"},
+            {"type": "message", "user": me, "text": "on it", "ts": f"{now - 200:.6f}"},
+            {"type": "message", "user": "U1", "text": "thanks", "ts": f"{now - 100:.6f}"},
+        ],
+    }
+    replies = {}
+    for index in range(12):
+        channel_id = f"C{index}"
+        conversations.append({"id": channel_id, "name": f"team-{index}", "updated": now - index})
+        root_ts = f"{now - 1000 - index:.6f}"
+        history[channel_id] = [
+            {"type": "message", "user": "U2", "text": f"<@{me}> status on {index}?", "ts": f"{now - 900 - index:.6f}"},
+            {"type": "message", "user": "U3", "text": f"thread {index}", "ts": root_ts, "thread_ts": root_ts, "reply_count": 2},
+        ]
+        replies[(channel_id, root_ts)] = [
+            {"type": "message", "user": "U3", "text": f"thread {index}", "ts": root_ts, "thread_ts": root_ts},
+            {"type": "message", "user": me if index % 2 else "U4", "text": "reply", "ts": f"{now - 500 - index:.6f}", "thread_ts": root_ts},
+            {"type": "message", "user": "U4", "text": f"follow up {index}?", "ts": f"{now - 400 - index:.6f}", "thread_ts": root_ts},
+        ]
+    return me, conversations, history, replies
+
+
+def _after(messages, params):
+    oldest = float(params.get("oldest") or 0)
+    return [message for message in messages if float(message["ts"]) >= oldest]
+
+
+def _install_fake_api(module, monkeypatch, workspace=None):
+    me, conversations, history, replies = workspace or _fake_workspace(time.time())
+    calls = []
+
+    def fake_api(method, token, params=None):
+        params = params or {}
+        calls.append(method)
+        if method == "auth.test":
+            return {"ok": True, "user_id": me}
+        if method == "users.conversations":
+            # ``updated`` stays put when messages arrive, as it does on Slack.
+            return {"ok": True, "channels": conversations}
+        if method == "users.list":
+            members = [{"id": user, "name": user.lower(), "profile": {"real_name": f"User {user}"}} for user in ("UME", "U1", "U2", "U3")]
+            return {"ok": True, "members": members}
+        if method == "users.info":
+            user = params["user"]
+            return {"ok": True, "user": {"id": user, "name": user.lower(), "profile": {"real_name": f"User {user}"}}}
+        if method == "conversations.history":
+            messages = _after(history.get(params["channel"], []), params)
+            for message in messages:
+                thread = replies.get((params["channel"], message["ts"]))
+                if thread:
+                    message["latest_reply"] = thread[-1]["ts"]
+            return {"ok": True, "messages": messages}
+        if method == "conversations.replies":
+            thread = replies.get((params["channel"], params["ts"]), [])
+            # The parent always comes back, whatever ``oldest`` is.
+            return {"ok": True, "messages": thread[:1] + _after(thread[1:], params)}
+        raise AssertionError(method)
+
+    monkeypatch.setattr(module, "_load_slack_token_config", lambda: ("xoxb-test", "T1"))
+    monkeypatch.setattr(module, "_slack_api", fake_api)
+    return calls
+
+
+def test_concurrent_scan_matches_serial_scan(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    calls = _install_fake_api(module, monkeypatch)
+    monkeypatch.setattr(module, "DB_PATH", tmp_path / "inbox.db")
+    module.ensure_inbox_schema(module.DB_PATH)
+
+    serial = module.fetch_recent_participation_items(workers=1)
+    serial_calls = sorted(calls)
+    # The directory is listed once; U4 is missing from the listing.
+    assert Counter(calls)["users.list"] == 1
+    assert Counter(calls)["users.info"] == 1
+    calls.clear()
+    concurrent = module.fetch_recent_participation_items(workers=6)
+    assert "users.list" not in calls and "users.info" not in calls
+    module._user_directories.clear()
+    calls.clear()
+    module.fetch_recent_participation_items(workers=6)
+    # A fresh process reads the persisted directory instead of Slack.
+    assert Counter(calls) == Counter(call for call in serial_calls if call not in {"users.list", "users.info"})
+
+    assert concurrent == serial
+    assert {item["channel_id"] for item in serial} >= {"D1", "C0", "C11"}
+    responded = {item["text"]: item["responded"] for item in serial if item["channel_id"] == "D1"}
+    assert responded == {"can you review this?": True, "thanks": False}
+
+
+def test_resident_process_relists_the_directory_after_the_ttl(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    calls = _install_fake_api(module, monkeypatch)
+    monkeypatch.setattr(module, "DB_PATH", tmp_path / "inbox.db")
+    module.ensure_inbox_schema(module.DB_PATH)
+    module._user_directories.clear()
+    module.fetch_recent_participation_items(workers=1)
+    assert Counter(calls)["users.list"] == 1
+
+    # A day later in the same process: the cached directory re-lists once
+    # instead of falling back to users.info for every stale user.
+    directory_module = module.load_slack_directory()
+    later = time.time() + directory_module.SLACK_USER_TTL_SECONDS + 60
+    monkeypatch.setattr(directory_module, "time", SimpleNamespace(time=lambda: later))
+    calls.clear()
+    module.fetch_recent_participation_items(workers=1)
+    assert Counter(calls)["users.list"] == 1
+    assert Counter(calls)["users.info"] == 1  # only U4, whom the listing never covers
+    module._user_directories.clear()
+
+
+def test_incremental_sync_fetches_only_deltas_and_flags_replies_in_db(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    now = time.time()
+    workspace = _fake_workspace(now)
+    me, _conversations, history, replies = workspace
+    calls = _install_fake_api(module, monkeypatch, workspace)
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    monkeypatch.setattr(module, "request_related_resolution", lambda card_ids: None)
+
+    state = {}
+    first, _ = module.sync_recent_participation_items(state, now=now)
+    assert state["slack_sync"]["mode"] == "full"
+    assert first == module.fetch_recent_participation_items(workers=1)
+    module.write_items_to_inbox_db(first)
+
+    calls.clear()
+    quiet, self_replies = module.sync_recent_participation_items(state, now=now + 60)
+    assert state["slack_sync"]["mode"] == "incremental"
+    assert quiet == [] and self_replies == []
+    # Nothing moved: one empty history call per conversation, no thread re-read.
+    assert Counter(calls) == Counter({"auth.test": 1, "users.conversations": 1, "conversations.history": 13})
+
+    root_ts = f"{now - 1000 - 1:.6f}"
+    history["D1"].append({"type": "message", "user": me, "text": "done, thanks", "ts": f"{now - 50:.6f}"})
+    replies[("C1", root_ts)].append({"type": "message", "user": "U4", "text": "one more?", "ts": f"{now - 40:.6f}", "thread_ts": root_ts})
+    replies[("C1", root_ts)].append({"type": "message", "user": me, "text": "sure", "ts": f"{now - 30:.6f}", "thread_ts": root_ts})
+    calls.clear()
+    delta, self_replies = module.sync_recent_participation_items(state, now=now + 120)
+    assert [(item["channel_id"], item["text"], item["responded"]) for item in delta] == [("C1", "one more?", True)]
+    # Only C1's thread has a newer reply, so it is the only thread re-read.
+    assert (Counter(calls)["conversations.history"], Counter(calls)["conversations.replies"]) == (13, 1)
+    assert sorted(channel for channel, _thread, _ts in self_replies) == ["C1", "D1"]
+
+    flipped = module.apply_self_replies_to_db(self_replies)
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT summary, classification, context_notes FROM cards WHERE id IN (%s) ORDER BY id" % ",".join("?" * len(flipped)),
+        flipped,
+    ).fetchall()
+    conn.close()
+    assert {summary.split(": ", 1)[1] for summary, _c, _n in rows} == {"thanks", "follow up 1?"}
+    assert {classification for _s, classification, _n in rows} == {"responded"}
+
+    # My reply, also sent to the channel, in a thread the marks do not track
+    # yet is picked up by this delta rather than the next full scan.
+    root_ts = f"{now - 1000:.6f}"
+    broadcast = {
+        "type": "message", "subtype": "thread_broadcast", "user": me, "text": "looking now",
+        "ts": f"{now - 20:.6f}", "thread_ts": root_ts,
+    }
+    history["C0"].append(broadcast)
+    replies[("C0", root_ts)].append(broadcast)
+    assert module._thread_key("C0", root_ts) not in state["slack_sync"]["threads"]
+    delta, self_replies = module.sync_recent_participation_items(state, now=now + 180)
+    assert [(channel, thread) for channel, thread, _ts in self_replies] == [("C0", root_ts)]
+    assert "follow up 0?" in {item["text"] for item in delta}
+    assert all(item["responded"] for item in delta)
+    assert module._thread_key("C0", root_ts) in state["slack_sync"]["threads"]
+
+
+
+
+def test_failed_db_write_keeps_the_previous_sync_marks(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    now = time.time()
+    workspace = _fake_workspace(now)
+    me, _conversations, history, _replies = workspace
+    _install_fake_api(module, monkeypatch, workspace)
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    monkeypatch.setattr(module, "STATE_FILE", tmp_path / "slack-poller-state.json")
+    monkeypatch.setattr(module, "WATCHED_THREADS_FILE", tmp_path / "watched-threads.json")
+    monkeypatch.setattr(module, "single_instance", lambda name: contextlib.nullcontext())
+    monkeypatch.setattr(module, "notify", lambda title, message: None)
+    monkeypatch.setattr(module, "notify_dashboard", lambda kind, payload: True)
+    monkeypatch.setattr(module, "invalidate_dashboard_cache", lambda source="slack": None)
+    real_connect = sqlite3.connect
+    # Fail fast on the lock instead of waiting out sqlite's busy timeout.
+    monkeypatch.setattr(module.sqlite3, "connect", lambda *args, **kwargs: real_connect(*args, **{**kwargs, "timeout": 0}))
+
+    module.main()
+    marks = json.loads(module.STATE_FILE.read_text())["slack_sync"]
+    history["D1"].append({"type": "message", "user": "U1", "text": "one more thing?", "ts": f"{now - 10:.6f}"})
+    history["D1"].append({"type": "message", "user": me, "text": "looking", "ts": f"{now - 5:.6f}"})
+
+    lock = real_connect(db_path, isolation_level=None)
+    lock.execute("BEGIN EXCLUSIVE")
+    module.main()
+    lock.execute("ROLLBACK")
+    assert json.loads(module.STATE_FILE.read_text())["slack_sync"] == marks
+
+    module.main()
+    conn = real_connect(db_path)
+    texts = {row[0].split(": ", 1)[1] for row in conn.execute("SELECT summary FROM cards WHERE source = 'slack'")}
+    conn.close()
+    lock.close()
+    assert "one more thing?" in texts
+    assert json.loads(module.STATE_FILE.read_text())["slack_sync"]["channels"] != marks["channels"]
+
+
+def test_self_replies_flip_cards_in_one_indexed_statement(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    monkeypatch.setattr(module, "request_related_resolution", lambda card_ids: None)
+    now = time.time()
+    _me, _conversations, _history, _replies = _fake_workspace(now)
+    item = {
+        "sender": "User U1", "channel": "User U1", "channel_id": "D1", "text": "ping?", "thread_ts": f"{now - 300:.6f}",
+        "timestamp": module.datetime.fromtimestamp(now - 300, module.timezone.utc).isoformat(),
+        "section": "needs-action", "classification": "needs-response", "draft_response": "",
+        "context_notes": "Recent direct message", "responded": False,
+    }
+    thread_item = {**item, "channel_id": "C1", "channel": "team-1", "text": "and this?", "thread_ts": "1.000000",
+                   "context_notes": "Message in a thread you participated in"}
+    module.write_items_to_inbox_db([item, thread_item])
+
+    statements = []
+    connect = sqlite3.connect
+
+    def traced(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(module.sqlite3, "connect", traced)
+    flipped = module.apply_self_replies_to_db([("D1", None, now - 200), ("C1", "1.000000", now - 100), ("C9", None, now)])
+    monkeypatch.setattr(module.sqlite3, "connect", connect)
+    assert len(flipped) == 2
+    updates = sorted({sql for sql in statements if sql.lstrip().startswith("UPDATE")})
+    assert len(updates) == 1  # one statement for all three replies
+
+    conn = sqlite3.connect(db_path)
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + updates[0]))
+    notes = dict(conn.execute("SELECT json_extract(proposed_actions, '$[0].channel_id'), context_notes FROM cards"))
+    conn.close()
+    assert "idx_cards_source_timestamp" in plan
+    assert notes == {"D1": "Recent direct message you already responded to", "C1": "Message in a thread you participated in"}
+def test_bulk_writer_upserts_in_one_transaction_and_resolves_in_one_call(monkeypatch, tmp_path):
+    module = _load_slack_poller()
+    db_path = tmp_path / "inbox.db"
+    module.ensure_inbox_schema(db_path)
+    monkeypatch.setattr(module, "DB_PATH", db_path)
+    notified = []
+    monkeypatch.setattr(module, "notify_dashboard", lambda kind, payload: notified.append((kind, payload)))
+    statements = []
+    real_connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(module.sqlite3, "connect", traced_connect)
+
+    def item(text, responded=False):
+        return {
+            "sender": "Dana", "channel": "finance", "channel_id": "C1", "thread_ts": "1.0", "text": text,
+            "timestamp": "2026-03-10T09:00:00+00:00", "section": "no-action" if responded else "needs-action",
+            "classification": "responded" if responded else "needs-response", "responded": responded,
+        }
+
+    items = [item("budget?"), item("numbers?", responded=True), item("lunch?")]
+    changed, responded = module.write_items_to_inbox_db(items)
+    assert len(changed) == 3 and responded == [changed[1]]
+    assert sum(1 for sql in statements if sql.startswith("COMMIT")) == 1
+
+    module.request_related_resolution(responded + responded)
+    assert notified == [("resolve_related", {"card_ids": [responded[0]]})]
+
+    # Unchanged candidates come back without a RETURNING row.
+    assert module.write_items_to_inbox_db(items) == ([], [])
+    # A responded card is never downgraded by a stale unresponded copy.
+    assert module.write_items_to_inbox_db([item("numbers?")]) == ([], [])
+    # Re-queues a card the dashboard has not indexed yet without tripping
+    # the card_terms_queue trigger.
+    assert module.write_items_to_inbox_db([dict(item("budget?"), draft_response="On it")]) == ([changed[0]], [])
+
+
+def test_rate_limiter_shares_retry_after_between_workers(monkeypatch):
+    module = _load_slack_poller()
+    clock = {"now": 100.0}
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(round(seconds, 3))
+        clock["now"] += seconds
+
+    monkeypatch.setattr(module.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(module.time, "sleep", fake_sleep)
+
+    limiter = module.SlackRateLimiter(
+        tier_rates={3: 60}, method_tiers={"conversations.history": 3, "conversations.replies": 3}
+    )
+    limiter.bucket("conversations.history").tokens = 2
+    limiter.bucket("conversations.replies").tokens = 1
+    limiter.acquire("conversations.history")
+    limiter.acquire("conversations.history")
+    limiter.acquire("conversations.replies")  # same tier, its own budget
+    assert sleeps == []
+
+    limiter.acquire("conversations.history")  # bucket empty: wait one token at 1/s
+    assert sleeps == [1.0]
+
+    limiter.pause(5)  # another worker saw a 429
+    limiter.acquire("conversations.history")
+    assert sleeps[1] == 5.0
+
+
+def _quadratic_has_later_self_message(messages, me, message_ts, thread_ts=None):
+    """The per-message rescan the classification pass used to do."""
+    for candidate in messages:
+        if candidate.get("user") != me or float(candidate.get("ts", "0") or 0) <= message_ts:
+            continue
+        if thread_ts is not None and (candidate.get("thread_ts") or candidate.get("ts")) != thread_ts:
+            continue
+        return True
+    return False
+
+
+def _synthetic_history(count, me="UME", start=1_700_000_000.0):
+    messages = []
+    for index in range(count):
+        ts = f"{start + index:.6f}"
+        user = me if index % 7 == 3 else f"U{index % 11}"
+        thread_ts = f"{start + (index // 10) * 10:.6f}"
+        messages.append({"type": "message", "user": user, "text": f"message {index}?", "ts": ts, "thread_ts": thread_ts})
+    return messages
+
+
+def test_latest_self_messages_matches_quadratic_rescan():
+    module = _load_slack_poller()
+    messages = _synthetic_history(400)
+    latest, by_thread = module._latest_self_messages(messages, "UME")
+
+    for message in messages:
+        message_ts = float(message["ts"])
+        thread_ts = message["thread_ts"]
+        assert (latest > message_ts) == _quadratic_has_later_self_message(messages, "UME", message_ts)
+        assert (by_thread.get(thread_ts, 0.0) > message_ts) == _quadratic_has_later_self_message(
+            messages, "UME", message_ts, thread_ts=thread_ts
+        )
+
+
+def test_responded_lookup_over_5k_messages_is_one_sweep():
+    """Each message is read once, not once per other message as in the rescan."""
+    module = _load_slack_poller()
+    reads = Counter()
+
+    class CountingMessage(dict):
+        def get(self, key, default=None):
+            reads[key] += 1
+            return super().get(key, default)
+
+    messages = [CountingMessage(message) for message in _synthetic_history(5000)]
+    latest, by_thread = module._latest_self_messages(messages, "UME")
+
+    assert reads["user"] == len(messages)
+    assert reads["ts"] == sum(1 for message in messages if message["user"] == "UME")
+    assert latest == max(float(message["ts"]) for message in messages if message["user"] == "UME")
+    assert len(by_thread) == len({message["thread_ts"] for message in messages if message["user"] == "UME"})